@@ -0,0 +1,67 @@
+"""stage44: order_stock_reservations ledger for physical-goods stock reservation.
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-17
+
+说明：
+- 每单每商品一行预占流水，支付确认/超时释放只处理 RESERVED 行（幂等，见 app/services/stock_reservation.py）；
+- 升级时为仍在预占中的待支付物流订单补写 RESERVED 流水（与 products.reserved_stock 现值一致）。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a8b9c0d1e2f3"
+down_revision = "f7a8b9c0d1e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_stock_reservations",
+        sa.Column("order_id", sa.String(length=36), primary_key=True, nullable=False, comment="订单ID"),
+        sa.Column("product_id", sa.String(length=36), primary_key=True, nullable=False, comment="商品ID"),
+        sa.Column("quantity", sa.Integer(), nullable=False, comment="预占数量（同一商品多行明细已合并）"),
+        sa.Column(
+            "status",
+            sa.String(length=16),
+            nullable=False,
+            server_default="RESERVED",
+            comment="状态：RESERVED/CONFIRMED/RELEASED",
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="更新时间"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index(
+        "ix_order_stock_reservations_product_status",
+        "order_stock_reservations",
+        ["product_id", "status"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        INSERT INTO order_stock_reservations (order_id, product_id, quantity, status, created_at, updated_at)
+        SELECT oi.order_id, oi.item_id, SUM(oi.quantity), 'RESERVED', UTC_TIMESTAMP(), UTC_TIMESTAMP()
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        WHERE o.payment_status = 'PENDING'
+          AND o.fulfillment_type = 'PHYSICAL_GOODS'
+          AND o.reservation_expires_at IS NOT NULL
+          AND oi.item_type = 'PRODUCT'
+          AND oi.quantity > 0
+        GROUP BY oi.order_id, oi.item_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_stock_reservations_product_status", table_name="order_stock_reservations")
+    op.drop_table("order_stock_reservations")
@@ -0,0 +1,42 @@
+"""stage45: composite (filter, sort, id) indexes for keyset-paginated list endpoints.
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-17
+
+说明：
+- 列表改为 `ORDER BY <排序列> DESC, id DESC` + keyset 游标（见 app/utils/pagination.py）；
+- 索引列顺序 = 等值过滤列 + 排序列 + id，使翻页只做索引范围扫描，不再 filesort + 大 OFFSET。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b9c0d1e2f3a4"
+down_revision = "a8b9c0d1e2f3"
+branch_labels = None
+depends_on = None
+
+_INDEXES: list[tuple[str, str, list[str]]] = [
+    ("ix_orders_user_created_at_id", "orders", ["user_id", "created_at", "id"]),
+    ("ix_orders_created_at_id", "orders", ["created_at", "id"]),
+    ("ix_audit_logs_created_at_id", "audit_logs", ["created_at", "id"]),
+    ("ix_cms_contents_updated_at_id", "cms_contents", ["updated_at", "id"]),
+    ("ix_products_status_created_at_id", "products", ["status", "created_at", "id"]),
+    ("ix_entitlements_owner_created_at_id", "entitlements", ["owner_id", "created_at", "id"]),
+    ("ix_entitlements_created_at_id", "entitlements", ["created_at", "id"]),
+    ("ix_bookings_date_created_at_id", "bookings", ["booking_date", "created_at", "id"]),
+    ("ix_redemption_records_venue_time_id", "redemption_records", ["venue_id", "redemption_time", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,44 @@
+"""stage46: FULLTEXT (ngram parser) indexes for keyword search.
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-17
+
+说明：
+- 列集合须与 app/services/search.py 中 SearchSpec.columns 完全一致（InnoDB BOOLEAN MODE 要求）；
+- ngram 分词粒度由 MySQL 服务端 `ngram_token_size` 决定（默认 2），须与 SEARCH_NGRAM_TOKEN_SIZE 一致；
+- 停用词：InnoDB 默认停用词表（a/about/the/in/...）在建索引时绑定到索引；ngram 分词下包含停用词的 token
+  整个被丢弃，"AI"（含 a）这类关键词会恒无结果。建索引前在本会话关闭停用词（innodb_ft_enable_stopword=OFF），
+  服务端同时配置 --innodb-ft-enable-stopword=OFF（见 docker-compose.yml），手工重建索引时同样生效；
+  如需自定义停用词，改为配置 innodb_ft_server_stopword_table 后重建这些索引；
+- 首次建 FULLTEXT 索引会重建表（InnoDB 增加 FTS_DOC_ID），大表建议在低峰期执行。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c0d1e2f3a4b5"
+down_revision = "b9c0d1e2f3a4"
+branch_labels = None
+depends_on = None
+
+_INDEXES: list[tuple[str, str, list[str]]] = [
+    ("ft_cms_contents_title_summary", "cms_contents", ["title", "summary"]),
+    ("ft_products_title", "products", ["title"]),
+    ("ft_venues_name_address", "venues", ["name", "address"]),
+    ("ft_audit_logs_summary", "audit_logs", ["summary"]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "mysql":
+        op.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, unique=False, mysql_prefix="FULLTEXT", mysql_with_parser="ngram")
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""stage40: venues add (publish_status, created_at, id) index for SQL-side list filtering/keyset pagination.
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2026-10-17
+
+说明：
+- `GET /api/v1/venues` 改为在 SQL 侧完成地区/权益过滤与分页（cursor=keyset），需要该复合索引支撑排序与 range scan。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d5e6f7a8b9"
+down_revision = "b3c4d5e6f7a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_venues_publish_status_created_at_id",
+        "venues",
+        ["publish_status", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_venues_publish_status_created_at_id", table_name="venues")
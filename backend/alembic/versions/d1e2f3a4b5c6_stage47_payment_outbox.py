@@ -0,0 +1,89 @@
+"""stage47: payment_outbox_events + payment_outbox_dead_letters (async fulfillment after payment).
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-17
+
+说明：
+- 支付回调只写“已支付 + PAYMENT_SUCCEEDED 事件”，履约由消费者异步执行（见 app/services/payment_outbox.py）；
+- 存量已支付订单已在回调内完成履约，无需补写事件。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d1e2f3a4b5c6"
+down_revision = "c0d1e2f3a4b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payment_outbox_events",
+        sa.Column("id", sa.String(length=36), primary_key=True, nullable=False, comment="事件ID"),
+        sa.Column(
+            "event_type",
+            sa.String(length=32),
+            nullable=False,
+            server_default="PAYMENT_SUCCEEDED",
+            comment="事件类型：PAYMENT_SUCCEEDED/ENTITLEMENTS_GENERATION",
+        ),
+        sa.Column("order_id", sa.String(length=36), nullable=False, comment="订单ID"),
+        sa.Column("payment_id", sa.String(length=36), nullable=False, comment="支付记录ID"),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="PENDING", comment="状态：PENDING/DONE/DEAD"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0", comment="已执行次数"),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            comment="下次可执行时间",
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True, comment="最近一次失败原因"),
+        sa.Column("paid_at", sa.DateTime(), nullable=False, comment="支付成功时间（履约滞后起点）"),
+        sa.Column("processed_at", sa.DateTime(), nullable=True, comment="履约完成时间"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="更新时间"),
+        sa.UniqueConstraint("order_id", "event_type", name="uk_payment_outbox_events_order_event"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index(
+        "ix_payment_outbox_events_status_next_attempt",
+        "payment_outbox_events",
+        ["status", "next_attempt_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "payment_outbox_dead_letters",
+        sa.Column("id", sa.String(length=36), primary_key=True, nullable=False, comment="死信ID"),
+        sa.Column("event_id", sa.String(length=36), nullable=False, comment="outbox 事件ID"),
+        sa.Column("event_type", sa.String(length=32), nullable=False, comment="事件类型"),
+        sa.Column("order_id", sa.String(length=36), nullable=False, comment="订单ID"),
+        sa.Column("payment_id", sa.String(length=36), nullable=False, comment="支付记录ID"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0", comment="进入死信时的执行次数"),
+        sa.Column("error", sa.Text(), nullable=True, comment="最后一次失败原因"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="进入死信时间"),
+        sa.Column("replayed_at", sa.DateTime(), nullable=True, comment="回放时间（NULL=未回放）"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_payment_outbox_dead_letters_event_id", "payment_outbox_dead_letters", ["event_id"], unique=False)
+    op.create_index("ix_payment_outbox_dead_letters_order_id", "payment_outbox_dead_letters", ["order_id"], unique=False)
+    op.create_index(
+        "ix_payment_outbox_dead_letters_replayed_at", "payment_outbox_dead_letters", ["replayed_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payment_outbox_dead_letters_replayed_at", table_name="payment_outbox_dead_letters")
+    op.drop_index("ix_payment_outbox_dead_letters_order_id", table_name="payment_outbox_dead_letters")
+    op.drop_index("ix_payment_outbox_dead_letters_event_id", table_name="payment_outbox_dead_letters")
+    op.drop_table("payment_outbox_dead_letters")
+    op.drop_index("ix_payment_outbox_events_status_next_attempt", table_name="payment_outbox_events")
+    op.drop_table("payment_outbox_events")
@@ -0,0 +1,33 @@
+"""stage41: orders add (payment_status, fulfillment_type, reservation_expires_at) index for the stock release sweeper.
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-17
+
+说明：
+- 库存预占超时释放改为集合式批量 + `FOR UPDATE SKIP LOCKED` 认领，需要该索引支撑到期订单 range scan，
+  并让 SKIP LOCKED 只锁定命中的索引记录（避免全表扫描时锁住无关行）。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d5e6f7a8b9c0"
+down_revision = "c4d5e6f7a8b9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_reservation_release",
+        "orders",
+        ["payment_status", "fulfillment_type", "reservation_expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_reservation_release", table_name="orders")
@@ -0,0 +1,63 @@
+"""stage48: dealer_commission_ledger (per paid order) for set-based settlement generation.
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-17
+
+说明：
+- 支付成功同事务写 ACTIVE 流水，全额退款冲销为 REVERSED；出账只按 (cycle, status) 聚合本表
+  （见 app/services/dealer_settlement.py）；
+- 升级时按存量订单回填：已支付 -> ACTIVE，已退款 -> REVERSED（cycle 取 paid_at 的 YYYY-MM，与出账口径一致）。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e2f3a4b5c6d7"
+down_revision = "d1e2f3a4b5c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dealer_commission_ledger",
+        sa.Column("order_id", sa.String(length=36), primary_key=True, nullable=False, comment="订单ID（一单一行）"),
+        sa.Column("dealer_id", sa.String(length=36), nullable=False, comment="经销商ID"),
+        sa.Column("cycle", sa.String(length=32), nullable=False, comment="结算周期（按 paid_at：YYYY-MM）"),
+        sa.Column("gross_amount", sa.Float(), nullable=False, server_default="0", comment="计佣金额（订单总额）"),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="ACTIVE", comment="状态：ACTIVE/REVERSED"),
+        sa.Column("paid_at", sa.DateTime(), nullable=False, comment="支付时间"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="更新时间"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index(
+        "ix_dealer_commission_ledger_cycle_status_dealer",
+        "dealer_commission_ledger",
+        ["cycle", "status", "dealer_id"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        INSERT INTO dealer_commission_ledger (order_id, dealer_id, cycle, gross_amount, status, paid_at, created_at, updated_at)
+        SELECT o.id, o.dealer_id, DATE_FORMAT(o.paid_at, '%Y-%m'), o.total_amount,
+               CASE WHEN o.payment_status = 'REFUNDED' THEN 'REVERSED' ELSE 'ACTIVE' END,
+               o.paid_at, UTC_TIMESTAMP(), UTC_TIMESTAMP()
+        FROM orders o
+        WHERE o.order_type = 'SERVICE_PACKAGE'
+          AND o.payment_status IN ('PAID', 'REFUNDED')
+          AND o.paid_at IS NOT NULL
+          AND o.dealer_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dealer_commission_ledger_cycle_status_dealer", table_name="dealer_commission_ledger")
+    op.drop_table("dealer_commission_ledger")
@@ -0,0 +1,69 @@
+"""stage42: dashboard_daily_rollups table + indexes for today's dashboard range counts.
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-17
+
+说明：
+- /admin/dashboard/summary 的趋势改读日汇总表（定时任务滚动重算 + scripts/backfill_dashboard_rollups.py 回填）；
+- 当天实时统计与待办计数需要对应的 range/status 索引（原 `func.date(paid_at)` 分组无法走索引）。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e6f7a8b9c0d1"
+down_revision = "d5e6f7a8b9c0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dashboard_daily_rollups",
+        sa.Column("stat_date", sa.Date(), primary_key=True, nullable=False, comment="统计日期（UTC）"),
+        sa.Column("new_member_count", sa.Integer(), nullable=False, server_default="0", comment="新增会员数（实例 owner 去重）"),
+        sa.Column(
+            "service_package_paid_count",
+            sa.Integer(),
+            nullable=False,
+            server_default="0",
+            comment="服务包支付成功数（按 paid_at）",
+        ),
+        sa.Column("ecommerce_paid_count", sa.Integer(), nullable=False, server_default="0", comment="电商支付成功数（按 paid_at）"),
+        sa.Column("refund_request_count", sa.Integer(), nullable=False, server_default="0", comment="售后/退款申请数"),
+        sa.Column("redemption_success_count", sa.Integer(), nullable=False, server_default="0", comment="核销成功数"),
+        sa.Column(
+            "rolled_up_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            comment="汇总时间",
+        ),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+
+    op.create_index("ix_orders_type_status_paid_at", "orders", ["order_type", "payment_status", "paid_at"], unique=False)
+    op.create_index(
+        "ix_redemption_records_status_time", "redemption_records", ["status", "redemption_time"], unique=False
+    )
+    op.create_index("ix_after_sale_cases_created_at", "after_sale_cases", ["created_at"], unique=False)
+    op.create_index("ix_after_sale_cases_status", "after_sale_cases", ["status"], unique=False)
+    op.create_index(
+        "ix_service_package_instances_created_at", "service_package_instances", ["created_at"], unique=False
+    )
+    op.create_index("ix_user_enterprise_bindings_status", "user_enterprise_bindings", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_enterprise_bindings_status", table_name="user_enterprise_bindings")
+    op.drop_index("ix_service_package_instances_created_at", table_name="service_package_instances")
+    op.drop_index("ix_after_sale_cases_status", table_name="after_sale_cases")
+    op.drop_index("ix_after_sale_cases_created_at", table_name="after_sale_cases")
+    op.drop_index("ix_redemption_records_status_time", table_name="redemption_records")
+    op.drop_index("ix_orders_type_status_paid_at", table_name="orders")
+    op.drop_table("dashboard_daily_rollups")
@@ -0,0 +1,77 @@
+"""stage49: notification_broadcasts + per-receiver read receipts; inbox index on notifications.
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-17
+
+说明：
+- 群发通知改为一条广播一行（notification_broadcasts），已读按接收者写回执（notification_broadcast_receipts），
+  接收端列表读取时与 notifications 合并（见 app/services/notification_inbox.py）；
+- notifications 增加 (receiver_type, receiver_id, created_at) 索引：收件箱分页按该顺序取前 N 行，无需排序全部记录；
+- 历史 fan-out 写入的 notifications 保持不变（仍按定向通知展示）。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3a4b5c6d7e8"
+down_revision = "e2f3a4b5c6d7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_broadcasts",
+        sa.Column("id", sa.String(length=36), primary_key=True, nullable=False, comment="广播ID（接收端作为通知ID展示）"),
+        sa.Column("sender_type", sa.String(length=32), nullable=True, comment="发送者类型（ADMIN；系统通知为空）"),
+        sa.Column("sender_id", sa.String(length=36), nullable=True, comment="发送者ID（adminId，可空）"),
+        sa.Column("audience", sa.String(length=32), nullable=False, comment="受众：ALL_ADMINS/ALL_DEALERS/ALL_PROVIDERS"),
+        sa.Column("title", sa.String(length=256), nullable=False, comment="标题"),
+        sa.Column("content", sa.Text(), nullable=False, comment="内容"),
+        sa.Column("category", sa.String(length=16), nullable=False, server_default="SYSTEM", comment="类别：SYSTEM/ACTIVITY/OPS"),
+        sa.Column("meta_json", sa.JSON(), nullable=True, comment="扩展元数据（JSON，可空）"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="创建时间"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index(
+        "ix_notification_broadcasts_audience_created",
+        "notification_broadcasts",
+        ["audience", "created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "notification_broadcast_receipts",
+        sa.Column("broadcast_id", sa.String(length=36), primary_key=True, nullable=False, comment="广播ID"),
+        sa.Column("receiver_type", sa.String(length=32), primary_key=True, nullable=False, comment="接收者类型"),
+        sa.Column("receiver_id", sa.String(length=36), primary_key=True, nullable=False, comment="接收者ID"),
+        sa.Column("read_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP"), comment="已读时间"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index(
+        "ix_notification_broadcast_receipts_receiver",
+        "notification_broadcast_receipts",
+        ["receiver_type", "receiver_id"],
+        unique=False,
+    )
+
+    op.create_index(
+        "ix_notifications_receiver_created",
+        "notifications",
+        ["receiver_type", "receiver_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_receiver_created", table_name="notifications")
+    op.drop_index("ix_notification_broadcast_receipts_receiver", table_name="notification_broadcast_receipts")
+    op.drop_table("notification_broadcast_receipts")
+    op.drop_index("ix_notification_broadcasts_audience_created", table_name="notification_broadcasts")
+    op.drop_table("notification_broadcasts")
@@ -0,0 +1,68 @@
+"""stage43: venues.geohash + (publish_status, geohash) index for nearby search.
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-17
+
+说明：
+- geohash 由 lat/lng 派生（ORM 钩子维护，见 app/models/venue.py）；
+- 升级时按 id 分批回填已有坐标的场所。
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.utils.geohash import encode as geohash_encode
+
+# revision identifiers, used by Alembic.
+revision = "f7a8b9c0d1e2"
+down_revision = "e6f7a8b9c0d1"
+branch_labels = None
+depends_on = None
+
+_BATCH = 1000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "venues",
+        sa.Column("geohash", sa.String(length=12), nullable=True, comment="lat/lng 派生的 geohash（12位）"),
+    )
+    op.create_index("ix_venues_publish_status_geohash", "venues", ["publish_status", "geohash"], unique=False)
+
+    bind = op.get_bind()
+    venues = sa.table(
+        "venues",
+        sa.column("id", sa.String),
+        sa.column("lat", sa.Float),
+        sa.column("lng", sa.Float),
+        sa.column("geohash", sa.String),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(venues.c.id, venues.c.lat, venues.c.lng)
+            .where(venues.c.id > last_id, venues.c.lat.is_not(None), venues.c.lng.is_not(None))
+            .order_by(venues.c.id.asc())
+            .limit(_BATCH)
+        ).all()
+        if not rows:
+            break
+        params = [
+            {"b_id": vid, "b_geohash": geohash_encode(float(lat), float(lng))}
+            for vid, lat, lng in rows
+            if -90.0 <= float(lat) <= 90.0 and -180.0 <= float(lng) <= 180.0
+        ]
+        if params:
+            bind.execute(
+                venues.update().where(venues.c.id == sa.bindparam("b_id")).values(geohash=sa.bindparam("b_geohash")),
+                params,
+            )
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index("ix_venues_publish_status_geohash", table_name="venues")
+    op.drop_column("venues", "geohash")
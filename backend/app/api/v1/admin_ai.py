@@ -12,7 +12,6 @@ from typing import Any, Literal
 from uuid import uuid4
 
 from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from sqlalchemy import delete, func, select
 
@@ -21,12 +20,14 @@ from app.models.ai_strategy import AiStrategy
 from app.models.audit_log import AuditLog
 from app.models.enums import AiProviderType, AuditAction, AuditActorType, CommonEnabledStatus
 from app.services.ai.factory import create_adapter
+from app.services.ai.repository import invalidate_ai_snapshots
+from app.services.ai.response_cache import purge_response_cache
 from app.services.ai.types import AiCallContext, AiProviderSnapshot, AiStrategySnapshot
-from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
+from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
 from app.utils.redis_client import get_redis
 from app.utils.db import get_session_factory
-from app.utils.response import fail, ok
-from app.api.v1.deps import require_admin
+from app.utils.response import ok
+from app.api.v1.deps import require_admin, IdempotencyGuard, idempotency_guard
 from app.services.rbac import ActorContext
 from app.utils.datetime_iso import iso as _iso
 from app.utils.settings import settings
@@ -133,37 +134,6 @@ def _require_idempotency_key(idempotency_key: str | None) -> str:
     return str(idempotency_key).strip()
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: IdemActorType,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key)
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
-# -----------------------------
-# Admin：AI Provider/Strategy（v2）
-# -----------------------------
-
-
 class AdminAiProviderResp(BaseModel):
     id: str
     name: str
@@ -236,11 +206,11 @@ async def admin_create_ai_provider(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_POST_AI_PROVIDER,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -332,11 +302,11 @@ async def admin_update_ai_provider(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_PUT_AI_PROVIDER,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -490,11 +460,11 @@ async def admin_test_ai_provider_connection(
     providerId: str,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_TEST_AI_PROVIDER,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -552,11 +522,11 @@ async def admin_create_ai_strategy(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_POST_AI_STRATEGY,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -656,11 +626,11 @@ async def admin_update_ai_strategy(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_PUT_AI_STRATEGY,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -762,12 +732,12 @@ async def admin_bind_ai_strategy_provider(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     # 说明：开发/测试阶段允许快速联调，不要求 admin 先绑手机（2FA）。
     admin_id = str(_admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_BIND_AI_STRATEGY_PROVIDER,
         actor_type="ADMIN",
         actor_id=admin_id,
@@ -825,6 +795,40 @@ async def admin_bind_ai_strategy_provider(
     return payload
 
 
+@router.post("/admin/ai/strategies/{strategyId}/response-cache/purge")
+async def admin_purge_ai_strategy_response_cache(
+    request: Request,
+    strategyId: str,
+    _admin: ActorContext = Depends(require_admin),
+):
+    # 清空该 scene 的全部响应缓存（含历史配置版本）；天然幂等，不要求 Idempotency-Key
+    admin_id = str(_admin.sub)
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        st = (await session.scalars(select(AiStrategy).where(AiStrategy.id == strategyId).limit(1))).first()
+        if st is None:
+            raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Strategy 不存在"})
+
+        purged = await purge_response_cache(scene=str(st.scene))
+        session.add(
+            AuditLog(
+                id=str(uuid4()),
+                actor_type=AuditActorType.ADMIN.value,
+                actor_id=admin_id,
+                action=AuditAction.UPDATE.value,
+                resource_type="AI_STRATEGY",
+                resource_id=str(st.id),
+                summary="ADMIN 清空 AI 响应缓存",
+                ip=getattr(getattr(request, "client", None), "host", None),
+                user_agent=request.headers.get("User-Agent"),
+                metadata_json={"requestId": request.state.request_id, "scene": str(st.scene), "purged": purged},
+            )
+        )
+        await session.commit()
+
+    return ok(data={"scene": str(st.scene), "purged": purged}, request_id=request.state.request_id)
+
+
 class AdminAiDevResetBody(BaseModel):
     resetAudit: bool = True
     resetChatAudits: bool = False
@@ -857,6 +861,8 @@ async def admin_dev_reset_ai_config(
             await session.execute(delete(AuditLog).where(AuditLog.resource_type == "AI_CHAT"))
 
         await session.commit()
+    # Core 批量删除不经 ORM 提交钩子：显式失效 Strategy/Provider 快照
+    await invalidate_ai_snapshots()
 
     return ok(data={"reset": True}, request_id=request.state.request_id)
 
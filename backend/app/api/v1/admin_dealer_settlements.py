@@ -2,10 +2,14 @@
 
 规格来源：
 - specs/health-services-platform/dealer-settlement-v1.md
+
+说明：
+- 出账按分账流水集合式生成（services/dealer_settlement.py）；同步接口与异步任务（generate-jobs）共用同一生成逻辑。
 """
 
 from __future__ import annotations
 
+import asyncio
 import re
 from datetime import UTC, datetime
 from uuid import uuid4
@@ -13,24 +17,32 @@ from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field, model_validator
 from sqlalchemy import func, select
-from sqlalchemy.exc import IntegrityError
 
 from app.api.v1.deps import require_admin, require_admin_phone_bound
 from app.models.audit_log import AuditLog
-from app.models.dealer import Dealer
-from app.models.dealer_settlement_account import DealerSettlementAccount
-from app.models.enums import AuditAction, AuditActorType, DealerStatus, OrderType, PaymentStatus, SettlementStatus
-from app.models.order import Order
+from app.models.enums import AuditAction, AuditActorType, SettlementStatus
 from app.models.settlement_record import SettlementRecord
 from app.models.system_config import SystemConfig
+from app.services.dealer_settlement import (
+    DEALER_COMMISSION_KEY,
+    SettlementBatchItem,
+    generate_dealer_settlements,
+    load_commission_rules,
+    load_job,
+    mask_account_no,
+    normalize_commission_rate,
+    save_job,
+    settlement_batch_audit,
+)
 from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
 
 
 router = APIRouter(tags=["admin-dealer-settlements"])
 
-_KEY_COMMISSION = "DEALER_COMMISSION_RULES"
+_KEY_COMMISSION = DEALER_COMMISSION_KEY
 _CYCLE_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
 
 
@@ -50,15 +62,6 @@ def _parse_cycle_to_range(cycle: str) -> tuple[datetime, datetime]:
     return start, end
 
 
-def _mask_account_no(account_no: str | None) -> str | None:
-    if not account_no:
-        return None
-    s = str(account_no).strip()
-    if len(s) <= 8:
-        return None
-    return f"{s[:4]}****{s[-4:]}"
-
-
 def _mask_reference_last4(ref: str | None) -> str | None:
     """资金类字段避免入审计明文：仅保留后 4 位（不足则不记）。"""
 
@@ -81,7 +84,7 @@ def _sanitize_payout_account(value: object | None) -> dict | None:
     out: dict = {
         "method": v.get("method"),
         "accountName": v.get("accountName") or v.get("account_name"),
-        "accountNoMasked": _mask_account_no(str(account_no).strip() if isinstance(account_no, str) else None),
+        "accountNoMasked": mask_account_no(str(account_no).strip() if isinstance(account_no, str) else None),
         "bankName": v.get("bankName") or v.get("bank_name"),
         "bankBranch": v.get("bankBranch") or v.get("bank_branch"),
     }
@@ -110,14 +113,7 @@ async def _get_or_create_cfg(session) -> SystemConfig:
     return cfg
 
 
-def _normalize_rate(v) -> float:
-    try:
-        x = float(v)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "分账比例必须是数字"}) from exc
-    if x < 0 or x > 1:
-        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "分账比例必须在 0~1 之间"})
-    return float(x)
+_normalize_rate = normalize_commission_rate
 
 
 class PutCommissionBody(BaseModel):
@@ -196,210 +192,142 @@ class GenerateBody(BaseModel):
     cycle: str
 
 
+def _batch_item_dto(item: SettlementBatchItem) -> dict:
+    row = item.record
+    out = {
+        "id": row.id,
+        "dealerId": row.dealer_id,
+        "cycle": row.cycle,
+        "orderCount": int(row.order_count),
+        "amount": float(row.amount),
+        "status": row.status,
+        "createdAt": _iso(row.created_at),
+        "settledAt": _iso(row.settled_at),
+        "grossAmount": item.gross_amount,
+        "commissionRate": item.commission_rate,
+        "generated": item.generated,
+    }
+    if item.generated:
+        out.update(
+            {
+                "payoutMethod": row.payout_method,
+                # 规格（TASK-P0-006）：不返回打款信息明文
+                "payoutAccount": _sanitize_payout_account(row.payout_account_json),
+                "payoutReference": row.payout_reference,
+                "payoutNote": row.payout_note,
+                "payoutMarkedAt": _iso(row.payout_marked_at),
+            }
+        )
+    return out
+
+
 @router.post("/admin/dealer-settlements/generate")
 async def admin_generate_dealer_settlements(request: Request, body: GenerateBody, admin=Depends(require_admin_phone_bound)):
+    """同步出账（集合式生成，见 services/dealer_settlement.py）；经销商规模大时改用 generate-jobs 异步任务。"""
+
     cycle = str(body.cycle or "").strip()
     start, end = _parse_cycle_to_range(cycle)
+    rules = await load_commission_rules()
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        # 读分账规则
-        cfg = await _get_or_create_cfg(session)
-        raw = cfg.value_json or {}
-        default_rate = _normalize_rate(raw.get("defaultRate") or 0.0)
-        overrides = raw.get("dealerOverrides") or {}
-        if not isinstance(overrides, dict):
-            overrides = {}
-
-        # 聚合当月已支付的健行天下订单（按 paid_at 落在周期）
-        agg = (
-            await session.execute(
-                select(
-                    Order.dealer_id,
-                    func.count().label("order_count"),
-                    func.sum(Order.total_amount).label("gross_amount"),
-                )
-                .where(
-                    Order.order_type == OrderType.SERVICE_PACKAGE.value,
-                    Order.payment_status == PaymentStatus.PAID.value,
-                    Order.paid_at.is_not(None),
-                    Order.paid_at >= start,
-                    Order.paid_at < end,
-                    Order.dealer_id.is_not(None),
-                )
-                .group_by(Order.dealer_id)
-            )
-        ).all()
-
-        dealer_ids = [str(x[0]) for x in agg if x[0]]
-        if dealer_ids:
-            dealers = (await session.scalars(select(Dealer).where(Dealer.id.in_(dealer_ids)))).all()
-        else:
-            dealers = []
-        dealer_map = {d.id: d for d in dealers}
-
-        created = 0
-        updated_or_existing = 0
-        items: list[dict] = []
-
-        for dealer_id, order_count, gross_amount in agg:
-            did = str(dealer_id)
-            d = dealer_map.get(did)
-            # v1 最小：仅对 ACTIVE dealer 出账
-            if d is None or d.status != DealerStatus.ACTIVE.value:
-                continue
-
-            rate = default_rate
-            try:
-                if did in overrides:
-                    rate = _normalize_rate(overrides.get(did))
-            except HTTPException:
-                rate = default_rate
-
-            gross = float(gross_amount or 0.0)
-            amount = float(round(gross * rate, 2))
-            oc = int(order_count or 0)
-
-            # 读取经销商结算账户（可为空）；保存到结算单快照，避免后续账户改动影响对账
-            acct = (
-                await session.scalars(select(DealerSettlementAccount).where(DealerSettlementAccount.dealer_id == did).limit(1))
-            ).first()
-            payout_method = acct.method if acct is not None else None
-            payout_account_json = None
-            if acct is not None:
-                payout_account_json = {
-                    "method": acct.method,
-                    "accountName": acct.account_name,
-                    "accountNoMasked": _mask_account_no(acct.account_no),
-                    "bankName": acct.bank_name,
-                    "bankBranch": acct.bank_branch,
-                    "contactPhone": acct.contact_phone,
-                }
-
-            existing = (
-                await session.scalars(
-                    select(SettlementRecord).where(SettlementRecord.dealer_id == did, SettlementRecord.cycle == cycle).limit(1)
-                )
-            ).first()
-            if existing is not None:
-                # 幂等：已存在则返回现有，不覆盖（避免重复生成引发对账口径漂移）
-                updated_or_existing += 1
-                items.append(
-                    {
-                        "id": existing.id,
-                        "dealerId": existing.dealer_id,
-                        "cycle": existing.cycle,
-                        "orderCount": int(existing.order_count),
-                        "amount": float(existing.amount),
-                        "status": existing.status,
-                        "createdAt": _iso(existing.created_at),
-                        "settledAt": _iso(existing.settled_at),
-                        "grossAmount": gross,
-                        "commissionRate": rate,
-                        "generated": False,
-                    }
-                )
-                continue
-
-            row = SettlementRecord(
-                id=str(uuid4()),
-                dealer_id=did,
-                cycle=cycle,
-                order_count=oc,
-                amount=amount,
-                status=SettlementStatus.PENDING_CONFIRM.value,
-                payout_method=payout_method,
-                payout_account_json=payout_account_json,
-                payout_reference=None,
-                payout_note=None,
-                payout_marked_by=None,
-                payout_marked_at=None,
-                created_at=datetime.now(tz=UTC).replace(tzinfo=None),
-                settled_at=None,
-            )
-            session.add(row)
-            try:
-                await session.commit()
-            except IntegrityError:
-                await session.rollback()
-                # 并发/重复：按幂等视为已存在
-                existing2 = (
-                    await session.scalars(
-                        select(SettlementRecord)
-                        .where(SettlementRecord.dealer_id == did, SettlementRecord.cycle == cycle)
-                        .limit(1)
-                    )
-                ).first()
-                if existing2 is not None:
-                    updated_or_existing += 1
-                    items.append(
-                        {
-                            "id": existing2.id,
-                            "dealerId": existing2.dealer_id,
-                            "cycle": existing2.cycle,
-                            "orderCount": int(existing2.order_count),
-                            "amount": float(existing2.amount),
-                            "status": existing2.status,
-                            "createdAt": _iso(existing2.created_at),
-                            "settledAt": _iso(existing2.settled_at),
-                            "grossAmount": gross,
-                            "commissionRate": rate,
-                            "generated": False,
-                        }
-                    )
-                    continue
-                raise
-            await session.refresh(row)
-            created += 1
-            items.append(
-                {
-                    "id": row.id,
-                    "dealerId": row.dealer_id,
-                    "cycle": row.cycle,
-                    "orderCount": int(row.order_count),
-                    "amount": float(row.amount),
-                    "status": row.status,
-                    "createdAt": _iso(row.created_at),
-                    "settledAt": _iso(row.settled_at),
-                    "payoutMethod": row.payout_method,
-                    "payoutAccount": row.payout_account_json,
-                    "payoutReference": row.payout_reference,
-                    "payoutNote": row.payout_note,
-                    "payoutMarkedAt": _iso(row.payout_marked_at),
-                    "grossAmount": gross,
-                    "commissionRate": rate,
-                    "generated": True,
-                }
-            )
-
-        # 审计：结算批次生成（资金高风险；避免记录账户明细/敏感信息）
+        result = await generate_dealer_settlements(session=session, cycle=cycle, start=start, end=end, rules=rules)
         session.add(
-            AuditLog(
-                id=str(uuid4()),
-                actor_type=AuditActorType.ADMIN.value,
-                actor_id=str(getattr(admin, "sub", "") or ""),
-                action=AuditAction.CREATE.value,
-                resource_type="DEALER_SETTLEMENT_BATCH",
-                resource_id=cycle,
-                summary=f"生成经销商结算批次：{cycle}",
+            settlement_batch_audit(
+                admin_id=str(getattr(admin, "sub", "") or ""),
+                result=result,
+                request_id=request.state.request_id,
                 ip=getattr(getattr(request, "client", None), "host", None),
                 user_agent=request.headers.get("User-Agent"),
-                metadata_json={
-                    "requestId": request.state.request_id,
-                    "cycle": cycle,
-                    "created": int(created),
-                    "existing": int(updated_or_existing),
-                },
             )
         )
         await session.commit()
 
     return ok(
-        data={"cycle": cycle, "created": created, "existing": updated_or_existing, "items": items},
+        data={
+            "cycle": cycle,
+            "created": result.created,
+            "existing": result.existing,
+            "items": [_batch_item_dto(x) for x in result.items],
+        },
         request_id=request.state.request_id,
     )
 
 
+def _settlement_job_dto(job: dict) -> dict:
+    return {
+        "jobId": job.get("jobId"),
+        "cycle": job.get("cycle"),
+        "status": job.get("status"),
+        "progress": job.get("progress"),
+        "created": job.get("created"),
+        "existing": job.get("existing"),
+        "ledgerBackfilled": job.get("ledgerBackfilled"),
+        "createdAt": job.get("createdAt"),
+        "startedAt": job.get("startedAt"),
+        "finishedAt": job.get("finishedAt"),
+        "error": job.get("error"),
+    }
+
+
+@router.post("/admin/dealer-settlements/generate-jobs")
+async def admin_create_dealer_settlement_job(
+    request: Request, body: GenerateBody, admin=Depends(require_admin_phone_bound)
+):
+    """出账：异步任务模式（月末大批量）。
+
+    说明：
+    - 由 Celery 执行，进度（ledger/aggregate/upsert 阶段 + done/total）写入任务状态；
+    - 轮询：GET /admin/dealer-settlements/generate-jobs/{jobId}；结果明细走结算单列表接口。
+    """
+
+    cycle = str(body.cycle or "").strip()
+    start, end = _parse_cycle_to_range(cycle)
+    job = {
+        "jobId": str(uuid4()),
+        "status": "PENDING",
+        "cycle": cycle,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "adminId": str(getattr(admin, "sub", "") or ""),
+        "requestId": request.state.request_id,
+        "ip": getattr(getattr(request, "client", None), "host", None),
+        "userAgent": request.headers.get("User-Agent"),
+        "progress": None,
+        "created": None,
+        "existing": None,
+        "ledgerBackfilled": None,
+        "createdAt": _iso(datetime.now(tz=UTC)),
+        "startedAt": None,
+        "finishedAt": None,
+        "error": None,
+    }
+    await save_job(redis=get_redis(), job=job)
+
+    try:
+        from app.tasks.dealer_settlements import generate_dealer_settlements_job  # noqa: WPS433
+
+        # 投递在线程中执行：broker 缓慢时不阻塞事件循环
+        await asyncio.to_thread(generate_dealer_settlements_job.delay, job["jobId"])
+    except Exception as exc:  # noqa: BLE001
+        job["status"] = "FAILED"
+        job["error"] = "ENQUEUE_FAILED"
+        await save_job(redis=get_redis(), job=job)
+        raise HTTPException(
+            status_code=500, detail={"code": "INTERNAL_ERROR", "message": "出账任务提交失败，请稍后重试"}
+        ) from exc
+
+    return ok(data=_settlement_job_dto(job), request_id=request.state.request_id)
+
+
+@router.get("/admin/dealer-settlements/generate-jobs/{jobId}")
+async def admin_get_dealer_settlement_job(request: Request, jobId: str, _admin=Depends(require_admin)):
+    job = await load_job(redis=get_redis(), job_id=str(jobId or "").strip())
+    if job is None:
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "出账任务不存在或已过期"})
+    return ok(data=_settlement_job_dto(job), request_id=request.state.request_id)
+
+
 @router.get("/admin/dealer-settlements")
 async def admin_list_dealer_settlements(
     request: Request,
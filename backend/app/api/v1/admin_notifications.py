@@ -7,38 +7,56 @@
 接口：
 - GET /api/v1/admin/notifications
 - POST /api/v1/admin/notifications/{id}/read
- - POST /api/v1/admin/notifications/send
+- POST /api/v1/admin/notifications/send
+- GET /api/v1/admin/notifications/send-jobs/{jobId}
 
 说明：
 - v1 仅支持 ADMIN 自己的站内通知（receiverType=ADMIN, receiverId=adminId）。
 - v1.1：支持 Admin 手工发送（群发/定向），并保留原有读取接口兼容。
+- 群发写一条广播（读取时合并），定向走 Core 批量写入，超过同步上限转异步任务（services/notification_sending.py）；
+  列表与未读数见 services/notification_inbox.py。
 """
 
 from __future__ import annotations
 
+import asyncio
 from datetime import UTC, datetime
 from typing import Literal
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import func, select
+from sqlalchemy import select
 
-from app.api.v1.deps import require_admin, require_admin_phone_bound
-from app.models.admin import Admin
+from app.api.v1.deps import require_admin, require_admin_phone_bound, IdempotencyGuard, idempotency_guard
 from app.models.audit_log import AuditLog
-from app.models.dealer_user import DealerUser
 from app.models.enums import AuditAction, AuditActorType, NotificationCategory, NotificationReceiverType, NotificationStatus
-from app.models.notification import Notification
-from app.models.provider_staff import ProviderStaff
-from app.models.provider_user import ProviderUser
-from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
+from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
+from app.services.notification_inbox import (
+    RECEIVER_MODELS,
+    InboxItem,
+    bump_broadcast_total,
+    list_inbox,
+    mark_inbox_read,
+)
+from app.services.notification_sending import (
+    count_audience,
+    insert_targeted_notifications,
+    load_job,
+    new_broadcast,
+    pack_receivers,
+    receiver_type_counts,
+    save_job,
+    sync_unread_counters,
+)
+from app.services.rate_limit import enforce_rate_limit
 from app.services.rbac import ActorContext
 from app.utils.db import get_session_factory
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
+from app.utils.datetime_utc import utcnow
+from app.utils.settings import settings
 
 router = APIRouter(tags=["admin-notifications"])
 
@@ -46,6 +64,7 @@ _SEND_OPERATION = "admin_send_notifications"
 _SEND_RATE_LIMIT_MAX = 20
 _SEND_RATE_LIMIT_WINDOW_SECONDS = 10 * 60
 _SEND_TARGETS_COUNT_MAX = 5000
+_RESOLVE_CHUNK = 1000
 
 
 def _mask_phone(phone: str | None) -> str | None:
@@ -58,7 +77,7 @@ def _mask_phone(phone: str | None) -> str | None:
     return f"{s[:3]}****{s[-4:]}"
 
 
-def _notification_dto(n: Notification) -> dict:
+def _notification_dto(n: InboxItem) -> dict:
     return {
         "id": n.id,
         "title": n.title,
@@ -76,42 +95,15 @@ def _require_idempotency_key(idempotency_key: str | None) -> str:
     return idempotency_key.strip()
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: IdemActorType,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key)
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 async def _enforce_send_rate_limit(*, admin_id: str) -> None:
-    """每 ADMIN 20 次 / 10min，超出 429 RATE_LIMITED（你已拍板）。"""
+    """每 ADMIN 20 次 / 10min（滑动窗口），超出 429 RATE_LIMITED（你已拍板）。"""
 
-    r = get_redis()
-    key = f"rate:admin_notifications_send:{admin_id}"
-    n = int(await r.incr(key))
-    if n == 1:
-        await r.expire(key, _SEND_RATE_LIMIT_WINDOW_SECONDS)
-    if n > _SEND_RATE_LIMIT_MAX:
-        raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "操作太频繁，请稍后重试"})
+    await enforce_rate_limit(
+        key=f"rate:admin_notifications_send:{admin_id}",
+        limit=_SEND_RATE_LIMIT_MAX,
+        window_seconds=_SEND_RATE_LIMIT_WINDOW_SECONDS,
+        message="操作太频繁，请稍后重试",
+    )
 
 
 @router.get("/admin/notifications")
@@ -125,23 +117,20 @@ async def admin_list_notifications(
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
-    stmt = select(Notification).where(
-        Notification.receiver_type == NotificationReceiverType.ADMIN.value,
-        Notification.receiver_id == str(_admin.sub),
-    )
-
-    if status:
-        if status not in {NotificationStatus.UNREAD.value, NotificationStatus.READ.value}:
-            raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "status 不合法"})
-        stmt = stmt.where(Notification.status == str(status))
-
-    stmt = stmt.order_by(Notification.created_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
+    if status and status not in {NotificationStatus.UNREAD.value, NotificationStatus.READ.value}:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "status 不合法"})
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        rows, total = await list_inbox(
+            session=session,
+            redis=get_redis(),
+            receiver_type=NotificationReceiverType.ADMIN.value,
+            receiver_id=str(_admin.sub),
+            status=str(status) if status else None,
+            page=page,
+            page_size=page_size,
+        )
 
     return ok(
         data={"items": [_notification_dto(x) for x in rows], "page": page, "pageSize": page_size, "total": total},
@@ -155,31 +144,18 @@ async def admin_mark_notification_read(
     id: str,
     _admin: ActorContext = Depends(require_admin),
 ):
-    now = datetime.now(tz=UTC)
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        n = (
-            await session.scalars(
-                select(Notification)
-                .where(
-                    Notification.id == id,
-                    Notification.receiver_type == NotificationReceiverType.ADMIN.value,
-                    Notification.receiver_id == str(_admin.sub),
-                )
-                .limit(1)
-            )
-        ).first()
-
-        if n is None:
-            raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "通知不存在"})
-
         # 幂等：重复标记已读不报错
-        if n.status != NotificationStatus.READ.value:
-            n.status = NotificationStatus.READ.value
-            n.read_at = now
-            await session.commit()
-            await session.refresh(n)
+        n = await mark_inbox_read(
+            session=session,
+            redis=get_redis(),
+            receiver_type=NotificationReceiverType.ADMIN.value,
+            receiver_id=str(_admin.sub),
+            notification_id=id,
+        )
+    if n is None:
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "通知不存在"})
 
     return ok(data=_notification_dto(n), request_id=request.state.request_id)
 
@@ -202,57 +178,69 @@ class SendBody(BaseModel):
 
 
 async def _resolve_targets(*, session, targets: list[_AudienceTarget]) -> list[tuple[str, str]]:
-    """返回 (receiver_type, receiver_id) 列表；不存在/非 ACTIVE 直接报错。"""
+    """返回去重后的 (receiver_type, receiver_id) 列表；不存在/非 ACTIVE 直接报错（按类型分片 IN 查询，不逐个查库）。"""
 
-    out: list[tuple[str, str]] = []
+    uniq: list[tuple[str, str]] = []
+    seen: set[tuple[str, str]] = set()
     for t in targets:
         rt = str(t.receiverType)
         rid = str(t.receiverId or "").strip()
         if not rid:
             raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "receiverId 不能为空"})
-
-        if rt == NotificationReceiverType.ADMIN.value:
-            row = (await session.scalars(select(Admin).where(Admin.id == rid).limit(1))).first()
-            if row is None or row.status != "ACTIVE":
-                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"ADMIN 账号不存在或不可用：{rid}"})
-        elif rt == NotificationReceiverType.DEALER.value:
-            row = (await session.scalars(select(DealerUser).where(DealerUser.id == rid).limit(1))).first()
-            if row is None or row.status != "ACTIVE":
-                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"DEALER 账号不存在或不可用：{rid}"})
-        elif rt == NotificationReceiverType.PROVIDER.value:
-            row = (await session.scalars(select(ProviderUser).where(ProviderUser.id == rid).limit(1))).first()
-            if row is None or row.status != "ACTIVE":
-                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"PROVIDER 账号不存在或不可用：{rid}"})
-        elif rt == NotificationReceiverType.PROVIDER_STAFF.value:
-            row = (await session.scalars(select(ProviderStaff).where(ProviderStaff.id == rid).limit(1))).first()
-            if row is None or row.status != "ACTIVE":
-                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"PROVIDER_STAFF 账号不存在或不可用：{rid}"})
-        else:
+        if rt not in RECEIVER_MODELS:
             raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"receiverType 不合法：{rt}"})
-
-        out.append((rt, rid))
-
-    # 去重
-    uniq: list[tuple[str, str]] = []
-    seen: set[tuple[str, str]] = set()
-    for x in out:
-        if x in seen:
+        if (rt, rid) in seen:
             continue
-        seen.add(x)
-        uniq.append(x)
+        seen.add((rt, rid))
+        uniq.append((rt, rid))
+
+    ids_by_type: dict[str, list[str]] = {}
+    for rt, rid in uniq:
+        ids_by_type.setdefault(rt, []).append(rid)
+
+    active: set[tuple[str, str]] = set()
+    for rt, ids in ids_by_type.items():
+        model = RECEIVER_MODELS[rt]
+        for i in range(0, len(ids), _RESOLVE_CHUNK):
+            found = (
+                await session.scalars(
+                    select(model.id).where(model.id.in_(ids[i : i + _RESOLVE_CHUNK]), model.status == "ACTIVE")
+                )
+            ).all()
+            active.update((rt, x) for x in found)
+
+    for rt, rid in uniq:
+        if (rt, rid) not in active:
+            raise HTTPException(
+                status_code=400, detail={"code": "INVALID_ARGUMENT", "message": f"{rt} 账号不存在或不可用：{rid}"}
+            )
     return uniq
 
 
+def _send_job_dto(job: dict) -> dict:
+    return {
+        "jobId": job.get("jobId"),
+        "batchId": job.get("batchId"),
+        "status": job.get("status"),
+        "progress": job.get("progress"),
+        "createdCount": job.get("createdCount"),
+        "createdAt": job.get("createdAt"),
+        "startedAt": job.get("startedAt"),
+        "finishedAt": job.get("finishedAt"),
+        "error": job.get("error"),
+    }
+
+
 @router.post("/admin/notifications/send")
 async def admin_send_notifications(
     request: Request,
     body: SendBody,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     _admin: ActorContext = Depends(require_admin_phone_bound),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_SEND_OPERATION,
         actor_type="ADMIN",
         actor_id=str(_admin.sub),
@@ -277,65 +265,89 @@ async def admin_send_notifications(
     # 非重放请求：计入限流
     await _enforce_send_rate_limit(admin_id=str(_admin.sub))
 
+    redis = get_redis()
+    now = utcnow()
+    batch_id = str(uuid4())
+    title = str(body.title).strip()
+    receivers: list[tuple[str, str]] = []
+    broadcast_id: str | None = None
+    job: dict | None = None
+
     session_factory = get_session_factory()
     async with session_factory() as session:
-        # 1) 解析接收者列表（fan-out 写入）
-        receivers: list[tuple[str, str]] = []
-        if mode == "ALL_ADMINS":
-            items = (await session.scalars(select(Admin).where(Admin.status == "ACTIVE"))).all()
-            receivers = [(NotificationReceiverType.ADMIN.value, x.id) for x in items]
-        elif mode == "ALL_DEALERS":
-            items = (await session.scalars(select(DealerUser).where(DealerUser.status == "ACTIVE"))).all()
-            receivers = [(NotificationReceiverType.DEALER.value, x.id) for x in items]
-        elif mode == "ALL_PROVIDERS":
-            users = (await session.scalars(select(ProviderUser).where(ProviderUser.status == "ACTIVE"))).all()
-            staffs = (await session.scalars(select(ProviderStaff).where(ProviderStaff.status == "ACTIVE"))).all()
-            receivers = [(NotificationReceiverType.PROVIDER.value, x.id) for x in users] + [
-                (NotificationReceiverType.PROVIDER_STAFF.value, x.id) for x in staffs
-            ]
-        else:
+        # 1) 接收者：群发只统计数量（写一条广播），定向按类型批量校验
+        if mode == "TARGETED":
             receivers = await _resolve_targets(session=session, targets=body.audience.targets or [])
+            type_counts = receiver_type_counts(receivers)
+        else:
+            type_counts = await count_audience(session=session, audience=mode)
+        targets_count = sum(type_counts.values())
 
-        if not receivers:
+        if targets_count < 1:
             raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "没有可发送的接收者"})
 
-        if len(receivers) > _SEND_TARGETS_COUNT_MAX:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "code": "INVALID_ARGUMENT",
-                    "message": f"targetsCount 超限：最多 {_SEND_TARGETS_COUNT_MAX}",
-                },
+        meta = {"audience": {"mode": mode}, "targetsCount": targets_count, "receiverTypeCounts": type_counts}
+
+        if mode != "TARGETED":
+            b = new_broadcast(
+                sender_id=str(_admin.sub),
+                audience=mode,
+                title=title,
+                content=str(body.content),
+                category=str(body.category),
+                meta=meta,
+                now=now,
             )
-
-        now = datetime.now(tz=UTC)
-        receiver_type_counts: dict[str, int] = {}
-        for rt, _rid in receivers:
-            receiver_type_counts[rt] = int(receiver_type_counts.get(rt, 0)) + 1
-        meta = {"audience": {"mode": mode}, "targetsCount": len(receivers), "receiverTypeCounts": receiver_type_counts}
-
-        created = 0
-        for rt, rid in receivers:
-            session.add(
-                Notification(
-                    id=str(uuid4()),
-                    sender_type=NotificationReceiverType.ADMIN.value,
-                    sender_id=str(_admin.sub),
-                    receiver_type=rt,
-                    receiver_id=rid,
-                    title=str(body.title).strip(),
-                    content=str(body.content),
-                    category=str(body.category),
-                    meta_json=meta,
-                    status=NotificationStatus.UNREAD.value,
-                    created_at=now,
-                    read_at=None,
-                )
+            session.add(b)
+            broadcast_id = b.id
+            created = targets_count
+        elif len(receivers) <= int(settings.notification_send_sync_max_targets):
+            created = await insert_targeted_notifications(
+                session=session,
+                batch_id=batch_id,
+                receivers=receivers,
+                sender_id=str(_admin.sub),
+                title=title,
+                content=str(body.content),
+                category=str(body.category),
+                meta=meta,
+                now=now,
             )
-            created += 1
+        else:
+            created = 0
+            job = {
+                "jobId": str(uuid4()),
+                "batchId": batch_id,
+                "status": "PENDING",
+                "senderId": str(_admin.sub),
+                "title": title,
+                "content": str(body.content),
+                "category": str(body.category),
+                "meta": meta,
+                "sentAt": now.isoformat(),
+                "receivers": pack_receivers(receivers),
+                "progress": {"done": 0, "total": len(receivers)},
+                "createdCount": 0,
+                "createdAt": _iso(datetime.now(tz=UTC)),
+                "startedAt": None,
+                "finishedAt": None,
+                "error": None,
+            }
 
         # 2) 审计（最小）
-        batch_id = str(uuid4())
+        audit_meta = {
+            "requestId": request.state.request_id,
+            "idempotencyKeyPrefix": idem_key[:12],
+            "mode": mode,
+            "category": str(body.category),
+            "createdCount": created,
+            "targetsCount": targets_count,
+            "receiverTypeCounts": type_counts,
+        }
+        if broadcast_id:
+            audit_meta["broadcastId"] = broadcast_id
+        if job is not None:
+            audit_meta["jobId"] = job["jobId"]
         session.add(
             AuditLog(
                 id=str(uuid4()),
@@ -347,22 +359,36 @@ async def admin_send_notifications(
                 summary="ADMIN 手工发送站内通知",
                 ip=getattr(getattr(request, "client", None), "host", None),
                 user_agent=request.headers.get("User-Agent"),
-                metadata_json={
-                    "requestId": request.state.request_id,
-                    "idempotencyKeyPrefix": idem_key[:12],
-                    "mode": mode,
-                    "category": str(body.category),
-                    "createdCount": created,
-                    "targetsCount": len(receivers),
-                    "receiverTypeCounts": receiver_type_counts,
-                },
+                metadata_json=audit_meta,
             )
         )
 
         await session.commit()
 
+    # 3) 提交后：未读计数 / 异步任务投递
     data = {"success": True, "createdCount": created, "batchId": batch_id}
-    idem = IdempotencyService(get_redis())
+    if broadcast_id:
+        await bump_broadcast_total(redis=redis, audience=mode)
+        data["broadcastId"] = broadcast_id
+    elif job is None:
+        await sync_unread_counters(redis=redis, receivers=receivers, created=created)
+    else:
+        await save_job(redis=redis, job=job)
+        try:
+            from app.tasks.notifications import send_targeted_notifications_job  # noqa: WPS433
+
+            # 投递在线程中执行：broker 缓慢时不阻塞事件循环
+            await asyncio.to_thread(send_targeted_notifications_job.delay, job["jobId"])
+        except Exception as exc:  # noqa: BLE001
+            job["status"] = "FAILED"
+            job["error"] = "ENQUEUE_FAILED"
+            await save_job(redis=redis, job=job)
+            raise HTTPException(
+                status_code=500, detail={"code": "INTERNAL_ERROR", "message": "发送任务提交失败，请稍后重试"}
+            ) from exc
+        data.update({"jobId": job["jobId"], "status": job["status"], "targetsCount": targets_count})
+
+    idem = IdempotencyService(redis)
     await idem.set(
         operation=_SEND_OPERATION,
         actor_type="ADMIN",
@@ -371,3 +397,11 @@ async def admin_send_notifications(
         result=IdempotencyCachedResult(status_code=200, success=True, data=data, error=None),
     )
     return ok(data=data, request_id=request.state.request_id)
+
+
+@router.get("/admin/notifications/send-jobs/{jobId}")
+async def admin_get_notification_send_job(request: Request, jobId: str, _admin: ActorContext = Depends(require_admin)):
+    job = await load_job(redis=get_redis(), job_id=str(jobId or "").strip())
+    if job is None:
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "发送任务不存在或已过期"})
+    return ok(data=_send_job_dto(job), request_id=request.state.request_id)
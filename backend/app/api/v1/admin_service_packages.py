@@ -19,7 +19,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import func, select
 
-from app.api.v1.deps import require_admin, require_admin_phone_bound
+from app.api.v1.deps import require_admin, require_admin_phone_bound, IdempotencyGuard, idempotency_guard
 from app.models.audit_log import AuditLog
 from app.models.enums import AuditAction, AuditActorType
 from app.models.enums import CommonEnabledStatus
@@ -27,7 +27,7 @@ from app.models.package_service import PackageService
 from app.models.service_category import ServiceCategory
 from app.models.service_package import ServicePackage
 from app.models.service_package_instance import ServicePackageInstance
-from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
+from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
 from app.utils.redis_client import get_redis
 from app.utils.db import get_session_factory
 from app.utils.response import fail, ok
@@ -77,32 +77,6 @@ def _require_idempotency_key(idempotency_key: str | None) -> str:
     return str(idempotency_key).strip()
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: IdemActorType,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key)
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 def _parse_upsert_body(body: Any) -> dict:
     """手动解析并校验，避免 422 漂移；统一返回 400 INVALID_ARGUMENT + 可读 message。"""
 
@@ -309,11 +283,11 @@ async def admin_create_service_package(
     body: dict[str, Any] = Body(default_factory=dict),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     admin=Depends(require_admin_phone_bound),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_id = str(admin.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation=_OPERATION_CREATE_SERVICE_PACKAGE,
         actor_type="ADMIN",
         actor_id=admin_id,
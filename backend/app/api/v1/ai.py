@@ -7,30 +7,41 @@
 - 必须登录（USER token）
 - 写操作必须幂等（Idempotency-Key）
 - 不持久化对话内容（不落库 messages）
+
+流式（SSE）：
+- body.stream=true 或 `Accept: text/event-stream` 时以 SSE 下发：`event: delta` {"content"} 若干，
+  结束为 `event: done`（完整统一响应体，与非流式 data 相同）；中途失败为 `event: error`（统一响应体）。
+- 首个增量到达前的失败（配置/频控/上游不可用）仍以普通 HTTP 错误返回，审计/幂等口径与非流式一致。
+- 完成后拼接的完整消息写入幂等缓存；同 Idempotency-Key 重放时按请求方式返回 JSON 或单段 SSE。
+- 审计 metadata 增加 stream/ttftMs（首包耗时），同时记录 lhmy_ai_time_to_first_token_seconds。
+
+响应缓存：由 Strategy 开启（见 services/ai/response_cache.py）；审计 metadata 记录 cacheHit 与 configVersion（配置指纹）。
 """
 
 from __future__ import annotations
 
 import time
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Literal
 from uuid import uuid4
 
 from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select
 
 from app.models.audit_log import AuditLog
-from app.models.ai_provider import AiProvider
-from app.models.ai_strategy import AiStrategy
 from app.models.enums import AuditAction, AuditActorType
-from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
-from app.services.ai.gateway import call_ai
+from app.services.idempotency import IdempotencyCachedResult, IdempotencyClaim, IdempotencyService
+from app.services.ai.gateway import AI_TIME_TO_FIRST_TOKEN, AiGatewayStream, call_ai, resolve_ai_config, stream_ai
+from app.services.ai.sse import format_sse
 from app.services.ai.types import AiCallContext
+from app.services.rate_limit import enforce_rate_limit
 from app.utils.db import get_session_factory
 from app.utils.jwt_token import decode_and_validate_user_token
 from app.utils.redis_client import get_redis
-from app.utils.response import ok
+from app.utils.response import fail, ok
+from app.utils.settings import settings
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 
 router = APIRouter(tags=["ai"])
@@ -50,22 +61,19 @@ def _user_id_from_authorization(authorization: str | None) -> str:
 
 
 async def _rate_limit_or_raise(*, user_id: str, limit_per_minute: int) -> None:
-    limit = max(1, int(limit_per_minute))
-    now = int(time.time())
-    bucket = now // 60
-    key = f"ai:rl:{user_id}:{bucket}"
-    redis = get_redis()
-    n = int(await redis.incr(key))
-    # 第一次命中设置 TTL
-    if n == 1:
-        await redis.expire(key, 120)
-    if n > limit:
-        raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "AI 调用频率过高，请稍后再试"})
+    # 滑动窗口（1 分钟），单次往返原子计数
+    await enforce_rate_limit(
+        key=f"ai:rl:{user_id}",
+        limit=max(1, int(limit_per_minute)),
+        window_seconds=60,
+        message="AI 调用频率过高，请稍后再试",
+    )
 
 
 class AiChatBody(BaseModel):
     scene: str = Field(..., min_length=1, max_length=64)
     message: str = Field(..., min_length=1, max_length=20000)
+    stream: bool = False
 
 
 class AiChatResp(BaseModel):
@@ -84,6 +92,9 @@ async def _audit_ai_call(
     error_code: str | None,
     config_version: str | None,
     request: Request,
+    stream: bool = False,
+    ttft_ms: int | None = None,
+    cache_hit: bool = False,
 ) -> None:
     # 仅记录元数据，不记录对话内容
     log = AuditLog(
@@ -107,6 +118,9 @@ async def _audit_ai_call(
             "errorCode": (str(error_code) if error_code else None),
             "configVersion": (str(config_version) if config_version else None),
             "requestId": getattr(request.state, "request_id", ""),
+            "stream": bool(stream),
+            "ttftMs": (int(ttft_ms) if ttft_ms is not None else None),
+            "cacheHit": bool(cache_hit),
         },
         created_at=datetime.utcnow(),
     )
@@ -116,6 +130,38 @@ async def _audit_ai_call(
         await session.commit()
 
 
+def _wants_stream(request: Request, body: AiChatBody) -> bool:
+    return bool(body.stream) or "text/event-stream" in (request.headers.get("Accept") or "")
+
+
+def _sse_response(chunks: AsyncIterator[bytes]) -> StreamingResponse:
+    # X-Accel-Buffering：避免 nginx 缓冲整段响应导致增量无法及时到达
+    return StreamingResponse(
+        chunks,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _replay_sse(*, data: dict, request_id: str) -> AsyncIterator[bytes]:
+    yield format_sse("delta", {"content": str((data.get("message") or {}).get("content") or "")})
+    yield format_sse("done", ok(data=data, request_id=request_id))
+
+
+def _failure_result(exc: HTTPException) -> IdempotencyCachedResult:
+    detail: dict[str, object] = exc.detail if isinstance(exc.detail, dict) else {}
+    return IdempotencyCachedResult(
+        status_code=int(exc.status_code),
+        success=False,
+        data=None,
+        error={
+            "code": str(detail.get("code") or "INTERNAL_ERROR"),
+            "message": str(detail.get("message") or "AI 服务调用失败"),
+            "details": None,
+        },
+    )
+
+
 @router.post("/ai/chat")
 async def ai_chat(
     request: Request,
@@ -125,14 +171,24 @@ async def ai_chat(
 ):
     # v1：必须登录
     user_id = _user_id_from_authorization(authorization)
+    want_stream = _wants_stream(request, body)
 
     # v1：对 chat 也支持幂等（避免前端重试造成重复计费/重复调用）
     idem_key = _require_idempotency_key(idempotency_key)
     idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation="ai_chat", actor_type="USER", actor_id=user_id, idempotency_key=idem_key)
-    if cached is not None:
+    # 同一 key 的并发重试等待首个请求的结果，不重复调用第三方
+    cached = await idem.claim(
+        operation="ai_chat",
+        actor_type="USER",
+        actor_id=user_id,
+        idempotency_key=idem_key,
+        wait_timeout_seconds=settings.idempotency_ai_chat_wait_timeout_seconds,
+    )
+    if isinstance(cached, IdempotencyCachedResult):
         # 复用 orders.py 的口径：data/error 复用，但 requestId 为当前请求
         if cached.success:
+            if want_stream:
+                return _sse_response(_replay_sse(data=dict(cached.data or {}), request_id=request.state.request_id))
             return ok(data=cached.data, request_id=request.state.request_id)
         err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
         raise HTTPException(status_code=int(cached.status_code), detail=err)
@@ -145,29 +201,58 @@ async def ai_chat(
     provider_for_audit = ""
     model_for_audit = ""
     config_version: str | None = None
+    claim = cached
+    stream_owns_claim = False
     try:
+        # 只解析一次 scene -> Strategy/Provider 快照（进程内缓存），频控与网关调用共用
+        resolved = await resolve_ai_config(scene=scene)
+
         # v2：频控（按用户维度），limit 来自 Provider.extra.rateLimitPerMinute（缺省 30）
         limit_per_minute = 30
-        session_factory = get_session_factory()
-        async with session_factory() as session:
-            st = (await session.scalars(select(AiStrategy).where(AiStrategy.scene == scene).limit(1))).first()
-            if st is not None and st.provider_id:
-                pv = (await session.scalars(select(AiProvider).where(AiProvider.id == st.provider_id).limit(1))).first()
-                if pv is not None:
-                    try:
-                        limit_per_minute = int((pv.extra_json or {}).get("rateLimitPerMinute") or 30)
-                    except Exception:  # noqa: BLE001
-                        limit_per_minute = 30
+        if resolved.provider is not None:
+            try:
+                limit_per_minute = int((resolved.provider.extra or {}).get("rateLimitPerMinute") or 30)
+            except Exception:  # noqa: BLE001
+                limit_per_minute = 30
         await _rate_limit_or_raise(user_id=user_id, limit_per_minute=limit_per_minute)
 
-        gw = await call_ai(
-            scene=scene,
-            user_input=user_message,
-            context=AiCallContext(user_id=user_id, request_id=request.state.request_id),
-        )
+        context = AiCallContext(user_id=user_id, request_id=request.state.request_id)
+        if want_stream:
+            gws = await stream_ai(scene=scene, user_input=user_message, context=context, resolved=resolved)
+            provider_for_audit = str(gws.provider.provider_type or "")
+            model_for_audit = str((gws.provider.extra or {}).get("default_model") or "")
+            config_version = gws.config_version
+            # 先取首个增量再建流：此前的失败仍走下方 except（HTTP 状态码 + 审计 + 幂等缓存）
+            first = await anext(gws.deltas, None)
+            if first is None:
+                raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务返回异常"})
+            ttft_ms = int((time.perf_counter() - started) * 1000)
+            AI_TIME_TO_FIRST_TOKEN.labels(provider_type=provider_for_audit or "unknown").observe(ttft_ms / 1000.0)
+            response = _sse_response(
+                _relay_stream(
+                    gws=gws,
+                    first=first,
+                    ttft_ms=ttft_ms,
+                    started=started,
+                    scene=scene,
+                    user_id=user_id,
+                    idem=idem,
+                    idem_key=idem_key,
+                    claim=claim,
+                    provider=provider_for_audit,
+                    model=model_for_audit,
+                    config_version=config_version,
+                    request=request,
+                )
+            )
+            stream_owns_claim = True
+            return response
+
+        gw = await call_ai(scene=scene, user_input=user_message, context=context, resolved=resolved)
         cost_ms = int((time.perf_counter() - started) * 1000)
         provider_for_audit = str(gw.provider.provider_type or "")
         model_for_audit = str((gw.provider.extra or {}).get("default_model") or "")
+        config_version = gw.config_version
         await _audit_ai_call(
             user_id=user_id,
             provider=provider_for_audit,
@@ -178,6 +263,7 @@ async def ai_chat(
             error_code=None,
             config_version=config_version,
             request=request,
+            cache_hit=gw.cache_hit,
         )
 
         data = AiChatResp(
@@ -209,21 +295,94 @@ async def ai_chat(
                 error_code=error_code,
                 config_version=config_version,
                 request=request,
+                stream=want_stream,
             )
             await idem.set(
                 operation="ai_chat",
                 actor_type="USER",
                 actor_id=user_id,
                 idempotency_key=idem_key,
-                result=IdempotencyCachedResult(
-                    status_code=int(exc.status_code),
-                    success=False,
-                    data=None,
-                    error={
-                        "code": error_code,
-                        "message": str(detail.get("message") or "AI 服务调用失败"),
-                        "details": None,
-                    },
-                ),
+                result=_failure_result(exc),
             )
         raise
+    finally:
+        # 未写回结果（前置校验失败等）时释放处理中标记，允许重试重新执行；已写回时为空操作
+        if not stream_owns_claim:
+            await idem.release(claim)
+
+
+async def _relay_stream(
+    *,
+    gws: AiGatewayStream,
+    first: str,
+    ttft_ms: int,
+    started: float,
+    scene: str,
+    user_id: str,
+    idem: IdempotencyService,
+    idem_key: str,
+    claim: IdempotencyClaim,
+    provider: str,
+    model: str,
+    config_version: str | None,
+    request: Request,
+) -> AsyncIterator[bytes]:
+    """转发增量；结束后审计并把拼接后的完整消息写入幂等缓存（客户端中途断开则不缓存，重试会重新生成）。"""
+
+    try:
+        parts = [first]
+        yield format_sse("delta", {"content": first})
+        try:
+            async for delta in gws.deltas:
+                parts.append(delta)
+                yield format_sse("delta", {"content": delta})
+        except HTTPException as exc:
+            detail: dict[str, object] = exc.detail if isinstance(exc.detail, dict) else {}
+            error_code = str(detail.get("code") or "INTERNAL_ERROR")
+            await _audit_ai_call(
+                user_id=user_id,
+                provider=provider,
+                model=model,
+                scene=scene,
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                result_status="fail",
+                error_code=error_code,
+                config_version=config_version,
+                request=request,
+                stream=True,
+                ttft_ms=ttft_ms,
+            )
+            failure = _failure_result(exc)
+            await idem.set(operation="ai_chat", actor_type="USER", actor_id=user_id, idempotency_key=idem_key, result=failure)
+            err = failure.error or {}
+            yield format_sse(
+                "error",
+                fail(code=str(err.get("code")), message=str(err.get("message")), request_id=request.state.request_id),
+            )
+            return
+
+        data = AiChatResp(message={"role": "assistant", "content": "".join(parts).strip()}, scene=scene).model_dump()
+        await _audit_ai_call(
+            user_id=user_id,
+            provider=provider,
+            model=model,
+            scene=scene,
+            latency_ms=int((time.perf_counter() - started) * 1000),
+            result_status="success",
+            error_code=None,
+            config_version=config_version,
+            request=request,
+            stream=True,
+            ttft_ms=ttft_ms,
+            cache_hit=gws.cache_hit,
+        )
+        await idem.set(
+            operation="ai_chat",
+            actor_type="USER",
+            actor_id=user_id,
+            idempotency_key=idem_key,
+            result=IdempotencyCachedResult(status_code=200, success=True, data=data, error=None),
+        )
+        yield format_sse("done", ok(data=data, request_id=request.state.request_id))
+    finally:
+        await idem.release(claim)
@@ -12,11 +12,13 @@ from datetime import date, datetime, timedelta, timezone
 from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import func, select
+from sqlalchemy import select
 
 from app.api.v1.deps import require_admin
 from app.models.audit_log import AuditLog
+from app.services.search import AUDIT_LOG_SEARCH, highlights, keyword_search
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.response import ok
 
 router = APIRouter(tags=["admin-audit-logs"])
@@ -113,10 +115,13 @@ async def admin_list_audit_logs(
     dateTo: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
     _admin=Depends(require_admin),
 ):
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(AuditLog.created_at,), id_col=AuditLog.id)
+    after = keyset.decode(cursor)
 
     stmt = select(AuditLog)
     if actorType:
@@ -129,8 +134,10 @@ async def admin_list_audit_logs(
         stmt = stmt.where(AuditLog.resource_type == resourceType.strip())
     if resourceId and resourceId.strip():
         stmt = stmt.where(AuditLog.resource_id == resourceId.strip())
-    if keyword and keyword.strip():
-        stmt = stmt.where(AuditLog.summary.like(f"%{keyword.strip()}%"))
+    # keyword：FULLTEXT 检索摘要；审计日志仍按时间倒序（不按相关度）
+    search = keyword_search(AUDIT_LOG_SEARCH, keyword)
+    if search is not None:
+        stmt = stmt.where(search.where)
     # Spec: dateFrom/dateTo are Beijing natural days (YYYY-MM-DD)
     if dateFrom:
         d_from = _parse_beijing_day(str(dateFrom), field_name="dateFrom")
@@ -142,15 +149,19 @@ async def admin_list_audit_logs(
         _start_utc_naive, end_utc_naive_exclusive = _beijing_day_range_to_utc_naive(d_to)
         stmt = stmt.where(AuditLog.created_at < end_utc_naive_exclusive)
 
-    stmt = stmt.order_by(AuditLog.created_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        logs = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        logs = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
 
     return ok(
-        data={"items": [_dto(x) for x in logs], "page": page, "pageSize": page_size, "total": total},
+        data={
+            "items": [{**_dto(x), "highlight": highlights(x, search)} for x in logs],
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(logs, page_size=page_size),
+        },
         request_id=request.state.request_id,
     )
@@ -22,7 +22,9 @@ from app.models.enterprise import Enterprise
 from app.models.enums import UserEnterpriseBindingStatus
 from app.models.user import User
 from app.models.user_enterprise_binding import UserEnterpriseBinding
-from app.services.enterprise_matching import EnterpriseCandidate, normalize_enterprise_name, suggest_enterprises
+from app.services.enterprise_matching import normalize_enterprise_name
+from app.services.enterprise_suggestion_index import get_enterprise_suggestion_index
+from app.services.actor_cache import invalidate_actor_cache
 from app.services.sms_code_service import SmsCodeService
 from app.services.user_identity_service import compute_identities_and_member_valid_until
 from app.services.enterprise_binding_rules import can_submit_new_binding
@@ -136,11 +138,11 @@ class EnterpriseSuggestionRespItem(BaseModel):
 @router.get("/auth/enterprise-suggestions")
 async def enterprise_suggestions(request: Request, keyword: str = ""):
     # v1：不强制登录；keyword 为空返回空列表
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        enterprises = (await session.scalars(select(Enterprise).limit(2000))).all()
-        candidates = [EnterpriseCandidate(id=e.id, name=e.name, city_code=e.city_code) for e in enterprises]
-        suggestions = suggest_enterprises(keyword=keyword, enterprises=candidates, limit=10)
+    # 全表联想索引（进程内缓存，企业新增/修改后自动重建；口径同 suggest_enterprises）
+    suggestions = []
+    if normalize_enterprise_name(keyword):
+        index = await get_enterprise_suggestion_index()
+        suggestions = index.suggest(keyword, limit=10)
 
     return ok(
         data={
@@ -285,6 +287,7 @@ async def user_refresh(request: Request, authorization: str | None = Header(defa
     now = int(datetime.now(tz=UTC).timestamp())
     ttl = max(1, exp - now)
     await redis.set(user_token_blacklist_key(jti=str(payload["jti"])), "1", ex=ttl)
+    await invalidate_actor_cache(jtis=[str(payload["jti"])])
 
     new_token = create_user_token(user_id=str(payload["sub"]), channel=str(payload.get("channel") or "H5"))
     return ok(data={"token": new_token}, request_id=request.state.request_id)
@@ -303,6 +306,7 @@ async def user_logout(request: Request, authorization: str | None = Header(defau
 
     redis = get_redis()
     await redis.set(user_token_blacklist_key(jti=str(payload["jti"])), "1", ex=ttl)
+    await invalidate_actor_cache(jtis=[str(payload["jti"])])
     return ok(data={"success": True}, request_id=request.state.request_id)
 
 
@@ -24,7 +24,6 @@ from uuid import uuid4
 from typing import cast
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from sqlalchemy import func, select
 
@@ -46,24 +45,25 @@ from app.models.enums import (
     ProductFulfillmentType,
     VenuePublishStatus,
 )
-from app.models.system_config import SystemConfig
 from app.models.venue import Venue
-from app.models.venue_schedule import VenueSchedule
 from app.models.venue_service import VenueService
-from app.services.booking_capacity_rules import can_reserve_capacity, release_capacity, reserve_capacity
 from app.services.booking_confirmation_rules import booking_state_on_create
 from app.services.booking_state_machine import assert_booking_status_transition
 from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
 from app.services.provider_auth_context import try_get_provider_context
+from app.services.rbac import request_actor
+from app.services.slot_capacity import SlotKey, cancel_booking_releasing_slot, try_reserve_slot
+from app.services.system_config_cache import get_enabled_config_value
 from app.services.venue_filtering_rules import VenueLite, VenueRegion, filter_venues_by_entitlement
 from app.services.booking_rules import can_cancel_confirmed_booking
-from app.api.v1.deps import require_user
+from app.api.v1.deps import require_user, IdempotencyGuard, idempotency_guard
 from app.api.v1.deps import require_admin, require_admin_phone_bound
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_token import decode_and_validate_user_token
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.datetime_iso import iso as _iso
 from app.utils.date_ymd import ymd as _ymd
@@ -76,6 +76,11 @@ def _require_idempotency_key(idempotency_key: str | None) -> str:
     return idempotency_key.strip()
 
 
+def _booking_state_changed() -> HTTPException:
+    # 读取后状态已被并发请求改变（如同一预约被重复取消）
+    return HTTPException(status_code=409, detail={"code": "STATE_CONFLICT", "message": "预约状态已变更，请刷新后重试"})
+
+
 def _user_context_from_authorization(authorization: str | None) -> dict:
     token = _extract_bearer_token(authorization)
     payload = decode_and_validate_user_token(token=token)
@@ -97,35 +102,6 @@ async def _try_get_admin_context(authorization: str | None) -> dict | None:
     return {"actorType": "ADMIN", "adminId": str(payload["sub"])}
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: IdemActorType,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(
-        operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key
-    )
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 def _booking_dto(b: Booking) -> dict:
     return {
         "id": b.id,
@@ -148,22 +124,13 @@ def _booking_dto(b: Booking) -> dict:
     }
 
 
-async def _booking_confirmation_method_v1(*, session) -> str:
-    """v1：读取全局配置，缺省 AUTO。"""
+async def _booking_confirmation_method_v1(*, session) -> str:  # noqa: ARG001
+    """v1：读取全局配置（走 SystemConfig 读缓存），缺省 AUTO。"""
 
-    row = (
-        await session.scalars(
-            select(SystemConfig)
-            .where(
-                SystemConfig.key == "BOOKING_CONFIRMATION_METHOD",
-                SystemConfig.status == CommonEnabledStatus.ENABLED.value,
-            )
-            .limit(1)
-        )
-    ).first()
-    if row is None:
+    raw = await get_enabled_config_value("BOOKING_CONFIRMATION_METHOD")
+    if raw is None:
         return BookingConfirmationMethod.AUTO.value
-    method = str((row.value_json or {}).get("method", "")).strip().upper()
+    method = str(raw.get("method", "")).strip().upper()
     if method in {BookingConfirmationMethod.AUTO.value, BookingConfirmationMethod.MANUAL.value}:
         return method
     return BookingConfirmationMethod.AUTO.value
@@ -250,12 +217,12 @@ async def create_booking(
     body: CreateBookingBody,
     user=Depends(require_user),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     user_id = str(user.sub)
 
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="create_booking",
         actor_type="USER",
         actor_id=user_id,
@@ -363,25 +330,18 @@ async def create_booking(
             if existing is not None:
                 raise HTTPException(status_code=409, detail={"code": "STATE_CONFLICT", "message": "该订单已存在预约记录"})
 
-        # 容量校验与扣减
-        sched = (
-            await session.scalars(
-                select(VenueSchedule)
-                .where(
-                    VenueSchedule.venue_id == venue_id,
-                    VenueSchedule.service_type == service_type,
-                    VenueSchedule.booking_date == booking_date,
-                    VenueSchedule.time_slot == time_slot,
-                    VenueSchedule.status == CommonEnabledStatus.ENABLED.value,
-                )
-                .limit(1)
-            )
-        ).first()
-        if sched is None:
-            raise HTTPException(status_code=409, detail={"code": "CAPACITY_FULL", "message": "容量不足"})
-        if not can_reserve_capacity(remaining_capacity=int(sched.remaining_capacity)):
+        # 容量校验与扣减：单条条件 UPDATE（remaining_capacity > 0 才扣减），避免并发超卖
+        reserved = await try_reserve_slot(
+            session=session,
+            slot=SlotKey(
+                venue_id=str(venue_id),
+                service_type=str(service_type),
+                booking_date=booking_date,
+                time_slot=time_slot,
+            ),
+        )
+        if not reserved:
             raise HTTPException(status_code=409, detail={"code": "CAPACITY_FULL", "message": "容量不足"})
-        sched.remaining_capacity = reserve_capacity(remaining_capacity=int(sched.remaining_capacity))
 
         # 自动/人工确认（属性17）
         cm = await _booking_confirmation_method_v1(session=session)
@@ -481,7 +441,9 @@ async def get_booking_detail(
     """
 
     admin_ctx = await _try_get_admin_context(authorization)
-    provider_ctx = None if admin_ctx else await try_get_provider_context(authorization=authorization)
+    provider_ctx = (
+        None if admin_ctx else await try_get_provider_context(authorization=authorization, actor=request_actor(request))
+    )
     user_ctx = None if (admin_ctx or provider_ctx) else _user_context_from_authorization(authorization)
 
     session_factory = get_session_factory()
@@ -568,29 +530,12 @@ async def cancel_booking(
                     detail={"code": "BOOKING_CANCEL_WINDOW_CLOSED", "message": "预约取消窗口已关闭"},
                 )
 
-        # 释放容量（属性19）
-        sched = (
-            await session.scalars(
-                select(VenueSchedule)
-                .where(
-                    VenueSchedule.venue_id == b.venue_id,
-                    VenueSchedule.service_type == b.service_type,
-                    VenueSchedule.booking_date == b.booking_date,
-                    VenueSchedule.time_slot == b.time_slot,
-                )
-                .limit(1)
-            )
-        ).first()
-        if sched is not None:
-            sched.remaining_capacity = release_capacity(
-                remaining_capacity=int(sched.remaining_capacity),
-                capacity=int(sched.capacity),
-            )
-
         assert_booking_status_transition(current=b.status, target=BookingStatus.CANCELLED.value)
-        b.status = BookingStatus.CANCELLED.value
-        b.cancelled_at = now
-        b.cancel_reason = "USER_CANCEL"
+        # 条件取消 + 释放容量（属性19）：并发取消同一预约只回补一次
+        if not await cancel_booking_releasing_slot(
+            session=session, booking=b, cancelled_at=now, cancel_reason="USER_CANCEL"
+        ):
+            raise _booking_state_changed()
         await session.commit()
 
     return ok(data=_booking_dto(b), request_id=request.state.request_id)
@@ -607,6 +552,7 @@ async def admin_cancel_booking(
     body: AdminCancelBookingBody,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     admin=Depends(require_admin_phone_bound),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     """Admin 强制取消预约（v1 最小）。
 
@@ -620,8 +566,7 @@ async def admin_cancel_booking(
     idem_key = _require_idempotency_key(idempotency_key)
 
     # 幂等复放（同 bookingId + idemKey）
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="admin_cancel_booking",
         actor_type=actor_type,
         actor_id=actor_id,
@@ -663,30 +608,12 @@ async def admin_cancel_booking(
             )
 
         before_status = b.status
-        # 释放容量（属性19）
-        sched = (
-            await session.scalars(
-                select(VenueSchedule)
-                .where(
-                    VenueSchedule.venue_id == b.venue_id,
-                    VenueSchedule.service_type == b.service_type,
-                    VenueSchedule.booking_date == b.booking_date,
-                    VenueSchedule.time_slot == b.time_slot,
-                )
-                .limit(1)
-            )
-        ).first()
-        if sched is not None:
-            sched.remaining_capacity = release_capacity(
-                remaining_capacity=int(sched.remaining_capacity),
-                capacity=int(sched.capacity),
-            )
-
         assert_booking_status_transition(current=b.status, target=BookingStatus.CANCELLED.value)
-        b.status = BookingStatus.CANCELLED.value
-        b.cancelled_at = now
-        # 记录原因（必须填写）：避免超长
-        b.cancel_reason = ("ADMIN_CANCEL:" + reason)[:255]
+        # 条件取消 + 释放容量（属性19）；记录原因（必须填写）：避免超长
+        if not await cancel_booking_releasing_slot(
+            session=session, booking=b, cancelled_at=now, cancel_reason=("ADMIN_CANCEL:" + reason)[:255]
+        ):
+            raise _booking_state_changed()
 
         # 业务审计（必做）：强制取消（reason 截断）
         session.add(
@@ -739,6 +666,7 @@ async def admin_list_bookings(
     providerId: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
     _admin=Depends(require_admin),
 ):
     """Admin 预约监管查询（只读）。
@@ -759,6 +687,8 @@ async def admin_list_bookings(
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "page 必须 >= 1"})
     if ps_i not in {10, 20, 50, 100}:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "pageSize 仅支持 10/20/50/100"})
+    keyset = DescKeyset(keys=(Booking.booking_date, Booking.created_at), id_col=Booking.id)
+    after = keyset.decode(cursor)
 
     stmt = select(Booking).join(Venue, Venue.id == Booking.venue_id, isouter=True)
 
@@ -804,16 +734,20 @@ async def admin_list_bookings(
             kw = f"%{kw0}%"
             stmt = stmt.where((Booking.id.like(kw)) | (Booking.user_id.like(kw)) | (Booking.venue_id.like(kw)))
 
-    stmt = stmt.order_by(Booking.booking_date.desc(), Booking.created_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page_i - 1) * ps_i).limit(ps_i))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        rows = (await session.scalars(keyset.paginate(stmt, after=after, page=page_i, page_size=ps_i))).all()
 
     return ok(
-        data={"items": [_booking_dto(x) for x in rows], "page": page_i, "pageSize": ps_i, "total": total},
+        data={
+            "items": [_booking_dto(x) for x in rows],
+            "page": page_i,
+            "pageSize": ps_i,
+            "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(rows, page_size=ps_i),
+        },
         request_id=request.state.request_id,
     )
 
@@ -824,9 +758,12 @@ async def confirm_booking(
     id: str,
     authorization: str | None = Header(default=None),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     admin_ctx = await _try_get_admin_context(authorization)
-    provider_ctx = None if admin_ctx else await try_get_provider_context(authorization=authorization)
+    provider_ctx = (
+        None if admin_ctx else await try_get_provider_context(authorization=authorization, actor=request_actor(request))
+    )
     if not admin_ctx and not provider_ctx:
         raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "无权限访问"})
 
@@ -839,8 +776,7 @@ async def confirm_booking(
         actor_id = str(provider_ctx.actorId)
 
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="confirm_booking",
         actor_type=actor_type,
         actor_id=actor_id,
@@ -892,7 +828,9 @@ async def list_provider_bookings(
     pageSize: int = 20,
 ):
     admin_ctx = await _try_get_admin_context(authorization)
-    provider_ctx = None if admin_ctx else await try_get_provider_context(authorization=authorization)
+    provider_ctx = (
+        None if admin_ctx else await try_get_provider_context(authorization=authorization, actor=request_actor(request))
+    )
     if not admin_ctx and not provider_ctx:
         raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "无权限访问"})
 
@@ -953,7 +891,7 @@ async def provider_cancel_booking(
     - 必须释放容量（属性19）
     """
 
-    provider_ctx = await try_get_provider_context(authorization=authorization)
+    provider_ctx = await try_get_provider_context(authorization=authorization, actor=request_actor(request))
     if not provider_ctx:
         raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "无权限访问"})
 
@@ -975,29 +913,12 @@ async def provider_cancel_booking(
         if b.status in {BookingStatus.CANCELLED.value, BookingStatus.COMPLETED.value}:
             raise HTTPException(status_code=409, detail={"code": "STATE_CONFLICT", "message": "预约状态不允许取消"})
 
-        # 释放容量（属性19）
-        sched = (
-            await session.scalars(
-                select(VenueSchedule)
-                .where(
-                    VenueSchedule.venue_id == b.venue_id,
-                    VenueSchedule.service_type == b.service_type,
-                    VenueSchedule.booking_date == b.booking_date,
-                    VenueSchedule.time_slot == b.time_slot,
-                )
-                .limit(1)
-            )
-        ).first()
-        if sched is not None:
-            sched.remaining_capacity = release_capacity(
-                remaining_capacity=int(sched.remaining_capacity),
-                capacity=int(sched.capacity),
-            )
-
         assert_booking_status_transition(current=b.status, target=BookingStatus.CANCELLED.value)
-        b.status = BookingStatus.CANCELLED.value
-        b.cancelled_at = now
-        b.cancel_reason = "PROVIDER_CANCEL"
+        # 条件取消 + 释放容量（属性19）
+        if not await cancel_booking_releasing_slot(
+            session=session, booking=b, cancelled_at=now, cancel_reason="PROVIDER_CANCEL"
+        ):
+            raise _booking_state_changed()
         await session.commit()
 
     return ok(data=_booking_dto(b), request_id=request.state.request_id)
@@ -15,16 +15,15 @@ from datetime import datetime
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import delete, select
 
 from app.models.cart import Cart, CartItem
 from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
 from app.utils.db import get_session_factory
-from app.api.v1.deps import require_user
+from app.api.v1.deps import require_user, IdempotencyGuard, idempotency_guard
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 
 router = APIRouter(tags=["cart"])
@@ -39,32 +38,6 @@ def _cart_item_dto(x: CartItem) -> dict:
     return {"id": x.id, "itemType": x.item_type, "itemId": x.item_id, "quantity": int(x.quantity)}
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation=operation, actor_type="USER", actor_id=actor_id, idempotency_key=idempotency_key)
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 async def _get_or_create_cart(*, session, user_id: str) -> Cart:
     c = (await session.scalars(select(Cart).where(Cart.user_id == user_id).limit(1))).first()
     if c is not None:
@@ -99,12 +72,13 @@ async def add_cart_item(
     body: AddCartItemBody,
     user=Depends(require_user),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     user_id = str(user.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="cart_add_item",
+        actor_type="USER",
         actor_id=user_id,
         idempotency_key=idem_key,
     )
@@ -158,12 +132,13 @@ async def update_cart_item(
     body: UpdateCartItemBody,
     user=Depends(require_user),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     user_id = str(user.sub)
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="cart_update_item",
+        actor_type="USER",
         actor_id=user_id,
         idempotency_key=f"{id}:{idem_key}",
     )
@@ -29,7 +29,7 @@ import bleach
 import markdown as mdlib
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, or_, select
 
 from app.api.v1.deps import require_admin, require_admin_phone_bound
 from app.models.audit_log import AuditLog
@@ -37,7 +37,9 @@ from app.models.cms_channel import CmsChannel
 from app.models.cms_content import CmsContent
 from app.models.enums import AuditAction, AuditActorType, CmsContentStatus, CommonEnabledStatus
 from app.services.rbac import ActorContext
+from app.services.search import CMS_CONTENT_SEARCH, highlights, keyword_search
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
 
@@ -264,20 +266,23 @@ async def mini_program_list_cms_contents(
     stmt = select(CmsContent).where(mp_status_col == CmsContentStatus.PUBLISHED.value, effective_cond)
     if channelId:
         stmt = stmt.where(CmsContent.channel_id == str(channelId))
-    if keyword and keyword.strip():
-        kw = f"%{keyword.strip()}%"
-        stmt = stmt.where(or_(CmsContent.title.like(kw), CmsContent.summary.like(kw)))
+    search = keyword_search(CMS_CONTENT_SEARCH, keyword)
+    if search is not None:
+        stmt = stmt.where(search.where)
 
     # 规格意图：按 publishedAt 倒序（无发布时间的排在最后），再按 createdAt 倒序
     # MySQL 不支持 "ORDER BY ... NULLS LAST" 语法，使用布尔表达式实现 nulls last：
     # published_at IS NULL: false(0) 排前、true(1) 排后
     base_stmt = stmt
-    stmt = base_stmt.order_by(mp_pub_at_col.is_(None).asc(), mp_pub_at_col.desc(), CmsContent.created_at.desc())
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
+    # 关键词检索：相关度优先，其余口径不变
+    rank = [search.score.desc()] if search is not None and search.score is not None else []
+    stmt = base_stmt.order_by(
+        *rank, mp_pub_at_col.is_(None).asc(), mp_pub_at_col.desc(), CmsContent.created_at.desc(), CmsContent.id.desc()
+    )
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
+        total, total_capped = await count_capped(session=session, stmt=base_stmt)
         items = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
 
     # 规格：列表 item 字段收敛
@@ -289,11 +294,12 @@ async def mini_program_list_cms_contents(
             "coverImageUrl": x.cover_image_url,
             "summary": x.summary,
             "publishedAt": _iso(getattr(x, "mp_published_at", None)),
+            "highlight": highlights(x, search),
         }
         for x in items
     ]
     return ok(
-        data={"items": data_items, "page": page, "pageSize": page_size, "total": total},
+        data={"items": data_items, "page": page, "pageSize": page_size, "total": total, "totalCapped": total_capped},
         request_id=request.state.request_id,
     )
 
@@ -319,19 +325,23 @@ async def website_list_cms_contents(
     stmt = select(CmsContent).where(CmsContent.status == CmsContentStatus.PUBLISHED.value, effective_cond)
     if channelId:
         stmt = stmt.where(CmsContent.channel_id == str(channelId))
-    if keyword and keyword.strip():
-        kw = f"%{keyword.strip()}%"
-        stmt = stmt.where(or_(CmsContent.title.like(kw), CmsContent.summary.like(kw)))
+    search = keyword_search(CMS_CONTENT_SEARCH, keyword)
+    if search is not None:
+        stmt = stmt.where(search.where)
 
     base_stmt = stmt
+    rank = [search.score.desc()] if search is not None and search.score is not None else []
     stmt = base_stmt.order_by(
-        CmsContent.published_at.is_(None).asc(), CmsContent.published_at.desc(), CmsContent.created_at.desc()
+        *rank,
+        CmsContent.published_at.is_(None).asc(),
+        CmsContent.published_at.desc(),
+        CmsContent.created_at.desc(),
+        CmsContent.id.desc(),
     )
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
+        total, total_capped = await count_capped(session=session, stmt=base_stmt)
         items = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
 
     data_items = [
@@ -342,10 +352,14 @@ async def website_list_cms_contents(
             "coverImageUrl": x.cover_image_url,
             "summary": x.summary,
             "publishedAt": _iso(x.published_at),
+            "highlight": highlights(x, search),
         }
         for x in items
     ]
-    return ok(data={"items": data_items, "page": page, "pageSize": page_size, "total": total}, request_id=request.state.request_id)
+    return ok(
+        data={"items": data_items, "page": page, "pageSize": page_size, "total": total, "totalCapped": total_capped},
+        request_id=request.state.request_id,
+    )
 
 
 @router.get("/mini-program/cms/contents/{id}")
@@ -497,10 +511,13 @@ async def admin_list_cms_contents(
     includeContent: bool = True,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
 
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(CmsContent.updated_at,), id_col=CmsContent.id)
+    after = keyset.decode(cursor)
 
     stmt = select(CmsContent)
     if channelId:
@@ -511,9 +528,9 @@ async def admin_list_cms_contents(
             stmt = stmt.where(mp_status_col == str(status))
         else:
             stmt = stmt.where(CmsContent.status == str(status))
-    if keyword and keyword.strip():
-        kw = f"%{keyword.strip()}%"
-        stmt = stmt.where(or_(CmsContent.title.like(kw), CmsContent.summary.like(kw)))
+    search = keyword_search(CMS_CONTENT_SEARCH, keyword)
+    if search is not None:
+        stmt = stmt.where(search.where)
     # Spec (Admin): dateFrom/dateTo are Beijing natural days (YYYY-MM-DD)
     if dateFrom:
         df = str(dateFrom).strip()
@@ -529,13 +546,10 @@ async def admin_list_cms_contents(
         else:
             stmt = stmt.where(CmsContent.created_at <= _parse_dt_utc_naive(dt_s))
 
-    stmt = stmt.order_by(CmsContent.updated_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        items = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        items = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
 
     # REQ-P0-004：列表返回 contentHtml 以支持增量编辑
     data_items: list[dict] = []
@@ -557,10 +571,18 @@ async def admin_list_cms_contents(
                 "updatedAt": _iso(x.updated_at),
                 "contentHtml": x.content_html if includeContent else None,
                 "contentMd": getattr(x, "content_md", None) if includeContent else None,
+                "highlight": highlights(x, search),
             }
         )
     return ok(
-        data={"items": data_items, "page": page, "pageSize": page_size, "total": total},
+        data={
+            "items": data_items,
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(items, page_size=page_size),
+        },
         request_id=request.state.request_id,
     )
 
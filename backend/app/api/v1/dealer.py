@@ -13,28 +13,35 @@ v1 说明：
 
 from __future__ import annotations
 
-import csv
-import io
+import asyncio
+import os
 from datetime import UTC, date, datetime, timedelta, timezone
 from typing import Literal
 
 from fastapi import APIRouter, Header, HTTPException, Request
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import func, select, update
 from sqlalchemy.orm import aliased
 
-from app.models.audit_log import AuditLog
 from app.models.bind_token import BindToken
 from app.models.card import Card
 from app.models.enums import CardStatus, OrderType, PaymentStatus
-from app.models.enums import AuditAction, AuditActorType
+from app.models.enums import AuditActorType
 from app.models.dealer_settlement_account import DealerSettlementAccount
 from app.models.order import Order
 from app.models.settlement_record import SettlementRecord
 from app.models.user import User
 from app.models.dealer_user import DealerUser
 from app.models.admin import Admin
+from app.services.dealer_order_export import (
+    DealerOrderExportFilters,
+    iter_dealer_orders_csv,
+    job_file_path,
+    load_job,
+    save_job,
+    write_export_audit,
+)
 from app.utils.db import get_session_factory
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_dealer_token import decode_and_validate_dealer_token
@@ -283,6 +290,39 @@ async def list_dealer_orders(
     )
 
 
+def _export_filters(
+    *,
+    dealer_id: str,
+    dealerLinkId: str | None,
+    orderNo: str | None,
+    phone: str | None,
+    paymentStatus: str | None,
+    dateFrom: str | None,
+    dateTo: str | None,
+) -> DealerOrderExportFilters:
+    if not (dateFrom and str(dateFrom).strip()):
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dateFrom 必填（YYYY-MM-DD）"})
+    if not (dateTo and str(dateTo).strip()):
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dateTo 必填（YYYY-MM-DD）"})
+
+    d_from = _parse_beijing_day(str(dateFrom), field_name="dateFrom")
+    start_utc, _end_exclusive = _beijing_day_range_to_utc_naive(d_from)
+    d_to = _parse_beijing_day(str(dateTo), field_name="dateTo")
+    _start_utc, end_exclusive = _beijing_day_range_to_utc_naive(d_to)
+
+    return DealerOrderExportFilters(
+        dealer_id=dealer_id,
+        start_utc=start_utc,
+        end_exclusive=end_exclusive,
+        date_from=str(dateFrom),
+        date_to=str(dateTo),
+        dealer_link_id=(str(dealerLinkId).strip() or None) if dealerLinkId else None,
+        order_no=(orderNo.strip() or None) if orderNo else None,
+        payment_status=str(paymentStatus) if paymentStatus else None,
+        phone=(phone.strip() or None) if phone else None,
+    )
+
+
 @router.get("/dealer/orders/export")
 async def export_dealer_orders_csv(
     request: Request,
@@ -295,12 +335,14 @@ async def export_dealer_orders_csv(
     dateFrom: str | None = None,
     dateTo: str | None = None,
 ):
-    """导出：同步直下 CSV（TTL=0，不落盘）。
+    """导出：同步流式直下 CSV（TTL=0，不落盘）。
 
-    规格来源：specs-prod/admin/security.md#5 + specs-prod/admin/api-contracts.md#10(9)
-    约束（你已拍板）：
+    规格来源：specs-prod/admin/security.md#5 + specs-prod/admin/api-contracts.md#9D
+    约束：
     - dateFrom/dateTo 必填（不填就禁止导出）
-    - maxRows=5000，超限拒绝并提示缩小范围
+    - 不限行数：服务端游标分批读取 + 边读边写（内存与行数无关，见 app/services/dealer_order_export.py）；
+      超大区间可改用异步导出任务（POST /dealer/orders/export-jobs）
+    - 审计在流结束时写入（含 rowCount；客户端中途断开记 completed=false）
     """
 
     ctx = await _require_dealer_or_admin_context(authorization=authorization)
@@ -308,129 +350,175 @@ async def export_dealer_orders_csv(
     if not dealer_id:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dealerId 不能为空"})
 
-    if not (dateFrom and str(dateFrom).strip()):
-        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dateFrom 必填（YYYY-MM-DD）"})
-    if not (dateTo and str(dateTo).strip()):
-        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dateTo 必填（YYYY-MM-DD）"})
+    filters = _export_filters(
+        dealer_id=dealer_id,
+        dealerLinkId=dealerLinkId,
+        orderNo=orderNo,
+        phone=phone,
+        paymentStatus=paymentStatus,
+        dateFrom=dateFrom,
+        dateTo=dateTo,
+    )
+    request_id = request.state.request_id
+    ip = getattr(getattr(request, "client", None), "host", None)
+    user_agent = request.headers.get("User-Agent")
+
+    async def _body():
+        counter = [0]
+        completed = False
+        try:
+            async for chunk in iter_dealer_orders_csv(
+                filters=filters, batch_size=settings.dealer_export_batch_size, counter=counter
+            ):
+                yield chunk
+            completed = True
+        finally:
+            actor_type, actor_id = _audit_actor(ctx)
+            await asyncio.shield(
+                write_export_audit(
+                    actor_type=actor_type,
+                    actor_id=actor_id,
+                    filters=filters,
+                    request_id=request_id,
+                    ip=ip,
+                    user_agent=user_agent,
+                    row_count=counter[0],
+                    mode="STREAM",
+                    completed=completed,
+                )
+            )
 
-    d_from = _parse_beijing_day(str(dateFrom), field_name="dateFrom")
-    start_utc, _end_exclusive = _beijing_day_range_to_utc_naive(d_from)
-    d_to = _parse_beijing_day(str(dateTo), field_name="dateTo")
-    _start_utc, end_exclusive = _beijing_day_range_to_utc_naive(d_to)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filters.filename()}"',
+        "Cache-Control": "no-store",
+    }
+    return StreamingResponse(_body(), media_type="text/csv; charset=utf-8", headers=headers)
+
+
+class CreateDealerOrderExportJobBody(BaseModel):
+    dealerId: str | None = None
+    dealerLinkId: str | None = None
+    orderNo: str | None = None
+    phone: str | None = None
+    paymentStatus: Literal["PENDING", "PAID", "FAILED", "REFUNDED"] | None = None
+    dateFrom: str | None = None
+    dateTo: str | None = None
+
+
+def _export_job_dto(job: dict) -> dict:
+    return {
+        "jobId": job.get("jobId"),
+        "status": job.get("status"),
+        "dealerId": job.get("dealerId"),
+        "rowCount": job.get("rowCount"),
+        "fileName": job.get("fileName"),
+        "createdAt": job.get("createdAt"),
+        "finishedAt": job.get("finishedAt"),
+        "expiresAt": job.get("expiresAt"),
+        "error": job.get("error"),
+    }
 
-    # 注意：aliased(User) 必须“只创建一次并复用”，否则会生成 users_1/users_2/users_3 等别名，
-    # 导致 join/on clause 引用错别名（MySQL 1054 Unknown column in 'on clause'）。
-    u = aliased(User)
-    stmt = select(Order, u.phone).select_from(Order).join(u, u.id == Order.user_id, isouter=True)  # type: ignore[arg-type]
-    # v1：仅返回健行天下订单
-    stmt = stmt.where(Order.order_type == OrderType.SERVICE_PACKAGE.value)
-    stmt = stmt.where(Order.dealer_id == dealer_id)
-    stmt = stmt.where(Order.created_at >= start_utc)
-    stmt = stmt.where(Order.created_at < end_exclusive)
 
-    if dealerLinkId and str(dealerLinkId).strip():
-        stmt = stmt.where(getattr(Order, "dealer_link_id") == str(dealerLinkId).strip())
-    if orderNo and orderNo.strip():
-        stmt = stmt.where(Order.id == orderNo.strip())
-    if paymentStatus:
-        stmt = stmt.where(Order.payment_status == paymentStatus)
-    if phone and phone.strip():
-        # 已 join u（isouter=True），这里只追加过滤即可
-        stmt = stmt.where(u.phone.like(f"%{phone.strip()}%"))
+async def _load_export_job_for_ctx(*, ctx: dict, job_id: str) -> dict:
+    job = await load_job(redis=get_redis(), job_id=str(job_id))
+    # 数据范围：DEALER 仅能访问本 dealer 的任务（不存在/越权统一 404，避免探测）
+    if job is None or (str(ctx.get("actorType")) == "DEALER" and str(job.get("dealerId")) != str(ctx.get("dealerId"))):
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "导出任务不存在或已过期"})
+    return job
 
-    stmt = stmt.order_by(Order.created_at.desc()).limit(5001)
 
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        rows = (await session.execute(stmt)).all()
+@router.post("/dealer/orders/export-jobs")
+async def create_dealer_orders_export_job(
+    request: Request,
+    body: CreateDealerOrderExportJobBody,
+    authorization: str | None = Header(default=None),
+):
+    """导出：异步任务模式（大区间/大批量）。
 
-        if len(rows) > 5000:
-            raise HTTPException(
-                status_code=400,
-                detail={"code": "INVALID_ARGUMENT", "message": "导出行数超过 5000，请缩小日期范围或增加筛选条件"},
-            )
+    说明：
+    - 生成文件落到 DEALER_EXPORT_DIR（TTL=DEALER_EXPORT_JOB_TTL_SECONDS），完成后给发起人发站内通知；
+    - 轮询：GET /dealer/orders/export-jobs/{jobId}；下载：GET /dealer/orders/export-jobs/{jobId}/download。
+    """
 
-        # 复用列表逻辑：预取订单明细与可售卡
-        order_ids = [o.id for o, _buyer_phone in rows]
-        item_map: dict[str, list] = {}
-        card_map: dict[str, "SellableCard"] = {}
-        if order_ids:
-            from app.models.order_item import OrderItem  # noqa: WPS433
-            from app.models.sellable_card import SellableCard  # noqa: WPS433
+    ctx = await _require_dealer_or_admin_context(authorization=authorization)
+    dealer_id = str(ctx.get("dealerId") or (body.dealerId or "")).strip()
+    if not dealer_id:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "dealerId 不能为空"})
 
-            items = (await session.scalars(select(OrderItem).where(OrderItem.order_id.in_(order_ids)))).all()
-            for it in items:
-                item_map.setdefault(it.order_id, []).append(it)
+    filters = _export_filters(
+        dealer_id=dealer_id,
+        dealerLinkId=body.dealerLinkId,
+        orderNo=body.orderNo,
+        phone=body.phone,
+        paymentStatus=body.paymentStatus,
+        dateFrom=body.dateFrom,
+        dateTo=body.dateTo,
+    )
+    job = {
+        "jobId": str(uuid4()),
+        "status": "PENDING",
+        "dealerId": dealer_id,
+        "ctx": ctx,
+        "filters": filters.to_json(),
+        "requestId": request.state.request_id,
+        "ip": getattr(getattr(request, "client", None), "host", None),
+        "userAgent": request.headers.get("User-Agent"),
+        "fileName": filters.filename(),
+        "rowCount": None,
+        "createdAt": _iso(datetime.now(tz=UTC)),
+        "finishedAt": None,
+        "expiresAt": None,
+        "error": None,
+    }
+    await save_job(redis=get_redis(), job=job)
 
-            card_ids = list(
-                {
-                    str(it.item_id)
-                    for it in items
-                    if str(it.item_type) == "SERVICE_PACKAGE" and str(it.item_id or "").strip()
-                }
-            )
-            if card_ids:
-                cards = (await session.scalars(select(SellableCard).where(SellableCard.id.in_(card_ids)))).all()
-                card_map = {c.id: c for c in cards}
+    try:
+        from app.tasks.dealer_exports import export_dealer_orders  # noqa: WPS433
 
-        # CSV 内容
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["订单号", "投放链接ID", "卡片", "区域级别", "手机号", "支付状态", "金额", "创建时间", "支付时间"])
-
-        for o, buyer_phone in rows:
-            oi0 = (item_map.get(o.id) or [None])[0]
-            sellable = card_map.get(getattr(oi0, "item_id", "") or "")
-            writer.writerow(
-                [
-                    o.id,
-                    getattr(o, "dealer_link_id", None) or "",
-                    (sellable.name if sellable is not None else "") or "",
-                    (sellable.region_level if sellable is not None else "") or "",
-                    _mask_phone(buyer_phone) or "",
-                    o.payment_status or "",
-                    float(o.total_amount or 0.0),
-                    _iso(o.created_at) or "",
-                    _iso(o.paid_at) or "",
-                ]
-            )
+        # 投递在线程中执行：broker 缓慢时不阻塞事件循环
+        await asyncio.to_thread(export_dealer_orders.delay, job["jobId"])
+    except Exception as exc:  # noqa: BLE001
+        job["status"] = "FAILED"
+        job["error"] = "ENQUEUE_FAILED"
+        await save_job(redis=get_redis(), job=job)
+        raise HTTPException(
+            status_code=500, detail={"code": "INTERNAL_ERROR", "message": "导出任务提交失败，请稍后重试"}
+        ) from exc
 
-        actor_type, actor_id = _audit_actor(ctx)
-        session.add(
-            AuditLog(
-                id=str(uuid4()),
-                actor_type=actor_type,
-                actor_id=actor_id,
-                action=AuditAction.UPDATE.value,  # v1：不新增 EXPORT 枚举
-                resource_type="EXPORT_DEALER_ORDERS",
-                resource_id=dealer_id,
-                summary=f"导出经销商订单 CSV：dealerId={dealer_id}",
-                ip=getattr(getattr(request, "client", None), "host", None),
-                user_agent=request.headers.get("User-Agent"),
-                metadata_json={
-                    "requestId": request.state.request_id,
-                    "dealerId": dealer_id,
-                    "filters": {
-                        "dealerLinkId": (str(dealerLinkId).strip() if dealerLinkId else None),
-                        "orderNo": (str(orderNo).strip() if orderNo else None),
-                        "paymentStatus": str(paymentStatus) if paymentStatus else None,
-                        "dateFrom": str(dateFrom),
-                        "dateTo": str(dateTo),
-                    },
-                    "rowCount": int(len(rows)),
-                    "maxRows": 5000,
-                },
-            )
-        )
-        await session.commit()
+    return ok(data=_export_job_dto(job), request_id=request.state.request_id)
 
-    content = "\ufeff" + output.getvalue()
-    filename = f"dealer-orders-{dealer_id}-{str(dateFrom)}-{str(dateTo)}.csv"
-    headers = {
-        "Content-Disposition": f'attachment; filename="{filename}"',
-        "Cache-Control": "no-store",
-    }
-    return Response(content=content, media_type="text/csv; charset=utf-8", headers=headers)
+
+@router.get("/dealer/orders/export-jobs/{jobId}")
+async def get_dealer_orders_export_job(
+    request: Request,
+    jobId: str,
+    authorization: str | None = Header(default=None),
+):
+    ctx = await _require_dealer_or_admin_context(authorization=authorization)
+    job = await _load_export_job_for_ctx(ctx=ctx, job_id=jobId)
+    return ok(data=_export_job_dto(job), request_id=request.state.request_id)
+
+
+@router.get("/dealer/orders/export-jobs/{jobId}/download")
+async def download_dealer_orders_export_job(
+    jobId: str,
+    authorization: str | None = Header(default=None),
+):
+    ctx = await _require_dealer_or_admin_context(authorization=authorization)
+    job = await _load_export_job_for_ctx(ctx=ctx, job_id=jobId)
+    if job.get("status") != "DONE":
+        raise HTTPException(status_code=409, detail={"code": "STATE_CONFLICT", "message": "导出文件尚未生成"})
+    path = job_file_path(str(job["jobId"]))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "导出任务不存在或已过期"})
+    return FileResponse(
+        path,
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="{job.get("fileName") or "dealer-orders.csv"}"',
+            "Cache-Control": "no-store",
+        },
+    )
 
 
 class RegenerateBindTokenResp(BaseModel):
@@ -22,6 +22,7 @@ from app.models.enums import DealerStatus
 from app.models.audit_log import AuditLog
 from app.models.enums import AuditAction, AuditActorType
 from app.services.password_hashing import hash_password, verify_password
+from app.services.rate_limit import record_failure
 from app.services.sms_code_service import SmsCodeService
 from app.utils.db import get_session_factory
 from app.utils.jwt_dealer_token import create_dealer_token, decode_and_validate_dealer_token
@@ -62,13 +63,16 @@ async def _raise_if_login_locked(*, redis, username: str) -> None:
 
 
 async def _record_login_failure(*, redis, username: str) -> None:
-    key = _login_fail_key(username)
-    n = int(await redis.incr(key))
-    if n == 1:
-        await redis.expire(key, _LOGIN_FAIL_WINDOW_SECONDS)
-    if n >= _LOGIN_FAIL_MAX:
-        await redis.set(_login_lock_key(username), "1", ex=_LOGIN_LOCK_SECONDS)
-        await redis.delete(key)
+    # 计数/过期/锁定/清理计数（避免重复累计造成锁定延长）一次往返原子完成
+    await record_failure(
+        fail_key=_login_fail_key(username),
+        lock_key=_login_lock_key(username),
+        max_failures=_LOGIN_FAIL_MAX,
+        window_seconds=_LOGIN_FAIL_WINDOW_SECONDS,
+        lock_seconds=_LOGIN_LOCK_SECONDS,
+        reset_on_lock=True,
+        redis=redis,
+    )
 
 
 async def _ensure_dealer_seed(session) -> None:
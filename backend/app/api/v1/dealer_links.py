@@ -19,8 +19,7 @@ from datetime import UTC, datetime
 from typing import Literal, cast
 from uuid import uuid4
 
-from fastapi import APIRouter, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel, Field
 from sqlalchemy import func, select, update
 
@@ -31,12 +30,13 @@ from app.models.dealer_user import DealerUser
 from app.models.enums import AuditAction, AuditActorType, DealerLinkStatus, DealerStatus
 from app.models.sellable_card import SellableCard
 from app.services.dealer_signing import sign_params, verify_params
+from app.api.v1.deps import IdempotencyGuard, idempotency_guard
 from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
 from app.utils.db import get_session_factory
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_dealer_token import decode_and_validate_dealer_token
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.settings import settings
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.datetime_iso import iso as _iso
@@ -68,37 +68,6 @@ def _ctx_actor_for_audit(ctx: dict) -> tuple[str, str]:
     return (AuditActorType.ADMIN.value, str(ctx.get("actorId") or ""))
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: str,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(
-        operation=operation,
-        actor_type=cast(IdemActorType, actor_type),
-        actor_id=actor_id,
-        idempotency_key=idempotency_key,
-    )
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 async def _require_admin_context(authorization: str | None) -> dict:
     token = _extract_bearer_token(authorization)
     payload = decode_and_validate_admin_token(token=token)
@@ -184,14 +153,14 @@ async def create_dealer_link(
     body: CreateDealerLinkBody,
     authorization: str | None = Header(default=None),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     ctx = await _require_dealer_or_admin_context(authorization=authorization)
     idem_key = _require_idempotency_key(idempotency_key)
     idem_actor_type, idem_actor_id = _ctx_actor_for_idempotency(ctx)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="create_dealer_link",
-        actor_type=idem_actor_type,
+        actor_type=cast(IdemActorType, idem_actor_type),
         actor_id=idem_actor_id,
         idempotency_key=idem_key,
     )
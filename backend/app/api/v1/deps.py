@@ -6,20 +6,29 @@
 说明：
 - 依赖优先复用 RbacContextMiddleware 注入的 request.state.actor（避免重复解码）
 - 若 middleware 未注入或本端点要求强认证，则使用 Authorization 解析并校验黑名单
+- `idempotency_guard`：写接口幂等重放/认领的统一依赖（见 services/idempotency.py）
 """
 
 from __future__ import annotations
 
+import logging
+from collections.abc import AsyncIterator
+
 from fastapi import Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from sqlalchemy import select
 
 from app.models.admin import Admin
 from app.utils.db import get_session_factory
+from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyClaim, IdempotencyService
 from app.services.provider_auth_context import ProviderContext, require_provider_context
 from app.services.rbac import ActorContext, ActorType, parse_actor_from_bearer_token, require_actor_types
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.redis_client import get_redis
+from app.utils.response import fail, ok
+
+logger = logging.getLogger(__name__)
 
 
 async def optional_actor(request: Request, authorization: str | None = Header(default=None)) -> ActorContext | None:
@@ -79,6 +88,74 @@ async def require_admin_phone_bound(
     return actor
 
 
-async def require_provider(authorization: str | None = Header(default=None)) -> ProviderContext:
-    return await require_provider_context(authorization=authorization)
+async def require_provider(request: Request, authorization: str | None = Header(default=None)) -> ProviderContext:
+    actor = getattr(request.state, "actor", None)
+    return await require_provider_context(
+        authorization=authorization, actor=actor if isinstance(actor, ActorContext) else None
+    )
+
+
+class IdempotencyGuard:
+    """单个请求内的幂等入口：命中首次结果则返回重放响应，否则认领执行权。
+
+    端点执行完毕（正常返回或抛错）后由 `idempotency_guard` 释放未写回结果的认领；
+    业务照旧用 `IdempotencyService.set` 写回结果（覆盖处理中标记）。
+    """
 
+    def __init__(self, request: Request) -> None:
+        self._request = request
+        self._service: IdempotencyService | None = None
+        self._claims: list[IdempotencyClaim] = []
+
+    async def replay_or_claim(
+        self,
+        *,
+        operation: str,
+        actor_type: IdemActorType,
+        actor_id: str,
+        idempotency_key: str,
+    ) -> JSONResponse | None:
+        if self._service is None:
+            self._service = IdempotencyService(get_redis())
+        outcome = await self._service.claim(
+            operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key
+        )
+        if isinstance(outcome, IdempotencyClaim):
+            self._claims.append(outcome)
+            return None
+        return _replay_response(request=self._request, cached=outcome)
+
+    async def release(self) -> None:
+        claims, self._claims = self._claims, []
+        service = self._service
+        if service is None:
+            return
+        for claim in claims:
+            try:
+                await service.release(claim)
+            except Exception:  # noqa: BLE001
+                # 释放失败不影响本次响应；标记会在租约到期后自动消失
+                logger.warning("idempotency claim release failed: key=%s", claim.key, exc_info=True)
+
+
+def _replay_response(*, request: Request, cached: IdempotencyCachedResult) -> JSONResponse:
+    # data/error 复用首次结果，requestId 取当前请求
+    if cached.success:
+        payload = ok(data=cached.data, request_id=request.state.request_id)
+    else:
+        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
+        payload = fail(
+            code=str(err.get("code", "INTERNAL_ERROR")),
+            message=str(err.get("message", "服务器内部错误")),
+            details=err.get("details"),
+            request_id=request.state.request_id,
+        )
+    return JSONResponse(status_code=int(cached.status_code), content=payload)
+
+
+async def idempotency_guard(request: Request) -> AsyncIterator[IdempotencyGuard]:
+    guard = IdempotencyGuard(request)
+    try:
+        yield guard
+    finally:
+        await guard.release()
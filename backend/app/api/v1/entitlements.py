@@ -16,8 +16,7 @@ from uuid import uuid4
 
 from typing import cast
 
-from fastapi import APIRouter, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy import func, select
 
@@ -46,15 +45,17 @@ from app.services.entitlement_qr_signing import verify_payload_text
 from app.services.entitlement_state_machine import assert_entitlement_status_transition
 from app.services.booking_state_machine import assert_booking_status_transition
 from app.services.booking_redeem_rules import can_redeem_with_booking_requirement
+from app.api.v1.deps import IdempotencyGuard, idempotency_guard
 from app.services.idempotency import IdemActorType, IdempotencyCachedResult, IdempotencyService
 from app.services.entitlement_redeem_rules import apply_redeem
 from app.services.provider_auth_context import try_get_provider_context
-from app.services.rbac import ActorType, parse_actor_from_bearer_token, require_actor_types
+from app.services.rbac import ActorType, parse_actor_from_bearer_token, request_actor, require_actor_types
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_token import decode_and_validate_user_token
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.settings import settings
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.datetime_iso import iso as _iso
@@ -167,35 +168,6 @@ def _require_idempotency_key(idempotency_key: str | None) -> str:
     return idempotency_key.strip()
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_type: IdemActorType,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(
-        operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key
-    )
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 def _voucher_code_v1() -> str:
     return uuid4().hex[:16].upper()
 
@@ -228,6 +200,7 @@ async def redeem_entitlement(
     body: RedeemEntitlementBody,
     authorization: str | None = Header(default=None),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     """核销权益（v1 最小）。
 
@@ -240,7 +213,7 @@ async def redeem_entitlement(
     """
 
     admin_ctx = await _try_get_admin_context(authorization)
-    provider_ctx = None if admin_ctx else await try_get_provider_context(authorization=authorization)
+    provider_ctx = None if admin_ctx else await try_get_provider_context(authorization=authorization, actor=request_actor(request))
     if not admin_ctx and not provider_ctx:
         raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "无权限访问"})
 
@@ -253,8 +226,7 @@ async def redeem_entitlement(
         operator_id = str(provider_ctx.actorId)
 
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="redeem_entitlement",
         actor_type=actor_type,
         actor_id=operator_id,
@@ -467,6 +439,7 @@ async def list_entitlements(
     status: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
     # USER/ADMIN 皆可；其余 actor（DEALER/PROVIDER）必须 403；未携带/无效 token 401
     token = _extract_bearer_token(authorization)
@@ -476,6 +449,8 @@ async def list_entitlements(
 
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(Entitlement.created_at,), id_col=Entitlement.id)
+    after = keyset.decode(cursor)
 
     stmt = select(Entitlement)
     if not is_admin:
@@ -484,14 +459,10 @@ async def list_entitlements(
         stmt = stmt.where(Entitlement.entitlement_type == type)
     if status:
         stmt = stmt.where(Entitlement.status == status)
-    stmt = stmt.order_by(Entitlement.created_at.desc())
-
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        rows = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
 
         agg = await _load_redemption_agg(session=session, entitlement_ids=[x.id for x in rows])
 
@@ -516,6 +487,8 @@ async def list_entitlements(
             "page": page,
             "pageSize": page_size,
             "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(rows, page_size=page_size),
         },
         request_id=request.state.request_id,
     )
@@ -561,6 +534,7 @@ async def transfer_entitlement(
     body: TransferEntitlementBody,
     authorization: str | None = Header(default=None),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     """转赠权益（v1 最小）。
 
@@ -581,8 +555,7 @@ async def transfer_entitlement(
         actor_id = str(user_ctx["userId"])
 
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="transfer_entitlement",
         actor_type=actor_type,
         actor_id=actor_id,
@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from sqlalchemy import select
 
 from app.models.bind_token import BindToken
@@ -29,10 +29,10 @@ from app.models.package_service import PackageService
 from app.models.sellable_card import SellableCard
 from app.models.service_package import ServicePackage
 from app.models.legal_agreement import LegalAgreement
-from app.models.system_config import SystemConfig
 from app.utils.db import get_session_factory
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
+from app.services.system_config_cache import conditional_enabled_config_value, get_enabled_config_value
 from app.services.wechat_h5_jssdk import build_wechat_jssdk_config
 
 router = APIRouter(tags=["h5-config"])
@@ -54,18 +54,8 @@ def _assert_dealer_link_usable(*, link: DealerLink, now_utc) -> None:
 
 
 async def _get_enabled_value(key: str) -> dict | None:
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        cfg = (
-            await session.scalars(
-                select(SystemConfig)
-                .where(SystemConfig.key == key, SystemConfig.status == CommonEnabledStatus.ENABLED.value)
-                .limit(1)
-            )
-        ).first()
-    if cfg is None:
-        return None
-    return cfg.value_json or {}
+    # 读穿缓存（L1 + Redis），admin 写入提交后自动失效
+    return await get_enabled_config_value(key)
 
 async def _get_published_legal(code: str) -> LegalAgreement | None:
     session_factory = get_session_factory()
@@ -81,8 +71,10 @@ async def _get_published_legal(code: str) -> LegalAgreement | None:
 
 
 @router.get("/h5/landing/faq-terms")
-async def h5_get_faq_terms(request: Request):
-    raw = await _get_enabled_value(_KEY_FAQ_TERMS)
+async def h5_get_faq_terms(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(request=request, response=response, key=_KEY_FAQ_TERMS)
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(data={"items": [], "termsText": "", "version": "0"}, request_id=request.state.request_id)
 
@@ -131,8 +123,12 @@ async def h5_get_service_agreement(request: Request):
 
 
 @router.get("/h5/mini-program/launch")
-async def h5_get_mini_program_launch(request: Request):
-    raw = await _get_enabled_value(_KEY_MINI_PROGRAM_LAUNCH)
+async def h5_get_mini_program_launch(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(
+        request=request, response=response, key=_KEY_MINI_PROGRAM_LAUNCH
+    )
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(data={"appid": "", "path": "", "fallbackText": None, "version": "0"}, request_id=request.state.request_id)
 
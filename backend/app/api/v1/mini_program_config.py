@@ -7,17 +7,22 @@
 说明（v1 最小）：
 - 规格仅约束对外接口契约（response shape 与只读规则），不约束内部存储实现。
 - 本实现采用 SystemConfig（key/valueJson）作为最小承载，便于后续替换为 B2「通用表 + schema」方案。
+- 配置读取走 services/system_config_cache；纯配置派生的接口（entries/pages/collections）支持 ETag/304。
 """
 
 from __future__ import annotations
 
 from typing import Any, Literal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from sqlalchemy import select
 
-from app.models.system_config import SystemConfig
-from app.models.enums import CommonEnabledStatus
+from app.services.system_config_cache import (
+    conditional_enabled_config_value,
+    get_enabled_config_value,
+    get_system_config,
+    not_modified_or_tag,
+)
 from app.utils.db import get_session_factory
 from app.utils.response import ok
 
@@ -32,18 +37,8 @@ _KEY_HOME_RECOMMENDED_PRODUCTS = "MINI_PROGRAM_HOME_RECOMMENDED_PRODUCTS"
 
 
 async def _get_enabled_config_value(key: str) -> dict | None:
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        cfg = (
-            await session.scalars(
-                select(SystemConfig)
-                .where(SystemConfig.key == key, SystemConfig.status == CommonEnabledStatus.ENABLED.value)
-                .limit(1)
-            )
-        ).first()
-    if cfg is None:
-        return None
-    return cfg.value_json or {}
+    # 读穿缓存（L1 + Redis），admin 写入提交后自动失效
+    return await get_enabled_config_value(key)
 
 
 @router.get("/mini-program/home/recommended-venues")
@@ -160,9 +155,11 @@ async def mini_program_get_home_recommended_products(request: Request):
 
 
 @router.get("/mini-program/entries")
-async def mini_program_get_entries(request: Request):
+async def mini_program_get_entries(request: Request, response: Response):
     # 规格：仅返回“已启用 + 已发布”的入口配置
-    raw = await _get_enabled_config_value(_KEY_ENTRIES)
+    not_modified, raw = await conditional_enabled_config_value(request=request, response=response, key=_KEY_ENTRIES)
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(data={"items": [], "version": "0"}, request_id=request.state.request_id)
 
@@ -197,9 +194,10 @@ async def mini_program_get_entries(request: Request):
 
 
 @router.get("/mini-program/pages/{id}")
-async def mini_program_get_page(request: Request, id: str):
+async def mini_program_get_page(request: Request, response: Response, id: str):
     # 规格：仅返回“已发布版本”的页面配置；否则 NOT_FOUND
-    raw = await _get_enabled_config_value(_KEY_PAGES)
+    entry = await get_system_config(_KEY_PAGES)
+    raw = entry.value if entry.enabled else None
     if raw is None:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "页面不存在"})
 
@@ -215,6 +213,10 @@ async def mini_program_get_page(request: Request, id: str):
     if page_type not in ("AGG_PAGE", "INFO_PAGE"):
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "页面不存在"})
 
+    not_modified = not_modified_or_tag(request=request, response=response, entry=entry)
+    if not_modified is not None:
+        return not_modified
+
     return ok(
         data={
             "id": str(page.get("id") or id),
@@ -251,6 +253,7 @@ def _match_taxonomy(item: dict, taxonomy_id: str | None) -> bool:
 @router.get("/mini-program/collections/{id}/items")
 async def mini_program_get_collection_items(
     request: Request,
+    response: Response,
     id: str,
     page: int = 1,
     pageSize: int = 20,
@@ -262,7 +265,8 @@ async def mini_program_get_collection_items(
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
-    raw = await _get_enabled_config_value(_KEY_COLLECTIONS)
+    entry = await get_system_config(_KEY_COLLECTIONS)
+    raw = entry.value if entry.enabled else None
     if raw is None:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "集合不存在"})
 
@@ -274,6 +278,10 @@ async def mini_program_get_collection_items(
     if not isinstance(col, dict) or not bool(col.get("published")):
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "集合不存在"})
 
+    not_modified = not_modified_or_tag(request=request, response=response, entry=entry)
+    if not_modified is not None:
+        return not_modified
+
     items = col.get("items") or []
     if not isinstance(items, list):
         items = []
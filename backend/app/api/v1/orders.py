@@ -13,24 +13,17 @@
 from __future__ import annotations
 
 from datetime import UTC, date, datetime, timedelta, timezone
-import base64
 import json
 from typing import Literal, Sequence
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 import sqlalchemy as sa
-from sqlalchemy import case, func, select
+from sqlalchemy import func, select
 from sqlalchemy.orm import aliased
 
-import httpx
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives.serialization import load_pem_private_key
-
-from app.api.v1.deps import require_admin, require_admin_phone_bound
+from app.api.v1.deps import require_admin, require_admin_phone_bound, IdempotencyGuard, idempotency_guard
 from app.models.audit_log import AuditLog
 from app.models.dealer import Dealer
 from app.models.enums import (
@@ -59,12 +52,16 @@ from app.services.dealer_signing import verify_params
 from app.services.idempotency import IdempotencyCachedResult, IdempotencyService
 from app.services.order_rules import order_items_match_order_type
 from app.services.pricing import resolve_price
+from app.services.stock_reservation import reserve_order_stock
+from app.services.wechatpay_crypto import sign_with_mch_key
+from app.utils.pagination import DescKeyset, count_capped
 from app.services.entitlement_scope_rules import parse_region_scope
+from app.utils import http_clients
 from app.utils.db import get_session_factory
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_token import decode_and_validate_user_token
 from app.utils.redis_client import get_redis
-from app.utils.response import fail, ok
+from app.utils.response import ok
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.datetime_iso import iso as _iso
 from app.utils.settings import settings
@@ -385,32 +382,6 @@ def _order_dto(o: Order, items: Sequence[OrderItem]) -> dict:
     }
 
 
-async def _idempotency_replay_if_exists(
-    *,
-    request: Request,
-    operation: str,
-    actor_id: str,
-    idempotency_key: str,
-) -> JSONResponse | None:
-    idem = IdempotencyService(get_redis())
-    cached = await idem.get(operation=operation, actor_type="USER", actor_id=actor_id, idempotency_key=idempotency_key)
-    if cached is None:
-        return None
-
-    if cached.success:
-        payload = ok(data=cached.data, request_id=request.state.request_id)
-    else:
-        err = cached.error or {"code": "INTERNAL_ERROR", "message": "服务器内部错误", "details": None}
-        payload = fail(
-            code=str(err.get("code", "INTERNAL_ERROR")),
-            message=str(err.get("message", "服务器内部错误")),
-            details=err.get("details"),
-            request_id=request.state.request_id,
-        )
-
-    return JSONResponse(status_code=int(cached.status_code), content=payload)
-
-
 class CreateOrderItemBody(BaseModel):
     itemType: Literal["PRODUCT", "SERVICE_PACKAGE"]
     itemId: str
@@ -446,6 +417,7 @@ async def create_order(
     ts: int | None = None,
     nonce: str | None = None,
     sign: str | None = None,
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     # 订单类型校验
     try:
@@ -491,9 +463,9 @@ async def create_order(
         buyer_phone = None
 
     idem_key = _require_idempotency_key(idempotency_key)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="create_order",
+        actor_type="USER",
         actor_id=idem_actor_id,
         idempotency_key=idem_key,
     )
@@ -627,6 +599,7 @@ async def create_order(
 
         product_map: dict[str, Product] = {}
         sellable_card_map: dict[str, SellableCard] = {}
+        stock_quantities: dict[str, int] = {}
 
         # 拉取商品（仅 PRODUCT 需要）
         if order_type == OrderType.PRODUCT:
@@ -825,12 +798,12 @@ async def create_order(
                     raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "商品不存在或不可购买"})
                 if str(p.fulfillment_type) != str(product_fulfillment):
                     raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "商品类型不匹配"})
-                # v2：物流商品库存占用
+                # v2：物流商品库存占用（按商品合并，提交前统一原子预占，见 services/stock_reservation.py）
                 if product_fulfillment == ProductFulfillmentType.PHYSICAL_GOODS.value:
-                    available = int(p.stock or 0) - int(p.reserved_stock or 0)
-                    if available < int(it.quantity):
+                    stock_quantities[p.id] = stock_quantities.get(p.id, 0) + int(it.quantity)
+                    # 快照预检（不加锁）：已售罄时直接拒绝，抢购时不必再去争热点行锁
+                    if int(p.stock or 0) - int(p.reserved_stock or 0) < stock_quantities[p.id]:
                         raise HTTPException(status_code=409, detail={"code": "OUT_OF_STOCK", "message": "库存不足"})
-                    p.reserved_stock = int(p.reserved_stock or 0) + int(it.quantity)
                 title = p.title
                 biz_item_id = p.id
                 unit_price, unit_price_type = resolve_price(p.price or {}, identities=identities)
@@ -898,6 +871,9 @@ async def create_order(
             oi.order_id = o.id
             session.add(oi)
 
+        # 最后一步预占库存：热点商品行锁只持有到提交；任一商品不足 => 409，整单回滚
+        await reserve_order_stock(session=session, order_id=o.id, quantities=stock_quantities)
+
         await session.commit()
 
     data = _order_dto(o, order_items)
@@ -923,26 +899,26 @@ async def list_orders(
     orderType: Literal["PRODUCT", "SERVICE_PACKAGE"] | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
     user_ctx = _user_context_from_authorization(authorization)
     user_id = user_ctx["userId"]
 
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(Order.created_at,), id_col=Order.id)
+    after = keyset.decode(cursor)
 
     stmt = select(Order).where(Order.user_id == user_id)
     if status:
         stmt = stmt.where(Order.payment_status == status)
     if orderType:
         stmt = stmt.where(Order.order_type == orderType)
-    stmt = stmt.order_by(Order.created_at.desc())
-
-    count_stmt = select(func.count()).select_from(stmt.subquery())
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        orders = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        orders = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
 
         # v1：Order 接口返回 items，按订单批量查询
         order_ids = [o.id for o in orders]
@@ -958,6 +934,8 @@ async def list_orders(
             "page": page,
             "pageSize": page_size,
             "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(orders, page_size=page_size),
         },
         request_id=request.state.request_id,
     )
@@ -979,6 +957,7 @@ async def admin_list_orders(
     dateTo: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
     # specs/health-services-platform/design.md -> E-1 admin 订单监管（v1 最小契约）
     # 权限：仅 ADMIN（由 require_admin 负责 401/403）
@@ -986,51 +965,10 @@ async def admin_list_orders(
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
-    u = aliased(User)
+    keyset = DescKeyset(keys=(Order.created_at,), id_col=Order.id)
+    after = keyset.decode(cursor)
 
-    # items 聚合：用于列表“订单摘要”（快速识别，不承诺真实顺序）
-    items_agg = (
-        select(
-            OrderItem.order_id.label("order_id"),
-            func.count(OrderItem.id).label("items_count"),
-            func.min(OrderItem.title).label("first_item_title"),
-        )
-        .select_from(OrderItem)
-        .group_by(OrderItem.order_id)
-        .subquery()
-    )
-
-    # providerId 推导：从订单明细关联商品。若同一订单存在多个 provider，则 providerId 置空。
-    provider_agg = (
-        select(
-            OrderItem.order_id.label("order_id"),
-            func.min(Product.provider_id).label("min_provider_id"),
-            func.max(Product.provider_id).label("max_provider_id"),
-        )
-        .select_from(OrderItem)
-        .join(Product, Product.id == OrderItem.item_id, isouter=True)
-        .where(OrderItem.item_type.in_([OrderItemType.PRODUCT.value]))
-        .group_by(OrderItem.order_id)
-        .subquery()
-    )
-
-    provider_id_expr = case(
-        (provider_agg.c.min_provider_id == provider_agg.c.max_provider_id, provider_agg.c.min_provider_id),
-        else_=None,
-    ).label("provider_id")
-
-    stmt = (
-        select(
-            Order,
-            u.phone,
-            provider_id_expr,
-            items_agg.c.items_count,
-            items_agg.c.first_item_title,
-        )
-        .join(u, u.id == Order.user_id, isouter=True)
-        .join(provider_agg, provider_agg.c.order_id == Order.id, isouter=True)
-        .join(items_agg, items_agg.c.order_id == Order.id, isouter=True)
-    )
+    stmt = select(Order)
 
     if orderNo and orderNo.strip():
         stmt = stmt.where(Order.id == orderNo.strip())
@@ -1038,7 +976,10 @@ async def admin_list_orders(
         stmt = stmt.where(Order.user_id == userId.strip())
     if phone and phone.strip():
         raw = phone.strip()
-        stmt = stmt.where(sa.or_(u.phone.like(f"%{raw}%"), Order.buyer_phone.like(f"%{raw}%")))
+        u = aliased(User)
+        stmt = stmt.join(u, u.id == Order.user_id, isouter=True).where(
+            sa.or_(u.phone.like(f"%{raw}%"), Order.buyer_phone.like(f"%{raw}%"))
+        )
     if orderType:
         stmt = stmt.where(Order.order_type == str(orderType))
     if fulfillmentType:
@@ -1048,7 +989,17 @@ async def admin_list_orders(
     if dealerId and dealerId.strip():
         stmt = stmt.where(Order.dealer_id == dealerId.strip())
     if providerId and providerId.strip():
-        stmt = stmt.where(provider_id_expr == providerId.strip())
+        # providerId 推导：订单 PRODUCT 明细关联商品的 provider 唯一且等于该值（多 provider 的订单不命中）
+        pid = providerId.strip()
+        stmt = stmt.where(
+            Order.id.in_(
+                select(OrderItem.order_id)
+                .join(Product, Product.id == OrderItem.item_id)
+                .where(OrderItem.item_type == OrderItemType.PRODUCT.value)
+                .group_by(OrderItem.order_id)
+                .having(sa.and_(func.min(Product.provider_id) == pid, func.max(Product.provider_id) == pid))
+            )
+        )
 
     # Spec (Admin): dateFrom/dateTo are YYYY-MM-DD interpreted as Beijing natural days.
     if dateFrom:
@@ -1061,13 +1012,50 @@ async def admin_list_orders(
         # inclusive end-of-day implemented as next day start (exclusive)
         stmt = stmt.where(Order.created_at < end_utc_naive_exclusive)
 
-    stmt = stmt.order_by(Order.created_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.execute(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        orders = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
+
+        # 本页订单的买家手机号 / 明细摘要 / providerId（只聚合本页，避免整表 GROUP BY）
+        order_ids = [o.id for o in orders]
+        user_ids = sorted({o.user_id for o in orders})
+        phone_by_user: dict[str, str | None] = {}
+        items_agg: dict[str, tuple[int, str | None]] = {}
+        provider_by_order: dict[str, str | None] = {}
+        if order_ids:
+            phone_by_user = dict(
+                (await session.execute(select(User.id, User.phone).where(User.id.in_(user_ids)))).tuples().all()
+            )
+            for oid, cnt, first_title in (
+                await session.execute(
+                    select(OrderItem.order_id, func.count(OrderItem.id), func.min(OrderItem.title))
+                    .where(OrderItem.order_id.in_(order_ids))
+                    .group_by(OrderItem.order_id)
+                )
+            ).all():
+                items_agg[str(oid)] = (int(cnt or 0), first_title)
+            # 若同一订单存在多个 provider，则 providerId 置空
+            for oid, min_pid, max_pid in (
+                await session.execute(
+                    select(OrderItem.order_id, func.min(Product.provider_id), func.max(Product.provider_id))
+                    .join(Product, Product.id == OrderItem.item_id)
+                    .where(OrderItem.order_id.in_(order_ids), OrderItem.item_type == OrderItemType.PRODUCT.value)
+                    .group_by(OrderItem.order_id)
+                )
+            ).all():
+                provider_by_order[str(oid)] = min_pid if min_pid == max_pid else None
+
+    rows = [
+        (
+            o,
+            phone_by_user.get(o.user_id),
+            provider_by_order.get(o.id),
+            items_agg.get(o.id, (0, None))[0],
+            items_agg.get(o.id, (0, None))[1],
+        )
+        for o in orders
+    ]
 
     items: list[dict] = []
     for o, buyer_phone, provider_id, items_count, first_item_title in rows:
@@ -1100,7 +1088,14 @@ async def admin_list_orders(
         )
 
     return ok(
-        data={"items": items, "page": page, "pageSize": page_size, "total": total},
+        data={
+            "items": items,
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(orders, page_size=page_size),
+        },
         request_id=request.state.request_id,
     )
 
@@ -1145,37 +1140,8 @@ async def get_order_detail(
 class PayOrderBody(BaseModel):
     paymentMethod: Literal["WECHAT"]
 
-def _load_wechatpay_mch_private_key_pem() -> bytes:
-    raw = (settings.wechat_pay_mch_private_key_pem_or_path or "").strip()
-    if not raw:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "code": "PAYMENT_NOT_CONFIGURED",
-                "message": "微信支付未配置：缺少商户私钥（WECHAT_PAY_MCH_PRIVATE_KEY_PEM_OR_PATH）",
-            },
-        )
-
-    if raw.startswith("-----BEGIN"):
-        return raw.encode("utf-8")
 
-    try:
-        with open(raw, "rb") as f:  # noqa: PTH123
-            return f.read()
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(
-            status_code=400,
-            detail={"code": "PAYMENT_NOT_CONFIGURED", "message": "微信支付配置无效：无法读取商户私钥文件"},
-        ) from exc
-
-
-def _wechatpay_sign_rsa_sha256(*, message: str) -> str:
-    key = load_pem_private_key(_load_wechatpay_mch_private_key_pem(), password=None)
-    sig = key.sign(message.encode("utf-8"), padding.PKCS1v15(), hashes.SHA256())
-    return base64.b64encode(sig).decode("utf-8")
-
-
-def _wechatpay_build_authorization(*, method: str, canonical_url: str, body_json: str) -> tuple[str, str, str]:
+async def _wechatpay_build_authorization(*, method: str, canonical_url: str, body_json: str) -> tuple[str, str, str]:
     mchid = (settings.wechat_pay_mch_id or "").strip()
     serial_no = (settings.wechat_pay_mch_cert_serial or "").strip()
     if not mchid or not serial_no:
@@ -1190,7 +1156,8 @@ def _wechatpay_build_authorization(*, method: str, canonical_url: str, body_json
     ts = str(int(datetime.now(tz=UTC).timestamp()))
     nonce = str(uuid4()).replace("-", "")
     message = f"{method}\n{canonical_url}\n{ts}\n{nonce}\n{body_json}\n"
-    signature = _wechatpay_sign_rsa_sha256(message=message)
+    # 商户私钥已解析并缓存（services/wechatpay_crypto.py），签名在线程中执行
+    signature = await sign_with_mch_key(message)
     auth = (
         'WECHATPAY2-SHA256-RSA2048 '
         f'mchid="{mchid}",nonce_str="{nonce}",timestamp="{ts}",serial_no="{serial_no}",signature="{signature}"'
@@ -1223,7 +1190,9 @@ async def _wechatpay_jsapi_prepay(*, order_id: str, amount: float, openid: str)
     }
     body_json = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
     canonical_url = "/v3/pay/transactions/jsapi"
-    auth, _ts, _nonce = _wechatpay_build_authorization(method="POST", canonical_url=canonical_url, body_json=body_json)
+    auth, _ts, _nonce = await _wechatpay_build_authorization(
+        method="POST", canonical_url=canonical_url, body_json=body_json
+    )
 
     headers = {
         "Authorization": auth,
@@ -1232,9 +1201,15 @@ async def _wechatpay_jsapi_prepay(*, order_id: str, amount: float, openid: str)
         "User-Agent": "LHMY/mini-program-pay",
     }
     try:
-        async with httpx.AsyncClient(timeout=10.0, base_url=base_url) as client:
-            r = await client.post(canonical_url, content=body_json.encode("utf-8"), headers=headers)
-            data = r.json() if r.content else {}
+        r = await http_clients.request(
+            "POST",
+            base_url.rstrip("/") + canonical_url,
+            upstream="wechat_pay",
+            timeout=10.0,
+            content=body_json.encode("utf-8"),
+            headers=headers,
+        )
+        data = r.json() if r.content else {}
     except Exception as exc:  # noqa: BLE001
         return {"ok": False, "failureReason": "微信支付网络请求失败", "raw": {"error": str(exc)}}
 
@@ -1244,13 +1219,13 @@ async def _wechatpay_jsapi_prepay(*, order_id: str, amount: float, openid: str)
     return {"ok": True, "prepayId": str(data["prepay_id"]), "raw": data}
 
 
-def _wechatpay_build_jsapi_pay_params(*, prepay_id: str) -> dict:
+async def _wechatpay_build_jsapi_pay_params(*, prepay_id: str) -> dict:
     appid = (settings.wechat_pay_appid or "").strip()
     time_stamp = str(int(datetime.now(tz=UTC).timestamp()))
     nonce_str = str(uuid4()).replace("-", "")
     package = f"prepay_id={prepay_id}"
     message = f"{appid}\n{time_stamp}\n{nonce_str}\n{package}\n"
-    pay_sign = _wechatpay_sign_rsa_sha256(message=message)
+    pay_sign = await sign_with_mch_key(message)
     return {
         "timeStamp": time_stamp,
         "nonceStr": nonce_str,
@@ -1292,7 +1267,9 @@ async def _wechatpay_h5_prepay(*, order_id: str, amount: float, client_ip: str)
     }
     body_json = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
 
-    auth, _ts, _nonce = _wechatpay_build_authorization(method="POST", canonical_url=canonical_url, body_json=body_json)
+    auth, _ts, _nonce = await _wechatpay_build_authorization(
+        method="POST", canonical_url=canonical_url, body_json=body_json
+    )
     headers = {
         "Authorization": auth,
         "Accept": "application/json",
@@ -1301,9 +1278,15 @@ async def _wechatpay_h5_prepay(*, order_id: str, amount: float, client_ip: str)
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0, base_url=base_url) as client:
-            r = await client.post(canonical_url, content=body_json.encode("utf-8"), headers=headers)
-            data = r.json() if r.content else {}
+        r = await http_clients.request(
+            "POST",
+            base_url.rstrip("/") + canonical_url,
+            upstream="wechat_pay",
+            timeout=10.0,
+            content=body_json.encode("utf-8"),
+            headers=headers,
+        )
+        data = r.json() if r.content else {}
     except Exception as exc:  # noqa: BLE001
         return {"ok": False, "failureReason": "微信支付网络请求失败", "raw": {"error": str(exc)}}
 
@@ -1321,6 +1304,7 @@ async def pay_order(
     authorization: str | None = Header(default=None),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     mockFail: int | None = None,
+    idem_guard: IdempotencyGuard = Depends(idempotency_guard),
 ):
     is_h5_anonymous = not (authorization or "").strip()
     user_id = ""
@@ -1330,9 +1314,9 @@ async def pay_order(
 
     idem_key = _require_idempotency_key(idempotency_key)
     idem_actor_id = (f"H5:{id}" if is_h5_anonymous else user_id)
-    replay = await _idempotency_replay_if_exists(
-        request=request,
+    replay = await idem_guard.replay_or_claim(
         operation="pay_order",
+        actor_type="USER",
         actor_id=idem_actor_id,
         idempotency_key=f"{id}:{idem_key}",
     )
@@ -1379,7 +1363,7 @@ async def pay_order(
             await idem.set(
                 operation="pay_order",
                 actor_type="USER",
-                actor_id=user_id,
+                actor_id=idem_actor_id,
                 idempotency_key=f"{id}:{idem_key}",
                 result=IdempotencyCachedResult(status_code=200, success=True, data=data, error=None),
             )
@@ -1435,7 +1419,7 @@ async def pay_order(
                     "failureReason": str(prepay.get("failureReason") or "微信支付下单失败"),
                 }
             else:
-                wechat_pay_params = _wechatpay_build_jsapi_pay_params(prepay_id=str(prepay["prepayId"]))
+                wechat_pay_params = await _wechatpay_build_jsapi_pay_params(prepay_id=str(prepay["prepayId"]))
                 data = {
                     "orderId": o.id,
                     "paymentStatus": PaymentStatus.PENDING.value,
@@ -6,8 +6,11 @@
 
 实现说明（v1）：
 - 路径：POST /api/v1/payments/wechat/notify
-- 使用微信支付 v3 通知报文：验签（平台证书）+ 解密（APIv3Key）
-- 幂等：重复回调由 mark_payment_succeeded 内部状态机与幂等逻辑兜底
+- 使用微信支付 v3 通知报文：验签（平台证书，见 services/wechatpay_crypto.py）+ 解密（APIv3Key）
+- 快速应答：短事务内置为已支付并写入 outbox 事件后即返回 SUCCESS；卡/权益/bind_token/库存扣减由
+  outbox 消费者异步履约（见 services/payment_outbox.py），不占用微信等待应答的时间；
+  提交后的即时投递放到线程中执行且不重试连接，broker 异常时直接交给排空任务
+- 幂等：重复回调由 record_payment_succeeded 内部状态机兜底（事件按订单唯一；仍待处理时补投递）
 - 响应：按微信支付通知规范返回 {code,message}
 
 注意：design.md 未定义对接微信支付“下单/支付参数签名”的完整契约，本实现仅覆盖回调侧。
@@ -15,21 +18,20 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 from typing import Any
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.x509 import load_pem_x509_certificate
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy import select
 
 from app.models.payment import Payment
-from app.services.payment_callbacks import mark_payment_succeeded
+from app.services.payment_callbacks import record_payment_succeeded
+from app.services.payment_outbox import enqueue_payment_outbox_event
+from app.services.wechatpay_crypto import verify_platform_signature
 from app.utils.db import get_session_factory
 from app.utils.settings import settings
 
@@ -52,26 +54,7 @@ def _http_exc_message(exc: HTTPException, fallback: str) -> str:
     return fallback
 
 
-def _load_platform_certificate_pem() -> bytes:
-    raw = (settings.wechat_pay_platform_cert_pem_or_path or "").strip()
-    if not raw:
-        raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "缺少微信支付平台证书配置"})
-
-    if raw.startswith("-----BEGIN"):
-        return raw.encode("utf-8")
-
-    # 否则视为文件路径
-    try:
-        with open(raw, "rb") as f:  # noqa: PTH123
-            return f.read()
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(
-            status_code=500,
-            detail={"code": "INTERNAL_ERROR", "message": "无法读取微信支付平台证书文件"},
-        ) from exc
-
-
-def _verify_wechatpay_signature(*, headers: dict[str, str], body_text: str) -> None:
+async def _verify_wechatpay_signature(*, headers: dict[str, str], body_text: str) -> None:
     timestamp = headers.get("wechatpay-timestamp", "").strip()
     nonce = headers.get("wechatpay-nonce", "").strip()
     signature_b64 = headers.get("wechatpay-signature", "").strip()
@@ -80,33 +63,14 @@ def _verify_wechatpay_signature(*, headers: dict[str, str], body_text: str) -> N
     if not (timestamp and nonce and signature_b64 and serial):
         raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "缺少微信支付验签头"})
 
-    expected_serial = (settings.wechat_pay_platform_cert_serial or "").strip()
-    if expected_serial and serial != expected_serial:
-        raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信支付证书序列号不匹配"})
-
     message = f"{timestamp}\n{nonce}\n{body_text}\n".encode("utf-8")
     try:
         sig = base64.b64decode(signature_b64)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信支付签名格式错误"}) from exc
 
-    cert = load_pem_x509_certificate(_load_platform_certificate_pem())
-    pub = cert.public_key()
-
-    try:
-        # 微信支付平台证书（v3）为 RSA；类型收窄以满足静态检查，并防御配置错误。
-        if isinstance(pub, rsa.RSAPublicKey):
-            pub.verify(sig, message, padding.PKCS1v15(), hashes.SHA256())
-        elif isinstance(pub, ec.EllipticCurvePublicKey):
-            # 兜底：若未来证书切换为 ECC，这里也可验签
-            pub.verify(sig, message, ec.ECDSA(hashes.SHA256()))
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail={"code": "INTERNAL_ERROR", "message": "微信支付平台证书公钥类型不支持"},
-            )
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信支付签名校验失败"}) from exc
+    # 平台证书按 wechatpay-serial 选取（已解析并缓存，支持轮换期间新旧证书并存）
+    await verify_platform_signature(serial=serial, message=message, signature=sig)
 
 
 def _decrypt_wechatpay_resource(*, resource: dict[str, Any]) -> dict[str, Any]:
@@ -149,7 +113,7 @@ async def wechat_pay_notify(request: Request):
     headers = {k.lower(): v for k, v in request.headers.items()}
 
     try:
-        _verify_wechatpay_signature(headers=headers, body_text=body_text)
+        await _verify_wechatpay_signature(headers=headers, body_text=body_text)
     except HTTPException as exc:
         # 按微信侧协议返回 FAIL（非 2xx 会触发重试）
         return _wechat_fail(status_code=exc.status_code, message=_http_exc_message(exc, "验签失败"))
@@ -186,12 +150,20 @@ async def wechat_pay_notify(request: Request):
         if p is None:
             return _wechat_fail(status_code=404, message="支付记录不存在")
 
-        # 幂等：mark_payment_succeeded 内部会对订单状态进行兜底
-        await mark_payment_succeeded(
-            session=session,
-            order_id=order_id,
-            payment_id=p.id,
-            provider_payload={"wechat": transaction, "notify": {"id": payload.get("id"), "eventType": payload.get("event_type")}},
-        )
+        try:
+            event_id = await record_payment_succeeded(
+                session=session,
+                order_id=order_id,
+                payment_id=p.id,
+                provider_payload={
+                    "wechat": transaction,
+                    "notify": {"id": payload.get("id"), "eventType": payload.get("event_type")},
+                },
+            )
+        except HTTPException as exc:
+            return _wechat_fail(status_code=exc.status_code, message=_http_exc_message(exc, "处理失败"))
 
+    if event_id is not None:
+        # 投递在线程中执行：broker 缓慢/不可用时不阻塞事件循环（失败由排空任务兜底）
+        await asyncio.to_thread(enqueue_payment_outbox_event, event_id)
     return _wechat_success()
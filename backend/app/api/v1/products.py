@@ -19,9 +19,11 @@ from app.models.enums import ProductFulfillmentType, ProductStatus
 from app.models.product import Product
 from app.models.provider import Provider
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.response import ok
 from app.api.v1.deps import require_admin
 from app.services.rbac import ActorContext
+from app.services.search import PRODUCT_SEARCH, highlights, keyword_search
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.datetime_iso import iso as _iso
 
@@ -46,6 +48,7 @@ class ProductListItem(BaseModel):
     reservedStock: int | None = None
     weight: float | None = None
     shippingFee: float | None = None
+    highlight: dict[str, str] | None = None
 
 
 class ProductListResp(BaseModel):
@@ -53,6 +56,8 @@ class ProductListResp(BaseModel):
     page: int
     pageSize: int
     total: int
+    totalCapped: bool = False
+    nextCursor: str | None = None
 
 
 @router.get("/products")
@@ -64,20 +69,27 @@ async def list_products(
     fulfillmentType: Literal["SERVICE", "PHYSICAL_GOODS"] | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
     # 分页约束（design.md：默认 20，最大 100）
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(Product.created_at,), id_col=Product.id)
+    after = keyset.decode(cursor)
+    search = keyword_search(PRODUCT_SEARCH, keyword)
+    ranked = search is not None and search.score is not None
+    if ranked and after is not None:
+        raise HTTPException(
+            status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "关键词检索按相关度排序，不支持 cursor"}
+        )
 
     stmt = select(Product).where(
         Product.status == ProductStatus.ON_SALE.value,
         Product.fulfillment_type.in_([ProductFulfillmentType.SERVICE.value, ProductFulfillmentType.PHYSICAL_GOODS.value]),
     )
 
-    if keyword:
-        k = keyword.strip()
-        if k:
-            stmt = stmt.where(Product.title.like(f"%{k}%"))
+    if search is not None:
+        stmt = stmt.where(search.where)
 
     if categoryId:
         stmt = stmt.where(Product.category_id == categoryId)
@@ -88,15 +100,17 @@ async def list_products(
     if fulfillmentType:
         stmt = stmt.where(Product.fulfillment_type == fulfillmentType)
 
-    # v1 固定排序：最新创建在前
-    stmt = stmt.order_by(Product.created_at.desc())
-
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
+    # v1 固定排序：最新创建在前（(created_at, id) DESC，支持 cursor）；关键词检索时相关度优先（仅 page/pageSize）
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        if search is not None and search.score is not None:
+            page_stmt = (
+                stmt.order_by(search.score.desc(), *keyset.order_by()).offset((page - 1) * page_size).limit(page_size)
+            )
+        else:
+            page_stmt = keyset.paginate(stmt, after=after, page=page, page_size=page_size)
+        rows = (await session.scalars(page_stmt)).all()
 
     items = [
         ProductListItem(
@@ -110,12 +124,20 @@ async def list_products(
             reservedStock=int(p.reserved_stock or 0) if p.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value else None,
             weight=(float(p.weight) if p.weight is not None else None) if p.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value else None,
             shippingFee=float(p.shipping_fee or 0.0) if p.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value else None,
+            highlight=highlights(p, search),
         )
         for p in rows
     ]
 
     return ok(
-        data=ProductListResp(items=items, page=page, pageSize=page_size, total=total).model_dump(),
+        data=ProductListResp(
+            items=items,
+            page=page,
+            pageSize=page_size,
+            total=total,
+            totalCapped=total_capped,
+            nextCursor=None if ranked else keyset.next_cursor(rows, page_size=page_size),
+        ).model_dump(),
         request_id=request.state.request_id,
     )
 
@@ -245,8 +267,9 @@ async def admin_list_products(
 
     stmt = select(Product)
 
-    if keyword and keyword.strip():
-        stmt = stmt.where(Product.title.like(f"%{keyword.strip()}%"))
+    search = keyword_search(PRODUCT_SEARCH, keyword)
+    if search is not None:
+        stmt = stmt.where(search.where)
     if providerId and providerId.strip():
         stmt = stmt.where(Product.provider_id == providerId.strip())
     if categoryId and categoryId.strip():
@@ -270,7 +293,10 @@ async def admin_list_products(
         )
         provider_name_map = {x.id: x.name for x in providers}
 
-    items = [_admin_product_list_item(p, provider_name_map.get(p.provider_id)) for p in products]
+    items = [
+        {**_admin_product_list_item(p, provider_name_map.get(p.provider_id)), "highlight": highlights(p, search)}
+        for p in products
+    ]
     return ok(
         data={"items": items, "page": page, "pageSize": page_size, "total": total}, request_id=request.state.request_id
     )
@@ -44,7 +44,10 @@ from app.models.venue import Venue
 from app.models.venue_schedule import VenueSchedule
 from app.models.venue_service import VenueService
 from app.services.provider_auth_context import require_provider_context
+from app.services.rbac import request_actor
+from app.services.slot_capacity import resize_slot_capacity
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset, count_capped
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
 
@@ -220,7 +223,7 @@ def _venue_dto(v: Venue) -> dict:
 async def provider_workbench_stats(request: Request, authorization: str | None = Header(default=None)):
     """Provider 工作台统计（REQ-P1-002）。"""
 
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
 
     session_factory = get_session_factory()
     async with session_factory() as session:
@@ -255,7 +258,7 @@ async def provider_workbench_stats(request: Request, authorization: str | None =
 
 @router.get("/provider/venues")
 async def provider_list_venues(request: Request, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         venues = (
@@ -286,7 +289,7 @@ async def provider_list_venues(request: Request, authorization: str | None = Hea
 
 @router.get("/provider/venues/{id}")
 async def provider_get_venue(request: Request, id: str, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         v = (
@@ -325,6 +328,8 @@ async def provider_get_venue(request: Request, id: str, authorization: str | Non
 class ProviderUpdateVenueBody(BaseModel):
     name: str | None = None
     address: str | None = None
+    lat: float | None = None
+    lng: float | None = None
     contactPhone: str | None = None
     businessHours: str | None = None
     countryCode: str | None = None
@@ -344,7 +349,7 @@ async def provider_update_venue(
     body: ProviderUpdateVenueBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         v = (
@@ -360,6 +365,14 @@ async def provider_update_venue(
 
         if body.address is not None:
             v.address = body.address.strip() if body.address.strip() else None
+        # 坐标需成对更新；geohash 由 Venue 的 ORM 钩子同步（附近场所检索）
+        if body.lat is not None or body.lng is not None:
+            if body.lat is None or body.lng is None:
+                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "lat/lng 需同时传入"})
+            if not (-90.0 <= body.lat <= 90.0) or not (-180.0 <= body.lng <= 180.0):
+                raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "lat/lng 不合法"})
+            v.lat = float(body.lat)
+            v.lng = float(body.lng)
         if body.contactPhone is not None:
             v.contact_phone = body.contactPhone.strip() if body.contactPhone.strip() else None
         if body.businessHours is not None:
@@ -391,7 +404,7 @@ async def provider_update_venue(
 
 @router.post("/provider/venues/{id}/submit-showcase")
 async def provider_submit_showcase(request: Request, id: str, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         v = (
@@ -543,7 +556,7 @@ async def provider_list_products(
     page: int = 1,
     pageSize: int = 20,
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
@@ -567,7 +580,7 @@ async def provider_create_product(
     body: ProviderCreateProductBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     if body.fulfillmentType not in {ProductFulfillmentType.SERVICE.value, ProductFulfillmentType.PHYSICAL_GOODS.value}:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "fulfillmentType 不合法"})
     if body.fulfillmentType == ProductFulfillmentType.PHYSICAL_GOODS.value:
@@ -670,7 +683,7 @@ async def provider_update_product(
     body: ProviderUpdateProductBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         p = (
@@ -798,7 +811,7 @@ async def provider_list_orders(
     page: int = 1,
     pageSize: int = 20,
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
@@ -837,7 +850,7 @@ async def provider_ship_order(
     body: ProviderShipOrderBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         o = (await session.scalars(select(Order).where(Order.id == id).limit(1))).first()
@@ -907,7 +920,7 @@ class ProviderUpsertVenueServiceBody(BaseModel):
 async def provider_list_venue_services(
     request: Request, venueId: str, authorization: str | None = Header(default=None)
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         v = (
@@ -937,7 +950,7 @@ async def provider_create_venue_service(
     body: ProviderUpsertVenueServiceBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
 
     if body.fulfillmentType not in {ProductFulfillmentType.SERVICE.value}:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "fulfillmentType 不合法"})
@@ -1001,7 +1014,7 @@ async def provider_update_venue_service(
     body: ProviderUpsertVenueServiceBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
 
     if body.fulfillmentType not in {ProductFulfillmentType.SERVICE.value}:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "fulfillmentType 不合法"})
@@ -1102,7 +1115,7 @@ async def provider_list_schedules(
     page: int = 1,
     pageSize: int = 20,
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
@@ -1155,7 +1168,7 @@ async def provider_batch_upsert_schedules(
     body: ProviderBatchUpsertSchedulesBody,
     authorization: str | None = Header(default=None),
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
 
     session_factory = get_session_factory()
     async with session_factory() as session:
@@ -1209,17 +1222,8 @@ async def provider_batch_upsert_schedules(
                 updated.append(s)
                 continue
 
-            old_capacity = int(existing.capacity or 0)
-            old_remaining = int(existing.remaining_capacity or 0)
-            booked = old_capacity - old_remaining
-            if booked < 0:
-                booked = 0
-            new_capacity = int(item.capacity)
-            new_remaining = max(0, new_capacity - booked)
-
-            existing.capacity = new_capacity
-            existing.remaining_capacity = new_remaining
-            existing.status = CommonEnabledStatus.ENABLED.value
+            # 已占用量保持不变：remaining = max(0, newCapacity - booked)；单条 UPDATE 计算，避免与并发预约交错
+            await resize_slot_capacity(session=session, schedule_id=existing.id, capacity=int(item.capacity))
             updated.append(existing)
 
         await session.commit()
@@ -1262,10 +1266,13 @@ async def provider_list_redemptions(
     operatorId: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
 ):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(RedemptionRecord.redemption_time,), id_col=RedemptionRecord.id)
+    after = keyset.decode(cursor)
 
     if (
         status
@@ -1303,15 +1310,19 @@ async def provider_list_redemptions(
         else:
             stmt = stmt.where(RedemptionRecord.redemption_time <= _parse_dt_utc_naive(s, field_name="dateTo"))
 
-    stmt = stmt.order_by(RedemptionRecord.redemption_time.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        total, total_capped = await count_capped(session=session, stmt=stmt)
+        rows = (await session.scalars(keyset.paginate(stmt, after=after, page=page, page_size=page_size))).all()
 
     return ok(
-        data={"items": [_redemption_dto(x) for x in rows], "page": page, "pageSize": page_size, "total": total},
+        data={
+            "items": [_redemption_dto(x) for x in rows],
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "totalCapped": total_capped,
+            "nextCursor": keyset.next_cursor(rows, page_size=page_size),
+        },
         request_id=request.state.request_id,
     )
@@ -22,6 +22,8 @@ from app.models.provider_staff import ProviderStaff
 from app.models.provider_user import ProviderUser
 from app.models.venue import Venue
 from app.services.password_hashing import hash_password, verify_password
+from app.services.actor_cache import invalidate_actor_cache
+from app.services.rate_limit import record_failure
 from app.services.sms_code_service import SmsCodeService
 from app.utils.db import get_session_factory
 from app.utils.jwt_provider_token import create_provider_token, decode_and_validate_provider_token, token_blacklist_key
@@ -63,13 +65,16 @@ async def _raise_if_login_locked(*, redis, username: str) -> None:
 
 
 async def _record_login_failure(*, redis, username: str) -> None:
-    key = _login_fail_key(username)
-    n = int(await redis.incr(key))
-    if n == 1:
-        await redis.expire(key, _LOGIN_FAIL_WINDOW_SECONDS)
-    if n >= _LOGIN_FAIL_MAX:
-        await redis.set(_login_lock_key(username), "1", ex=_LOGIN_LOCK_SECONDS)
-        await redis.delete(key)
+    # 计数/过期/锁定/清理计数（避免重复累计造成锁定延长）一次往返原子完成
+    await record_failure(
+        fail_key=_login_fail_key(username),
+        lock_key=_login_lock_key(username),
+        max_failures=_LOGIN_FAIL_MAX,
+        window_seconds=_LOGIN_FAIL_WINDOW_SECONDS,
+        lock_seconds=_LOGIN_LOCK_SECONDS,
+        reset_on_lock=True,
+        redis=redis,
+    )
 
 async def _require_provider_context(authorization: str | None) -> dict:
     token = _extract_bearer_token(authorization)
@@ -389,6 +394,7 @@ async def provider_refresh(request: Request, authorization: str | None = Header(
     now = int(datetime.now(tz=UTC).timestamp())
     ttl = max(1, exp - now)
     await redis.set(token_blacklist_key(jti=str(payload["jti"])), "1", ex=ttl)
+    await invalidate_actor_cache(jtis=[str(payload["jti"])])
 
     new_token, _new_jti = create_provider_token(actor_type=str(payload["actorType"]), actor_id=str(payload["sub"]))
     return ok(data={"token": new_token}, request_id=request.state.request_id)
@@ -480,4 +486,5 @@ async def provider_logout(request: Request, authorization: str | None = Header(d
 
     redis = get_redis()
     await redis.set(token_blacklist_key(jti=str(payload["jti"])), "1", ex=ttl)
+    await invalidate_actor_cache(jtis=[str(payload["jti"])])
     return ok(data={"success": True}, request_id=request.state.request_id)
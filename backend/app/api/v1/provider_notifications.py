@@ -6,24 +6,23 @@
 
 from __future__ import annotations
 
-from datetime import UTC, datetime
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import func, select
 
 from app.api.v1.deps import optional_actor
 from app.models.enums import NotificationCategory, NotificationReceiverType, NotificationStatus
-from app.models.notification import Notification
+from app.services.notification_inbox import InboxItem, list_inbox, mark_inbox_read
 from app.services.rbac import ActorContext, ActorType, require_actor_types
 from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
 
 router = APIRouter(tags=["provider-notifications"])
 
 
-def _dto(n: Notification) -> dict:
+def _dto(n: InboxItem) -> dict:
     return {
         "id": n.id,
         "title": n.title,
@@ -60,19 +59,21 @@ async def provider_list_notifications(
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
 
-    stmt = select(Notification).where(Notification.receiver_type == receiver_type, Notification.receiver_id == str(a.sub))
-    if status:
-        if status not in {NotificationStatus.UNREAD.value, NotificationStatus.READ.value}:
-            raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "status 不合法"})
-        stmt = stmt.where(Notification.status == str(status))
-
-    stmt = stmt.order_by(Notification.created_at.desc())
-    count_stmt = select(func.count()).select_from(stmt.subquery())
+    if status and status not in {NotificationStatus.UNREAD.value, NotificationStatus.READ.value}:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "status 不合法"})
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        total = int((await session.execute(count_stmt)).scalar() or 0)
-        rows = (await session.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+        # status=UNREAD 的 total（顶栏轮询）取 Redis 未读计数，不逐次 COUNT
+        rows, total = await list_inbox(
+            session=session,
+            redis=get_redis(),
+            receiver_type=receiver_type,
+            receiver_id=str(a.sub),
+            status=str(status) if status else None,
+            page=page,
+            page_size=page_size,
+        )
 
     return ok(data={"items": [_dto(x) for x in rows], "page": page, "pageSize": page_size, "total": total}, request_id=request.state.request_id)
 
@@ -89,24 +90,17 @@ async def provider_mark_notification_read(
         if a.actor_type == ActorType.PROVIDER_STAFF
         else NotificationReceiverType.PROVIDER.value
     )
-    now = datetime.now(tz=UTC)
-
     session_factory = get_session_factory()
     async with session_factory() as session:
-        n = (
-            await session.scalars(
-                select(Notification)
-                .where(Notification.id == id, Notification.receiver_type == receiver_type, Notification.receiver_id == str(a.sub))
-                .limit(1)
-            )
-        ).first()
-        if n is None:
-            raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "通知不存在"})
-        if n.status != NotificationStatus.READ.value:
-            n.status = NotificationStatus.READ.value
-            n.read_at = now
-            await session.commit()
-            await session.refresh(n)
+        n = await mark_inbox_read(
+            session=session,
+            redis=get_redis(),
+            receiver_type=receiver_type,
+            receiver_id=str(a.sub),
+            notification_id=id,
+        )
+    if n is None:
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "通知不存在"})
 
     return ok(data=_dto(n), request_id=request.state.request_id)
 
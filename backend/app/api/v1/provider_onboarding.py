@@ -7,19 +7,25 @@
 from __future__ import annotations
 
 from datetime import UTC, datetime
-from uuid import uuid4
 
 from fastapi import APIRouter, Header, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy import select
 
-from app.models.admin import Admin
-from app.models.enums import NotificationReceiverType, NotificationStatus, ProviderHealthCardStatus, ProviderInfraCommerceStatus
-from app.models.notification import Notification
+from app.models.enums import (
+    NotificationBroadcastAudience,
+    NotificationCategory,
+    ProviderHealthCardStatus,
+    ProviderInfraCommerceStatus,
+)
 from app.models.provider import Provider
 from app.models.venue import Venue
+from app.services.notification_inbox import bump_broadcast_total
+from app.services.notification_sending import new_broadcast
 from app.services.provider_auth_context import require_provider_context
+from app.services.rbac import request_actor
 from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
 from app.utils.response import ok
 from app.utils.datetime_iso import iso as _iso
 
@@ -56,7 +62,7 @@ def _dto(p: Provider) -> dict:
 
 @router.get("/provider/onboarding")
 async def provider_get_onboarding(request: Request, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     session_factory = get_session_factory()
     async with session_factory() as session:
         p = (await session.scalars(select(Provider).where(Provider.id == ctx.providerId).limit(1))).first()
@@ -71,7 +77,7 @@ class OpenInfraBody(BaseModel):
 
 @router.post("/provider/onboarding/infra/open")
 async def provider_open_infra(request: Request, body: OpenInfraBody, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     if body.agree is not True:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "必须勾选并同意协议"})
     session_factory = get_session_factory()
@@ -97,7 +103,7 @@ class SubmitHealthCardBody(BaseModel):
 
 @router.post("/provider/onboarding/health-card/submit")
 async def provider_submit_health_card(request: Request, body: SubmitHealthCardBody, authorization: str | None = Header(default=None)):
-    ctx = await require_provider_context(authorization=authorization)
+    ctx = await require_provider_context(authorization=authorization, actor=request_actor(request))
     if body.agree is not True:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "必须勾选并同意协议"})
 
@@ -123,22 +129,21 @@ async def provider_submit_health_card(request: Request, body: SubmitHealthCardBo
 
         # v1：系统站内通知（Admin 顶栏）——提醒运营有新的开通申请需要审核
         # 说明：Notification 模型为“站内通知记录”，并不等同于短信/推送；仅用于后台顶栏可见与可标记已读。
-        admins = (await session.scalars(select(Admin).where(Admin.status == "ACTIVE"))).all()
-        for a in admins:
-            session.add(
-                Notification(
-                    id=str(uuid4()),
-                    receiver_type=NotificationReceiverType.ADMIN.value,
-                    receiver_id=a.id,
-                    title="新的健行天下开通申请待审核",
-                    content=f"Provider 已提交健行天下开通申请：{p.name}（{p.id}）。请前往“供给侧 → 健行天下开通审核”处理。",
-                    status=NotificationStatus.UNREAD.value,
-                    created_at=now,
-                    read_at=None,
-                )
+        # 全体 ADMIN 可见：写一条广播（读取时合并），不再按 ADMIN 逐个写入。
+        session.add(
+            new_broadcast(
+                sender_id=None,
+                audience=NotificationBroadcastAudience.ALL_ADMINS.value,
+                title="新的健行天下开通申请待审核",
+                content=f"Provider 已提交健行天下开通申请：{p.name}（{p.id}）。请前往“供给侧 → 健行天下开通审核”处理。",
+                category=NotificationCategory.SYSTEM.value,
+                meta=None,
+                now=now,
             )
+        )
 
         await session.commit()
         await session.refresh(p)
+    await bump_broadcast_total(redis=get_redis(), audience=NotificationBroadcastAudience.ALL_ADMINS.value)
     return ok(data=_dto(p), request_id=request.state.request_id)
 
@@ -9,12 +9,9 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Request
-from sqlalchemy import select
+from fastapi import APIRouter, Request, Response
 
-from app.models.enums import CommonEnabledStatus
-from app.models.system_config import SystemConfig
-from app.utils.db import get_session_factory
+from app.services.system_config_cache import conditional_enabled_config_value
 from app.utils.response import ok
 
 router = APIRouter(tags=["regions"])
@@ -23,21 +20,17 @@ _KEY_REGION_CITIES = "REGION_CITIES"
 
 
 @router.get("/regions/cities")
-async def get_region_cities(request: Request):
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        cfg = (
-            await session.scalars(
-                select(SystemConfig)
-                .where(SystemConfig.key == _KEY_REGION_CITIES, SystemConfig.status == CommonEnabledStatus.ENABLED.value)
-                .limit(1)
-            )
-        ).first()
-
-    if cfg is None:
+async def get_region_cities(request: Request, response: Response):
+    # 读穿缓存（L1 + Redis）+ ETag/304：城市列表是各端启动必拉的大 JSON
+    not_modified, raw = await conditional_enabled_config_value(
+        request=request, response=response, key=_KEY_REGION_CITIES
+    )
+    if not_modified is not None:
+        return not_modified
+
+    if raw is None:
         return ok(data={"items": [], "defaultCode": None, "version": "0"}, request_id=request.state.request_id)
 
-    raw = cfg.value_json or {}
     version = str(raw.get("version") or "0")
     default_code = raw.get("defaultCode")
 
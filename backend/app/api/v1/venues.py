@@ -11,6 +11,13 @@
 v1 说明：
 - `GET /api/v1/venues` / `GET /api/v1/venues/{id}` 允许未登录访问，但仅返回 PUBLISHED 场所。
 - 当 `entitlementId` 传入时，按该权益适用范围过滤场所（属性14）；出于安全性，v1 要求 USER 登录且 ownerId 必须为本人。
+- 列表的地区/权益过滤与分页均在 SQL 侧完成（见 services/venue_filtering_sql.py）；
+  除 page/pageSize 外支持 `cursor`（keyset，按 createdAt DESC, id DESC），响应附带 `nextCursor`。
+- 附近场所：传 `lat`/`lng`（可选 `radius`，米）时只返回半径内场所，按距离升序（同距离按 id），
+  列表项附带 `distanceMeters`；可与 keyword/地区/taxonomyId/entitlementId 过滤组合。
+  候选由 geohash 前缀索引预筛（见 services/venue_filtering_sql.nearby_clause）；该模式仅支持 page/pageSize。
+- `keyword`：FULLTEXT 检索 name/address（见 services/search.py），列表项附带 `highlight`；
+  非附近模式下按相关度排序，仅支持 page/pageSize。
 """
 
 from __future__ import annotations
@@ -18,7 +25,7 @@ from __future__ import annotations
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from sqlalchemy import or_, select
+from sqlalchemy import func, select
 
 from app.models.entitlement import Entitlement
 from app.models.enums import CommonEnabledStatus, VenuePublishStatus
@@ -30,10 +37,18 @@ from app.services.venue_filtering_rules import (
     VenueLite,
     VenueRegion,
     filter_venues_by_entitlement,
-    matches_region_filter,
 )
+from app.services.venue_filtering_sql import (
+    distance_meters_expr,
+    entitlement_scope_clause,
+    nearby_clause,
+    region_filter_clause,
+)
+from app.services.search import VENUE_SEARCH, highlights, keyword_search
 from app.utils.db import get_session_factory
+from app.utils.pagination import DescKeyset
 from app.utils.response import ok
+from app.utils.settings import settings
 
 router = APIRouter(tags=["venues"])
 
@@ -62,6 +77,31 @@ def _venue_list_item_dto(v: Venue) -> dict:
     }
 
 
+def _parse_nearby(
+    *, lat: float | None, lng: float | None, radius: int | None
+) -> tuple[float, float, float] | None:
+    if lat is None and lng is None:
+        if radius is not None:
+            raise HTTPException(
+                status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "radius 需与 lat/lng 一起传入"}
+            )
+        return None
+    if lat is None or lng is None:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "lat/lng 需同时传入"})
+    if not (-90.0 <= lat <= 90.0) or not (-180.0 <= lng <= 180.0):
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "lat/lng 不合法"})
+    r = settings.venue_nearby_default_radius_meters if radius is None else int(radius)
+    if r <= 0 or r > settings.venue_nearby_max_radius_meters:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "INVALID_ARGUMENT",
+                "message": f"radius 需在 1~{settings.venue_nearby_max_radius_meters} 米之间",
+            },
+        )
+    return float(lat), float(lng), float(r)
+
+
 def _venue_detail_public_dto(v: Venue) -> dict:
     return {
         "id": v.id,
@@ -106,56 +146,53 @@ async def list_venues(
     entitlementId: str | None = None,
     page: int = 1,
     pageSize: int = 20,
+    cursor: str | None = None,
+    lat: float | None = None,
+    lng: float | None = None,
+    radius: int | None = None,
 ):
     page = max(1, int(page))
     page_size = max(1, min(100, int(pageSize)))
+    keyset = DescKeyset(keys=(Venue.created_at,), id_col=Venue.id)
+    after = keyset.decode(cursor)
+    nearby = _parse_nearby(lat=lat, lng=lng, radius=radius)
+    if nearby is not None and after is not None:
+        raise HTTPException(
+            status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "附近场所按距离排序，不支持 cursor"}
+        )
+    search = keyword_search(VENUE_SEARCH, keyword)
+    # 关键词检索（非附近模式）按相关度排序
+    ranked = nearby is None and search is not None and search.score is not None
+    if ranked and after is not None:
+        raise HTTPException(
+            status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "关键词检索按相关度排序，不支持 cursor"}
+        )
 
     # 基础：仅 PUBLISHED
-    stmt = select(Venue).where(Venue.publish_status == VenuePublishStatus.PUBLISHED.value)
+    conds = [Venue.publish_status == VenuePublishStatus.PUBLISHED.value]
+
+    if search is not None:
+        conds.append(search.where)
 
-    if keyword and keyword.strip():
-        kw = f"%{keyword.strip()}%"
-        stmt = stmt.where(or_(Venue.name.like(kw), Venue.address.like(kw)))
+    # 地区筛选：规则编译为 SQL 谓词（口径与 matches_region_filter 一致，见 venue_filtering_sql）
+    region_cond = region_filter_clause(region_level=regionLevel, region_code=regionCode)
+    if region_cond is not None:
+        conds.append(region_cond)
 
-    # 地区筛选（v1 最小：先拉取后用规则函数判定，避免引入复杂 SQL 拼接）
     # taxonomyId（v1 最小约束）：规格未给出 Venue 与 taxonomy 的显式关联；
     # 为保持可用性，v1 将 taxonomyId 解释为 “serviceType”，筛选存在 ENABLED 的 VenueService.serviceType==taxonomyId 的场所。
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        if taxonomyId and taxonomyId.strip():
-            vs_venue_ids = (
-                await session.scalars(
-                    select(VenueService.venue_id).where(
-                        VenueService.service_type == taxonomyId.strip(),
-                        VenueService.status == CommonEnabledStatus.ENABLED.value,
-                    )
+    if taxonomyId and taxonomyId.strip():
+        conds.append(
+            Venue.id.in_(
+                select(VenueService.venue_id).where(
+                    VenueService.service_type == taxonomyId.strip(),
+                    VenueService.status == CommonEnabledStatus.ENABLED.value,
                 )
-            ).all()
-            if not vs_venue_ids:
-                return ok(
-                    data={"items": [], "page": page, "pageSize": page_size, "total": 0},
-                    request_id=request.state.request_id,
-                )
-            stmt = stmt.where(Venue.id.in_(list(set(vs_venue_ids))))
-
-        venues = (await session.scalars(stmt.order_by(Venue.created_at.desc()))).all()
-
-        # 地区过滤（纯函数，便于属性测试覆盖）
-        venues = [
-            v
-            for v in venues
-            if matches_region_filter(
-                venue=VenueLite(
-                    id=v.id,
-                    region=VenueRegion(
-                        country_code=v.country_code, province_code=v.province_code, city_code=v.city_code
-                    ),
-                ),
-                region_level=regionLevel,
-                region_code=regionCode,
             )
-        ]
+        )
 
+    session_factory = get_session_factory()
+    async with session_factory() as session:
         # 权益过滤：要求登录且 ownerId 为本人
         if entitlementId and entitlementId.strip():
             if user is None:
@@ -172,34 +209,69 @@ async def list_venues(
                     status_code=403, detail={"code": "ENTITLEMENT_NOT_OWNED", "message": "无权限访问该权益"}
                 )
 
-            filtered = filter_venues_by_entitlement(
-                venues=[
-                    VenueLite(
-                        id=v.id,
-                        region=VenueRegion(
-                            country_code=v.country_code, province_code=v.province_code, city_code=v.city_code
-                        ),
-                    )
-                    for v in venues
-                ],
-                entitlement_type=e.entitlement_type,
-                applicable_regions=e.applicable_regions,
-                applicable_venues=e.applicable_venues,
+            # 口径与 filter_venues_by_entitlement 一致（属性14）
+            conds.append(
+                entitlement_scope_clause(
+                    entitlement_type=e.entitlement_type,
+                    applicable_regions=e.applicable_regions,
+                    applicable_venues=e.applicable_venues,
+                )
             )
-            allowed_ids = {x.id for x in filtered}
-            venues = [v for v in venues if v.id in allowed_ids]
 
-        total = len(venues)
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_items = venues[start:end]
+        if nearby is not None:
+            n_lat, n_lng, n_radius = nearby
+            conds.append(nearby_clause(lat=n_lat, lng=n_lng, radius_meters=n_radius))
+
+        # total：仅 COUNT(id)，不做 ORM 实体加载
+        total = int((await session.execute(select(func.count(Venue.id)).where(*conds))).scalar() or 0)
+
+        distances: dict[str, float] = {}
+        if nearby is not None:
+            # 附近模式：候选已被半径限定，按距离排序后 OFFSET 分页
+            distance = distance_meters_expr(lat=nearby[0], lng=nearby[1]).label("distance_meters")
+            rows = (
+                await session.execute(
+                    select(Venue, distance)
+                    .where(*conds)
+                    .order_by(distance.asc(), Venue.id.asc())
+                    .offset((page - 1) * page_size)
+                    .limit(page_size)
+                )
+            ).all()
+            page_items = [v for v, _d in rows]
+            distances = {v.id: float(d) for v, d in rows}
+        elif search is not None and search.score is not None:
+            stmt = (
+                select(Venue)
+                .where(*conds)
+                .order_by(search.score.desc(), Venue.created_at.desc(), Venue.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+            page_items = list((await session.scalars(stmt)).all())
+        else:
+            # keyset：传 cursor 时忽略 page，从游标之后继续（避免深分页 OFFSET 扫描）
+            stmt = keyset.paginate(select(Venue).where(*conds), after=after, page=page, page_size=page_size)
+            page_items = list((await session.scalars(stmt)).all())
+
+    next_cursor = None if nearby is not None or ranked else keyset.next_cursor(page_items, page_size=page_size)
+
+    items = []
+    for v in page_items:
+        item = _venue_list_item_dto(v)
+        if nearby is not None:
+            item["distanceMeters"] = int(round(distances[v.id]))
+        if search is not None:
+            item["highlight"] = highlights(v, search)
+        items.append(item)
 
     return ok(
         data={
-            "items": [_venue_list_item_dto(v) for v in page_items],
+            "items": items,
             "page": page,
             "pageSize": page_size,
             "total": total,
+            "nextCursor": next_cursor,
         },
         request_id=request.state.request_id,
     )
@@ -3,16 +3,18 @@
 规格来源：
 - specs/health-services-platform/design.md -> I. Website 只读配置下发（v1 最小契约）
 - specs/health-services-platform/design.md -> SystemConfig key 约定（WEBSITE_*）
+
+说明：配置读取走 services/system_config_cache；纯配置派生的接口支持 ETag/304。
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 from sqlalchemy import select
 
-from app.models.enums import CommonEnabledStatus, VenuePublishStatus
-from app.models.system_config import SystemConfig
+from app.models.enums import VenuePublishStatus
 from app.models.venue import Venue
+from app.services.system_config_cache import conditional_enabled_config_value, get_enabled_config_value
 from app.utils.db import get_session_factory
 from app.utils.response import fail, ok
 
@@ -36,18 +38,8 @@ def _mask_phone(phone: str | None) -> str | None:
 
 
 async def _get_enabled_value(key: str) -> dict | None:
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        cfg = (
-            await session.scalars(
-                select(SystemConfig)
-                .where(SystemConfig.key == key, SystemConfig.status == CommonEnabledStatus.ENABLED.value)
-                .limit(1)
-            )
-        ).first()
-    if cfg is None:
-        return None
-    return cfg.value_json or {}
+    # 读穿缓存（L1 + Redis），admin 写入提交后自动失效
+    return await get_enabled_config_value(key)
 
 
 @router.get("/website/home/recommended-venues")
@@ -104,8 +96,12 @@ async def website_get_recommended_venues(request: Request):
 
 
 @router.get("/website/footer/config")
-async def website_get_footer_config(request: Request):
-    raw = await _get_enabled_value(_KEY_FOOTER_CONFIG)
+async def website_get_footer_config(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(
+        request=request, response=response, key=_KEY_FOOTER_CONFIG
+    )
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         # 已确认契约（specs/功能实现/website/api-contracts.md）：data 直接为 FooterConfig；
         # 若未配置，必须返回可区分的业务错误，避免前端静默展示“—”造成假可用。
@@ -121,8 +117,12 @@ async def website_get_footer_config(request: Request):
 
 
 @router.get("/website/external-links")
-async def website_get_external_links(request: Request):
-    raw = await _get_enabled_value(_KEY_EXTERNAL_LINKS)
+async def website_get_external_links(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(
+        request=request, response=response, key=_KEY_EXTERNAL_LINKS
+    )
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return fail(
             code="WEBSITE_EXTERNAL_LINKS_MISSING",
@@ -150,8 +150,10 @@ async def website_get_external_links(request: Request):
 
 
 @router.get("/website/site-seo")
-async def website_get_site_seo(request: Request):
-    raw = await _get_enabled_value(_KEY_SITE_SEO)
+async def website_get_site_seo(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(request=request, response=response, key=_KEY_SITE_SEO)
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(
             data={
@@ -168,8 +170,10 @@ async def website_get_site_seo(request: Request):
 
 
 @router.get("/website/nav-control")
-async def website_get_nav_control(request: Request):
-    raw = await _get_enabled_value(_KEY_NAV_CONTROL)
+async def website_get_nav_control(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(request=request, response=response, key=_KEY_NAV_CONTROL)
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(
             data={
@@ -189,8 +193,12 @@ async def website_get_nav_control(request: Request):
 
 
 @router.get("/website/maintenance-mode")
-async def website_get_maintenance_mode(request: Request):
-    raw = await _get_enabled_value(_KEY_MAINTENANCE_MODE)
+async def website_get_maintenance_mode(request: Request, response: Response):
+    not_modified, raw = await conditional_enabled_config_value(
+        request=request, response=response, key=_KEY_MAINTENANCE_MODE
+    )
+    if not_modified is not None:
+        return not_modified
     if raw is None:
         return ok(
             data={
@@ -45,7 +45,15 @@ celery_app = Celery(
     "lhmy",
     broker=_broker_url(),
     backend=_backend_url(),
-    include=["app.tasks.inventory"],
+    include=[
+        "app.tasks.inventory",
+        "app.tasks.booking_capacity",
+        "app.tasks.dashboard",
+        "app.tasks.dealer_exports",
+        "app.tasks.payments",
+        "app.tasks.dealer_settlements",
+        "app.tasks.notifications",
+    ],
 )
 
 # v1 最小：使用 UTC，避免跨时区漂移；未来如需本地时区可通过配置扩展
@@ -54,4 +62,7 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+# worker 进程内常驻 event loop / fork 后重置连接 / 指标端口（信号注册）
+import app.tasks.runtime  # noqa: E402,F401
+
 
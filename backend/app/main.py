@@ -9,6 +9,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -23,12 +24,19 @@ from app.middleware.exceptions import register_exception_handlers
 from app.middleware.rbac_context import RbacContextMiddleware
 from app.middleware.request_id import RequestIdMiddleware
 from app.middleware.request_logger import RequestLoggerMiddleware
+from app.services.actor_cache import run_invalidation_listener as run_actor_cache_listener
+from app.services.ai.repository import run_invalidation_listener as run_ai_snapshot_listener
+from app.services.audit_writer import audit_writer
+from app.services.system_config_cache import run_invalidation_listener
 from app.utils.db import get_session_factory
+from app.utils.http_clients import close_http_clients
+from app.utils.invalidation import in_pytest
 from app.utils.logging import setup_logging
 from app.utils.settings import settings
 
 logger = logging.getLogger(__name__)
 
+
 def _is_production() -> bool:
     return str(getattr(settings, "app_env", "") or "").strip().lower() == "production"
 
@@ -124,8 +132,28 @@ def create_app() -> FastAPI:
         except Exception:  # noqa: BLE001
             logger.exception("admin seed failed (ignored)")
 
+        # SystemConfig 缓存：订阅跨进程失效广播（Redis 不可用时内部退避重连，不阻塞启动）
+        listener_stop = asyncio.Event()
+        config_listener = asyncio.create_task(run_invalidation_listener(listener_stop))
+        # 操作者上下文缓存：订阅 logout/冻结失效广播（同上）
+        actor_listener = asyncio.create_task(run_actor_cache_listener(listener_stop))
+        # AI Strategy/Provider 快照缓存：订阅配置变更失效广播（同上）
+        ai_snapshot_listener = asyncio.create_task(run_ai_snapshot_listener(listener_stop))
+
+        # 审计日志批量写入器（测试环境不启动：保持请求结束即落库的可断言语义）
+        if not in_pytest():
+            audit_writer.start()
+
         yield
-        # Shutdown（v1：无资源需要释放；DB/Redis 使用连接池/客户端自身管理）
+        # Shutdown（DB/Redis 使用连接池/客户端自身管理；仅停止后台任务，审计队列尽力排空/落盘）
+        await audit_writer.stop()
+        await close_http_clients()
+        listener_stop.set()
+        for listener in (config_listener, actor_listener, ai_snapshot_listener):
+            try:
+                await asyncio.wait_for(listener, timeout=5)
+            except Exception:  # noqa: BLE001
+                listener.cancel()
 
     app = FastAPI(
         title=settings.app_name,
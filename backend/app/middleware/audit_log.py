@@ -8,20 +8,22 @@
 v1 约束：
 - 仅记录关键操作元数据（禁止存敏感明文：密码/短信验证码/Authorization/token/对话正文等）
 - 默认仅对“写操作”留痕（POST/PUT/PATCH/DELETE + 少数路径动作），GET 不记录
+- 写入：优先投递到进程内批量写入器（app.services.audit_writer，不占用请求路径的 DB 往返）；
+  写入器未运行（未走 lifespan 的测试/脚本）时回退为同步单条写入
+- 纯 ASGI 实现：响应完整发出后再记录（状态码取自 http.response.start）
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Callable
 from uuid import uuid4
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.models.audit_log import AuditLog
 from app.models.enums import AuditAction
+from app.services.audit_writer import audit_writer
 from app.services.rbac import ActorContext
 from app.utils.db import get_session_factory
 from app.utils.datetime_utc import utcnow
@@ -121,56 +123,79 @@ def _safe_metadata(metadata: dict) -> dict:
     return {k: metadata.get(k) for k in allowed_keys if k in metadata}
 
 
-class AuditLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-
-        try:
-            actor: ActorContext | None = getattr(request.state, "actor", None)
-            if actor is None:
-                return response
-
-            action = _infer_action(method=request.method, path=request.url.path)
-            if action is None:
-                return response
-            if not _should_audit(request=request, action=action):
-                return response
-
-            resource_type, resource_id = _infer_resource(path=request.url.path)
-            rid = getattr(request.state, "request_id", "")
-
-            meta = _safe_metadata(
-                {
-                    "method": request.method.upper(),
-                    "path": request.url.path,
-                    "statusCode": int(response.status_code),
-                    "queryKeys": _query_keys(request),
-                    "requestId": str(rid) if rid else None,
-                }
-            )
-
-            log = AuditLog(
-                id=str(uuid4()),
-                actor_type=actor.actor_type.value,
-                actor_id=str(actor.sub),
-                action=action.value,
-                resource_type=str(resource_type),
-                resource_id=str(resource_id) if resource_id else None,
-                summary=_truncate(
-                    f"{action.value} {resource_type}{(' ' + str(resource_id)) if resource_id else ''}", 512
-                ),
-                ip=_truncate(getattr(getattr(request, "client", None), "host", None), 64),
-                user_agent=_truncate(request.headers.get("User-Agent"), 512),
-                metadata_json=meta,
-                created_at=utcnow(),
-            )
-
-            session_factory = get_session_factory()
-            async with session_factory() as session:
-                session.add(log)
-                await session.commit()
-        except Exception as exc:  # noqa: BLE001
-            # 审计失败不得影响主流程
-            logger.warning("audit_log_failed path=%s err=%s", request.url.path, repr(exc))
-
-        return response
+async def _record_audit(*, request: Request, status_code: int) -> None:
+    """写操作留痕；任何异常仅记日志（审计失败不得影响主流程）。"""
+
+    try:
+        actor: ActorContext | None = getattr(request.state, "actor", None)
+        if actor is None:
+            return
+
+        action = _infer_action(method=request.method, path=request.url.path)
+        if action is None:
+            return
+        if not _should_audit(request=request, action=action):
+            return
+
+        resource_type, resource_id = _infer_resource(path=request.url.path)
+        rid = getattr(request.state, "request_id", "")
+
+        meta = _safe_metadata(
+            {
+                "method": request.method.upper(),
+                "path": request.url.path,
+                "statusCode": status_code,
+                "queryKeys": _query_keys(request),
+                "requestId": str(rid) if rid else None,
+            }
+        )
+
+        row = {
+            "id": str(uuid4()),
+            "actor_type": actor.actor_type.value,
+            "actor_id": str(actor.sub),
+            "action": action.value,
+            "resource_type": str(resource_type),
+            "resource_id": str(resource_id) if resource_id else None,
+            "summary": _truncate(
+                f"{action.value} {resource_type}{(' ' + str(resource_id)) if resource_id else ''}", 512
+            ),
+            "ip": _truncate(getattr(getattr(request, "client", None), "host", None), 64),
+            "user_agent": _truncate(request.headers.get("User-Agent"), 512),
+            # 注意：Core insert 使用列名 metadata（ORM 属性名为 metadata_json）
+            "metadata": meta,
+            "created_at": utcnow(),
+        }
+
+        if audit_writer.is_running():
+            audit_writer.submit(row)
+            return
+
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(AuditLog(**{("metadata_json" if k == "metadata" else k): v for k, v in row.items()}))
+            await session.commit()
+    except Exception as exc:  # noqa: BLE001
+        # 审计失败不得影响主流程
+        logger.warning("audit_log_failed path=%s err=%s", request.url.path, repr(exc))
+
+
+class AuditLogMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started: dict = {}
+
+        async def send_capturing_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                started["status"] = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_capturing_status)
+        if "status" in started:
+            await _record_audit(request=Request(scope), status_code=int(started["status"]))
@@ -6,20 +6,28 @@
 说明：
 - v1 仅在 request.state 注入 actorContext（不主动拦截请求）。
 - 具体端点的权限/数据范围校验由依赖或业务逻辑负责。
+- 纯 ASGI 实现：request.state 即 scope["state"]，下游 Request 对象共享同一份状态。
 """
 
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.services.rbac import ActorContext, parse_actor_from_bearer_token
 from app.utils.redis_client import get_redis
 
 
-class RbacContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
+class RbacContextMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
         request.state.actor = None
 
         auth = request.headers.get("Authorization")
@@ -32,4 +40,4 @@ class RbacContextMiddleware(BaseHTTPMiddleware):
                 # 无效 token 不在此处拦截，由具体端点决定是否要求登录
                 request.state.actor = None
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
@@ -3,26 +3,38 @@
 - 读取请求头中的 RequestId（默认 X-Request-Id）
 - 若不存在则生成
 - 写入 request.state.request_id 供统一响应与日志使用
+
+说明：纯 ASGI 实现（不经 BaseHTTPMiddleware 的 task/stream 转发），响应头在 http.response.start 时写入。
 """
 
 from __future__ import annotations
 
 import uuid
-from typing import Callable
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.utils.settings import settings
 
 
-class RequestIdMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         header_name = settings.request_id_header
+        request = Request(scope)
         rid = request.headers.get(header_name) or str(uuid.uuid4())
         request.state.request_id = rid
 
-        response = await call_next(request)
-        response.headers[header_name] = rid
-        return response
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[header_name] = rid
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
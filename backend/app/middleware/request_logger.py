@@ -1,27 +1,44 @@
 """请求日志中间件。
 
 任务要求：请求日志中间件。
+
+说明：纯 ASGI 实现；耗时统计到响应头发出（与原 call_next 返回时刻一致），日志在请求处理结束后输出。
 """
 
 from __future__ import annotations
 
 import logging
 import time
-from typing import Callable
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger("lhmy.request")
 
 
-class RequestLoggerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+class RequestLoggerMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start = time.perf_counter()
-        response = await call_next(request)
-        cost_ms = (time.perf_counter() - start) * 1000
+        started: dict = {}
+
+        async def send_capturing_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                started["status"] = message["status"]
+                started["cost_ms"] = (time.perf_counter() - start) * 1000
+            await send(message)
+
+        await self.app(scope, receive, send_capturing_status)
+        if not started:
+            return
 
+        request = Request(scope)
         rid = getattr(request.state, "request_id", "")
         actor = getattr(request.state, "actor", None)
         actor_type = getattr(actor, "actor_type", None)
@@ -33,11 +50,10 @@ class RequestLoggerMiddleware(BaseHTTPMiddleware):
             rid,
             request.method,
             request.url.path,
-            response.status_code,
-            cost_ms,
+            started["status"],
+            started["cost_ms"],
             actor_type,
             actor_id,
             ip,
             ua,
         )
-        return response
@@ -48,3 +48,8 @@ from app.models.card import Card  # noqa: F401
 from app.models.bind_token import BindToken  # noqa: F401
 from app.models.ai_provider import AiProvider  # noqa: F401
 from app.models.ai_strategy import AiStrategy  # noqa: F401
+from app.models.dashboard_daily_rollup import DashboardDailyRollup  # noqa: F401
+from app.models.order_stock_reservation import OrderStockReservation  # noqa: F401
+from app.models.payment_outbox import PaymentOutboxDeadLetter, PaymentOutboxEvent  # noqa: F401
+from app.models.dealer_commission_entry import DealerCommissionEntry  # noqa: F401
+from app.models.notification_broadcast import NotificationBroadcast, NotificationBroadcastReceipt  # noqa: F401
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -20,6 +20,11 @@ from app.models.enums import AfterSaleStatus, AfterSaleType
 
 class AfterSaleCase(Base):
     __tablename__ = "after_sale_cases"
+    __table_args__ = (
+        # 仪表盘：今日申请数（created_at range）与待审核数（status）
+        Index("ix_after_sale_cases_created_at", "created_at"),
+        Index("ix_after_sale_cases_status", "status"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="申请单号")
     order_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="订单ID")
@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -24,6 +24,13 @@ from app.utils.datetime_utc import utcnow
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
+    __table_args__ = (
+        # 列表 keyset 分页：ORDER BY created_at DESC, id DESC
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        # 关键词检索：FULLTEXT（ngram 分词，见 services/search.py）
+        Index("ft_audit_logs_summary", "summary", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="审计ID")
 
     actor_type: Mapped[str] = mapped_column(
@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, String
+from sqlalchemy import Date, DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -23,6 +23,11 @@ from app.utils.datetime_utc import utcnow
 class Booking(Base):
     __tablename__ = "bookings"
 
+    __table_args__ = (
+        # Admin 列表 keyset 分页：ORDER BY booking_date DESC, created_at DESC, id DESC
+        Index("ix_bookings_date_created_at_id", "booking_date", "created_at", "id"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="预约ID")
 
     source_type: Mapped[str] = mapped_column(
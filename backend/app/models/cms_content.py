@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text
+from sqlalchemy import DateTime, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -23,6 +23,13 @@ from app.utils.datetime_utc import utcnow
 class CmsContent(Base):
     __tablename__ = "cms_contents"
 
+    __table_args__ = (
+        # Admin 列表 keyset 分页：ORDER BY updated_at DESC, id DESC
+        Index("ix_cms_contents_updated_at_id", "updated_at", "id"),
+        # 关键词检索：FULLTEXT（ngram 分词，见 services/search.py）
+        Index("ft_cms_contents_title_summary", "title", "summary", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="内容ID")
 
     # v3：内容中心与投放解耦：内容可先在“内容中心”创建（不挂栏目），再在“官网投放”页分配栏目并发布
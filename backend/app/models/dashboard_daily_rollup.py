@@ -0,0 +1,40 @@
+"""Admin 仪表盘日汇总（预聚合）。
+
+规格来源：
+- specs/health-services-platform/design.md -> E-11. Admin 仪表盘统计（v1 最小契约）
+
+说明：
+- 一天一行（UTC 日期，与仪表盘 `_date_range_days` 口径一致），只存“已结束”的日期；
+  当天数据由接口按 today 时间范围实时统计。
+- 由定时任务（app/tasks/dashboard.py）滚动重算最近几天，历史区间用 scripts/backfill_dashboard_rollups.py 回填。
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.utils.datetime_utc import utcnow
+
+
+class DashboardDailyRollup(Base):
+    __tablename__ = "dashboard_daily_rollups"
+
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True, comment="统计日期（UTC）")
+
+    new_member_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="新增会员数（实例 owner 去重）"
+    )
+    service_package_paid_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="服务包支付成功数（按 paid_at）"
+    )
+    ecommerce_paid_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="电商支付成功数（按 paid_at）"
+    )
+    refund_request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="售后/退款申请数")
+    redemption_success_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="核销成功数")
+
+    rolled_up_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="汇总时间")
@@ -0,0 +1,49 @@
+"""经销商分账流水（每笔已支付订单一行，结算按周期聚合）。
+
+规格来源：
+- specs/health-services-platform/dealer-settlement-v1.md
+
+说明：
+- 支付回调置为已支付的同一事务写入 ACTIVE 流水（见 app/services/payment_callbacks.py），
+  全额退款同事务冲销为 REVERSED（见 app/services/refund_service.py）；
+- 出账只按 (cycle, status) 聚合本表，不再扫描订单表；分账比例仍在出账时按当时规则计算（口径不变）。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import DealerCommissionEntryStatus
+from app.utils.datetime_utc import utcnow
+
+
+class DealerCommissionEntry(Base):
+    __tablename__ = "dealer_commission_ledger"
+
+    __table_args__ = (Index("ix_dealer_commission_ledger_cycle_status_dealer", "cycle", "status", "dealer_id"),)
+
+    order_id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="订单ID（一单一行）")
+    dealer_id: Mapped[str] = mapped_column(String(36), nullable=False, comment="经销商ID")
+    cycle: Mapped[str] = mapped_column(String(32), nullable=False, comment="结算周期（按 paid_at：YYYY-MM）")
+
+    gross_amount: Mapped[float] = mapped_column(nullable=False, default=0.0, comment="计佣金额（订单总额）")
+    status: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default=DealerCommissionEntryStatus.ACTIVE.value,
+        comment="状态：ACTIVE/REVERSED",
+    )
+
+    paid_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, comment="支付时间")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="创建时间")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        comment="更新时间",
+    )
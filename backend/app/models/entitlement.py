@@ -11,7 +11,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -23,6 +23,12 @@ from app.utils.datetime_utc import utcnow
 class Entitlement(Base):
     __tablename__ = "entitlements"
 
+    __table_args__ = (
+        # 列表 keyset 分页：USER 按 owner_id 过滤；ADMIN 全量
+        Index("ix_entitlements_owner_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_entitlements_created_at_id", "created_at", "id"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="权益ID")
 
     # userId 为兼容/查询保留字段；语义等同 ownerId（业务逻辑统一使用 ownerId）
@@ -64,6 +64,22 @@ class ProductStatus(StrEnum):
     REJECTED = "REJECTED"
 
 
+class StockReservationStatus(StrEnum):
+    """物流商品库存预占流水状态（每单每商品一行）。"""
+
+    RESERVED = "RESERVED"
+    CONFIRMED = "CONFIRMED"
+    RELEASED = "RELEASED"
+
+
+class PaymentOutboxStatus(StrEnum):
+    """支付成功 outbox 事件状态（PENDING -> DONE；重试耗尽 -> DEAD，回放后回到 PENDING）。"""
+
+    PENDING = "PENDING"
+    DONE = "DONE"
+    DEAD = "DEAD"
+
+
 class CommonEnabledStatus(StrEnum):
     """启用/停用（分类/节点等通用）。"""
 
@@ -274,6 +290,13 @@ class SettlementStatus(StrEnum):
     FROZEN = "FROZEN"
 
 
+class DealerCommissionEntryStatus(StrEnum):
+    """经销商分账流水状态（支付成功记 ACTIVE；全额退款冲销为 REVERSED）。"""
+
+    ACTIVE = "ACTIVE"
+    REVERSED = "REVERSED"
+
+
 class NotificationReceiverType(StrEnum):
     """通知接收者类型。"""
 
@@ -291,6 +314,14 @@ class NotificationStatus(StrEnum):
     READ = "READ"
 
 
+class NotificationBroadcastAudience(StrEnum):
+    """广播通知受众（一条广播覆盖该类全部账号，读取时合并；PROVIDER 含 PROVIDER_STAFF）。"""
+
+    ALL_ADMINS = "ALL_ADMINS"
+    ALL_DEALERS = "ALL_DEALERS"
+    ALL_PROVIDERS = "ALL_PROVIDERS"
+
+
 class NotificationCategory(StrEnum):
     """通知类别（用于接收端展示/筛选，v1 最小）。"""
 
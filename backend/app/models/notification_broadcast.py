@@ -0,0 +1,61 @@
+"""广播通知与已读回执模型。
+
+规格来源：
+- specs/health-services-platform/admin-notifications-sending-v1.md
+- specs-prod/admin/api-contracts.md#9J
+
+说明：
+- 群发（ALL_ADMINS/ALL_DEALERS/ALL_PROVIDERS）只写一行 notification_broadcasts，不再按接收者 fan-out；
+  接收端列表在读取时与 notifications（定向通知）合并。
+- 已读状态按接收者写回执（一人一条广播一行）；无回执即未读。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, JSON, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import NotificationCategory
+from app.utils.datetime_utc import utcnow
+
+
+class NotificationBroadcast(Base):
+    __tablename__ = "notification_broadcasts"
+    __table_args__ = (Index("ix_notification_broadcasts_audience_created", "audience", "created_at"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="广播ID（接收端作为通知ID展示）")
+
+    sender_type: Mapped[str | None] = mapped_column(
+        String(32), nullable=True, comment="发送者类型（ADMIN；系统通知为空）"
+    )
+    sender_id: Mapped[str | None] = mapped_column(String(36), nullable=True, comment="发送者ID（adminId，可空）")
+
+    audience: Mapped[str] = mapped_column(
+        String(32), nullable=False, comment="受众：ALL_ADMINS/ALL_DEALERS/ALL_PROVIDERS"
+    )
+
+    title: Mapped[str] = mapped_column(String(256), nullable=False, comment="标题")
+    content: Mapped[str] = mapped_column(Text, nullable=False, comment="内容")
+    category: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default=NotificationCategory.SYSTEM.value,
+        comment="类别：SYSTEM/ACTIVITY/OPS",
+    )
+    meta_json: Mapped[dict | None] = mapped_column(JSON, nullable=True, comment="扩展元数据（JSON，可空）")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="创建时间")
+
+
+class NotificationBroadcastReceipt(Base):
+    __tablename__ = "notification_broadcast_receipts"
+    __table_args__ = (Index("ix_notification_broadcast_receipts_receiver", "receiver_type", "receiver_id"),)
+
+    broadcast_id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="广播ID")
+    receiver_type: Mapped[str] = mapped_column(String(32), primary_key=True, comment="接收者类型")
+    receiver_id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="接收者ID")
+
+    read_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="已读时间")
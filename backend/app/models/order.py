@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -20,6 +20,15 @@ from app.utils.datetime_utc import utcnow
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # 库存预占超时释放：按 (待支付, 物流商品, 到期时间) range scan + SKIP LOCKED 认领
+        Index("ix_orders_reservation_release", "payment_status", "fulfillment_type", "reservation_expires_at"),
+        # 仪表盘：按 (订单类型, 已支付, paid_at) range 统计
+        Index("ix_orders_type_status_paid_at", "order_type", "payment_status", "paid_at"),
+        # 列表 keyset 分页：USER 按 user_id 过滤；ADMIN 全量
+        Index("ix_orders_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="订单ID（v1：展示字段 orderNo=id）")
 
@@ -0,0 +1,47 @@
+"""物流商品库存预占流水（每单每商品一行）。
+
+规格来源：
+- specs/health-services-platform/tasks.md -> REQ-ECOMMERCE-P0-001（下单占用库存 -> 支付扣减 / 超时释放）
+
+说明：
+- 下单时与 `products.reserved_stock` 的条件更新在同一事务写入（RESERVED）；
+- 支付成功只处理 RESERVED 行并置为 CONFIRMED，超时释放同理置为 RELEASED：
+  状态只前进一次，重复回调/重复释放天然幂等（见 app/services/stock_reservation.py）。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import StockReservationStatus
+from app.utils.datetime_utc import utcnow
+
+
+class OrderStockReservation(Base):
+    __tablename__ = "order_stock_reservations"
+
+    __table_args__ = (Index("ix_order_stock_reservations_product_status", "product_id", "status"),)
+
+    order_id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="订单ID")
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="商品ID")
+
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, comment="预占数量（同一商品多行明细已合并）")
+    status: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default=StockReservationStatus.RESERVED.value,
+        comment="状态：RESERVED/CONFIRMED/RELEASED",
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="创建时间")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        comment="更新时间",
+    )
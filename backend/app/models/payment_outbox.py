@@ -0,0 +1,89 @@
+"""支付成功 outbox 事件与死信（履约异步化）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 属性 3：履约流程启动正确性（支付成功后按订单类型路由）
+- specs/health-services-platform/tasks.md -> 阶段4-25.3（支付回调处理与状态更新）
+
+说明：
+- 支付回调在同一个短事务内写入“订单/支付已支付 + 一条 PAYMENT_SUCCEEDED 事件”后立即应答微信；
+  卡/权益/bind_token/库存扣减由消费者按事件异步履约（见 app/services/payment_outbox.py）。
+- 权益大单：PAYMENT_SUCCEEDED 履约时与其同事务写入 ENTITLEMENTS_GENERATION 事件，批量生成权益同样走本表的
+  重试/死信/回放，避免“事件已 DONE 但权益未生成”。
+- (order_id, event_type) 唯一：重复回调不会产生第二条事件。
+- 重试耗尽（或业务校验失败）的事件置为 DEAD 并写入死信表，修复后用 scripts/replay_payment_outbox.py 回放。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import PaymentOutboxStatus
+from app.utils.datetime_utc import utcnow
+
+PAYMENT_SUCCEEDED_EVENT = "PAYMENT_SUCCEEDED"
+ENTITLEMENTS_GENERATION_EVENT = "ENTITLEMENTS_GENERATION"
+
+
+class PaymentOutboxEvent(Base):
+    __tablename__ = "payment_outbox_events"
+
+    __table_args__ = (
+        UniqueConstraint("order_id", "event_type", name="uk_payment_outbox_events_order_event"),
+        Index("ix_payment_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="事件ID")
+    event_type: Mapped[str] = mapped_column(
+        String(32),
+        nullable=False,
+        default=PAYMENT_SUCCEEDED_EVENT,
+        comment="事件类型：PAYMENT_SUCCEEDED/ENTITLEMENTS_GENERATION",
+    )
+    order_id: Mapped[str] = mapped_column(String(36), nullable=False, comment="订单ID")
+    payment_id: Mapped[str] = mapped_column(String(36), nullable=False, comment="支付记录ID")
+
+    status: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default=PaymentOutboxStatus.PENDING.value,
+        comment="状态：PENDING/DONE/DEAD",
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="已执行次数")
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=utcnow, comment="下次可执行时间"
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="最近一次失败原因")
+
+    paid_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, comment="支付成功时间（履约滞后起点）")
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, comment="履约完成时间")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="创建时间")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        comment="更新时间",
+    )
+
+
+class PaymentOutboxDeadLetter(Base):
+    __tablename__ = "payment_outbox_dead_letters"
+
+    __table_args__ = (Index("ix_payment_outbox_dead_letters_replayed_at", "replayed_at"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="死信ID")
+    event_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="outbox 事件ID")
+    event_type: Mapped[str] = mapped_column(String(32), nullable=False, comment="事件类型")
+    order_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="订单ID")
+    payment_id: Mapped[str] = mapped_column(String(36), nullable=False, comment="支付记录ID")
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="进入死信时的执行次数")
+    error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="最后一次失败原因")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, comment="进入死信时间")
+    replayed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, comment="回放时间（NULL=未回放）")
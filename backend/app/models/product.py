@@ -13,7 +13,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text
+from sqlalchemy import DateTime, Index, String, Text
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -25,6 +25,13 @@ from app.utils.datetime_utc import utcnow
 class Product(Base):
     __tablename__ = "products"
 
+    __table_args__ = (
+        # 列表 keyset 分页：WHERE status=? ORDER BY created_at DESC, id DESC
+        Index("ix_products_status_created_at_id", "status", "created_at", "id"),
+        # 关键词检索：FULLTEXT（ngram 分词，见 services/search.py）
+        Index("ft_products_title", "title", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="商品ID")
     provider_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="服务提供方ID")
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -19,6 +19,12 @@ from app.utils.datetime_utc import utcnow
 
 class RedemptionRecord(Base):
     __tablename__ = "redemption_records"
+    __table_args__ = (
+        # 仪表盘：按 (核销成功, redemption_time) range 统计
+        Index("ix_redemption_records_status_time", "status", "redemption_time"),
+        # Provider 列表 keyset 分页：按场所 + ORDER BY redemption_time DESC, id DESC
+        Index("ix_redemption_records_venue_time_id", "venue_id", "redemption_time", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="核销记录ID")
 
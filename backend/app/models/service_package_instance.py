@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -19,6 +19,10 @@ from app.utils.datetime_utc import utcnow
 
 class ServicePackageInstance(Base):
     __tablename__ = "service_package_instances"
+    __table_args__ = (
+        # 仪表盘：新增会员（created_at range）
+        Index("ix_service_package_instances_created_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="卡实例ID")
     order_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="订单ID")
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -22,6 +22,10 @@ class UserEnterpriseBinding(Base):
     """用户企业绑定申请与审核结果。"""
 
     __tablename__ = "user_enterprise_bindings"
+    __table_args__ = (
+        # 仪表盘：待处理绑定数（status）
+        Index("ix_user_enterprise_bindings_status", "status"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="绑定ID")
 
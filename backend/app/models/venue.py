@@ -3,24 +3,38 @@
 规格来源：
 - specs/health-services-platform/design.md -> 数据模型 -> Venue
 - specs/health-services-platform/tasks.md -> 阶段2-9.1
+
+说明：
+- `geohash` 由 lat/lng 派生（ORM before_insert/before_update 钩子维护），用于附近场所的前缀范围预筛；
+  不要绕过 ORM 直接改 lat/lng（批量修复时逐行调用 `sync_geohash`）。
 """
 
 from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text
+from sqlalchemy import DateTime, Index, String, Text, event
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
 from app.models.enums import VenuePublishStatus, VenueReviewStatus
 from app.utils.datetime_utc import utcnow
+from app.utils.geohash import encode as geohash_encode
 
 
 class Venue(Base):
     __tablename__ = "venues"
 
+    __table_args__ = (
+        # 列表 keyset 分页：WHERE publish_status=? ORDER BY created_at DESC, id DESC
+        Index("ix_venues_publish_status_created_at_id", "publish_status", "created_at", "id"),
+        # 附近场所：WHERE publish_status=? AND geohash LIKE 'prefix%'（覆盖格的多段前缀 range scan）
+        Index("ix_venues_publish_status_geohash", "publish_status", "geohash"),
+        # 关键词检索：FULLTEXT（ngram 分词，见 services/search.py）
+        Index("ft_venues_name_address", "name", "address", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
     id: Mapped[str] = mapped_column(String(36), primary_key=True, comment="场所ID")
 
     provider_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="服务提供方ID")
@@ -40,6 +54,7 @@ class Venue(Base):
     address: Mapped[str | None] = mapped_column(String(512), nullable=True, comment="地址")
     lat: Mapped[float | None] = mapped_column(nullable=True, comment="纬度")
     lng: Mapped[float | None] = mapped_column(nullable=True, comment="经度")
+    geohash: Mapped[str | None] = mapped_column(String(12), nullable=True, comment="lat/lng 派生的 geohash（12位）")
 
     contact_phone: Mapped[str | None] = mapped_column(String(64), nullable=True, comment="联系电话")
     business_hours: Mapped[str | None] = mapped_column(String(256), nullable=True, comment="营业时间")
@@ -72,3 +87,23 @@ class Venue(Base):
         onupdate=utcnow,
         comment="更新时间",
     )
+
+
+def sync_geohash(v: Venue) -> None:
+    """按 lat/lng 重算 geohash；坐标缺失或越界时置空（不参与附近检索）。"""
+
+    lat, lng = v.lat, v.lng
+    if lat is None or lng is None or not (-90.0 <= lat <= 90.0) or not (-180.0 <= lng <= 180.0):
+        v.geohash = None
+    else:
+        v.geohash = geohash_encode(float(lat), float(lng))
+
+
+@event.listens_for(Venue, "before_insert")
+def _venue_before_insert(_mapper, _connection, target: Venue) -> None:
+    sync_geohash(target)
+
+
+@event.listens_for(Venue, "before_update")
+def _venue_before_update(_mapper, _connection, target: Venue) -> None:
+    sync_geohash(target)
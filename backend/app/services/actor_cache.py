@@ -0,0 +1,197 @@
+"""操作者上下文进程内缓存（按 token jti）。
+
+规格来源：
+- specs/health-services-platform/design.md -> RBAC：中间件从 token 解析 actorType/sub
+- specs/health-services-platform/design.md -> logout blacklist 机制
+
+说明：
+- token 签名仍在每次请求校验（单次 HMAC 解码）；缓存只省去黑名单 Redis EXISTS 与 Provider 状态 DB 查询。
+- 条目有效期 = min(短 TTL, token exp)；同一条目可附带 ProviderContext（providerId 由 DB 得到）。
+- 失效：
+  1) 黑名单写入（logout/refresh）后调用 `invalidate_actor_cache(jtis=...)`；
+  2) 账号状态变化（冻结/启用/删除）由 ORM after_commit 钩子按 sub 自动失效（同 system_config_cache）；
+  两者都会通过 Redis pub/sub 广播，其它进程的监听任务清理各自缓存；广播丢失时由短 TTL 收敛。
+- 测试环境不启用（同 system_config_cache：测试会绕过 ORM 直接改表）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.admin import Admin
+from app.models.dealer_user import DealerUser
+from app.models.provider_staff import ProviderStaff
+from app.models.provider_user import ProviderUser
+from app.utils.invalidation import in_pytest, listen_for_invalidations, register_commit_invalidation
+from app.utils.redis_client import get_redis
+from app.utils.settings import settings
+
+if TYPE_CHECKING:
+    from app.services.provider_auth_context import ProviderContext
+    from app.services.rbac import ActorContext
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "actor_cache:invalidate"
+
+_MAX_ENTRIES = 10000
+_SESSION_INFO_KEY = "actor_cache_dirty_subs"
+_ACCOUNT_MODELS = (Admin, DealerUser, ProviderStaff, ProviderUser)
+
+
+@dataclass
+class _Entry:
+    sub: str
+    actor: ActorContext
+    provider: ProviderContext | None
+    expires_at: float
+
+
+class _ActorCache:
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._data: OrderedDict[str, _Entry] = OrderedDict()
+        self._by_sub: dict[str, set[str]] = {}
+
+    def get(self, jti: str, *, sub: str) -> _Entry | None:
+        e = self._data.get(jti)
+        if e is None:
+            return None
+        if e.expires_at < time.monotonic() or e.sub != sub:
+            self._pop(jti)
+            return None
+        self._data.move_to_end(jti)
+        return e
+
+    def put(
+        self, jti: str, *, sub: str, actor: ActorContext, provider: ProviderContext | None, token_exp: int | None
+    ) -> None:
+        ttl = self._ttl
+        if token_exp:
+            ttl = min(ttl, float(token_exp) - time.time())
+        if ttl <= 0:
+            return
+        self._pop(jti)
+        self._data[jti] = _Entry(sub=sub, actor=actor, provider=provider, expires_at=time.monotonic() + ttl)
+        self._by_sub.setdefault(sub, set()).add(jti)
+        while len(self._data) > self._max:
+            self._pop(next(iter(self._data)))
+
+    def _pop(self, jti: str) -> None:
+        e = self._data.pop(jti, None)
+        if e is None:
+            return
+        jtis = self._by_sub.get(e.sub)
+        if jtis is not None:
+            jtis.discard(jti)
+            if not jtis:
+                self._by_sub.pop(e.sub, None)
+
+    def evict(self, *, jtis: list[str] | None = None, subs: list[str] | None = None) -> None:
+        for jti in jtis or []:
+            self._pop(jti)
+        for sub in subs or []:
+            for jti in list(self._by_sub.get(sub, ())):
+                self._pop(jti)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._by_sub.clear()
+
+
+_cache = _ActorCache(max_entries=_MAX_ENTRIES, ttl_seconds=settings.actor_cache_ttl_seconds)
+
+
+def cached_actor(*, jti: str, sub: str) -> ActorContext | None:
+    if in_pytest():
+        return None
+    e = _cache.get(jti, sub=sub)
+    return None if e is None else e.actor
+
+
+def remember_actor(*, jti: str, sub: str, actor: ActorContext, token_exp: int | None) -> None:
+    if in_pytest():
+        return
+    _cache.put(jti, sub=sub, actor=actor, provider=None, token_exp=token_exp)
+
+
+def cached_provider_context(*, jti: str, sub: str) -> ProviderContext | None:
+    if in_pytest():
+        return None
+    e = _cache.get(jti, sub=sub)
+    return None if e is None else e.provider
+
+
+def remember_provider_context(
+    *, jti: str, sub: str, actor: ActorContext, provider: ProviderContext, token_exp: int | None
+) -> None:
+    if in_pytest():
+        return
+    _cache.put(jti, sub=sub, actor=actor, provider=provider, token_exp=token_exp)
+
+
+async def invalidate_actor_cache(*, jtis: list[str] | None = None, subs: list[str] | None = None) -> None:
+    """清理本进程缓存并广播给其它进程（Redis 不可用时依赖短 TTL 收敛）。"""
+
+    js = sorted({str(x) for x in (jtis or []) if x})
+    ss = sorted({str(x) for x in (subs or []) if x})
+    if not js and not ss:
+        return
+    _cache.evict(jtis=js, subs=ss)
+    try:
+        await get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"jtis": js, "subs": ss}))
+    except Exception:  # noqa: BLE001
+        logger.warning("actor cache invalidation publish failed (TTL will converge): jtis=%s subs=%s", js, ss)
+
+
+# -----------------------------
+# ORM 提交钩子：账号状态变化自动失效；跨进程失效监听（FastAPI lifespan 内启动）
+# -----------------------------
+
+
+def _dirty_subs(session: Session) -> set[str]:
+    subs: set[str] = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, _ACCOUNT_MODELS):
+            continue
+        if obj in session.dirty and not get_history(obj, "status").has_changes():
+            continue
+        subs.add(str(obj.id))
+    return subs
+
+
+def _evict_subs(subs: list[str]) -> None:
+    _cache.evict(subs=subs)
+
+
+async def _propagate_subs(subs: list[str]) -> None:
+    await invalidate_actor_cache(subs=subs)
+
+
+def _on_invalidation(payload: dict | None) -> None:
+    jtis, subs = (payload or {}).get("jtis") or [], (payload or {}).get("subs") or []
+    if payload is None or not isinstance(jtis, list) or not isinstance(subs, list):
+        _cache.clear()
+        return
+    _cache.evict(jtis=[str(x) for x in jtis], subs=[str(x) for x in subs])
+
+
+register_commit_invalidation(
+    info_key=_SESSION_INFO_KEY, collect=_dirty_subs, evict_local=_evict_subs, propagate=_propagate_subs
+)
+
+
+async def run_invalidation_listener(stop: asyncio.Event) -> None:
+    """订阅失效广播并清理本进程缓存；Redis 断开时退避重连，直到 stop 被置位。"""
+
+    await listen_for_invalidations(channel=INVALIDATION_CHANNEL, handler=_on_invalidation, stop=stop)
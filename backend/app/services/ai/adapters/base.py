@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 
 from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
 
@@ -23,3 +24,18 @@ class ProviderAdapter(ABC):
     ) -> AiAdapterResult:  # pragma: no cover
         raise NotImplementedError
 
+    async def stream(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AsyncIterator[str]:
+        """流式输出增量文本（拼接后即完整回复）。
+
+        默认实现：整段调用 execute 后一次性产出；支持流式的 provider 覆盖本方法。
+        """
+
+        result = await self.execute(provider=provider, strategy=strategy, user_input=user_input, context=context)
+        yield result.content
@@ -7,18 +7,30 @@
 - POST {endpoint}/api/v1/apps/{app_id}/completion
   - Authorization: Bearer {api_key}
   - body: { "input": { "prompt": "..." }, "parameters": {...} }
+  - 流式：`X-DashScope-SSE: enable` + parameters.incremental_output=true
 """
 
 from __future__ import annotations
 
 import time
+from collections.abc import AsyncIterator
+from typing import Any
 
-import httpx
 from fastapi import HTTPException
 
 from app.services.ai.adapters.base import ProviderAdapter
 from app.services.ai.prompting import build_single_turn_prompt
+from app.services.ai.sse import stream_sse_deltas
 from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
+from app.utils import http_clients
+
+
+def _stream_delta(obj: Any) -> str | None:
+    out = obj.get("output") if isinstance(obj, dict) else None
+    if not isinstance(out, dict):
+        return None
+    content = out.get("text") or out.get("answer") or out.get("content")
+    return str(content) if content else None
 
 
 class DashScopeApplicationAdapter(ProviderAdapter):
@@ -26,16 +38,9 @@ class DashScopeApplicationAdapter(ProviderAdapter):
         _ = strategy
         return True
 
-    async def execute(
-        self,
-        *,
-        provider: AiProviderSnapshot,
-        strategy: AiStrategySnapshot,
-        user_input: str,
-        context: AiCallContext,
-    ) -> AiAdapterResult:
-        _ = context
-
+    def _prepare(
+        self, *, provider: AiProviderSnapshot, strategy: AiStrategySnapshot, user_input: str
+    ) -> tuple[str, dict, dict[str, str], float, int]:
         api_key = str((provider.credentials or {}).get("api_key") or (provider.credentials or {}).get("apiKey") or "").strip()
         app_id = str((provider.credentials or {}).get("app_id") or (provider.credentials or {}).get("appId") or "").strip()
         endpoint = (provider.endpoint or "").strip() or "https://dashscope.aliyuncs.com"
@@ -72,15 +77,29 @@ class DashScopeApplicationAdapter(ProviderAdapter):
         timeout_s = max(0.1, float(timeout_ms) / 1000.0)
 
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        return url, payload, headers, timeout_s, 1 + max(0, retries)
+
+    async def execute(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AiAdapterResult:
+        _ = context
 
-        max_attempts = 1 + max(0, retries)
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
         last_exc: Exception | None = None
         started = time.perf_counter()
 
         for attempt in range(max_attempts):
             try:
-                async with httpx.AsyncClient(timeout=timeout_s) as client:
-                    resp = await client.post(url, json=payload, headers=headers)
+                resp = await http_clients.request(
+                    "POST", url, upstream="ai:dashscope_application", timeout=timeout_s, json=payload, headers=headers
+                )
                 if resp.status_code >= 500 and attempt < max_attempts - 1:
                     continue
                 data = resp.json()
@@ -113,3 +132,27 @@ class DashScopeApplicationAdapter(ProviderAdapter):
 
         raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务调用失败"}) from last_exc
 
+    async def stream(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AsyncIterator[str]:
+        _ = context
+
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
+        payload.setdefault("parameters", {})["incremental_output"] = True
+        async for delta in stream_sse_deltas(
+            url=url,
+            upstream="ai:dashscope_application",
+            timeout_s=timeout_s,
+            max_attempts=max_attempts,
+            payload=payload,
+            headers={**headers, "Accept": "text/event-stream", "X-DashScope-SSE": "enable"},
+            extract_delta=_stream_delta,
+        ):
+            yield delta
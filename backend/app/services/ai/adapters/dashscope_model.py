@@ -6,6 +6,7 @@
 接口参考（公开文档）：
 - POST {endpoint}/api/v1/services/aigc/text-generation/generation
   - Authorization: Bearer {api_key}
+  - 流式：`X-DashScope-SSE: enable` + parameters.incremental_output=true
   - body:
     {
       "model": "<model>",
@@ -17,13 +18,29 @@
 from __future__ import annotations
 
 import time
+from collections.abc import AsyncIterator
+from typing import Any
 
-import httpx
 from fastapi import HTTPException
 
 from app.services.ai.adapters.base import ProviderAdapter
 from app.services.ai.prompting import build_system_prompt
+from app.services.ai.sse import stream_sse_deltas
 from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
+from app.utils import http_clients
+
+
+def _stream_delta(obj: Any) -> str | None:
+    # 与非流式同构：output.choices[0].message.content，兜底 output.text
+    out = obj.get("output") if isinstance(obj, dict) else None
+    if not isinstance(out, dict):
+        return None
+    choices = out.get("choices") or []
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        msg = choices[0].get("message")
+        if isinstance(msg, dict) and msg.get("content"):
+            return str(msg["content"])
+    return str(out["text"]) if out.get("text") else None
 
 
 class DashScopeModelAdapter(ProviderAdapter):
@@ -31,16 +48,9 @@ class DashScopeModelAdapter(ProviderAdapter):
         _ = strategy
         return True
 
-    async def execute(
-        self,
-        *,
-        provider: AiProviderSnapshot,
-        strategy: AiStrategySnapshot,
-        user_input: str,
-        context: AiCallContext,
-    ) -> AiAdapterResult:
-        _ = context
-
+    def _prepare(
+        self, *, provider: AiProviderSnapshot, strategy: AiStrategySnapshot, user_input: str
+    ) -> tuple[str, dict, dict[str, str], float, int]:
         api_key = str((provider.credentials or {}).get("api_key") or (provider.credentials or {}).get("apiKey") or "").strip()
         endpoint = (provider.endpoint or "").strip() or "https://dashscope.aliyuncs.com"
         model = str((provider.extra or {}).get("default_model") or (provider.extra or {}).get("model") or "").strip()
@@ -85,15 +95,29 @@ class DashScopeModelAdapter(ProviderAdapter):
         timeout_s = max(0.1, float(timeout_ms) / 1000.0)
 
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        return url, payload, headers, timeout_s, 1 + max(0, retries)
+
+    async def execute(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AiAdapterResult:
+        _ = context
 
-        max_attempts = 1 + max(0, retries)
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
         last_exc: Exception | None = None
         started = time.perf_counter()
 
         for attempt in range(max_attempts):
             try:
-                async with httpx.AsyncClient(timeout=timeout_s) as client:
-                    resp = await client.post(url, json=payload, headers=headers)
+                resp = await http_clients.request(
+                    "POST", url, upstream="ai:dashscope_model", timeout=timeout_s, json=payload, headers=headers
+                )
                 if resp.status_code >= 500 and attempt < max_attempts - 1:
                     continue
                 data = resp.json()
@@ -133,3 +157,28 @@ class DashScopeModelAdapter(ProviderAdapter):
 
         raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务调用失败"}) from last_exc
 
+    async def stream(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AsyncIterator[str]:
+        _ = context
+
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
+        # SSE + incremental_output：每个事件只含新增片段（默认为累计全文）
+        payload["parameters"]["incremental_output"] = True
+        async for delta in stream_sse_deltas(
+            url=url,
+            upstream="ai:dashscope_model",
+            timeout_s=timeout_s,
+            max_attempts=max_attempts,
+            payload=payload,
+            headers={**headers, "Accept": "text/event-stream", "X-DashScope-SSE": "enable"},
+            extract_delta=_stream_delta,
+        ):
+            yield delta
@@ -3,13 +3,26 @@
 from __future__ import annotations
 
 import time
+from collections.abc import AsyncIterator
+from typing import Any
 
-import httpx
 from fastapi import HTTPException
 
 from app.services.ai.adapters.base import ProviderAdapter
 from app.services.ai.prompting import build_system_prompt
+from app.services.ai.sse import stream_sse_deltas
 from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
+from app.utils import http_clients
+
+
+def _stream_delta(obj: Any) -> str | None:
+    # stream=true：choices[0].delta.content（首个事件通常只有 role，无 content）
+    choices = obj.get("choices") if isinstance(obj, dict) else None
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return None
+    delta = choices[0].get("delta")
+    content = delta.get("content") if isinstance(delta, dict) else None
+    return str(content) if content else None
 
 
 class OpenAiCompatibleAdapter(ProviderAdapter):
@@ -17,16 +30,9 @@ class OpenAiCompatibleAdapter(ProviderAdapter):
         _ = strategy
         return True
 
-    async def execute(
-        self,
-        *,
-        provider: AiProviderSnapshot,
-        strategy: AiStrategySnapshot,
-        user_input: str,
-        context: AiCallContext,
-    ) -> AiAdapterResult:
-        _ = context
-
+    def _prepare(
+        self, *, provider: AiProviderSnapshot, strategy: AiStrategySnapshot, user_input: str
+    ) -> tuple[str, dict, dict[str, str], float, int]:
         endpoint = (provider.endpoint or "").strip()
         api_key = str((provider.credentials or {}).get("api_key") or (provider.credentials or {}).get("apiKey") or "").strip()
         model = str((provider.extra or {}).get("default_model") or (provider.extra or {}).get("model") or "").strip()
@@ -62,15 +68,29 @@ class OpenAiCompatibleAdapter(ProviderAdapter):
         timeout_s = max(0.1, float(timeout_ms) / 1000.0)
 
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        return url, payload, headers, timeout_s, 1 + max(0, retries)
+
+    async def execute(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AiAdapterResult:
+        _ = context
 
-        max_attempts = 1 + max(0, retries)
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
         last_exc: Exception | None = None
         started = time.perf_counter()
 
         for attempt in range(max_attempts):
             try:
-                async with httpx.AsyncClient(timeout=timeout_s) as client:
-                    resp = await client.post(url, json=payload, headers=headers)
+                resp = await http_clients.request(
+                    "POST", url, upstream="ai:openai_compatible", timeout=timeout_s, json=payload, headers=headers
+                )
                 if resp.status_code >= 500 and attempt < max_attempts - 1:
                     continue
                 data = resp.json()
@@ -96,3 +116,27 @@ class OpenAiCompatibleAdapter(ProviderAdapter):
 
         raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务调用失败"}) from last_exc
 
+    async def stream(
+        self,
+        *,
+        provider: AiProviderSnapshot,
+        strategy: AiStrategySnapshot,
+        user_input: str,
+        context: AiCallContext,
+    ) -> AsyncIterator[str]:
+        _ = context
+
+        url, payload, headers, timeout_s, max_attempts = self._prepare(
+            provider=provider, strategy=strategy, user_input=user_input
+        )
+        payload["stream"] = True
+        async for delta in stream_sse_deltas(
+            url=url,
+            upstream="ai:openai_compatible",
+            timeout_s=timeout_s,
+            max_attempts=max_attempts,
+            payload=payload,
+            headers={**headers, "Accept": "text/event-stream"},
+            extract_delta=_stream_delta,
+        ):
+            yield delta
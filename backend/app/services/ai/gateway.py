@@ -1,17 +1,39 @@
-"""AI Gateway（v2 统一入口）。"""
+"""AI Gateway（v2 统一入口）。
+
+说明：
+- 流程：解析 Strategy/Provider 快照（repository 进程内缓存；调用方已解析时经 `resolved` 传入，不再重复查询）
+  -> 响应缓存（按 Strategy 开启，见 response_cache.py）-> 风控拒答 -> Provider adapter。
+- 缓存命中与风控拒答都不调用第三方；二者的结果都会写入缓存（仅当该 Strategy 开启缓存）。
+"""
 
 from __future__ import annotations
 
 import time
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
 from fastapi import HTTPException
+from prometheus_client import Histogram
 
+from app.services.ai.adapters.base import ProviderAdapter
 from app.services.ai.factory import create_adapter
-from app.services.ai.repository import load_provider_by_id, load_strategy_by_scene
+from app.services.ai.repository import resolve_snapshots
+from app.services.ai.response_cache import AiResponseCache, CachedAiResponse, config_fingerprint
 from app.services.ai.risk import is_medical_diagnosis_request, refusal_for_diagnosis
 from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
-from app.utils.db import get_session_factory
+
+_RISK_BLOCKED = "RISK_BLOCKED"
+_RISK_BLOCKED_PROVIDER = AiProviderSnapshot(
+    id="", name="", provider_type=_RISK_BLOCKED, credentials={}, endpoint=None, extra={}
+)
+
+
+@dataclass(frozen=True)
+class AiResolvedConfig:
+    """scene 解析结果：Strategy 已启用；Provider 未绑定/已停用时为 None（调用时才报错，风控拒答不依赖 Provider）。"""
+
+    strategy: AiStrategySnapshot
+    provider: AiProviderSnapshot | None
 
 
 @dataclass(frozen=True)
@@ -20,65 +42,202 @@ class AiGatewayResult:
     provider: AiProviderSnapshot
     strategy: AiStrategySnapshot
     provider_latency_ms: int | None
+    config_version: str | None = None
+    cache_hit: bool = False
+
+
+@dataclass(frozen=True)
+class AiGatewayStream:
+    """流式调用：配置/风控校验已完成（错误在建流前以 HTTPException 抛出），deltas 按序产出增量文本。"""
+
+    provider: AiProviderSnapshot
+    strategy: AiStrategySnapshot
+    deltas: AsyncIterator[str]
+    config_version: str | None = None
+    cache_hit: bool = False
+
+
+# 首包耗时（请求开始 -> 第一个增量到达），由调用方在拿到首个 delta 时 observe
+AI_TIME_TO_FIRST_TOKEN = Histogram(
+    "lhmy_ai_time_to_first_token_seconds",
+    "Time from AI chat request start to the first streamed delta",
+    ["provider_type"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0),
+)
 
 
-async def call_ai(*, scene: str, user_input: str, context: AiCallContext) -> AiGatewayResult:
+async def resolve_ai_config(*, scene: str) -> AiResolvedConfig:
     scene = str(scene or "").strip()
     if not scene:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "缺少 scene"})
 
-    user_input = str(user_input or "").strip()
+    strategy, provider = await resolve_snapshots(scene=scene)
+    if strategy is None:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "FORBIDDEN",
+                "message": f"AI 场景未配置或已停用（scene={scene}）。请在管理后台创建并启用对应 AI Strategy。",
+            },
+        )
+    return AiResolvedConfig(strategy=strategy, provider=provider)
+
+
+async def _load_config(
+    *, scene: str, user_input: str, resolved: AiResolvedConfig | None
+) -> tuple[AiStrategySnapshot, AiProviderSnapshot | None]:
+    if not scene:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "缺少 scene"})
     if not user_input:
         raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "缺少 message"})
+    if resolved is None:
+        resolved = await resolve_ai_config(scene=scene)
+    return resolved.strategy, resolved.provider
+
+
+def _risk_refusal(*, strategy: AiStrategySnapshot, user_input: str) -> str | None:
+    # 风控：诊断类问题直接拒答，不调用第三方
+    if bool((strategy.constraints or {}).get("forbid_medical_diagnosis")) and is_medical_diagnosis_request(user_input):
+        return refusal_for_diagnosis()
+    return None
+
+
+def _require_adapter(
+    *, scene: str, strategy: AiStrategySnapshot, provider: AiProviderSnapshot | None
+) -> tuple[AiProviderSnapshot, ProviderAdapter]:
+    if not str(strategy.provider_id or "").strip():
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "FORBIDDEN",
+                "message": f"AI 场景未绑定 Provider（scene={scene}）。请在管理后台“AI 绑定关系”把该 scene 绑定到一个 Provider。",
+            },
+        )
+    if provider is None:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "FORBIDDEN",
+                "message": f"AI Provider 未配置或已停用（scene={scene}）。请检查绑定的 Provider 是否存在且状态为 ENABLED。",
+            },
+        )
+
+    adapter = create_adapter(provider)
+    if not adapter.supports(strategy=strategy):
+        raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "AI Provider 不支持该场景"})
+    return provider, adapter
+
+
+def _cached_provider(hit: CachedAiResponse, provider: AiProviderSnapshot | None) -> AiProviderSnapshot:
+    # 配置指纹包含 Provider，非拒答条目命中时 provider 必然存在
+    if hit.provider_type == _RISK_BLOCKED or provider is None:
+        return _RISK_BLOCKED_PROVIDER
+    return provider
 
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        strategy = await load_strategy_by_scene(session, scene=scene)
-        if strategy is None:
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "code": "FORBIDDEN",
-                    "message": f"AI 场景未配置或已停用（scene={scene}）。请在管理后台创建并启用对应 AI Strategy。",
-                },
-            )
 
-        # 风控：诊断类问题直接拒答，不调用第三方
-        if bool((strategy.constraints or {}).get("forbid_medical_diagnosis")) and is_medical_diagnosis_request(user_input):
+async def call_ai(
+    *, scene: str, user_input: str, context: AiCallContext, resolved: AiResolvedConfig | None = None
+) -> AiGatewayResult:
+    scene = str(scene or "").strip()
+    user_input = str(user_input or "").strip()
+    strategy, provider = await _load_config(scene=scene, user_input=user_input, resolved=resolved)
+    version = config_fingerprint(strategy, provider)
+
+    cache = AiResponseCache.for_strategy(strategy, config_version=version)
+    if cache is not None:
+        hit = await cache.get(user_input=user_input)
+        if hit is not None:
             return AiGatewayResult(
-                content=refusal_for_diagnosis(),
-                provider=AiProviderSnapshot(id="", name="", provider_type="RISK_BLOCKED", credentials={}, endpoint=None, extra={}),
+                content=hit.content,
+                provider=_cached_provider(hit, provider),
                 strategy=strategy,
                 provider_latency_ms=0,
+                config_version=version,
+                cache_hit=True,
             )
 
-        provider_id = str(strategy.provider_id or "").strip()
-        if not provider_id:
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "code": "FORBIDDEN",
-                    "message": f"AI 场景未绑定 Provider（scene={scene}）。请在管理后台“AI 绑定关系”把该 scene 绑定到一个 Provider。",
-                },
-            )
-
-        provider = await load_provider_by_id(session, provider_id=provider_id)
-        if provider is None:
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "code": "FORBIDDEN",
-                    "message": f"AI Provider 未配置或已停用（scene={scene}）。请检查绑定的 Provider 是否存在且状态为 ENABLED。",
-                },
+    refusal = _risk_refusal(strategy=strategy, user_input=user_input)
+    if refusal is not None:
+        if cache is not None:
+            await cache.put(
+                user_input=user_input, response=CachedAiResponse(content=refusal, provider_type=_RISK_BLOCKED)
             )
-
-    adapter = create_adapter(provider)
-    if not adapter.supports(strategy=strategy):
-        raise HTTPException(status_code=403, detail={"code": "FORBIDDEN", "message": "AI Provider 不支持该场景"})
-
+        return AiGatewayResult(
+            content=refusal,
+            provider=_RISK_BLOCKED_PROVIDER,
+            strategy=strategy,
+            provider_latency_ms=0,
+            config_version=version,
+        )
+
+    provider, adapter = _require_adapter(scene=scene, strategy=strategy, provider=provider)
     started = time.perf_counter()
     result: AiAdapterResult = await adapter.execute(provider=provider, strategy=strategy, user_input=user_input, context=context)
     latency_ms = int((time.perf_counter() - started) * 1000)
     provider_latency = result.provider_latency_ms if result.provider_latency_ms is not None else latency_ms
-    return AiGatewayResult(content=str(result.content).strip(), provider=provider, strategy=strategy, provider_latency_ms=provider_latency)
+    content = str(result.content).strip()
+    if cache is not None:
+        await cache.put(
+            user_input=user_input, response=CachedAiResponse(content=content, provider_type=provider.provider_type)
+        )
+    return AiGatewayResult(
+        content=content,
+        provider=provider,
+        strategy=strategy,
+        provider_latency_ms=provider_latency,
+        config_version=version,
+    )
+
+
+async def _single(content: str) -> AsyncIterator[str]:
+    yield content
+
+
+async def _cache_when_complete(
+    deltas: AsyncIterator[str], *, cache: AiResponseCache, user_input: str, provider_type: str
+) -> AsyncIterator[str]:
+    # 仅在上游完整结束后写缓存；中途失败/客户端断开（生成器被关闭）不写入半截回复
+    parts: list[str] = []
+    async for delta in deltas:
+        parts.append(delta)
+        yield delta
+    await cache.put(
+        user_input=user_input, response=CachedAiResponse(content="".join(parts), provider_type=provider_type)
+    )
+
+
+async def stream_ai(
+    *, scene: str, user_input: str, context: AiCallContext, resolved: AiResolvedConfig | None = None
+) -> AiGatewayStream:
+    scene = str(scene or "").strip()
+    user_input = str(user_input or "").strip()
+    strategy, provider = await _load_config(scene=scene, user_input=user_input, resolved=resolved)
+    version = config_fingerprint(strategy, provider)
+
+    cache = AiResponseCache.for_strategy(strategy, config_version=version)
+    if cache is not None:
+        hit = await cache.get(user_input=user_input)
+        if hit is not None:
+            return AiGatewayStream(
+                provider=_cached_provider(hit, provider),
+                strategy=strategy,
+                deltas=_single(hit.content),
+                config_version=version,
+                cache_hit=True,
+            )
 
+    refusal = _risk_refusal(strategy=strategy, user_input=user_input)
+    if refusal is not None:
+        if cache is not None:
+            await cache.put(
+                user_input=user_input, response=CachedAiResponse(content=refusal, provider_type=_RISK_BLOCKED)
+            )
+        return AiGatewayStream(
+            provider=_RISK_BLOCKED_PROVIDER, strategy=strategy, deltas=_single(refusal), config_version=version
+        )
+
+    provider, adapter = _require_adapter(scene=scene, strategy=strategy, provider=provider)
+    deltas = adapter.stream(provider=provider, strategy=strategy, user_input=user_input, context=context)
+    if cache is not None:
+        deltas = _cache_when_complete(deltas, cache=cache, user_input=user_input, provider_type=provider.provider_type)
+    return AiGatewayStream(provider=provider, strategy=strategy, deltas=deltas, config_version=version)
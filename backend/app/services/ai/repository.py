@@ -1,21 +1,108 @@
-"""AI Provider/Strategy 读取（v2）。"""
+"""AI Provider/Strategy 读取（v2）。
+
+说明：
+- `/ai/chat` 每次请求都要解析 scene -> Strategy -> Provider；配置极少变更，读侧走进程内快照缓存：
+  `resolve_snapshots` 命中时零 DB 往返，未命中时同一会话内补齐 Strategy/Provider。
+- 停用/不存在同样缓存（负缓存，值为 None），因此状态判断仍在读侧完成：启用/停用切换即失效。
+- 失效：任何 ORM 会话提交了 AiStrategy/AiProvider 的新增/修改/删除，after_commit 后清理本进程并经 Redis pub/sub
+  广播，其它进程的监听任务清理各自缓存（同 system_config_cache）；绕过 ORM 的批量写入需调用 `invalidate_ai_snapshots`。
+- 版本：每次失效递增进程内代数；未命中时回源读到的结果仅在代数未变时写入，避免并发失效后写回旧快照。
+- 广播丢失时由短 TTL 收敛；测试环境不启用（测试会绕过 ORM 直接清表）。
+"""
 
 from __future__ import annotations
 
-from sqlalchemy import select
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from enum import Enum, auto
+from typing import Final, TypeVar
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
 
 from app.models.ai_provider import AiProvider
 from app.models.ai_strategy import AiStrategy
 from app.models.enums import CommonEnabledStatus
 from app.services.ai.types import AiProviderSnapshot, AiStrategySnapshot
+from app.utils.db import get_session_factory
+from app.utils.invalidation import in_pytest, listen_for_invalidations, register_commit_invalidation
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "ai_config:invalidate"
+
+_TTL_SECONDS = 60.0
+# 负缓存以 scene 为 key，scene 来自请求体：需设上限
+_MAX_ENTRIES = 1024
+_SESSION_INFO_KEY = "ai_snapshot_dirty_keys"
+
+_T = TypeVar("_T")
+
+
+class _Miss(Enum):
+    """缓存未命中（与负缓存的 None 区分）。"""
+
+    MISS = auto()
+
+
+_MISS: Final = _Miss.MISS
 
 
 def _enabled(v: str | None) -> bool:
     return str(v or "") == CommonEnabledStatus.ENABLED.value
 
 
-async def load_strategy_by_scene(session, *, scene: str) -> AiStrategySnapshot | None:
-    row = (await session.scalars(select(AiStrategy).where(AiStrategy.scene == scene).limit(1))).first()
+def _strategy_key(scene: str) -> str:
+    return f"s:{scene}"
+
+
+def _provider_key(provider_id: str) -> str:
+    return f"p:{provider_id}"
+
+
+class _SnapshotCache:
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: str, kind: type[_T]) -> _T | _Miss | None:
+        hit = self._data.get(key)
+        if hit is None:
+            return _MISS
+        expires_at, value = hit
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return _MISS
+        self._data.move_to_end(key)
+        return value if value is None or isinstance(value, kind) else _MISS
+
+    def put(self, key: str, value: object, *, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max:
+            self._data.popitem(last=False)
+
+    def evict(self, keys: list[str] | None = None) -> None:
+        self.generation += 1
+        if keys is None:
+            self._data.clear()
+            return
+        for k in keys:
+            self._data.pop(k, None)
+
+
+_cache = _SnapshotCache(max_entries=_MAX_ENTRIES, ttl_seconds=_TTL_SECONDS)
+
+
+def _strategy_snapshot(row: AiStrategy | None) -> AiStrategySnapshot | None:
     if row is None or not _enabled(row.status):
         return None
     return AiStrategySnapshot(
@@ -28,8 +115,7 @@ async def load_strategy_by_scene(session, *, scene: str) -> AiStrategySnapshot |
     )
 
 
-async def load_provider_by_id(session, *, provider_id: str) -> AiProviderSnapshot | None:
-    row = (await session.scalars(select(AiProvider).where(AiProvider.id == provider_id).limit(1))).first()
+def _provider_snapshot(row: AiProvider | None) -> AiProviderSnapshot | None:
     if row is None or not _enabled(row.status):
         return None
     return AiProviderSnapshot(
@@ -41,3 +127,90 @@ async def load_provider_by_id(session, *, provider_id: str) -> AiProviderSnapsho
         extra=dict(row.extra_json or {}),
     )
 
+
+async def load_strategy_by_scene(session, *, scene: str) -> AiStrategySnapshot | None:
+    row = (await session.scalars(select(AiStrategy).where(AiStrategy.scene == scene).limit(1))).first()
+    return _strategy_snapshot(row)
+
+
+async def load_provider_by_id(session, *, provider_id: str) -> AiProviderSnapshot | None:
+    row = (await session.scalars(select(AiProvider).where(AiProvider.id == provider_id).limit(1))).first()
+    return _provider_snapshot(row)
+
+
+async def resolve_snapshots(*, scene: str) -> tuple[AiStrategySnapshot | None, AiProviderSnapshot | None]:
+    """按 scene 返回（已启用的 Strategy，其绑定且已启用的 Provider）；不存在/停用为 None。"""
+
+    use_cache = not in_pytest()
+    generation = _cache.generation
+    strategy = _cache.get(_strategy_key(scene), AiStrategySnapshot) if use_cache else _MISS
+    provider: AiProviderSnapshot | _Miss | None = None
+    if isinstance(strategy, AiStrategySnapshot) and strategy.provider_id:
+        provider = _cache.get(_provider_key(strategy.provider_id), AiProviderSnapshot) if use_cache else _MISS
+    if strategy is not _MISS and provider is not _MISS:
+        return strategy, provider
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        if strategy is _MISS:
+            strategy = await load_strategy_by_scene(session, scene=scene)
+            if use_cache:
+                _cache.put(_strategy_key(scene), strategy, generation=generation)
+        provider = None
+        provider_id = str(strategy.provider_id or "").strip() if strategy is not None else ""
+        if provider_id:
+            provider = _cache.get(_provider_key(provider_id), AiProviderSnapshot) if use_cache else _MISS
+            if provider is _MISS:
+                provider = await load_provider_by_id(session, provider_id=provider_id)
+                if use_cache:
+                    _cache.put(_provider_key(provider_id), provider, generation=generation)
+    return strategy, provider
+
+
+async def invalidate_ai_snapshots(keys: list[str] | None = None) -> None:
+    """清理本进程缓存并广播给其它进程；keys=None 表示全部（Redis 不可用时依赖短 TTL 收敛）。"""
+
+    ks = sorted({str(k) for k in keys if k}) if keys is not None else None
+    if ks is not None and not ks:
+        return
+    _cache.evict(ks)
+    try:
+        await get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"keys": ks}))
+    except Exception:  # noqa: BLE001
+        logger.warning("ai snapshot invalidation publish failed (TTL will converge): keys=%s", ks)
+
+
+# -----------------------------
+# ORM 提交钩子：Strategy/Provider 变更自动失效；跨进程失效监听（FastAPI lifespan 内启动）
+# -----------------------------
+
+
+def _dirty_keys(session: Session) -> set[str]:
+    keys: set[str] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, AiStrategy):
+            # scene 变更时旧 scene 也要失效
+            scenes = {obj.scene, *inspect(obj).attrs.scene.history.deleted}
+            keys.update(_strategy_key(str(s)) for s in scenes if s)
+        elif isinstance(obj, AiProvider) and obj.id:
+            keys.add(_provider_key(str(obj.id)))
+    return keys
+
+
+def _on_invalidation(payload: dict | None) -> None:
+    keys = (payload or {}).get("keys")
+    _cache.evict([str(k) for k in keys] if isinstance(keys, list) else None)
+
+
+register_commit_invalidation(
+    info_key=_SESSION_INFO_KEY,
+    collect=_dirty_keys,
+    evict_local=_cache.evict,
+    propagate=invalidate_ai_snapshots,
+)
+
+
+async def run_invalidation_listener(stop: asyncio.Event) -> None:
+    """订阅失效广播并清理本进程缓存；Redis 断开时退避重连，直到 stop 被置位。"""
+
+    await listen_for_invalidations(channel=INVALIDATION_CHANNEL, handler=_on_invalidation, stop=stop)
@@ -0,0 +1,198 @@
+"""AI 响应缓存（按 scene，v2）。
+
+规格来源：
+- specs/health-services-platform/ai-gateway-v2.md -> Strategy（constraints）/ Gateway
+
+说明：
+- 按 Strategy 显式开启：`constraints.response_cache_ttl_seconds > 0`（默认不缓存）；
+  `constraints.personalized = true` 的场景恒不缓存（回复依赖用户上下文，不可跨用户复用）。
+- Key = scene + 配置版本 + 归一化输入哈希：
+  - 配置版本为 Strategy/Provider 生效配置的指纹（不含凭证）；改提示词/生成参数/约束或换绑 Provider 后自然失效，
+    旧条目不再被访问，随 LRU/TTL 淘汰。同一指纹也写入 AI_CHAT 审计的 configVersion。
+  - 归一化：NFKC、大小写折叠、空白合并、去掉句末标点（近似相同的提问命中同一条）。
+- 存储：值 `ai:resp:{scene}:{version}:{hash}`（SET EX）；每个 scene 一个 ZSET（score=最近访问时间）做 LRU，
+  条目数超过上限时淘汰最久未访问者，写入时顺带清理已过期成员。
+- 风控拒答同样写入缓存（由网关决定写什么，本模块只负责存取）。
+- Redis 不可用时按未命中处理，不阻断调用。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+from dataclasses import dataclass
+
+from prometheus_client import Counter
+
+from app.services.ai.types import AiProviderSnapshot, AiStrategySnapshot
+from app.utils.redis_client import get_redis
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+AI_RESPONSE_CACHE_REQUESTS = Counter(
+    "lhmy_ai_response_cache_requests_total",
+    "AI response cache lookups",
+    ["scene", "result"],
+)
+AI_RESPONSE_CACHE_EVICTIONS = Counter(
+    "lhmy_ai_response_cache_evictions_total",
+    "AI response cache entries evicted by the per-scene LRU bound",
+    ["scene"],
+)
+
+_KEY_PREFIX = "ai:resp"
+# NFKC 后全角标点已转半角；句号/顿号/省略号无半角形式，单独列出
+_TRAILING_PUNCT = "?!.,;:~。、… "
+_PURGE_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class CachedAiResponse:
+    content: str
+    provider_type: str
+
+
+def normalize_user_input(text: str) -> str:
+    s = unicodedata.normalize("NFKC", str(text or "")).casefold()
+    s = " ".join(s.split())
+    return s.rstrip(_TRAILING_PUNCT)
+
+
+def config_fingerprint(strategy: AiStrategySnapshot, provider: AiProviderSnapshot | None) -> str:
+    """Strategy/Provider 生效配置指纹（不含凭证：换密钥不影响回复内容）。"""
+
+    doc = {
+        "strategy": {
+            "scene": strategy.scene,
+            "providerId": strategy.provider_id,
+            "promptTemplate": strategy.prompt_template,
+            "generationConfig": strategy.generation_config,
+            "constraints": strategy.constraints,
+        },
+        "provider": (
+            None
+            if provider is None
+            else {
+                "id": provider.id,
+                "providerType": provider.provider_type,
+                "endpoint": provider.endpoint,
+                "extra": provider.extra,
+            }
+        ),
+    }
+    raw = json.dumps(doc, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_ttl_seconds(strategy: AiStrategySnapshot) -> int:
+    """Strategy 的缓存 TTL；0 表示不缓存（未开启/个性化场景/配置非法）。"""
+
+    constraints = strategy.constraints or {}
+    if bool(constraints.get("personalized")):
+        return 0
+    raw = constraints.get("response_cache_ttl_seconds")
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+        return 0
+    return max(0, min(int(raw), int(settings.ai_response_cache_max_ttl_seconds)))
+
+
+def _lru_key(scene: str) -> str:
+    return f"{_KEY_PREFIX}:lru:{scene}"
+
+
+def _value_key(scene: str, member: str) -> str:
+    return f"{_KEY_PREFIX}:{scene}:{member}"
+
+
+class AiResponseCache:
+    def __init__(self, redis, *, scene: str, config_version: str, ttl_seconds: int, max_entries: int):
+        self._redis = redis
+        self._scene = scene
+        self._config_version = config_version
+        self._ttl = int(ttl_seconds)
+        self._max_entries = max(1, int(max_entries))
+
+    @classmethod
+    def for_strategy(cls, strategy: AiStrategySnapshot, *, config_version: str, redis=None) -> AiResponseCache | None:
+        ttl = cache_ttl_seconds(strategy)
+        if ttl <= 0:
+            return None
+        return cls(
+            redis if redis is not None else get_redis(),
+            scene=strategy.scene,
+            config_version=config_version,
+            ttl_seconds=ttl,
+            max_entries=int(settings.ai_response_cache_max_entries_per_scene),
+        )
+
+    def _member(self, user_input: str) -> str:
+        digest = hashlib.sha256(normalize_user_input(user_input).encode("utf-8")).hexdigest()[:32]
+        return f"{self._config_version}:{digest}"
+
+    async def get(self, *, user_input: str) -> CachedAiResponse | None:
+        member = self._member(user_input)
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(_value_key(self._scene, member))
+            # 命中即刷新 LRU 位置（XX：成员不存在时不新增）
+            pipe.zadd(_lru_key(self._scene), {member: time.time()}, xx=True)
+            raw, _ = await pipe.execute()
+        except Exception:  # noqa: BLE001
+            logger.warning("ai response cache get failed: scene=%s", self._scene, exc_info=True)
+            raw = None
+
+        hit = None
+        if raw is not None:
+            try:
+                payload = json.loads(raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw))
+                hit = CachedAiResponse(content=str(payload["content"]), provider_type=str(payload["providerType"]))
+            except Exception:  # noqa: BLE001
+                hit = None
+        AI_RESPONSE_CACHE_REQUESTS.labels(scene=self._scene, result="hit" if hit is not None else "miss").inc()
+        return hit
+
+    async def put(self, *, user_input: str, response: CachedAiResponse) -> None:
+        content = str(response.content or "").strip()
+        if not content:
+            return
+        member = self._member(user_input)
+        lru = _lru_key(self._scene)
+        now = time.time()
+        value = json.dumps({"content": content, "providerType": response.provider_type}, ensure_ascii=False)
+        try:
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.set(_value_key(self._scene, member), value, ex=self._ttl)
+            pipe.zadd(lru, {member: now})
+            # 最近访问早于 now-ttl 的条目必然已过期（写入时刻 <= 最近访问时刻）
+            pipe.zremrangebyscore(lru, "-inf", now - self._ttl)
+            pipe.zcard(lru)
+            pipe.expire(lru, int(settings.ai_response_cache_max_ttl_seconds))
+            size = int((await pipe.execute())[3])
+            if size > self._max_entries:
+                evicted = await self._redis.zpopmin(lru, size - self._max_entries)
+                if evicted:
+                    await self._redis.delete(*[_value_key(self._scene, _member_str(m)) for m, _score in evicted])
+                    AI_RESPONSE_CACHE_EVICTIONS.labels(scene=self._scene).inc(len(evicted))
+        except Exception:  # noqa: BLE001
+            logger.warning("ai response cache put failed: scene=%s", self._scene, exc_info=True)
+
+
+def _member_str(m) -> str:
+    return m.decode("utf-8") if isinstance(m, (bytes, bytearray)) else str(m)
+
+
+async def purge_response_cache(*, scene: str, redis=None) -> int:
+    """清空某 scene 的全部缓存条目（所有配置版本），返回删除的条目数。"""
+
+    r = redis if redis is not None else get_redis()
+    lru = _lru_key(scene)
+    members = [_member_str(m) for m in await r.zrange(lru, 0, -1)]
+    deleted = 0
+    for i in range(0, len(members), _PURGE_CHUNK):
+        deleted += int(await r.delete(*[_value_key(scene, m) for m in members[i : i + _PURGE_CHUNK]]) or 0)
+    await r.delete(lru)
+    return deleted
@@ -0,0 +1,100 @@
+"""Server-Sent Events 工具（v2 流式输出）。
+
+规格来源：
+- specs/health-services-platform/ai-gateway-v2.md -> Provider Adapter 规范（流式为 adapter 内部适配）
+
+说明：
+- 上游（OpenAI compatible / DashScope）均以 SSE 返回增量：`data: {...}`，以空行分隔事件。
+- `stream_sse_deltas`：adapter 共用的“发请求 + 解析增量 + 重试”循环；
+  仅在尚未产出任何增量时重试（已下发给客户端的内容无法撤回）。
+- `format_sse`：网关向客户端下发的事件编码（event + 单行 JSON data）。
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+import httpx
+from fastapi import HTTPException
+
+from app.utils import http_clients
+
+
+async def iter_sse_data(resp: httpx.Response) -> AsyncIterator[str]:
+    """逐个事件返回 data 字段（多行 data 以换行拼接）；忽略 event/id/retry 与注释行。"""
+
+    buf: list[str] = []
+    async for line in resp.aiter_lines():
+        if not line:
+            if buf:
+                yield "\n".join(buf)
+                buf = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            buf.append(value[1:] if value.startswith(" ") else value)
+    if buf:
+        yield "\n".join(buf)
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+async def stream_sse_deltas(
+    *,
+    url: str,
+    upstream: str,
+    timeout_s: float,
+    max_attempts: int,
+    payload: dict,
+    headers: dict[str, str],
+    extract_delta: Callable[[Any], str | None],
+) -> AsyncIterator[str]:
+    """POST 并按事件产出增量文本；错误口径与各 adapter 的 execute 一致（HTTPException 500）。"""
+
+    last_exc: Exception | None = None
+    for attempt in range(max_attempts):
+        emitted = False
+        try:
+            async with http_clients.stream(
+                "POST", url, upstream=upstream, timeout=timeout_s, json=payload, headers=headers
+            ) as resp:
+                if resp.status_code >= 500 and attempt < max_attempts - 1:
+                    continue
+                if resp.status_code != 200:
+                    raise HTTPException(
+                        status_code=500,
+                        detail={
+                            "code": "INTERNAL_ERROR",
+                            "message": "AI 服务调用失败",
+                            "details": {"status": resp.status_code},
+                        },
+                    )
+                async for data in iter_sse_data(resp):
+                    if data.strip() == "[DONE]":
+                        break
+                    try:
+                        obj = json.loads(data)
+                    except ValueError:
+                        continue
+                    delta = extract_delta(obj)
+                    if delta:
+                        emitted = True
+                        yield delta
+            if not emitted:
+                raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务返回异常"})
+            return
+        except HTTPException:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            last_exc = exc
+            if not emitted and attempt < max_attempts - 1:
+                continue
+            break
+
+    raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": "AI 服务调用失败"}) from last_exc
@@ -0,0 +1,306 @@
+"""审计日志异步批量写入（AuditLogMiddleware 写侧）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 审计日志（AuditLog，v1 最小可执行）
+
+说明：
+- 请求路径只做 `submit(row)`（put_nowait，O(1)），不再逐条开会话 + commit。
+- 后台 flusher：凑满 batch_size 或等待 flush_interval 到期即做一次多行 INSERT（executemany）。
+- MySQL 写入失败/超时：整批落盘到 spill 目录（JSONL）；队列满时新记录转入溢出缓冲，由单个后台任务
+  在线程中合并落盘（事件循环内不做同步文件 IO）；落盘也失败才计入 dropped。
+- flusher 在写入恢复后回放 spill 文件（INSERT IGNORE，按主键幂等）；回放中途崩溃遗留的认领文件
+  （*.jsonl.replaying-*）超过 _STALE_CLAIM_SECONDS 未更新即视为无主，重新认领回放。
+- 约束不变：审计失败不得影响主流程（submit 永不抛错、永不阻塞）。
+- writer 未启动（如未走 lifespan 的测试、脚本）时 `is_running()` 为 False，由调用方走原同步写入路径。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import cast
+from uuid import uuid4
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import Table, insert
+
+from app.models.audit_log import AuditLog
+from app.utils.db import get_session_factory
+from app.utils.settings import settings
+
+logger = logging.getLogger("lhmy.audit")
+
+AUDIT_QUEUE_DEPTH = Gauge("lhmy_audit_queue_depth", "Pending audit rows in the in-process queue")
+AUDIT_WRITTEN = Counter("lhmy_audit_written_total", "Audit rows written to MySQL", ["source"])
+AUDIT_SPILLED = Counter("lhmy_audit_spilled_total", "Audit rows spilled to disk", ["reason"])
+AUDIT_DROPPED = Counter("lhmy_audit_dropped_total", "Audit rows dropped (queue full and spill failed)")
+AUDIT_FLUSH_SECONDS = Histogram(
+    "lhmy_audit_flush_seconds",
+    "Latency of one multi-row audit INSERT",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+_REPLAY_INTERVAL_SECONDS = 30.0
+# 认领文件在回放期间按批刷新 mtime；超过该时长未更新视为认领进程已退出
+_STALE_CLAIM_SECONDS = 600.0
+
+
+def _encode_row(row: dict) -> str:
+    out = dict(row)
+    if isinstance(out.get("created_at"), datetime):
+        out["created_at"] = out["created_at"].isoformat()
+    return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def _decode_row(line: str) -> dict | None:
+    try:
+        row = json.loads(line)
+    except Exception:  # noqa: BLE001
+        return None
+    if not isinstance(row, dict) or not row.get("id"):
+        return None
+    if isinstance(row.get("created_at"), str):
+        try:
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+        except ValueError:
+            return None
+    return row
+
+
+class AuditBatchWriter:
+    def __init__(
+        self,
+        *,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+        flush_timeout_seconds: float,
+        spill_dir: str,
+    ) -> None:
+        self._max_queue_size = max(1, int(max_queue_size))
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval = max(0.01, float(flush_interval_seconds))
+        self._flush_timeout = max(0.1, float(flush_timeout_seconds))
+        self._spill_dir = spill_dir
+        self._queue: asyncio.Queue[dict] | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._last_replay_at = 0.0
+        self._overflow: dict[str, list[dict]] = {}
+        self._overflow_task: asyncio.Task | None = None
+
+    # -----------------------------
+    # 生命周期
+    # -----------------------------
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="audit-batch-writer")
+
+    async def stop(self, *, timeout: float = 10.0) -> None:
+        """停止接收并尽力排空队列；超时未写完的部分落盘，不丢失。"""
+
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except Exception:  # noqa: BLE001
+            self._task.cancel()
+        finally:
+            self._task = None
+        rest = self._drain_nowait(limit=None)
+        if rest:
+            await self._spill(rest, reason="shutdown")
+        if self._overflow_task is not None:
+            await self._overflow_task
+        AUDIT_QUEUE_DEPTH.set(0)
+
+    # -----------------------------
+    # 写入侧
+    # -----------------------------
+
+    def submit(self, row: dict) -> None:
+        """非阻塞投递；队列满则转入溢出缓冲由后台落盘，落盘失败计 dropped。"""
+
+        q = self._queue
+        if q is None or self._stopping:
+            self._spill_later(row, reason="not_running")
+            return
+        try:
+            q.put_nowait(row)
+            AUDIT_QUEUE_DEPTH.set(q.qsize())
+        except asyncio.QueueFull:
+            self._spill_later(row, reason="queue_full")
+
+    # -----------------------------
+    # flusher
+    # -----------------------------
+
+    def _drain_nowait(self, *, limit: int | None) -> list[dict]:
+        q = self._queue
+        out: list[dict] = []
+        if q is None:
+            return out
+        while limit is None or len(out) < limit:
+            try:
+                out.append(q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        AUDIT_QUEUE_DEPTH.set(q.qsize())
+        return out
+
+    async def _next_batch(self) -> list[dict]:
+        q = self._queue
+        assert q is not None
+        batch = self._drain_nowait(limit=self._batch_size)
+        if batch:
+            return batch
+        try:
+            first = await asyncio.wait_for(q.get(), timeout=self._flush_interval)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        # 给同一时间窗口内的请求一点聚合机会（时间触发 or 数量触发）
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            batch.extend(self._drain_nowait(limit=self._batch_size - len(batch)))
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self._batch_size or remaining <= 0 or self._stopping:
+                break
+            try:
+                batch.append(await asyncio.wait_for(q.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        AUDIT_QUEUE_DEPTH.set(q.qsize())
+        return batch
+
+    async def _insert(self, rows: list[dict], *, ignore_duplicates: bool) -> None:
+        stmt = insert(cast(Table, AuditLog.__table__))
+        if ignore_duplicates:
+            stmt = stmt.prefix_with("IGNORE")
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            await session.execute(stmt, rows)
+            await session.commit()
+
+    async def _flush(self, rows: list[dict]) -> bool:
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._insert(rows, ignore_duplicates=False), timeout=self._flush_timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("audit_batch_flush_failed rows=%s err=%s", len(rows), repr(exc))
+            await self._spill(rows, reason="flush_failed")
+            return False
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - t0)
+        AUDIT_WRITTEN.labels(source="queue").inc(len(rows))
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            if self._stopping and (self._queue is None or self._queue.empty()):
+                return
+            batch = await self._next_batch()
+            ok = True
+            if batch:
+                ok = await self._flush(batch)
+            if ok and time.monotonic() - self._last_replay_at >= _REPLAY_INTERVAL_SECONDS:
+                self._last_replay_at = time.monotonic()
+                await self._replay_spill()
+
+    # -----------------------------
+    # spill-to-disk
+    # -----------------------------
+
+    def _spill_path(self) -> str:
+        return os.path.join(self._spill_dir, f"audit-{os.getpid()}.jsonl")
+
+    def _spill_sync(self, rows: list[dict], *, reason: str) -> None:
+        try:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            with open(self._spill_path(), "a", encoding="utf-8") as f:
+                for r in rows:
+                    f.write(_encode_row(r) + "\n")
+            AUDIT_SPILLED.labels(reason=reason).inc(len(rows))
+        except Exception as exc:  # noqa: BLE001
+            AUDIT_DROPPED.inc(len(rows))
+            logger.warning("audit_spill_failed rows=%s reason=%s err=%s", len(rows), reason, repr(exc))
+
+    async def _spill(self, rows: list[dict], *, reason: str) -> None:
+        await asyncio.to_thread(self._spill_sync, rows, reason=reason)
+
+    def _spill_later(self, row: dict, *, reason: str) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # 无事件循环（脚本/同步调用）：直接写
+            self._spill_sync([row], reason=reason)
+            return
+        self._overflow.setdefault(reason, []).append(row)
+        if self._overflow_task is None or self._overflow_task.done():
+            self._overflow_task = asyncio.create_task(self._spill_overflow(), name="audit-overflow-spill")
+
+    async def _spill_overflow(self) -> None:
+        # 单任务串行：等待线程落盘期间新到的溢出记录合并进下一轮
+        while self._overflow:
+            pending, self._overflow = self._overflow, {}
+            for reason, rows in pending.items():
+                await self._spill(rows, reason=reason)
+
+    def _replay_candidates(self) -> list[str]:
+        paths = glob.glob(os.path.join(self._spill_dir, "audit-*.jsonl"))
+        stale_before = time.time() - _STALE_CLAIM_SECONDS
+        for path in glob.glob(os.path.join(self._spill_dir, "audit-*.jsonl.replaying-*")):
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    paths.append(path)
+            except OSError:
+                continue
+        return sorted(paths)
+
+    async def _replay_spill(self) -> None:
+        """回放 spill 文件：先改名认领（多进程不重复），写入成功后删除；失败则放回等待下次。"""
+
+        for path in self._replay_candidates():
+            claimed = f"{path.split('.replaying-', 1)[0]}.replaying-{uuid4().hex}"
+            try:
+                os.rename(path, claimed)
+                os.utime(claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    rows = [r for r in (_decode_row(line) for line in f if line.strip()) if r is not None]
+                for i in range(0, len(rows), self._batch_size):
+                    chunk = rows[i : i + self._batch_size]
+                    await asyncio.wait_for(self._insert(chunk, ignore_duplicates=True), timeout=self._flush_timeout)
+                    AUDIT_WRITTEN.labels(source="spill_replay").inc(len(chunk))
+                    os.utime(claimed)
+                os.remove(claimed)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("audit_spill_replay_failed file=%s err=%s", claimed, repr(exc))
+                try:
+                    os.rename(claimed, os.path.join(self._spill_dir, f"audit-retry-{uuid4().hex}.jsonl"))
+                except OSError:
+                    pass
+                return
+
+
+audit_writer = AuditBatchWriter(
+    max_queue_size=settings.audit_queue_max_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval_seconds=settings.audit_flush_interval_ms / 1000.0,
+    flush_timeout_seconds=settings.audit_flush_timeout_seconds,
+    spill_dir=settings.audit_spill_dir,
+)
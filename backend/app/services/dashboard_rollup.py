@@ -0,0 +1,172 @@
+"""Admin 仪表盘日汇总（预聚合读写）。
+
+规格来源：
+- specs/health-services-platform/design.md -> E-11. Admin 仪表盘统计（v1 最小契约）
+
+说明：
+- 统计口径与原实时查询完全一致（按 UTC 日期；支付按 paid_at、核销按 redemption_time、售后/新增会员按 created_at）。
+- 写：`rollup_days` 对一个日期区间做有界 range 聚合并 upsert 到 dashboard_daily_rollups（幂等，可重复执行）。
+- 读：已结束日期读汇总表；当天及汇总缺失的日期（任务尚未跑到/未回填）回退为有界实时统计，结果不缺口。
+- 汇总是快照：超出滚动窗口后的状态变化（如历史订单退款）需重新回填才会反映。
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import cast
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.models.after_sale_case import AfterSaleCase
+from app.models.dashboard_daily_rollup import DashboardDailyRollup
+from app.models.enums import OrderType, PaymentStatus, RedemptionStatus
+from app.models.order import Order
+from app.models.redemption_record import RedemptionRecord
+from app.models.service_package_instance import ServicePackageInstance
+from app.utils.datetime_utc import utcnow
+
+
+@dataclass
+class DailyCounts:
+    new_member_count: int = 0
+    service_package_paid_count: int = 0
+    ecommerce_paid_count: int = 0
+    refund_request_count: int = 0
+    redemption_success_count: int = 0
+
+
+def _day_bounds(date_from: date, date_to: date) -> tuple[datetime, datetime]:
+    # DB 中时间均为 naive UTC；右开区间便于走索引 range scan
+    return datetime.combine(date_from, datetime.min.time()), datetime.combine(
+        date_to + timedelta(days=1), datetime.min.time()
+    )
+
+
+def _as_date(v) -> date | None:
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return date.fromisoformat(str(v)[:10])
+
+
+async def _count_by_day(*, session, ts_col, value, where: list) -> dict[date, int]:
+    day = func.date(ts_col)
+    rows = (await session.execute(select(day, value).where(*where).group_by(day))).all()
+    out: dict[date, int] = {}
+    for d, c in rows:
+        k = _as_date(d)
+        if k is not None:
+            out[k] = int(c or 0)
+    return out
+
+
+async def compute_daily_counts(*, session, date_from: date, date_to: date) -> dict[date, DailyCounts]:
+    """实时统计 [date_from, date_to]（含两端）每天的指标；区间内每一天都有返回值（无数据为 0）。"""
+
+    start, end = _day_bounds(date_from, date_to)
+
+    new_members = await _count_by_day(
+        session=session,
+        ts_col=ServicePackageInstance.created_at,
+        value=func.count(func.distinct(ServicePackageInstance.owner_id)),
+        where=[ServicePackageInstance.created_at >= start, ServicePackageInstance.created_at < end],
+    )
+
+    def _paid_where(order_type: str) -> list:
+        return [
+            Order.order_type == order_type,
+            Order.payment_status == PaymentStatus.PAID.value,
+            Order.paid_at >= start,
+            Order.paid_at < end,
+        ]
+
+    sp_paid = await _count_by_day(
+        session=session, ts_col=Order.paid_at, value=func.count(), where=_paid_where(OrderType.SERVICE_PACKAGE.value)
+    )
+    ecommerce_paid = await _count_by_day(
+        session=session, ts_col=Order.paid_at, value=func.count(), where=_paid_where(OrderType.PRODUCT.value)
+    )
+    refund_requests = await _count_by_day(
+        session=session,
+        ts_col=AfterSaleCase.created_at,
+        value=func.count(),
+        where=[AfterSaleCase.created_at >= start, AfterSaleCase.created_at < end],
+    )
+    redemptions = await _count_by_day(
+        session=session,
+        ts_col=RedemptionRecord.redemption_time,
+        value=func.count(),
+        where=[
+            RedemptionRecord.status == RedemptionStatus.SUCCESS.value,
+            RedemptionRecord.redemption_time >= start,
+            RedemptionRecord.redemption_time < end,
+        ],
+    )
+
+    out: dict[date, DailyCounts] = {}
+    d = date_from
+    while d <= date_to:
+        out[d] = DailyCounts(
+            new_member_count=new_members.get(d, 0),
+            service_package_paid_count=sp_paid.get(d, 0),
+            ecommerce_paid_count=ecommerce_paid.get(d, 0),
+            refund_request_count=refund_requests.get(d, 0),
+            redemption_success_count=redemptions.get(d, 0),
+        )
+        d = d + timedelta(days=1)
+    return out
+
+
+async def rollup_days(*, session, date_from: date, date_to: date) -> int:
+    """重算并 upsert [date_from, date_to] 的日汇总；调用方负责 commit。返回写入天数。"""
+
+    if date_to < date_from:
+        return 0
+    counts = await compute_daily_counts(session=session, date_from=date_from, date_to=date_to)
+    now = utcnow()
+    rows = [{"stat_date": d, **asdict(c), "rolled_up_at": now} for d, c in sorted(counts.items())]
+    stmt = mysql_insert(cast(Table, DashboardDailyRollup.__table__))
+    stmt = stmt.on_duplicate_key_update(
+        {k: stmt.inserted[k] for k in rows[0] if k != "stat_date"},
+    )
+    await session.execute(stmt, rows)
+    return len(rows)
+
+
+async def load_daily_counts(*, session, date_from: date, date_to: date, today: date) -> dict[date, DailyCounts]:
+    """读取 [date_from, date_to] 每天的指标：已结束日期走汇总表，today 与汇总缺失日期实时统计。"""
+
+    out: dict[date, DailyCounts] = {}
+    closed_to = min(date_to, today - timedelta(days=1))
+    if date_from <= closed_to:
+        rows = (
+            await session.scalars(
+                select(DashboardDailyRollup).where(
+                    DashboardDailyRollup.stat_date >= date_from, DashboardDailyRollup.stat_date <= closed_to
+                )
+            )
+        ).all()
+        for r in rows:
+            out[r.stat_date] = DailyCounts(
+                new_member_count=int(r.new_member_count or 0),
+                service_package_paid_count=int(r.service_package_paid_count or 0),
+                ecommerce_paid_count=int(r.ecommerce_paid_count or 0),
+                refund_request_count=int(r.refund_request_count or 0),
+                redemption_success_count=int(r.redemption_success_count or 0),
+            )
+
+    missing = [
+        date_from + timedelta(days=i)
+        for i in range((date_to - date_from).days + 1)
+        if (date_from + timedelta(days=i)) not in out
+    ]
+    if missing:
+        live = await compute_daily_counts(session=session, date_from=missing[0], date_to=missing[-1])
+        for d in missing:
+            out[d] = live[d]
+    return out
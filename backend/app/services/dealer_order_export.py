@@ -0,0 +1,406 @@
+"""经销商订单 CSV 导出（流式 + 异步任务）。
+
+规格来源：
+- specs-prod/admin/api-contracts.md#9D（GET /dealer/orders/export；CSV 列与 /dealer/orders 对齐）
+- specs-prod/admin/security.md#5（导出安全：手机号仅脱敏、审计）
+
+说明：
+- 行数不设上限，内存与行数无关：
+  1) 订单走服务端游标（`session.stream` + `yield_per`，只取列不建 ORM 对象），按批次分区读取；
+  2) 每批次用独立会话预取首个订单明细与可售卡（MySQL 服务端游标未读完前同连接不能再发查询）；
+  3) 每批次编码为一段 CSV 文本后立即交给调用方（StreamingResponse / 写文件）。
+- 异步任务模式：任务状态存 Redis（带 TTL），文件落到 DEALER_EXPORT_DIR（backend 与 worker 共享卷），
+  完成后给发起人发站内通知；文件与任务状态同 TTL 过期清理。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app.models.audit_log import AuditLog
+from app.models.enums import (
+    AuditAction,
+    AuditActorType,
+    NotificationCategory,
+    NotificationReceiverType,
+    NotificationStatus,
+    OrderType,
+)
+from app.models.notification import Notification
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.sellable_card import SellableCard
+from app.models.user import User
+from app.services.notification_inbox import bump_unread
+from app.utils.datetime_iso import iso as _iso
+from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
+from app.utils.settings import settings
+
+CSV_HEADER = ["订单号", "投放链接ID", "卡片", "区域级别", "手机号", "支付状态", "金额", "创建时间", "支付时间"]
+CSV_BOM = "\ufeff"
+
+_JOB_KEY_PREFIX = "dealer_export:job:"
+
+
+@dataclass(frozen=True)
+class DealerOrderExportFilters:
+    dealer_id: str
+    start_utc: datetime
+    end_exclusive: datetime
+    date_from: str
+    date_to: str
+    dealer_link_id: str | None = None
+    order_no: str | None = None
+    payment_status: str | None = None
+    phone: str | None = None
+
+    def to_json(self) -> dict:
+        out = asdict(self)
+        out["start_utc"] = self.start_utc.isoformat()
+        out["end_exclusive"] = self.end_exclusive.isoformat()
+        return out
+
+    @classmethod
+    def from_json(cls, raw: dict) -> DealerOrderExportFilters:
+        data = dict(raw)
+        data["start_utc"] = datetime.fromisoformat(str(data["start_utc"]))
+        data["end_exclusive"] = datetime.fromisoformat(str(data["end_exclusive"]))
+        return cls(**data)
+
+    def audit_filters(self) -> dict:
+        return {
+            "dealerLinkId": self.dealer_link_id,
+            "orderNo": self.order_no,
+            "paymentStatus": self.payment_status,
+            "dateFrom": self.date_from,
+            "dateTo": self.date_to,
+        }
+
+    def filename(self) -> str:
+        return f"dealer-orders-{self.dealer_id}-{self.date_from}-{self.date_to}.csv"
+
+
+def _build_stmt(f: DealerOrderExportFilters):
+    # 注意：aliased(User) 必须“只创建一次并复用”，否则 join/on clause 会引用错别名
+    u = aliased(User)
+    stmt = (
+        select(
+            Order.id,
+            Order.dealer_link_id,
+            Order.payment_status,
+            Order.total_amount,
+            Order.created_at,
+            Order.paid_at,
+            u.phone,
+        )
+        .select_from(Order)
+        .join(u, u.id == Order.user_id, isouter=True)
+        .where(
+            # v1：仅返回健行天下订单
+            Order.order_type == OrderType.SERVICE_PACKAGE.value,
+            Order.dealer_id == f.dealer_id,
+            Order.created_at >= f.start_utc,
+            Order.created_at < f.end_exclusive,
+        )
+    )
+    if f.dealer_link_id:
+        stmt = stmt.where(Order.dealer_link_id == f.dealer_link_id)
+    if f.order_no:
+        stmt = stmt.where(Order.id == f.order_no)
+    if f.payment_status:
+        stmt = stmt.where(Order.payment_status == f.payment_status)
+    if f.phone:
+        stmt = stmt.where(u.phone.like(f"%{f.phone}%"))
+    return stmt.order_by(Order.created_at.desc(), Order.id.desc())
+
+
+async def _prefetch_cards(
+    *, session, order_ids: list[str], card_cache: dict[str, tuple[str, str] | None]
+) -> dict[str, tuple[str, str] | None]:
+    """order_id -> (卡片名称, 区域级别)；沿用列表口径：取订单首个明细的 item_id 查可售卡。"""
+
+    first_item: dict[str, tuple[str, str]] = {}
+    rows = (
+        await session.execute(
+            select(OrderItem.order_id, OrderItem.item_id, OrderItem.item_type)
+            .where(OrderItem.order_id.in_(order_ids))
+            .order_by(OrderItem.order_id.asc(), OrderItem.id.asc())
+        )
+    ).all()
+    for order_id, item_id, item_type in rows:
+        first_item.setdefault(str(order_id), (str(item_id or ""), str(item_type or "")))
+
+    # 可售卡数量有限：跨批次缓存，只查新出现的 id
+    missing = sorted(
+        {item_id for item_id, item_type in first_item.values() if item_type == "SERVICE_PACKAGE" and item_id}
+        - card_cache.keys()
+    )
+    if missing:
+        cards = (
+            await session.execute(
+                select(SellableCard.id, SellableCard.name, SellableCard.region_level).where(
+                    SellableCard.id.in_(missing)
+                )
+            )
+        ).all()
+        found = {str(cid): (str(name or ""), str(level or "")) for cid, name, level in cards}
+        for cid in missing:
+            card_cache[cid] = found.get(cid)
+
+    return {oid: card_cache.get(item_id) for oid, (item_id, _item_type) in first_item.items()}
+
+
+def _encode(rows: list[list]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+async def iter_dealer_orders_csv(
+    *, filters: DealerOrderExportFilters, batch_size: int, counter: list[int] | None = None
+) -> AsyncIterator[str]:
+    """逐批产出 CSV 文本（首段含 BOM + 表头）。counter[0] 累计已输出的数据行数。"""
+
+    # 手机号脱敏与经销商订单列表同一口径；dealer.py 顶层导入本模块，这里延迟导入避免循环
+    from app.api.v1.dealer import _mask_phone  # noqa: WPS433
+
+    batch_size = max(1, int(batch_size))
+    yield CSV_BOM + _encode([CSV_HEADER])
+
+    card_cache: dict[str, tuple[str, str] | None] = {}
+    session_factory = get_session_factory()
+    async with session_factory() as stream_session, session_factory() as lookup_session:
+        result = await stream_session.stream(_build_stmt(filters).execution_options(yield_per=batch_size))
+        async for part in result.partitions(batch_size):
+            cards = await _prefetch_cards(
+                session=lookup_session, order_ids=[str(r[0]) for r in part], card_cache=card_cache
+            )
+            # 预取查询只读，及时结束事务，避免长导出期间持有快照
+            await lookup_session.rollback()
+            out: list[list] = []
+            for order_id, dealer_link_id, payment_status, total_amount, created_at, paid_at, buyer_phone in part:
+                card = cards.get(str(order_id))
+                out.append(
+                    [
+                        order_id,
+                        dealer_link_id or "",
+                        (card[0] if card else "") or "",
+                        (card[1] if card else "") or "",
+                        _mask_phone(buyer_phone) or "",
+                        payment_status or "",
+                        float(total_amount or 0.0),
+                        _iso(created_at) or "",
+                        _iso(paid_at) or "",
+                    ]
+                )
+            if counter is not None:
+                counter[0] += len(out)
+            yield _encode(out)
+
+
+# -----------------------------
+# 异步任务模式
+# -----------------------------
+
+
+def job_key(job_id: str) -> str:
+    return f"{_JOB_KEY_PREFIX}{job_id}"
+
+
+def job_file_path(job_id: str) -> str:
+    return os.path.join(settings.dealer_export_dir, f"{job_id}.csv")
+
+
+async def save_job(*, redis, job: dict) -> None:
+    await redis.set(
+        job_key(str(job["jobId"])),
+        json.dumps(job, ensure_ascii=False),
+        ex=int(settings.dealer_export_job_ttl_seconds),
+    )
+
+
+async def load_job(*, redis, job_id: str) -> dict | None:
+    raw = await redis.get(job_key(job_id))
+    if not raw:
+        return None
+    try:
+        job = json.loads(raw)
+    except Exception:  # noqa: BLE001
+        return None
+    return job if isinstance(job, dict) else None
+
+
+async def write_dealer_orders_csv_file(*, filters: DealerOrderExportFilters, path: str, batch_size: int) -> int:
+    """流式写入文件（先写 .part 再原子改名）；返回数据行数。"""
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.part"
+    counter = [0]
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            async for chunk in iter_dealer_orders_csv(filters=filters, batch_size=batch_size, counter=counter):
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return counter[0]
+
+
+async def write_export_audit(
+    *,
+    actor_type: str,
+    actor_id: str,
+    filters: DealerOrderExportFilters,
+    request_id: str | None,
+    ip: str | None,
+    user_agent: str | None,
+    row_count: int,
+    mode: str,
+    completed: bool = True,
+) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        session.add(
+            AuditLog(
+                id=str(uuid4()),
+                actor_type=actor_type,
+                actor_id=actor_id,
+                action=AuditAction.UPDATE.value,  # v1：不新增 EXPORT 枚举
+                resource_type="EXPORT_DEALER_ORDERS",
+                resource_id=filters.dealer_id,
+                summary=f"导出经销商订单 CSV：dealerId={filters.dealer_id}",
+                ip=ip,
+                user_agent=user_agent,
+                metadata_json={
+                    "requestId": request_id,
+                    "dealerId": filters.dealer_id,
+                    "filters": filters.audit_filters(),
+                    "rowCount": int(row_count),
+                    "maxRows": None,
+                    "mode": mode,
+                    "completed": bool(completed),
+                },
+            )
+        )
+        await session.commit()
+
+
+def _requester(ctx: dict) -> tuple[str, str, str]:
+    """(auditActorType, actorId, notificationReceiverType)。"""
+
+    if str(ctx.get("actorType")) == "DEALER":
+        return (AuditActorType.DEALER.value, str(ctx.get("dealerUserId") or ""), NotificationReceiverType.DEALER.value)
+    return (AuditActorType.ADMIN.value, str(ctx.get("adminId") or ""), NotificationReceiverType.ADMIN.value)
+
+
+async def run_export_job(*, job_id: str) -> dict | None:
+    """执行异步导出任务：写文件 -> 更新任务状态 -> 审计 -> 站内通知发起人。任务不存在（已过期）返回 None。"""
+
+    redis = get_redis()
+    job = await load_job(redis=redis, job_id=job_id)
+    if job is None or job.get("status") == "DONE":
+        return job
+
+    filters = DealerOrderExportFilters.from_json(job["filters"])
+    actor_type, actor_id, receiver_type = _requester(dict(job.get("ctx") or {}))
+
+    job["status"] = "RUNNING"
+    await save_job(redis=redis, job=job)
+    try:
+        row_count = await write_dealer_orders_csv_file(
+            filters=filters, path=job_file_path(job_id), batch_size=settings.dealer_export_batch_size
+        )
+    except Exception:
+        job["status"] = "FAILED"
+        job["error"] = "EXPORT_FAILED"
+        job["finishedAt"] = _iso(datetime.now(tz=UTC))
+        await save_job(redis=redis, job=job)
+        raise
+
+    now = datetime.now(tz=UTC)
+    job.update(
+        {
+            "status": "DONE",
+            "rowCount": int(row_count),
+            "finishedAt": _iso(now),
+            "expiresAt": _iso(now + timedelta(seconds=int(settings.dealer_export_job_ttl_seconds))),
+            "error": None,
+        }
+    )
+    await save_job(redis=redis, job=job)
+
+    await write_export_audit(
+        actor_type=actor_type,
+        actor_id=actor_id,
+        filters=filters,
+        request_id=job.get("requestId"),
+        ip=job.get("ip"),
+        user_agent=job.get("userAgent"),
+        row_count=row_count,
+        mode="JOB",
+    )
+
+    if actor_id:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(
+                Notification(
+                    id=str(uuid4()),
+                    receiver_type=receiver_type,
+                    receiver_id=actor_id,
+                    title="订单导出已完成",
+                    content=f"订单导出（{filters.date_from} ~ {filters.date_to}，共 {row_count} 行）已生成，请在有效期内下载。",
+                    category=NotificationCategory.SYSTEM.value,
+                    meta_json={
+                        "type": "DEALER_ORDERS_EXPORT",
+                        "jobId": job_id,
+                        "downloadPath": f"/api/v1/dealer/orders/export-jobs/{job_id}/download",
+                        "expiresAt": job["expiresAt"],
+                    },
+                    status=NotificationStatus.UNREAD.value,
+                    created_at=now.replace(tzinfo=None),
+                    read_at=None,
+                )
+            )
+            await session.commit()
+        await bump_unread(redis=redis, receivers=[(receiver_type, actor_id)])
+    return job
+
+
+def cleanup_expired_export_files(*, now_ts: float) -> int:
+    """删除超过 TTL 的导出文件（含异常中断遗留的 .part）；返回删除数。"""
+
+    base = settings.dealer_export_dir
+    ttl = int(settings.dealer_export_job_ttl_seconds)
+    removed = 0
+    try:
+        names = os.listdir(base)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not (name.endswith(".csv") or name.endswith(".csv.part")):
+            continue
+        path = os.path.join(base, name)
+        try:
+            if now_ts - os.path.getmtime(path) > ttl:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
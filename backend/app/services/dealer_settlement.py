@@ -0,0 +1,454 @@
+"""经销商分账流水与结算单批量生成。
+
+规格来源：
+- specs/health-services-platform/dealer-settlement-v1.md
+
+说明：
+- 分账流水（dealer_commission_ledger）在支付成功事务内逐单写入、全额退款时冲销；
+  出账时先用一条 INSERT ... SELECT 补录流水缺失的已支付订单（历史数据/非回调路径置为已支付的订单），再按周期聚合流水。
+- 出账为集合式：聚合 1 次 + 经销商/结算账户按分片批量预取 + 多行 upsert（ON DUPLICATE KEY 空更新，
+  已存在的结算单保持不变，幂等口径与改造前一致），往返次数与经销商数无关（仅按分片线性增长）。
+- 新建/已存在的判定：upsert 后回读本周期结算单，id 等于本次预分配 id 的即本次新建（并发生成也不会重复计数）。
+- 大批量走异步任务（POST /admin/dealer-settlements/generate-jobs）：任务状态与进度存 Redis（带 TTL），
+  由 Celery 执行（app/tasks/dealer_settlements.py）。
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import cast
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import Table, and_, func, literal, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.models.audit_log import AuditLog
+from app.models.dealer import Dealer
+from app.models.dealer_commission_entry import DealerCommissionEntry
+from app.models.dealer_settlement_account import DealerSettlementAccount
+from app.models.enums import (
+    AuditAction,
+    AuditActorType,
+    DealerCommissionEntryStatus,
+    DealerStatus,
+    OrderType,
+    PaymentStatus,
+    SettlementStatus,
+)
+from app.models.order import Order
+from app.models.settlement_record import SettlementRecord
+from app.services.settlement_cycle import compute_settlement_cycle_monthly
+from app.services.system_config_cache import get_system_config
+from app.utils.datetime_iso import iso as _iso
+from app.utils.datetime_utc import utcnow
+from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
+from app.utils.settings import settings
+
+DEALER_COMMISSION_KEY = "DEALER_COMMISSION_RULES"
+
+_JOB_KEY_PREFIX = "dealer_settlement:job:"
+
+Progress = Callable[[str, int, int], Awaitable[None]]
+
+
+def normalize_commission_rate(v) -> float:
+    try:
+        x = float(v)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(
+            status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "分账比例必须是数字"}
+        ) from exc
+    if x < 0 or x > 1:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "分账比例必须在 0~1 之间"})
+    return float(x)
+
+
+@dataclass(frozen=True)
+class CommissionRules:
+    default_rate: float
+    overrides: dict
+
+    def rate_for(self, dealer_id: str) -> float:
+        if dealer_id in self.overrides:
+            try:
+                return normalize_commission_rate(self.overrides.get(dealer_id))
+            except HTTPException:
+                return self.default_rate
+        return self.default_rate
+
+
+async def load_commission_rules() -> CommissionRules:
+    """读分账规则（走 SystemConfig 读缓存；未配置时按默认规则）。"""
+
+    cached = await get_system_config(DEALER_COMMISSION_KEY)
+    raw = cached.value if cached.exists else {"defaultRate": 0.1, "dealerOverrides": {}}
+    overrides = raw.get("dealerOverrides") or {}
+    return CommissionRules(
+        default_rate=normalize_commission_rate(raw.get("defaultRate") or 0.0),
+        overrides=overrides if isinstance(overrides, dict) else {},
+    )
+
+
+# ---- 分账流水 ----
+
+
+def record_dealer_commission(*, session, order: Order) -> None:
+    """支付成功：为经销商归属的服务包订单写一条 ACTIVE 流水（与置为已支付同事务；调用方负责 commit）。"""
+
+    if order.order_type != OrderType.SERVICE_PACKAGE.value or not order.dealer_id or order.paid_at is None:
+        return
+    paid_at = order.paid_at.astimezone(UTC).replace(tzinfo=None) if order.paid_at.tzinfo else order.paid_at
+    session.add(
+        DealerCommissionEntry(
+            order_id=order.id,
+            dealer_id=str(order.dealer_id),
+            cycle=compute_settlement_cycle_monthly(dt=paid_at),
+            gross_amount=float(order.total_amount or 0.0),
+            status=DealerCommissionEntryStatus.ACTIVE.value,
+            paid_at=paid_at,
+        )
+    )
+
+
+async def reverse_dealer_commission(*, session, order_id: str) -> None:
+    """全额退款：冲销该订单流水（已出账的结算单不回改，与改造前口径一致；调用方负责 commit）。"""
+
+    await session.execute(
+        update(DealerCommissionEntry)
+        .where(
+            DealerCommissionEntry.order_id == order_id,
+            DealerCommissionEntry.status == DealerCommissionEntryStatus.ACTIVE.value,
+        )
+        .values(status=DealerCommissionEntryStatus.REVERSED.value)
+    )
+
+
+async def backfill_commission_ledger(*, session, cycle: str, start: datetime, end: datetime) -> int:
+    """补录 [start, end) 内已支付但缺流水的订单（一条 INSERT ... SELECT；调用方负责 commit）。返回补录行数。"""
+
+    missing = (
+        select(
+            Order.id,
+            Order.dealer_id,
+            literal(cycle),
+            Order.total_amount,
+            literal(DealerCommissionEntryStatus.ACTIVE.value),
+            Order.paid_at,
+            literal(utcnow()),
+            literal(utcnow()),
+        )
+        .select_from(Order)
+        .outerjoin(DealerCommissionEntry, DealerCommissionEntry.order_id == Order.id)
+        .where(
+            Order.order_type == OrderType.SERVICE_PACKAGE.value,
+            Order.payment_status == PaymentStatus.PAID.value,
+            Order.paid_at.is_not(None),
+            Order.paid_at >= start,
+            Order.paid_at < end,
+            Order.dealer_id.is_not(None),
+            DealerCommissionEntry.order_id.is_(None),
+        )
+    )
+    t = cast(Table, DealerCommissionEntry.__table__)
+    stmt = (
+        mysql_insert(t)
+        .from_select(
+            ["order_id", "dealer_id", "cycle", "gross_amount", "status", "paid_at", "created_at", "updated_at"], missing
+        )
+        .prefix_with("IGNORE")
+    )
+    res = await session.execute(stmt)
+    return int(res.rowcount or 0)
+
+
+# ---- 结算单批量生成 ----
+
+
+@dataclass(frozen=True)
+class SettlementBatchItem:
+    record: SettlementRecord
+    gross_amount: float
+    commission_rate: float
+    generated: bool
+
+
+@dataclass(frozen=True)
+class SettlementBatchResult:
+    cycle: str
+    created: int
+    existing: int
+    ledger_backfilled: int
+    items: list[SettlementBatchItem]
+
+
+def _chunks(values: list, size: int) -> list[list]:
+    size = max(1, int(size))
+    return [values[i : i + size] for i in range(0, len(values), size)]
+
+
+def mask_account_no(account_no: str | None) -> str | None:
+    """收款账号脱敏（前 4 + 后 4）；过短不展示。结算单快照与管理端列表共用。"""
+
+    if not account_no:
+        return None
+    s = str(account_no).strip()
+    if len(s) <= 8:
+        return None
+    return f"{s[:4]}****{s[-4:]}"
+
+
+def _payout_snapshot(acct: DealerSettlementAccount | None) -> tuple[str | None, dict | None]:
+    # 保存到结算单快照，避免后续账户改动影响对账
+    if acct is None:
+        return None, None
+    return acct.method, {
+        "method": acct.method,
+        "accountName": acct.account_name,
+        "accountNoMasked": mask_account_no(acct.account_no),
+        "bankName": acct.bank_name,
+        "bankBranch": acct.bank_branch,
+        "contactPhone": acct.contact_phone,
+    }
+
+
+async def _noop_progress(_stage: str, _done: int, _total: int) -> None:
+    return None
+
+
+async def generate_dealer_settlements(
+    *,
+    session,
+    cycle: str,
+    start: datetime,
+    end: datetime,
+    rules: CommissionRules,
+    progress: Progress | None = None,
+) -> SettlementBatchResult:
+    """按周期生成结算单（集合式；调用方负责 commit）。"""
+
+    report = progress or _noop_progress
+    batch_size = max(1, int(settings.dealer_settlement_batch_size))
+
+    backfilled = await backfill_commission_ledger(session=session, cycle=cycle, start=start, end=end)
+    await report("ledger", backfilled, backfilled)
+
+    agg = (
+        await session.execute(
+            select(
+                DealerCommissionEntry.dealer_id,
+                func.count().label("order_count"),
+                func.sum(DealerCommissionEntry.gross_amount).label("gross_amount"),
+            )
+            .where(
+                DealerCommissionEntry.cycle == cycle,
+                DealerCommissionEntry.status == DealerCommissionEntryStatus.ACTIVE.value,
+            )
+            .group_by(DealerCommissionEntry.dealer_id)
+        )
+    ).all()
+    totals = {str(did): (int(oc or 0), float(gross or 0.0)) for did, oc, gross in agg if did}
+    dealer_ids = sorted(totals)
+    await report("aggregate", len(dealer_ids), len(dealer_ids))
+
+    # v1 最小：仅对 ACTIVE dealer 出账
+    active: set[str] = set()
+    accounts: dict[str, DealerSettlementAccount] = {}
+    for chunk in _chunks(dealer_ids, batch_size):
+        active.update(
+            str(x)
+            for x in (
+                await session.scalars(
+                    select(Dealer.id).where(Dealer.id.in_(chunk), Dealer.status == DealerStatus.ACTIVE.value)
+                )
+            ).all()
+        )
+        for acct in (
+            await session.scalars(select(DealerSettlementAccount).where(DealerSettlementAccount.dealer_id.in_(chunk)))
+        ).all():
+            accounts[str(acct.dealer_id)] = acct
+    billable = [d for d in dealer_ids if d in active]
+
+    now = utcnow()
+    proposed: dict[str, str] = {}
+    rows: list[dict] = []
+    for did in billable:
+        order_count, gross = totals[did]
+        payout_method, payout_account_json = _payout_snapshot(accounts.get(did))
+        proposed[did] = str(uuid4())
+        rows.append(
+            {
+                "id": proposed[did],
+                "dealer_id": did,
+                "cycle": cycle,
+                "order_count": order_count,
+                "amount": float(round(gross * rules.rate_for(did), 2)),
+                "status": SettlementStatus.PENDING_CONFIRM.value,
+                "payout_method": payout_method,
+                "payout_account_json": payout_account_json,
+                "payout_reference": None,
+                "payout_note": None,
+                "payout_marked_by": None,
+                "payout_marked_at": None,
+                "created_at": now,
+                "settled_at": None,
+            }
+        )
+
+    done = 0
+    for chunk in _chunks(rows, batch_size):
+        # 幂等：已存在 (dealer_id, cycle) 则保持现有结算单不变（空更新），避免重复生成引发对账口径漂移
+        t = cast(Table, SettlementRecord.__table__)
+        stmt = mysql_insert(t)
+        stmt = stmt.on_duplicate_key_update(id=t.c.id)
+        await session.execute(stmt, chunk)
+        done += len(chunk)
+        await report("upsert", done, len(rows))
+
+    records: dict[str, SettlementRecord] = {}
+    for chunk in _chunks(billable, batch_size):
+        for r in (
+            await session.scalars(
+                select(SettlementRecord).where(
+                    and_(SettlementRecord.cycle == cycle, SettlementRecord.dealer_id.in_(chunk))
+                )
+            )
+        ).all():
+            records[str(r.dealer_id)] = r
+
+    items: list[SettlementBatchItem] = []
+    for did in billable:
+        r = records.get(did)
+        if r is None:
+            continue
+        items.append(
+            SettlementBatchItem(
+                record=r,
+                gross_amount=totals[did][1],
+                commission_rate=rules.rate_for(did),
+                generated=r.id == proposed[did],
+            )
+        )
+    created = sum(1 for x in items if x.generated)
+    return SettlementBatchResult(
+        cycle=cycle, created=created, existing=len(items) - created, ledger_backfilled=backfilled, items=items
+    )
+
+
+def settlement_batch_audit(
+    *,
+    admin_id: str,
+    result: SettlementBatchResult,
+    request_id: str | None,
+    ip: str | None,
+    user_agent: str | None,
+    job_id: str | None = None,
+) -> AuditLog:
+    """审计：结算批次生成（资金高风险；避免记录账户明细/敏感信息）。"""
+
+    metadata = {
+        "requestId": request_id,
+        "cycle": result.cycle,
+        "created": int(result.created),
+        "existing": int(result.existing),
+    }
+    if job_id:
+        metadata["jobId"] = job_id
+    return AuditLog(
+        id=str(uuid4()),
+        actor_type=AuditActorType.ADMIN.value,
+        actor_id=admin_id,
+        action=AuditAction.CREATE.value,
+        resource_type="DEALER_SETTLEMENT_BATCH",
+        resource_id=result.cycle,
+        summary=f"生成经销商结算批次：{result.cycle}",
+        ip=ip,
+        user_agent=user_agent,
+        metadata_json=metadata,
+    )
+
+
+# ---- 异步生成任务 ----
+
+
+def job_key(job_id: str) -> str:
+    return f"{_JOB_KEY_PREFIX}{job_id}"
+
+
+async def save_job(*, redis, job: dict) -> None:
+    await redis.set(
+        job_key(str(job["jobId"])),
+        json.dumps(job, ensure_ascii=False),
+        ex=int(settings.dealer_settlement_job_ttl_seconds),
+    )
+
+
+async def load_job(*, redis, job_id: str) -> dict | None:
+    raw = await redis.get(job_key(job_id))
+    if not raw:
+        return None
+    try:
+        job = json.loads(raw)
+    except Exception:  # noqa: BLE001
+        return None
+    return job if isinstance(job, dict) else None
+
+
+async def run_settlement_job(*, job_id: str) -> dict | None:
+    """执行异步出账：生成结算单 -> 审计 -> 更新任务状态（含分阶段进度）。任务不存在（已过期）返回 None。"""
+
+    redis = get_redis()
+    job = await load_job(redis=redis, job_id=job_id)
+    if job is None or job.get("status") == "DONE":
+        return job
+
+    cycle = str(job["cycle"])
+    start = datetime.fromisoformat(str(job["start"]))
+    end = datetime.fromisoformat(str(job["end"]))
+
+    async def _progress(stage: str, done: int, total: int) -> None:
+        job["progress"] = {"stage": stage, "done": int(done), "total": int(total)}
+        await save_job(redis=redis, job=job)
+
+    job["status"] = "RUNNING"
+    job["startedAt"] = _iso(datetime.now(tz=UTC))
+    await save_job(redis=redis, job=job)
+    try:
+        rules = await load_commission_rules()
+        async with get_session_factory()() as session:
+            result = await generate_dealer_settlements(
+                session=session, cycle=cycle, start=start, end=end, rules=rules, progress=_progress
+            )
+            session.add(
+                settlement_batch_audit(
+                    admin_id=str(job.get("adminId") or ""),
+                    result=result,
+                    request_id=job.get("requestId"),
+                    ip=job.get("ip"),
+                    user_agent=job.get("userAgent"),
+                    job_id=job_id,
+                )
+            )
+            await session.commit()
+    except Exception:
+        job["status"] = "FAILED"
+        job["error"] = "GENERATE_FAILED"
+        job["finishedAt"] = _iso(datetime.now(tz=UTC))
+        await save_job(redis=redis, job=job)
+        raise
+
+    job.update(
+        {
+            "status": "DONE",
+            "created": int(result.created),
+            "existing": int(result.existing),
+            "ledgerBackfilled": int(result.ledger_backfilled),
+            "finishedAt": _iso(datetime.now(tz=UTC)),
+        }
+    )
+    await save_job(redis=redis, job=job)
+    return job
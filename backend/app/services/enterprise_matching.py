@@ -39,6 +39,49 @@ def levenshtein_distance(a: str, b: str) -> int:
     return prev[-1]
 
 
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int | None:
+    """带上限的编辑距离：<= max_dist 时返回距离，否则返回 None。
+
+    只计算主对角线 ±max_dist 的带状区域，且整行超限即提前退出：O(max_dist * min(len))。
+    """
+
+    if abs(len(a) - len(b)) > max_dist:
+        return None
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+
+    over = max_dist + 1
+    m = len(b)
+    prev = [j if j <= max_dist else over for j in range(m + 1)]
+    curr = [over] * (m + 1)
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        lo = i - max_dist if i > max_dist else 1
+        hi = i + max_dist if i + max_dist < m else m
+        left = i if i <= max_dist else over
+        curr[lo - 1] = left
+        row_min = left
+        for j in range(lo, hi + 1):
+            v = prev[j - 1] if ca == b[j - 1] else prev[j - 1] + 1
+            if prev[j] < v:
+                v = prev[j] + 1
+            if left < v:
+                v = left + 1
+            if v > over:
+                v = over
+            curr[j] = left = v
+            if v < row_min:
+                row_min = v
+        if hi < m:
+            curr[hi + 1] = over
+        if row_min > max_dist:
+            return None
+        prev, curr = curr, prev
+    return prev[m] if prev[m] <= max_dist else None
+
+
 @dataclass(frozen=True)
 class EnterpriseCandidate:
     id: str
@@ -0,0 +1,316 @@
+"""企业名称联想索引（`GET /api/v1/auth/enterprise-suggestions`）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 企业名称智能匹配（Property 9：精确 > 前缀 > 包含 > 编辑距离<=2，最多 10 条）
+
+说明：
+- 口径与 `enterprise_matching.suggest_enterprises` 完全一致（后者仍是属性测试 oracle），
+  区别只在于候选生成不再逐条计算编辑距离：
+  - 文档按 (name, id) 排序编号，档内排序 == 编号顺序，各档取够即停；
+  - 精确：规范化名 -> 编号；前缀：规范化名有序数组 + bisect；
+  - 包含：n-gram（单字/二元组）倒排，取最稀有的一个 gram 的倒排表顺序扫描校验；
+  - 编辑距离：短关键词（<= 2k+1 字）用删除邻域（SymSpell），长关键词用 q-gram 前缀过滤
+    （距离<=k 时至少共享 D-2k 个二元组 => 必命中最稀有的 2k+1 个之一），再做带状编辑距离校验；
+    先以 k=1 取全部距离 1 的结果，不足再按编号升序扫描距离 2 的候选，取满即停；
+  - 前三档已取满 limit 时不再计算编辑距离；同一索引内按 (关键词, limit) 做结果 LRU。
+- 缓存：进程内单例，覆盖 enterprises 全表（不再截断到 2000 行）。
+  任何 ORM 会话提交了 Enterprise 的新增/修改/删除，都会在 after_commit 后标记本进程索引过期并递增 Redis 版本号；
+  各进程读时比对版本号，过期则后台重建（重建期间继续用旧索引应答），Redis 不可用时按 TTL 兜底重建。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import chain
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.enterprise import Enterprise
+from app.services.enterprise_matching import (
+    EnterpriseCandidate,
+    EnterpriseSuggestion,
+    bounded_levenshtein,
+    normalize_enterprise_name,
+)
+from app.utils.db import get_session_factory
+from app.utils.invalidation import in_pytest, register_commit_invalidation
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+MAX_DISTANCE = 2
+
+_VERSION_KEY = "enterprise_suggestions:version"
+_MAX_AGE_SECONDS = 300.0
+_SESSION_INFO_KEY = "enterprise_suggestions_dirty"
+
+# 删除邻域只为可能与短关键词距离<=k 的短名字建立
+_SHORT_KEY_MAX_LEN = 2 * MAX_DISTANCE + 1
+_DELETES_MAX_NAME_LEN = _SHORT_KEY_MAX_LEN + MAX_DISTANCE
+_RESULT_CACHE_SIZE = 4096
+
+
+def _grams(s: str) -> set[str]:
+    if len(s) < 2:
+        return {s} if s else set()
+    return {s[i : i + 2] for i in range(len(s) - 1)}
+
+
+def _deletes(s: str, k: int) -> set[str]:
+    out = {s}
+    frontier = {s}
+    for _ in range(k):
+        frontier = {x[:i] + x[i + 1 :] for x in frontier for i in range(len(x))}
+        out |= frontier
+    return out
+
+
+class EnterpriseSuggestionIndex:
+    """不可变索引：构建后只读，可在协程间共享（仅结果 LRU 会变化）。"""
+
+    def __init__(self, enterprises: Iterable[EnterpriseCandidate]) -> None:
+        docs: list[tuple[str, EnterpriseCandidate]] = []
+        for e in enterprises:
+            n = normalize_enterprise_name(e.name)
+            if n:
+                docs.append((n, e))
+        docs.sort(key=lambda x: (x[1].name, x[1].id))
+
+        self._docs = [e for _n, e in docs]
+        self._names = [n for n, _e in docs]
+        self._exact: dict[str, list[int]] = {}
+        self._postings: dict[str, list[int]] = {}
+        self._deletes: dict[str, list[int]] = {}
+        by_len: dict[int, list[int]] = {}
+        for idx, n in enumerate(self._names):
+            self._exact.setdefault(n, []).append(idx)
+            by_len.setdefault(len(n), []).append(idx)
+            for g in _grams(n) | set(n):
+                self._postings.setdefault(g, []).append(idx)
+            if len(n) <= _DELETES_MAX_NAME_LEN:
+                for d in _deletes(n, MAX_DISTANCE):
+                    self._deletes.setdefault(d, []).append(idx)
+
+        self._sorted = sorted(range(len(self._names)), key=lambda i: self._names[i])
+        self._by_len = {n: frozenset(ids) for n, ids in by_len.items()}
+        self._long_sets = {
+            g: frozenset(ids) for g, ids in self._postings.items() if len(ids) > max(256, len(self._names) // 64)
+        }
+        self._sorted_names = [self._names[i] for i in self._sorted]
+        self._results: OrderedDict[tuple[str, int], tuple[EnterpriseSuggestion, ...]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def suggest(self, keyword: str, *, limit: int = 10) -> list[EnterpriseSuggestion]:
+        key = normalize_enterprise_name(keyword)
+        if not key or limit <= 0:
+            return []
+
+        # 索引不可变：同一关键词结果可直接复用（热门企业名的逐字输入高度重复）
+        hit = self._results.get((key, limit))
+        if hit is not None:
+            self._results.move_to_end((key, limit))
+            return list(hit)
+        result = self._suggest(key, limit=limit)
+        self._results[(key, limit)] = tuple(result)
+        if len(self._results) > _RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return result
+
+    def _suggest(self, key: str, *, limit: int) -> list[EnterpriseSuggestion]:
+        picked: list[int] = list(self._exact.get(key, ()))[:limit]
+        if len(picked) < limit:
+            picked += self._prefix(key, need=limit - len(picked))
+        if len(picked) < limit:
+            picked += self._contains(key, need=limit - len(picked))
+        if len(picked) < limit:
+            picked += self._fuzzy(key, need=limit - len(picked))
+        return [
+            EnterpriseSuggestion(id=e.id, name=e.name, city_code=e.city_code) for e in (self._docs[i] for i in picked)
+        ]
+
+    def _prefix(self, key: str, *, need: int) -> list[int]:
+        lo = bisect.bisect_right(self._sorted_names, key)
+        hi = bisect.bisect_left(self._sorted_names, key + "\U0010ffff", lo)
+        return heapq.nsmallest(need, (self._sorted[i] for i in range(lo, hi)))
+
+    def _contains(self, key: str, *, need: int) -> list[int]:
+        grams = _grams(key)
+        rarest = min(grams, key=lambda g: len(self._postings.get(g, ())))
+        out: list[int] = []
+        for idx in self._postings.get(rarest, ()):
+            n = self._names[idx]
+            if key in n and not n.startswith(key):
+                out.append(idx)
+                if len(out) >= need:
+                    break
+        return out
+
+    def _candidates(self, key: str, *, k: int) -> Iterator[int]:
+        """编辑距离 <= k 的候选超集，按编号升序。"""
+
+        if len(key) <= _SHORT_KEY_MAX_LEN:
+            # 名字长度 <= len(key)+k <= _DELETES_MAX_NAME_LEN，均已建删除邻域
+            yield from sorted({idx for d in _deletes(key, k) for idx in self._deletes.get(d, ())})
+            return
+
+        lengths = [self._by_len.get(n, frozenset()) for n in range(len(key) - k, len(key) + k + 1)]
+        grams = sorted(_grams(key), key=lambda g: len(self._postings.get(g, ())))
+        min_shared = len(grams) - 2 * k
+        if min_shared <= 0:
+            # 高度重复的关键词（如 "aaaaaa"）：q-gram 过滤失效，退化为按长度扫描
+            yield from sorted(set().union(*lengths))
+            return
+
+        # 前缀过滤：共享 >= D-2k 个 gram => 必命中最稀有的 2k+1 个之一；再叠加长度过滤与完整计数过滤
+        cands = set().union(*(self._postings.get(g, ()) for g in grams[: 2 * k + 1]))
+        cands = set().union(*(cands & ids for ids in lengths))
+        counts = Counter(chain.from_iterable(cands.intersection(self._posting_set(g)) for g in grams))
+        yield from sorted(idx for idx, c in counts.items() if c >= min_shared)
+
+    def _posting_set(self, gram: str) -> frozenset[int] | list[int]:
+        # 高频 gram（如“有限”“公司”）预建集合，求交为 O(候选数)；低频直接用倒排表
+        return self._long_sets.get(gram) or self._postings.get(gram, [])
+
+    def _fuzzy(self, key: str, *, need: int) -> list[int]:
+        # 不含 key 的名字距离至少为 1：先用更严的 k=1 过滤取全部距离 1 的结果（候选通常很少），
+        # 不足时再按编号升序扫描 k=2 候选，取满即停（常见后缀如“有限公司”会让 k=2 候选很多，但命中也多）。
+        picked: list[int] = []
+        for idx in self._candidates(key, k=1):
+            n = self._names[idx]
+            if key not in n and bounded_levenshtein(key, n, 1) is not None:
+                picked.append(idx)
+        if len(picked) >= need:
+            return picked[:need]
+
+        seen = set(picked)
+        for idx in self._candidates(key, k=MAX_DISTANCE):
+            n = self._names[idx]
+            if idx in seen or abs(len(n) - len(key)) > MAX_DISTANCE or key in n:
+                continue
+            if bounded_levenshtein(key, n, MAX_DISTANCE) is not None:
+                picked.append(idx)
+                if len(picked) >= need:
+                    break
+        return picked
+
+
+# -----------------------------
+# 进程内缓存
+# -----------------------------
+
+
+@dataclass
+class _CacheState:
+    index: EnterpriseSuggestionIndex | None = None
+    version: str | None = None
+    local_gen: int = 0
+    built_at: float = 0.0
+
+
+_state = _CacheState()
+_local_gen = 0
+_build_lock = asyncio.Lock()
+_refresh_task: asyncio.Task | None = None
+
+
+async def _redis_version() -> str | None:
+    try:
+        raw = await get_redis().get(_VERSION_KEY)
+    except Exception:  # noqa: BLE001
+        return None
+    if raw is None:
+        return "0"
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
+
+
+async def _load_candidates() -> list[EnterpriseCandidate]:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        rows = (await session.execute(select(Enterprise.id, Enterprise.name, Enterprise.city_code))).all()
+    return [EnterpriseCandidate(id=str(eid), name=str(name or ""), city_code=city) for eid, name, city in rows]
+
+
+async def _rebuild(version: str | None) -> EnterpriseSuggestionIndex:
+    gen = _local_gen
+    candidates = await _load_candidates()
+    # 构建为纯 CPU 计算（全表时约百毫秒级），放到线程中避免阻塞事件循环
+    index = await asyncio.to_thread(EnterpriseSuggestionIndex, candidates)
+    _state.index, _state.version, _state.local_gen, _state.built_at = index, version, gen, time.monotonic()
+    return index
+
+
+def _is_stale(version: str | None) -> bool:
+    if _state.index is None or _state.local_gen != _local_gen:
+        return True
+    if version is None:
+        return time.monotonic() - _state.built_at > _MAX_AGE_SECONDS
+    return version != _state.version
+
+
+async def _refresh_in_background(version: str | None) -> None:
+    async with _build_lock:
+        if _is_stale(version):
+            await _rebuild(version)
+
+
+async def get_enterprise_suggestion_index() -> EnterpriseSuggestionIndex:
+    """返回当前索引；过期时后台重建并先返回旧索引（首次构建需等待）。"""
+
+    global _refresh_task
+
+    if in_pytest():
+        return EnterpriseSuggestionIndex(await _load_candidates())
+
+    version = await _redis_version()
+    if not _is_stale(version):
+        return _state.index  # type: ignore[return-value]
+
+    if _state.index is None:
+        async with _build_lock:
+            if _state.index is None:
+                return await _rebuild(version)
+        return _state.index
+
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_in_background(version))
+    return _state.index
+
+
+async def _bump_version(_keys: list[str]) -> None:
+    try:
+        await get_redis().incr(_VERSION_KEY)
+    except Exception:  # noqa: BLE001
+        logger.warning("enterprise suggestion index version bump failed (TTL will converge)")
+
+
+# -----------------------------
+# ORM 提交钩子：自动失效
+# -----------------------------
+
+
+def _dirty(session: Session) -> set[str]:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Enterprise):
+            return {"*"}
+    return set()
+
+
+def _bump_local_gen(_keys: list[str]) -> None:
+    global _local_gen
+
+    _local_gen += 1
+
+
+register_commit_invalidation(
+    info_key=_SESSION_INFO_KEY, collect=_dirty, evict_local=_bump_local_gen, propagate=_bump_version
+)
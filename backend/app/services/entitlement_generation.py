@@ -12,6 +12,7 @@ v1 最小口径（已在 tasks.md 28.1 中确认）：
 说明：
 - 该模块实现“支付成功后自动生成权益”的副作用逻辑；
 - 幂等口径：同一 orderId 若已生成过 entitlements，则不重复生成。
+- 企业大批量购买（数量很大）时由支付 outbox 的 ENTITLEMENTS_GENERATION 事件在独立事务中生成，避免长事务。
 """
 
 from __future__ import annotations
@@ -20,31 +21,30 @@ from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from app.models.entitlement import Entitlement
-from app.models.enums import EntitlementStatus, EntitlementType, OrderItemType, OrderType
+from app.models.enums import (
+    EntitlementStatus,
+    EntitlementType,
+    OrderItemType,
+    OrderType,
+    ServicePackageInstanceStatus,
+)
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.package_service import PackageService
 from app.models.product import Product
 from app.models.service_package_instance import ServicePackageInstance
-from app.services.entitlement_qr_signing import build_payload_text, sign_payload
+from app.services.entitlement_qr_signing import PayloadSigner, build_payload_text
 from app.services.entitlement_rules import EntitlementShape, validate_entitlement_shape
+from app.utils.datetime_utc import utcnow
 
 
 def _voucher_code_v1() -> str:
     return uuid4().hex[:16].upper()
 
 
-def _build_qr_payload_v1(*, secret: str, entitlement_id: str, voucher_code: str, now_ts: int) -> str:
-    nonce = uuid4().hex
-    sign = sign_payload(secret=secret, entitlement_id=entitlement_id, voucher_code=voucher_code, ts=now_ts, nonce=nonce)
-    return build_payload_text(
-        entitlement_id=entitlement_id, voucher_code=voucher_code, ts=now_ts, nonce=nonce, sign=sign
-    )
-
-
 def _valid_window_from_paid_at(paid_at: datetime) -> tuple[datetime, datetime]:
     valid_from = paid_at
     valid_until = paid_at + timedelta(days=365)
@@ -58,15 +58,64 @@ async def _ensure_not_generated_yet(*, session, order_id: str) -> bool:
     return existing is not None
 
 
+_INSERT_CHUNK_SIZE = 1000
+
+
+async def _prefetch_package_services(*, session, template_ids: set[str]) -> dict[str, list[tuple[str, int]]]:
+    """一次性拉取所有模板的“服务类目×次数”：template_id -> [(service_type, total_count)]。"""
+
+    if not template_ids:
+        return {}
+    rows = (
+        await session.execute(
+            select(PackageService.service_package_id, PackageService.service_type, PackageService.total_count)
+            .where(PackageService.service_package_id.in_(sorted(template_ids)))
+            .order_by(PackageService.service_package_id.asc(), PackageService.id.asc())
+        )
+    ).all()
+    out: dict[str, list[tuple[str, int]]] = {}
+    for template_id, service_type, total_count in rows:
+        out.setdefault(str(template_id), []).append((str(service_type), int(total_count)))
+    return out
+
+
+async def _insert_chunked(*, session, table, rows: list[dict]) -> None:
+    for i in range(0, len(rows), _INSERT_CHUNK_SIZE):
+        await session.execute(insert(table), rows[i : i + _INSERT_CHUNK_SIZE])
+
+
+async def count_entitlements_to_generate(*, session, order_id: str) -> int:
+    """预估订单将生成的权益条数（用于决定内联生成还是交给后台任务）。"""
+
+    items = (
+        await session.execute(
+            select(OrderItem.service_package_template_id, OrderItem.quantity).where(
+                OrderItem.order_id == order_id,
+                OrderItem.item_type == OrderItemType.SERVICE_PACKAGE.value,
+            )
+        )
+    ).all()
+    templates = await _prefetch_package_services(session=session, template_ids={str(t) for t, _ in items if t})
+    return sum(int(q or 0) * len(templates.get(str(t), [])) for t, q in items)
+
+
 async def generate_entitlements_after_payment_succeeded(
     *, session, order_id: str, qr_sign_secret: str, owner_id_override: str | None = None
 ) -> int:
-    """按订单类型生成权益。
+    """按订单类型生成权益（批量路径）。
+
+    说明：
+    - 模板一次性预取；实例/权益构造为 dict，二维码签名复用同一 HMAC key，Core insert 分块 executemany。
+    - 幂等：锁定订单行（支付回调事务内该行已被更新锁定，不会额外阻塞）后检查“已生成”，
+      内联生成与后台任务并发触发时只有一方会写入。
+    - 不提交事务：由调用方 commit（支付 outbox 消费者，见 app/services/payment_outbox.py）。
 
     返回：本次生成的 entitlement 数量（幂等重复调用返回 0）。
     """
 
-    o: Order | None = (await session.scalars(select(Order).where(Order.id == order_id).limit(1))).first()
+    o: Order | None = (
+        await session.scalars(select(Order).where(Order.id == order_id).limit(1).with_for_update())
+    ).first()
     if o is None:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "订单不存在"})
 
@@ -89,90 +138,98 @@ async def generate_entitlements_after_payment_succeeded(
             status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "orderType 不合法"}
         ) from exc
 
-    items: list[OrderItem] = (await session.scalars(select(OrderItem).where(OrderItem.order_id == o.id))).all()
+    if order_type != OrderType.SERVICE_PACKAGE:
+        # PRODUCT（服务类订单）在 v1 不生成权益（阶段5仅覆盖服务包）
+        return 0
+
+    items: list[OrderItem] = [
+        it
+        for it in (await session.scalars(select(OrderItem).where(OrderItem.order_id == o.id))).all()
+        if it.item_type == OrderItemType.SERVICE_PACKAGE.value
+    ]
     if not items:
         return 0
 
+    for it in items:
+        if not it.service_package_template_id or not it.region_scope or not it.tier:
+            raise HTTPException(
+                status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "服务包明细缺少必要参数"}
+            )
+    templates = await _prefetch_package_services(
+        session=session, template_ids={str(it.service_package_template_id) for it in items}
+    )
+    if any(not templates.get(str(it.service_package_template_id)) for it in items):
+        raise HTTPException(
+            status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "服务包模板未配置服务类别×次数"}
+        )
+
     now_ts = int(datetime.now(tz=UTC).timestamp())
+    created_at = utcnow()
     valid_from, valid_until = _valid_window_from_paid_at(o.paid_at)
-
-    created = 0
-    if order_type == OrderType.SERVICE_PACKAGE:
-        for it in items:
-            if it.item_type != OrderItemType.SERVICE_PACKAGE.value:
-                continue
-            if not it.service_package_template_id or not it.region_scope or not it.tier:
-                raise HTTPException(
-                    status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "服务包明细缺少必要参数"}
+    signer = PayloadSigner(secret=qr_sign_secret)
+
+    instance_rows: list[dict] = []
+    entitlement_rows: list[dict] = []
+    for it in items:
+        ps_list = templates[str(it.service_package_template_id)]
+        regions = [it.region_scope]
+        for _ in range(int(it.quantity)):
+            sp_id = str(uuid4())
+            instance_rows.append(
+                {
+                    "id": sp_id,
+                    "order_id": o.id,
+                    "order_item_id": it.id,
+                    "service_package_template_id": it.service_package_template_id,
+                    "owner_id": owner_id,
+                    "region_scope": it.region_scope,
+                    "tier": it.tier,
+                    "valid_from": valid_from,
+                    "valid_until": valid_until,
+                    "status": ServicePackageInstanceStatus.ACTIVE.value,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            for service_type, total_count in ps_list:
+                entitlement_id = str(uuid4())
+                voucher_code = _voucher_code_v1()
+                nonce = uuid4().hex
+                qr_payload = build_payload_text(
+                    entitlement_id=entitlement_id,
+                    voucher_code=voucher_code,
+                    ts=now_ts,
+                    nonce=nonce,
+                    sign=signer.sign(entitlement_id=entitlement_id, voucher_code=voucher_code, ts=now_ts, nonce=nonce),
                 )
-
-            # 拉取模板的“服务类目×次数”
-            ps_list: list[PackageService] = (
-                await session.scalars(
-                    select(PackageService).where(PackageService.service_package_id == it.service_package_template_id)
+                validate_entitlement_shape(
+                    EntitlementShape(owner_id=owner_id, qr_code=qr_payload, voucher_code=voucher_code)
                 )
-            ).all()
-            if not ps_list:
-                raise HTTPException(
-                    status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "服务包模板未配置服务类别×次数"}
+                entitlement_rows.append(
+                    {
+                        "id": entitlement_id,
+                        "user_id": owner_id,
+                        "order_id": o.id,
+                        "entitlement_type": EntitlementType.SERVICE_PACKAGE.value,
+                        "service_type": service_type,
+                        "remaining_count": total_count,
+                        "total_count": total_count,
+                        "valid_from": valid_from,
+                        "valid_until": valid_until,
+                        "applicable_venues": None,
+                        "applicable_regions": regions,
+                        "qr_code": qr_payload,
+                        "voucher_code": voucher_code,
+                        "status": EntitlementStatus.ACTIVE.value,
+                        "service_package_instance_id": sp_id,
+                        "owner_id": owner_id,
+                        "activator_id": "",
+                        "current_user_id": owner_id,
+                        "created_at": created_at,
+                    }
                 )
 
-            for _ in range(int(it.quantity)):
-                sp_id = str(uuid4())
-                sp = ServicePackageInstance(
-                    id=sp_id,
-                    order_id=o.id,
-                    order_item_id=it.id,
-                    service_package_template_id=it.service_package_template_id,
-                    owner_id=owner_id,
-                    region_scope=it.region_scope,
-                    tier=it.tier,
-                    valid_from=valid_from,
-                    valid_until=valid_until,
-                    created_at=datetime.utcnow(),
-                )
-                session.add(sp)
-
-                for ps in ps_list:
-                    entitlement_id = str(uuid4())
-                    voucher_code = _voucher_code_v1()
-                    qr_payload = _build_qr_payload_v1(
-                        secret=qr_sign_secret,
-                        entitlement_id=entitlement_id,
-                        voucher_code=voucher_code,
-                        now_ts=now_ts,
-                    )
-
-                    e = Entitlement(
-                        id=entitlement_id,
-                        user_id=owner_id,
-                        order_id=o.id,
-                        entitlement_type=EntitlementType.SERVICE_PACKAGE.value,
-                        service_type=ps.service_type,
-                        remaining_count=int(ps.total_count),
-                        total_count=int(ps.total_count),
-                        valid_from=valid_from,
-                        valid_until=valid_until,
-                        applicable_venues=None,
-                        applicable_regions=[it.region_scope],
-                        qr_code=qr_payload,
-                        voucher_code=voucher_code,
-                        status=EntitlementStatus.ACTIVE.value,
-                        service_package_instance_id=sp_id,
-                        owner_id=owner_id,
-                        activator_id="",
-                        current_user_id=owner_id,
-                        created_at=datetime.utcnow(),
-                    )
-                    validate_entitlement_shape(
-                        EntitlementShape(owner_id=e.owner_id, qr_code=e.qr_code, voucher_code=e.voucher_code)
-                    )
-                    session.add(e)
-                    created += 1
-
-    else:
-        # PRODUCT（服务类订单）在 v1 不生成权益（阶段5仅覆盖服务包）
-        return 0
-
-    await session.flush()
-    return created
+    # 先实例后权益（权益引用实例 id）
+    await _insert_chunked(session=session, table=ServicePackageInstance.__table__, rows=instance_rows)
+    await _insert_chunked(session=session, table=Entitlement.__table__, rows=entitlement_rows)
+    return len(entitlement_rows)
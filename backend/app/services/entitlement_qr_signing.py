@@ -31,6 +31,19 @@ def sign_payload(*, secret: str, entitlement_id: str, voucher_code: str, ts: int
     return hmac.new(secret.encode("utf-8"), canonical.encode("utf-8"), hashlib.sha256).hexdigest()
 
 
+class PayloadSigner:
+    """同一 secret 批量签名：HMAC key 只派生一次，每条签名复制已初始化的 HMAC 状态（结果与 sign_payload 一致）。"""
+
+    def __init__(self, *, secret: str) -> None:
+        self._base = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, *, entitlement_id: str, voucher_code: str, ts: int, nonce: str) -> str:
+        h = self._base.copy()
+        canonical = build_canonical(entitlement_id=entitlement_id, voucher_code=voucher_code, ts=ts, nonce=nonce)
+        h.update(canonical.encode("utf-8"))
+        return h.hexdigest()
+
+
 def build_payload_text(*, entitlement_id: str, voucher_code: str, ts: int, nonce: str, sign: str) -> str:
     # 固定顺序输出，便于前端稳定生成二维码文本
     return (
@@ -9,17 +9,69 @@
   - 返回首次结果（success/data 或 error/code/message/details）
   - 不重复产生副作用（不重复写库）
 - requestId 属于“本次请求”，因此重放时返回缓存的 data/error，但 requestId 仍取当前请求的 request.state.request_id。
+
+并发与存储：
+- `claim`：SET NX PX GET 一次往返完成“认领或读取”。首个请求写入带租约的处理中标记后执行业务；
+  并发重试看到处理中标记时轮询等待首个结果并重放，而不是再执行一遍（超时 409 STATE_CONFLICT）。
+- `set` 直接覆盖处理中标记；业务未写回结果即结束（参数校验失败等）时由 `release` 比较 token 后删除标记，
+  后续重试可重新执行（与改造前“失败不缓存”的口径一致）。进程崩溃则等租约到期。
+- 续租：认领后后台每 1/3 租约比较 token 后 PEXPIRE 一次，直到结果写回/释放；长耗时处理（AI 对话/SSE）
+  不会因租约到期被并发重试再次执行。等待上限可按 operation 覆盖（`wait_timeout_seconds`）。
+- 结果以紧凑 JSON 数组存储，达到阈值时 zlib 压缩；读取兼容改造前的 JSON 对象格式。
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
-from dataclasses import dataclass
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
 from typing import Any, Literal, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+from prometheus_client import Counter, Histogram
+
+from app.utils.redis_scripts import LuaScript
+from app.utils.settings import settings
 
+logger = logging.getLogger(__name__)
 
 IdemActorType = Literal["USER", "ADMIN", "DEALER", "PROVIDER", "PROVIDER_STAFF"]
 
+_PENDING_PREFIX = b"~pending:"
+_ZLIB_PREFIX = b"~z:"
+
+# 轮询间隔：从 20ms 指数增长到 250ms
+_POLL_INITIAL_SECONDS = 0.02
+_POLL_MAX_SECONDS = 0.25
+
+# KEYS[1]=幂等 key；ARGV[1]=本请求的处理中标记。仅删除自己的标记（结果已写回/已被他人接管时不动）
+_RELEASE = LuaScript("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+""")
+
+# KEYS[1]=幂等 key；ARGV[1]=处理中标记 ARGV[2]=租约毫秒。仅续期自己的标记；返回 0 表示标记已不在（停止续租）
+_RENEW = LuaScript("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+""")
+
+IDEMPOTENCY_PAYLOAD_BYTES = Histogram(
+    "lhmy_idempotency_payload_bytes",
+    "Stored idempotency result size in bytes (after compression)",
+    ["operation"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536),
+)
+IDEMPOTENCY_CLAIMS = Counter(
+    "lhmy_idempotency_claims_total",
+    "Idempotency claim outcomes (claimed / replayed / replayed_after_wait / timeout)",
+    ["operation", "outcome"],
+)
+
 
 @dataclass(frozen=True)
 class IdempotencyCachedResult:
@@ -29,6 +81,50 @@ class IdempotencyCachedResult:
     error: dict[str, Any] | None
 
 
+@dataclass(frozen=True)
+class IdempotencyClaim:
+    """本请求持有的处理中标记（交给 `release` 清理）。"""
+
+    key: str
+    marker: bytes
+    renewal: asyncio.Task | None = field(default=None, compare=False, repr=False)
+
+
+def _encode(result: IdempotencyCachedResult) -> bytes:
+    raw = json.dumps(
+        [result.status_code, result.success, result.data, result.error], ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    if len(raw) >= int(settings.idempotency_compress_min_bytes):
+        packed = _ZLIB_PREFIX + zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return packed
+    return raw
+
+
+def _decode(raw: bytes) -> Optional[IdempotencyCachedResult]:
+    try:
+        if raw.startswith(_ZLIB_PREFIX):
+            raw = zlib.decompress(raw[len(_ZLIB_PREFIX) :])
+        payload = json.loads(raw.decode("utf-8"))
+        if isinstance(payload, list):
+            status_code, success, data, error = payload
+            return IdempotencyCachedResult(status_code=int(status_code), success=bool(success), data=data, error=error)
+        # 改造前写入的 JSON 对象（24h 内仍可能存在）
+        return IdempotencyCachedResult(
+            status_code=int(payload["status_code"]),
+            success=bool(payload["success"]),
+            data=payload.get("data"),
+            error=payload.get("error"),
+        )
+    except Exception:  # noqa: BLE001
+        # 缓存损坏：当作不存在，避免阻断主流程
+        return None
+
+
+def _as_bytes(raw) -> bytes:
+    return bytes(raw) if isinstance(raw, (bytes, bytearray)) else str(raw).encode("utf-8")
+
+
 class IdempotencyService:
     def __init__(self, redis):
         self._redis = redis
@@ -49,22 +145,82 @@ class IdempotencyService:
         raw = await self._redis.get(key)
         if raw is None:
             return None
-
-        try:
-            payload = json.loads(raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw))
-        except Exception:  # noqa: BLE001
-            # 缓存损坏：当作不存在，避免阻断主流程
+        raw = _as_bytes(raw)
+        if raw.startswith(_PENDING_PREFIX):
             return None
+        return _decode(raw)
 
-        try:
-            return IdempotencyCachedResult(
-                status_code=int(payload["status_code"]),
-                success=bool(payload["success"]),
-                data=payload.get("data"),
-                error=payload.get("error"),
-            )
-        except Exception:  # noqa: BLE001
-            return None
+    async def claim(
+        self,
+        *,
+        operation: str,
+        actor_type: IdemActorType,
+        actor_id: str,
+        idempotency_key: str,
+        wait_timeout_seconds: float | None = None,
+    ) -> IdempotencyCachedResult | IdempotencyClaim:
+        """认领执行权，或返回首次结果（必要时等待正在执行的首个请求）。
+
+        wait_timeout_seconds：等待首个结果的上限（缺省 settings.idempotency_wait_timeout_seconds）。
+
+        Errors：
+        - STATE_CONFLICT(409)：等待超时，首个请求仍在处理中
+        """
+
+        key = self._key(operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key)
+        marker = _PENDING_PREFIX + uuid4().hex.encode("ascii")
+        lease_ms = max(1, int(settings.idempotency_claim_lease_seconds)) * 1000
+        wait = settings.idempotency_wait_timeout_seconds if wait_timeout_seconds is None else wait_timeout_seconds
+        deadline = time.monotonic() + max(0.0, float(wait))
+        delay = _POLL_INITIAL_SECONDS
+        waited = False
+
+        while True:
+            existing = await self._redis.set(key, marker, nx=True, px=lease_ms, get=True)
+            if existing is None:
+                IDEMPOTENCY_CLAIMS.labels(operation=operation, outcome="claimed").inc()
+                return self._start_renewal(key=key, marker=marker, lease_ms=lease_ms)
+
+            existing = _as_bytes(existing)
+            if not existing.startswith(_PENDING_PREFIX):
+                cached = _decode(existing)
+                if cached is None:
+                    # 缓存损坏：当作不存在，由本请求重新执行并覆盖
+                    await self._redis.set(key, marker, px=lease_ms)
+                    IDEMPOTENCY_CLAIMS.labels(operation=operation, outcome="claimed").inc()
+                    return self._start_renewal(key=key, marker=marker, lease_ms=lease_ms)
+                outcome = "replayed_after_wait" if waited else "replayed"
+                IDEMPOTENCY_CLAIMS.labels(operation=operation, outcome=outcome).inc()
+                return cached
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                IDEMPOTENCY_CLAIMS.labels(operation=operation, outcome="timeout").inc()
+                raise HTTPException(
+                    status_code=409, detail={"code": "STATE_CONFLICT", "message": "相同请求正在处理中，请稍后重试"}
+                )
+            waited = True
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX_SECONDS)
+
+    def _start_renewal(self, *, key: str, marker: bytes, lease_ms: int) -> IdempotencyClaim:
+        renewal = asyncio.get_running_loop().create_task(self._renew(key=key, marker=marker, lease_ms=lease_ms))
+        return IdempotencyClaim(key=key, marker=marker, renewal=renewal)
+
+    async def _renew(self, *, key: str, marker: bytes, lease_ms: int) -> None:
+        while True:
+            await asyncio.sleep(lease_ms / 3000.0)
+            try:
+                if not await _RENEW.run(self._redis, keys=[key], args=[marker, lease_ms]):
+                    return
+            except Exception:  # noqa: BLE001
+                # 单次续期失败不终止：下个周期重试，租约内恢复即可
+                logger.warning("idempotency claim renewal failed: key=%s", key, exc_info=True)
+
+    async def release(self, claim: IdempotencyClaim) -> None:
+        if claim.renewal is not None:
+            claim.renewal.cancel()
+        await _RELEASE.run(self._redis, keys=[claim.key], args=[claim.marker])
 
     async def set(
         self,
@@ -77,10 +233,6 @@ class IdempotencyService:
         ttl_seconds: int = 24 * 60 * 60,
     ) -> None:
         key = self._key(operation=operation, actor_type=actor_type, actor_id=actor_id, idempotency_key=idempotency_key)
-        value = {
-            "status_code": result.status_code,
-            "success": result.success,
-            "data": result.data,
-            "error": result.error,
-        }
-        await self._redis.set(key, json.dumps(value, ensure_ascii=False), ex=ttl_seconds)
+        value = _encode(result)
+        IDEMPOTENCY_PAYLOAD_BYTES.labels(operation=operation).observe(len(value))
+        await self._redis.set(key, value, ex=ttl_seconds)
@@ -0,0 +1,430 @@
+"""站内通知收件箱：定向通知与广播在读取时合并，未读数走 Redis 计数。
+
+规格来源：
+- specs/health-services-platform/admin-notifications-sending-v1.md -> 3.2 接收端：通知列表
+- specs/mini-program2.0/backend-agent-tasks.md -> BE-ADMIN-002
+
+说明：
+- 收件箱 = notifications（按接收者一行）∪ notification_broadcasts（按受众一行，已读看本人回执）；
+  分页时两路各自按 created_at 倒序只取前 offset+pageSize 行再合并排序，单页代价与广播/历史总量无关。
+- 广播只对发送时已存在的账号可见：created_at >= 账号 created_at（列表/计数/标记已读一致），新账号不会收到历史广播。
+- 未读数（status=UNREAD 时的 total，顶栏轮询用）= 定向未读 + (受众广播总数 - 建号前广播数 - 本人广播回执数)，
+  四项各一个 Redis key（建号前广播数此后不再变化，只回填不增减）：
+  - key 缺失时 COUNT 一次回填（SET NX + TTL），之后轮询不再查库；
+  - 写入方提交后只对“已存在”的 key 增减（Lua，不存在不创建，避免把一次增量当成全量）；
+  - 漏记（Redis 抖动、未接入计数的写入方）最多持续一个 TTL；Redis 不可用时回退 COUNT。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from prometheus_client import Counter
+from sqlalchemy import and_, case, func, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.admin import Admin
+from app.models.dealer_user import DealerUser
+from app.models.enums import NotificationBroadcastAudience, NotificationReceiverType, NotificationStatus
+from app.models.notification import Notification
+from app.models.notification_broadcast import NotificationBroadcast, NotificationBroadcastReceipt
+from app.models.provider_staff import ProviderStaff
+from app.models.provider_user import ProviderUser
+from app.utils.datetime_utc import utcnow
+from app.utils.redis_scripts import LuaScript
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_UNREAD_LOOKUPS = Counter(
+    "lhmy_notification_unread_lookups_total",
+    "Notification unread-count lookups "
+    "(hit: all counters cached; rebuilt: COUNT backfill; db_fallback: redis unavailable)",
+    ["result"],
+)
+
+RECEIVER_MODELS: dict[str, type[Admin] | type[DealerUser] | type[ProviderUser] | type[ProviderStaff]] = {
+    NotificationReceiverType.ADMIN.value: Admin,
+    NotificationReceiverType.DEALER.value: DealerUser,
+    NotificationReceiverType.PROVIDER.value: ProviderUser,
+    NotificationReceiverType.PROVIDER_STAFF.value: ProviderStaff,
+}
+
+_BROADCAST_AUDIENCE = {
+    NotificationReceiverType.ADMIN.value: NotificationBroadcastAudience.ALL_ADMINS.value,
+    NotificationReceiverType.DEALER.value: NotificationBroadcastAudience.ALL_DEALERS.value,
+    NotificationReceiverType.PROVIDER.value: NotificationBroadcastAudience.ALL_PROVIDERS.value,
+    NotificationReceiverType.PROVIDER_STAFF.value: NotificationBroadcastAudience.ALL_PROVIDERS.value,
+}
+
+# KEYS=计数 key；ARGV[1]=增量。只对已存在的 key 生效（不存在说明尚未回填，下次读取时 COUNT）；结果不小于 0。
+_INCR_EXISTING = LuaScript("""
+local n = 0
+for _, k in ipairs(KEYS) do
+  if redis.call('EXISTS', k) == 1 then
+    if redis.call('INCRBY', k, ARGV[1]) < 0 then redis.call('SET', k, 0, 'KEEPTTL') end
+    n = n + 1
+  end
+end
+return n
+""")
+
+
+def broadcast_audience_for(receiver_type: str) -> str | None:
+    """接收者类型 -> 可见的广播受众（USER 无广播）。"""
+
+    return _BROADCAST_AUDIENCE.get(str(receiver_type))
+
+
+def _receiver_created_at(*, receiver_type: str, receiver_id: str):
+    """接收者账号创建时间（标量子查询）：早于它的广播对该账号不可见。"""
+
+    model = RECEIVER_MODELS[receiver_type]
+    return select(model.created_at).where(model.id == receiver_id).scalar_subquery()
+
+
+@dataclass(frozen=True)
+class InboxItem:
+    id: str
+    title: str
+    content: str
+    category: str | None
+    status: str
+    created_at: datetime | None
+    read_at: datetime | None
+
+
+# ---- 未读计数（Redis） ----
+
+
+def unread_key(receiver_type: str, receiver_id: str) -> str:
+    return f"notifications:unread:{receiver_type}:{receiver_id}"
+
+
+def broadcast_total_key(audience: str) -> str:
+    return f"notifications:broadcast_total:{audience}"
+
+
+def broadcast_read_key(receiver_type: str, receiver_id: str) -> str:
+    return f"notifications:broadcast_read:{receiver_type}:{receiver_id}"
+
+
+def broadcast_hidden_key(receiver_type: str, receiver_id: str) -> str:
+    return f"notifications:broadcast_hidden:{receiver_type}:{receiver_id}"
+
+
+async def _incr_existing(redis, *, keys: list[str], delta: int) -> None:
+    if not keys:
+        return
+    try:
+        await _INCR_EXISTING.run(redis, keys=keys, args=[int(delta)])
+    except Exception:  # noqa: BLE001
+        # 计数失败不影响已提交的写入：TTL 到期后按 COUNT 回填
+        logger.warning("notification unread counter update failed: keys=%d", len(keys), exc_info=True)
+
+
+async def bump_unread(*, redis, receivers: Sequence[tuple[str, str]], delta: int = 1) -> None:
+    """定向通知提交后调整接收者未读数（新写入 +1，标记已读 -1）。"""
+
+    await _incr_existing(redis, keys=[unread_key(rt, rid) for rt, rid in receivers], delta=delta)
+
+
+async def invalidate_unread(*, redis, receivers: Sequence[tuple[str, str]]) -> None:
+    """无法精确增减时（如重放分片部分已存在）删除计数，下次读取时 COUNT 回填。"""
+
+    if not receivers:
+        return
+    try:
+        await redis.delete(*[unread_key(rt, rid) for rt, rid in receivers])
+    except Exception:  # noqa: BLE001
+        logger.warning("notification unread counter invalidate failed: receivers=%d", len(receivers), exc_info=True)
+
+
+async def bump_broadcast_total(*, redis, audience: str) -> None:
+    await _incr_existing(redis, keys=[broadcast_total_key(audience)], delta=1)
+
+
+async def bump_broadcast_read(*, redis, receiver_type: str, receiver_id: str) -> None:
+    await _incr_existing(redis, keys=[broadcast_read_key(receiver_type, receiver_id)], delta=1)
+
+
+def _unread_count_specs(*, receiver_type: str, receiver_id: str) -> list[tuple[str, object]]:
+    specs: list[tuple[str, object]] = [
+        (
+            unread_key(receiver_type, receiver_id),
+            select(func.count())
+            .select_from(Notification)
+            .where(
+                Notification.receiver_type == receiver_type,
+                Notification.receiver_id == receiver_id,
+                Notification.status == NotificationStatus.UNREAD.value,
+            ),
+        )
+    ]
+    audience = broadcast_audience_for(receiver_type)
+    if audience is not None:
+        specs.append(
+            (
+                broadcast_total_key(audience),
+                select(func.count())
+                .select_from(NotificationBroadcast)
+                .where(NotificationBroadcast.audience == audience),
+            )
+        )
+        specs.append(
+            (
+                broadcast_hidden_key(receiver_type, receiver_id),
+                select(func.count())
+                .select_from(NotificationBroadcast)
+                .where(
+                    NotificationBroadcast.audience == audience,
+                    NotificationBroadcast.created_at
+                    < _receiver_created_at(receiver_type=receiver_type, receiver_id=receiver_id),
+                ),
+            )
+        )
+        specs.append(
+            (
+                broadcast_read_key(receiver_type, receiver_id),
+                select(func.count())
+                .select_from(NotificationBroadcastReceipt)
+                .where(
+                    NotificationBroadcastReceipt.receiver_type == receiver_type,
+                    NotificationBroadcastReceipt.receiver_id == receiver_id,
+                ),
+            )
+        )
+    return specs
+
+
+async def unread_count(*, session, redis, receiver_type: str, receiver_id: str) -> int:
+    specs = _unread_count_specs(receiver_type=receiver_type, receiver_id=receiver_id)
+    try:
+        cached = await redis.mget([key for key, _ in specs])
+    except Exception:  # noqa: BLE001
+        logger.warning("notification unread counter read failed, falling back to COUNT", exc_info=True)
+        cached = None
+
+    values: list[int] = []
+    missing: dict[str, int] = {}
+    for i, (key, stmt) in enumerate(specs):
+        raw = None if cached is None else cached[i]
+        if raw is None:
+            v = int((await session.execute(stmt)).scalar() or 0)
+            missing[key] = v
+        else:
+            v = int(raw)
+        values.append(v)
+
+    if cached is None:
+        NOTIFICATION_UNREAD_LOOKUPS.labels(result="db_fallback").inc()
+    elif missing:
+        NOTIFICATION_UNREAD_LOOKUPS.labels(result="rebuilt").inc()
+        ttl = int(settings.notification_unread_cache_ttl_seconds)
+        try:
+            for key, v in missing.items():
+                # NX：回填期间已有其它请求回填，以先写入者为准
+                await redis.set(key, v, nx=True, ex=ttl)
+        except Exception:  # noqa: BLE001
+            logger.warning("notification unread counter backfill failed", exc_info=True)
+    else:
+        NOTIFICATION_UNREAD_LOOKUPS.labels(result="hit").inc()
+
+    direct = values[0]
+    broadcast_unread = max(0, values[1] - values[2] - values[3]) if len(values) == 4 else 0
+    return direct + broadcast_unread
+
+
+# ---- 收件箱列表 / 标记已读 ----
+
+
+def _direct_select(*, receiver_type: str, receiver_id: str, status: str | None):
+    stmt = select(
+        Notification.id.label("id"),
+        Notification.title.label("title"),
+        Notification.content.label("content"),
+        Notification.category.label("category"),
+        Notification.status.label("status"),
+        Notification.created_at.label("created_at"),
+        Notification.read_at.label("read_at"),
+    ).where(Notification.receiver_type == receiver_type, Notification.receiver_id == receiver_id)
+    if status:
+        stmt = stmt.where(Notification.status == status)
+    return stmt, (Notification.created_at.desc(), Notification.id.desc())
+
+
+def _broadcast_select(*, receiver_type: str, receiver_id: str, audience: str, status: str | None):
+    r = NotificationBroadcastReceipt
+    stmt = (
+        select(
+            NotificationBroadcast.id.label("id"),
+            NotificationBroadcast.title.label("title"),
+            NotificationBroadcast.content.label("content"),
+            NotificationBroadcast.category.label("category"),
+            case(
+                (r.broadcast_id.is_(None), literal(NotificationStatus.UNREAD.value)),
+                else_=literal(NotificationStatus.READ.value),
+            ).label("status"),
+            NotificationBroadcast.created_at.label("created_at"),
+            r.read_at.label("read_at"),
+        )
+        .select_from(NotificationBroadcast)
+        .outerjoin(
+            r,
+            and_(
+                r.broadcast_id == NotificationBroadcast.id,
+                r.receiver_type == receiver_type,
+                r.receiver_id == receiver_id,
+            ),
+        )
+        .where(
+            NotificationBroadcast.audience == audience,
+            NotificationBroadcast.created_at
+            >= _receiver_created_at(receiver_type=receiver_type, receiver_id=receiver_id),
+        )
+    )
+    if status == NotificationStatus.UNREAD.value:
+        stmt = stmt.where(r.broadcast_id.is_(None))
+    elif status == NotificationStatus.READ.value:
+        stmt = stmt.where(r.broadcast_id.is_not(None))
+    return stmt, (NotificationBroadcast.created_at.desc(), NotificationBroadcast.id.desc())
+
+
+def _item(row) -> InboxItem:
+    return InboxItem(
+        id=row.id,
+        title=row.title,
+        content=row.content,
+        category=row.category,
+        status=row.status,
+        created_at=row.created_at,
+        read_at=row.read_at,
+    )
+
+
+async def list_inbox(
+    *,
+    session,
+    redis,
+    receiver_type: str,
+    receiver_id: str,
+    status: str | None,
+    page: int,
+    page_size: int,
+) -> tuple[list[InboxItem], int]:
+    """返回 (当前页, total)；status=UNREAD 时 total 取未读计数（不 COUNT）。"""
+
+    offset = (page - 1) * page_size
+    branches = [_direct_select(receiver_type=receiver_type, receiver_id=receiver_id, status=status)]
+    audience = broadcast_audience_for(receiver_type)
+    if audience is not None:
+        branches.append(
+            _broadcast_select(receiver_type=receiver_type, receiver_id=receiver_id, audience=audience, status=status)
+        )
+
+    if len(branches) == 1:
+        stmt, order = branches[0]
+        page_stmt = stmt.order_by(*order).offset(offset).limit(page_size)
+    else:
+        # 每路只取前 offset+pageSize 行：合并后的前 offset+pageSize 行必然落在其中
+        window = offset + page_size
+        parts = [select(stmt.order_by(*order).limit(window).subquery()) for stmt, order in branches]
+        inbox = union_all(*parts).subquery("inbox")
+        page_stmt = select(inbox).order_by(inbox.c.created_at.desc(), inbox.c.id.desc()).offset(offset).limit(page_size)
+
+    rows = (await session.execute(page_stmt)).all()
+
+    if status == NotificationStatus.UNREAD.value:
+        total = await unread_count(session=session, redis=redis, receiver_type=receiver_type, receiver_id=receiver_id)
+    else:
+        total = 0
+        for stmt, _order in branches:
+            total += int((await session.execute(select(func.count()).select_from(stmt.subquery()))).scalar() or 0)
+
+    return [_item(x) for x in rows], total
+
+
+async def mark_inbox_read(
+    *, session, redis, receiver_type: str, receiver_id: str, notification_id: str
+) -> InboxItem | None:
+    """标记已读（幂等）；定向通知与广播共用同一个 id 空间。通知不存在或不属于该接收者返回 None。"""
+
+    now = utcnow()
+    # 条件更新：并发标记时只有一个请求把 UNREAD 改为 READ，计数只减一次
+    res = await session.execute(
+        update(Notification)
+        .where(
+            Notification.id == notification_id,
+            Notification.receiver_type == receiver_type,
+            Notification.receiver_id == receiver_id,
+            Notification.status == NotificationStatus.UNREAD.value,
+        )
+        .values(status=NotificationStatus.READ.value, read_at=now)
+    )
+    if res.rowcount == 1:
+        await session.commit()
+        await bump_unread(redis=redis, receivers=[(receiver_type, receiver_id)], delta=-1)
+    n = (
+        await session.scalars(
+            select(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.receiver_type == receiver_type,
+                Notification.receiver_id == receiver_id,
+            )
+            .limit(1)
+        )
+    ).first()
+    if n is not None:
+        return _item(n)
+
+    audience = broadcast_audience_for(receiver_type)
+    if audience is None:
+        return None
+    b = (
+        await session.scalars(
+            select(NotificationBroadcast)
+            .where(
+                NotificationBroadcast.id == notification_id,
+                NotificationBroadcast.audience == audience,
+                NotificationBroadcast.created_at
+                >= _receiver_created_at(receiver_type=receiver_type, receiver_id=receiver_id),
+            )
+            .limit(1)
+        )
+    ).first()
+    if b is None:
+        return None
+
+    # 回滚会使已加载对象过期：先取出展示字段
+    item = InboxItem(
+        id=b.id,
+        title=b.title,
+        content=b.content,
+        category=b.category,
+        status=NotificationStatus.READ.value,
+        created_at=b.created_at,
+        read_at=now,
+    )
+    pk = (b.id, receiver_type, receiver_id)
+    receipt = await session.get(NotificationBroadcastReceipt, pk)
+    if receipt is None:
+        session.add(
+            NotificationBroadcastReceipt(
+                broadcast_id=b.id, receiver_type=receiver_type, receiver_id=receiver_id, read_at=now
+            )
+        )
+        try:
+            await session.commit()
+        except IntegrityError:
+            # 并发重复标记：以先写入的回执为准
+            await session.rollback()
+            receipt = await session.get(NotificationBroadcastReceipt, pk)
+        else:
+            await bump_broadcast_read(redis=redis, receiver_type=receiver_type, receiver_id=receiver_id)
+            return item
+
+    return replace(item, read_at=receipt.read_at) if receipt is not None else item
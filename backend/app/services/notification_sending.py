@@ -0,0 +1,222 @@
+"""Admin 手工发送站内通知：群发写一条广播，定向走 Core 批量写入（大批量异步任务）。
+
+规格来源：
+- specs-prod/admin/api-contracts.md#9J
+- specs/health-services-platform/admin-notifications-sending-v1.md
+
+说明：
+- 群发（ALL_ADMINS/ALL_DEALERS/ALL_PROVIDERS）只写一行 notification_broadcasts，接收端读取时合并
+  （见 services/notification_inbox.py）；接收者数只做 COUNT（响应/审计口径不变），不再加载账号行。
+- 定向：Core 多行 INSERT 分片写入（不构造 ORM 对象）；接收者数超过 notification_send_sync_max_targets 时
+  任务状态写 Redis（带 TTL）后交给 Celery（app/tasks/notifications.py），每片单独提交并上报进度。
+- 通知 id 由 (batchId, 接收者) 派生（uuid5）+ INSERT IGNORE：任务重试/重复投递时已写入的分片不会重复写。
+- 写入提交后调整 Redis 未读计数。
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import cast
+from uuid import UUID, uuid4, uuid5
+
+from sqlalchemy import Table, func, insert, select
+
+from app.models.enums import NotificationBroadcastAudience, NotificationReceiverType, NotificationStatus
+from app.models.notification import Notification
+from app.models.notification_broadcast import NotificationBroadcast
+from app.services.notification_inbox import RECEIVER_MODELS, bump_unread, invalidate_unread
+from app.utils.datetime_iso import iso as _iso
+from app.utils.db import get_session_factory
+from app.utils.redis_client import get_redis
+from app.utils.settings import settings
+
+_JOB_KEY_PREFIX = "notifications:send_job:"
+
+AUDIENCE_RECEIVER_TYPES = {
+    NotificationBroadcastAudience.ALL_ADMINS.value: [NotificationReceiverType.ADMIN.value],
+    NotificationBroadcastAudience.ALL_DEALERS.value: [NotificationReceiverType.DEALER.value],
+    NotificationBroadcastAudience.ALL_PROVIDERS.value: [
+        NotificationReceiverType.PROVIDER.value,
+        NotificationReceiverType.PROVIDER_STAFF.value,
+    ],
+}
+
+
+async def count_audience(*, session, audience: str) -> dict[str, int]:
+    """群发覆盖的 ACTIVE 账号数（按接收者类型）。"""
+
+    out: dict[str, int] = {}
+    for rt in AUDIENCE_RECEIVER_TYPES[audience]:
+        model = RECEIVER_MODELS[rt]
+        out[rt] = int(
+            (await session.execute(select(func.count()).select_from(model).where(model.status == "ACTIVE"))).scalar()
+            or 0
+        )
+    return out
+
+
+def new_broadcast(
+    *, sender_id: str | None, audience: str, title: str, content: str, category: str, meta: dict | None, now: datetime
+) -> NotificationBroadcast:
+    return NotificationBroadcast(
+        id=str(uuid4()),
+        sender_type=NotificationReceiverType.ADMIN.value if sender_id else None,
+        sender_id=sender_id,
+        audience=audience,
+        title=title,
+        content=content,
+        category=category,
+        meta_json=meta,
+        created_at=now,
+    )
+
+
+def notification_id_for(*, batch_id: str, receiver_type: str, receiver_id: str) -> str:
+    return str(uuid5(UUID(batch_id), f"{receiver_type}:{receiver_id}"))
+
+
+async def insert_targeted_notifications(
+    *,
+    session,
+    batch_id: str,
+    receivers: Sequence[tuple[str, str]],
+    sender_id: str,
+    title: str,
+    content: str,
+    category: str,
+    meta: dict | None,
+    now: datetime,
+) -> int:
+    """一条多行 INSERT IGNORE 写入一片定向通知（不提交）；返回实际写入行数（重放时已存在的行不计）。"""
+
+    if not receivers:
+        return 0
+    rows = [
+        {
+            "id": notification_id_for(batch_id=batch_id, receiver_type=rt, receiver_id=rid),
+            "sender_type": NotificationReceiverType.ADMIN.value,
+            "sender_id": sender_id,
+            "receiver_type": rt,
+            "receiver_id": rid,
+            "title": title,
+            "content": content,
+            "category": category,
+            "meta_json": meta,
+            "status": NotificationStatus.UNREAD.value,
+            "created_at": now,
+            "read_at": None,
+        }
+        for rt, rid in receivers
+    ]
+    res = await session.execute(
+        insert(cast(Table, Notification.__table__)).prefix_with("IGNORE", dialect="mysql"), rows
+    )
+    return int(res.rowcount or 0)
+
+
+async def sync_unread_counters(*, redis, receivers: Sequence[tuple[str, str]], created: int) -> None:
+    """定向写入提交后：全部新写入则 +1；部分已存在（重放）无法区分是谁，直接失效这些接收者的计数。"""
+
+    if created == len(receivers):
+        await bump_unread(redis=redis, receivers=receivers, delta=1)
+    else:
+        await invalidate_unread(redis=redis, receivers=receivers)
+
+
+def receiver_type_counts(receivers: Sequence[tuple[str, str]]) -> dict[str, int]:
+    out: dict[str, int] = {}
+    for rt, _rid in receivers:
+        out[rt] = int(out.get(rt, 0)) + 1
+    return out
+
+
+# ---- 异步发送任务 ----
+
+
+def pack_receivers(receivers: Sequence[tuple[str, str]]) -> dict[str, list[str]]:
+    """按类型分组存储（任务 JSON 体积约为逐条存储的一半）。"""
+
+    out: dict[str, list[str]] = {}
+    for rt, rid in receivers:
+        out.setdefault(rt, []).append(rid)
+    return out
+
+
+def unpack_receivers(packed: dict[str, list[str]]) -> list[tuple[str, str]]:
+    return [(rt, rid) for rt, ids in packed.items() for rid in ids]
+
+
+def job_key(job_id: str) -> str:
+    return f"{_JOB_KEY_PREFIX}{job_id}"
+
+
+async def save_job(*, redis, job: dict) -> None:
+    await redis.set(
+        job_key(str(job["jobId"])),
+        json.dumps(job, ensure_ascii=False),
+        ex=int(settings.notification_send_job_ttl_seconds),
+    )
+
+
+async def load_job(*, redis, job_id: str) -> dict | None:
+    raw = await redis.get(job_key(job_id))
+    if not raw:
+        return None
+    try:
+        job = json.loads(raw)
+    except Exception:  # noqa: BLE001
+        return None
+    return job if isinstance(job, dict) else None
+
+
+async def run_send_job(*, job_id: str) -> dict | None:
+    """执行异步定向发送：分片写入 + 提交 + 计数 + 进度。重试时从已完成的分片之后继续。任务不存在（已过期）返回 None。"""
+
+    redis = get_redis()
+    job = await load_job(redis=redis, job_id=job_id)
+    if job is None or job.get("status") == "DONE":
+        return job
+
+    receivers = unpack_receivers(dict(job["receivers"]))
+    total = len(receivers)
+    done = int((job.get("progress") or {}).get("done") or 0)
+    created = int(job.get("createdCount") or 0)
+    sent_at = datetime.fromisoformat(str(job["sentAt"]))
+    batch_size = max(1, int(settings.notification_send_batch_size))
+
+    job["status"] = "RUNNING"
+    job["startedAt"] = job.get("startedAt") or _iso(datetime.now(tz=UTC))
+    await save_job(redis=redis, job=job)
+    try:
+        async with get_session_factory()() as session:
+            for i in range(done, total, batch_size):
+                chunk = receivers[i : i + batch_size]
+                n = await insert_targeted_notifications(
+                    session=session,
+                    batch_id=str(job["batchId"]),
+                    receivers=chunk,
+                    sender_id=str(job["senderId"]),
+                    title=str(job["title"]),
+                    content=str(job["content"]),
+                    category=str(job["category"]),
+                    meta=job.get("meta"),
+                    now=sent_at,
+                )
+                await session.commit()
+                await sync_unread_counters(redis=redis, receivers=chunk, created=n)
+                created += n
+                job["progress"] = {"done": i + len(chunk), "total": total}
+                job["createdCount"] = created
+                await save_job(redis=redis, job=job)
+    except Exception:
+        job["status"] = "FAILED"
+        job["error"] = "SEND_FAILED"
+        job["finishedAt"] = _iso(datetime.now(tz=UTC))
+        await save_job(redis=redis, job=job)
+        raise
+
+    job.update({"status": "DONE", "createdCount": created, "finishedAt": _iso(datetime.now(tz=UTC)), "error": None})
+    await save_job(redis=redis, job=job)
+    return job
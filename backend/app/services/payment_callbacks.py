@@ -9,6 +9,12 @@
 - design.md 未定义“微信支付回调”的对外 HTTP 端点契约（URL/签名验签/报文结构等），因此这里仅实现**可复用的回调处理核心逻辑**：
   - 更新 payments/paymentStatus 与 orders/paymentStatus、paidAt
   - 返回履约路由结果，供后续“权益生成/预约/发券”等流程接入
+- 回调分两段（见 app/models/payment_outbox.py）：
+  - record_payment_succeeded：短事务内置为已支付并写入 PAYMENT_SUCCEEDED outbox 事件，回调随即应答；
+  - fulfill_paid_order：卡/权益/bind_token/库存扣减，由 outbox 消费者异步执行（app/services/payment_outbox.py），
+    各步骤自身幂等，重试/回放不会重复生成。
+- 权益条数超过 ENTITLEMENT_ASYNC_THRESHOLD 的大单：履约事务只写卡/bind_token，并同事务写入
+  ENTITLEMENTS_GENERATION outbox 事件，由同一消费者在独立事务中批量生成（失败重试/死信/回放同 outbox），避免长事务。
 """
 
 from __future__ import annotations
@@ -22,27 +28,71 @@ from sqlalchemy import select, update
 from app.models.bind_token import BindToken
 from app.models.card import Card
 from app.models.enums import CardStatus
-from app.models.enums import OrderFulfillmentStatus, OrderType, PaymentStatus, ProductFulfillmentType
+from app.models.enums import (
+    OrderFulfillmentStatus,
+    OrderType,
+    PaymentOutboxStatus,
+    PaymentStatus,
+    ProductFulfillmentType,
+)
 from app.models.order import Order
-from app.models.order_item import OrderItem
 from app.models.payment import Payment
-from app.models.product import Product
+from app.models.payment_outbox import (
+    ENTITLEMENTS_GENERATION_EVENT,
+    PAYMENT_SUCCEEDED_EVENT,
+    PaymentOutboxEvent,
+)
+from app.services.dealer_settlement import record_dealer_commission
 from app.services.order_state_machine import assert_order_status_transition
-from app.services.entitlement_generation import generate_entitlements_after_payment_succeeded
+from app.services.entitlement_generation import (
+    count_entitlements_to_generate,
+    generate_entitlements_after_payment_succeeded,
+)
 from app.services.fulfillment_routing import FulfillmentFlow, resolve_fulfillment_flow
+from app.services.stock_reservation import confirm_order_stock
 from app.utils.settings import settings
 
 
-async def mark_payment_succeeded(
+async def generate_deferred_entitlements(*, session, order_id: str) -> int:
+    """后台生成大单权益（调用方负责 commit）。
+
+    说明：
+    - ownerId 按生成时的卡状态裁决：仍 UNBOUND 写 cardId；若用户已先行绑定则直接写绑定用户，
+      与绑定接口“cardId -> userId 迁移”口径一致。
+    - 锁定卡行，避免与绑定接口的归属迁移交错。
+    """
+
+    card = (await session.scalars(select(Card).where(Card.id == order_id).limit(1).with_for_update())).first()
+    owner_id = order_id
+    if card is not None and str(card.status) == CardStatus.BOUND.value and card.owner_user_id:
+        owner_id = str(card.owner_user_id)
+    return await generate_entitlements_after_payment_succeeded(
+        session=session,
+        order_id=order_id,
+        qr_sign_secret=settings.entitlement_qr_sign_secret,
+        owner_id_override=owner_id,
+    )
+
+
+def _should_defer_entitlements(count: int) -> bool:
+    threshold = int(settings.entitlement_async_threshold or 0)
+    return threshold > 0 and count > threshold
+
+
+async def record_payment_succeeded(
     *,
     session,
     order_id: str,
     payment_id: str,
     provider_payload: dict[str, Any] | None = None,
-) -> FulfillmentFlow:
-    """将支付置为成功，并返回履约流程路由结果。"""
+) -> str | None:
+    """短事务：订单/支付置为已支付并写入 outbox 事件（本函数 commit）。
+
+    返回需要投递给消费者的事件 ID；重复回调时若事件仍待处理则再次返回（补投递），已完成则返回 None。
+    """
 
-    o = (await session.scalars(select(Order).where(Order.id == order_id).limit(1))).first()
+    # 锁定订单行：与库存超时释放（SKIP LOCKED 认领订单）串行，避免“已释放预占的订单又被置为已支付”
+    o = (await session.scalars(select(Order).where(Order.id == order_id).limit(1).with_for_update())).first()
     if o is None:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "订单不存在"})
 
@@ -54,7 +104,17 @@ async def mark_payment_succeeded(
 
     if o.payment_status == PaymentStatus.PAID.value:
         # 幂等：重复回调不应报错
-        return resolve_fulfillment_flow(order_type=OrderType(o.order_type))
+        event_id = (
+            await session.scalars(
+                select(PaymentOutboxEvent.id).where(
+                    PaymentOutboxEvent.order_id == order_id,
+                    PaymentOutboxEvent.event_type == PAYMENT_SUCCEEDED_EVENT,
+                    PaymentOutboxEvent.status == PaymentOutboxStatus.PENDING.value,
+                )
+            )
+        ).first()
+        await session.commit()
+        return event_id
 
     assert_order_status_transition(current=o.payment_status, target=PaymentStatus.PAID.value)
 
@@ -66,6 +126,40 @@ async def mark_payment_succeeded(
     if provider_payload is not None:
         p.provider_payload = provider_payload
 
+    # 经销商分账流水：与置为已支付同事务，月末出账只聚合流水
+    record_dealer_commission(session=session, order=o)
+
+    from uuid import uuid4  # noqa: WPS433
+
+    event_id = str(uuid4())
+    session.add(
+        PaymentOutboxEvent(
+            id=event_id,
+            event_type=PAYMENT_SUCCEEDED_EVENT,
+            order_id=o.id,
+            payment_id=p.id,
+            status=PaymentOutboxStatus.PENDING.value,
+            attempts=0,
+            next_attempt_at=now.replace(tzinfo=None),
+            paid_at=now.replace(tzinfo=None),
+        )
+    )
+    await session.commit()
+    return event_id
+
+
+async def fulfill_paid_order(*, session, order_id: str) -> bool:
+    """已支付订单履约（调用方负责 commit）；返回是否有大单权益需另行生成（见模块说明）。"""
+
+    o = (await session.scalars(select(Order).where(Order.id == order_id).limit(1).with_for_update())).first()
+    if o is None:
+        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "订单不存在"})
+    if o.payment_status != PaymentStatus.PAID.value:
+        # 已退款等：不再履约
+        return False
+
+    deferred_entitlements = False
+
     # v1（h5-anonymous-purchase-bind-token）：
     # - 仅对 SERVICE_PACKAGE 订单生成“未绑定卡（Card）+ 权益（ownerId=cardId）+ bind_token”
     # - Card.id = Order.id（v1 一单一张卡）
@@ -79,17 +173,20 @@ async def mark_payment_succeeded(
         else:
             # 若已绑定，则不再生成/刷新 token（避免越权覆盖绑定结果）
             if str(card.status) == CardStatus.BOUND.value:
-                await session.commit()
-                return resolve_fulfillment_flow(order_type=OrderType(o.order_type))
+                return False
 
         # 2) 生成权益：ownerId 临时写 cardId（并写入兼容字段 userId/currentUserId）
         # - 幂等：生成逻辑内部对同一 orderId 做“已生成”检查
-        await generate_entitlements_after_payment_succeeded(
-            session=session,
-            order_id=o.id,
-            qr_sign_secret=settings.entitlement_qr_sign_secret,
-            owner_id_override=card_id,
-        )
+        # - 大单：提交后交给后台任务（见模块说明）
+        if _should_defer_entitlements(await count_entitlements_to_generate(session=session, order_id=o.id)):
+            deferred_entitlements = True
+        else:
+            await generate_entitlements_after_payment_succeeded(
+                session=session,
+                order_id=o.id,
+                qr_sign_secret=settings.entitlement_qr_sign_secret,
+                owner_id_override=card_id,
+            )
 
         # 3) 生成 bind_token（24h，回调幂等：已有未过期且未使用 token 则复用）
         now2 = datetime.now(tz=UTC)
@@ -120,28 +217,46 @@ async def mark_payment_succeeded(
             expires_at = (now2 + timedelta(seconds=int(settings.bind_token_expire_seconds))).replace(tzinfo=None)
             session.add(BindToken(token=token, card_id=card_id, expires_at=expires_at, used_at=None))
 
-    # v2：物流商品库存确认扣减（占用 -> 扣减），并进入待发货
+    # v2：物流商品库存确认扣减（占用 -> 扣减，按预占流水幂等处理），并进入待发货
+    # - 订单已是 PAID，超时释放只认领 PENDING 订单，预占在履约前不会被释放
     if o.order_type == OrderType.PRODUCT.value and o.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value:
-        items: list[OrderItem] = (await session.scalars(select(OrderItem).where(OrderItem.order_id == o.id))).all()
-        product_ids = [it.item_id for it in items if it.item_type == "PRODUCT"]
-        if product_ids:
-            products: list[Product] = (await session.scalars(select(Product).where(Product.id.in_(product_ids)))).all()
-            prod_map = {x.id: x for x in products}
-            for it in items:
-                if it.item_type != "PRODUCT":
-                    continue
-                p2 = prod_map.get(it.item_id)
-                if p2 is None:
-                    continue
-                qty = int(it.quantity or 0)
-                if qty <= 0:
-                    continue
-                p2.stock = max(0, int(p2.stock or 0) - qty)
-                p2.reserved_stock = max(0, int(p2.reserved_stock or 0) - qty)
-
-        o.fulfillment_status = OrderFulfillmentStatus.NOT_SHIPPED.value
+        await confirm_order_stock(session=session, order_id=o.id)
+        if not o.fulfillment_status:
+            o.fulfillment_status = OrderFulfillmentStatus.NOT_SHIPPED.value
         o.reservation_expires_at = None
 
-    await session.commit()
+    return deferred_entitlements
+
+
+async def mark_payment_succeeded(
+    *,
+    session,
+    order_id: str,
+    payment_id: str,
+    provider_payload: dict[str, Any] | None = None,
+) -> FulfillmentFlow:
+    """将支付置为成功并内联完成履约，返回履约流程路由结果（测试/运维脚本用；回调走 outbox 异步履约）。"""
+
+    from app.services.payment_outbox import process_payment_outbox_event  # noqa: WPS433
+
+    event_id = await record_payment_succeeded(
+        session=session, order_id=order_id, payment_id=payment_id, provider_payload=provider_payload
+    )
+    if event_id is not None:
+        await process_payment_outbox_event(session=session, event_id=event_id)
+        # 大单权益事件同样内联处理（已被即时任务取走时为 skipped）
+        follow_up = (
+            await session.scalars(
+                select(PaymentOutboxEvent.id).where(
+                    PaymentOutboxEvent.order_id == order_id,
+                    PaymentOutboxEvent.event_type == ENTITLEMENTS_GENERATION_EVENT,
+                    PaymentOutboxEvent.status == PaymentOutboxStatus.PENDING.value,
+                )
+            )
+        ).first()
+        await session.rollback()
+        if follow_up is not None:
+            await process_payment_outbox_event(session=session, event_id=follow_up)
 
-    return resolve_fulfillment_flow(order_type=OrderType(o.order_type))
+    order_type = (await session.scalars(select(Order.order_type).where(Order.id == order_id).limit(1))).first()
+    return resolve_fulfillment_flow(order_type=OrderType(order_type))
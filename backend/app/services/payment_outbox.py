@@ -0,0 +1,285 @@
+"""支付成功 outbox 消费（异步履约 / 重试 / 死信 / 回放）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 属性 3：履约流程启动正确性（支付成功后按订单类型路由）
+- specs/health-services-platform/tasks.md -> 阶段4-25.3（支付回调处理与状态更新）
+
+说明：
+- 回调提交事件后投递 Celery 任务（app/tasks/payments.py）立即处理；投递失败或处理失败的事件由每分钟的
+  排空任务按 next_attempt_at 重试（指数退避），两条路径对同一事件以 SKIP LOCKED 行锁互斥；
+  排空取到期事件时同样跳过正被处理（已加锁）的行，避免同一批被反复取到。
+- 履约与“事件置 DONE”在同一事务提交：要么都生效，要么都回滚后重试；履约步骤本身幂等，回放安全。
+- 权益大单：PAYMENT_SUCCEEDED 履约时同事务写入 ENTITLEMENTS_GENERATION 事件，提交后投递即时处理，
+  批量生成在独立事务中完成；该事件与支付事件共用排空/退避/死信/回放，生成失败不会丢失。
+- 重试耗尽或业务校验失败（HTTPException，重试无意义）：事件置 DEAD 并写死信，
+  修复后用 scripts/replay_payment_outbox.py 回放。
+- 指标：lhmy_payment_outbox_events_total{outcome}、lhmy_payment_fulfillment_lag_seconds（支付成功 -> 履约完成，大单以权益生成完成计）、
+  lhmy_payment_outbox_oldest_pending_seconds（最早待处理事件的滞后）。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi import HTTPException
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import func, select
+
+from app.models.enums import PaymentOutboxStatus
+from app.models.payment_outbox import ENTITLEMENTS_GENERATION_EVENT, PaymentOutboxDeadLetter, PaymentOutboxEvent
+from app.services.payment_callbacks import fulfill_paid_order, generate_deferred_entitlements
+from app.utils.datetime_utc import utcnow
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_OUTBOX_EVENTS = Counter(
+    "lhmy_payment_outbox_events_total", "Payment outbox event processing outcomes", ["outcome"]
+)
+PAYMENT_FULFILLMENT_LAG = Histogram(
+    "lhmy_payment_fulfillment_lag_seconds",
+    "Delay from payment success to fulfillment (entitlements available) commit",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+PAYMENT_OUTBOX_OLDEST_PENDING = Gauge(
+    "lhmy_payment_outbox_oldest_pending_seconds",
+    "Age (since payment) of the oldest pending payment outbox event",
+    multiprocess_mode="livemax",
+)
+
+_ERROR_MAX_CHARS = 2000
+
+
+@dataclass(frozen=True)
+class OutboxDrainResult:
+    processed: int
+    done: int
+    failed: int
+
+
+def _retry_delay_seconds(attempts: int) -> float:
+    base = max(0.0, float(settings.payment_outbox_retry_base_seconds))
+    cap = max(base, float(settings.payment_outbox_retry_max_seconds))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def enqueue_payment_outbox_event(event_id: str) -> bool:
+    """提交后投递即时处理任务；失败只记日志（排空任务兜底）。
+
+    同步调用（async 代码中请放到线程执行）；不重试 broker 连接，broker 不可用时尽快返回。
+    """
+
+    try:
+        from app.tasks.payments import process_payment_event  # noqa: WPS433
+
+        process_payment_event.apply_async((event_id,), retry=False)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("payment outbox enqueue failed, left to drain: event_id=%s err=%s", event_id, repr(exc))
+        return False
+    return True
+
+
+async def _record_failure(*, session, event_id: str, error: str, retryable: bool) -> str:
+    ev = (
+        await session.scalars(
+            select(PaymentOutboxEvent).where(PaymentOutboxEvent.id == event_id).limit(1).with_for_update()
+        )
+    ).first()
+    if ev is None or ev.status != PaymentOutboxStatus.PENDING.value:
+        await session.rollback()
+        return "skipped"
+
+    now = utcnow()
+    ev.attempts = int(ev.attempts or 0) + 1
+    ev.last_error = error[:_ERROR_MAX_CHARS]
+    if retryable and ev.attempts < int(settings.payment_outbox_max_attempts):
+        ev.next_attempt_at = now + timedelta(seconds=_retry_delay_seconds(ev.attempts))
+        await session.commit()
+        return "retry"
+
+    ev.status = PaymentOutboxStatus.DEAD.value
+    session.add(
+        PaymentOutboxDeadLetter(
+            id=str(uuid4()),
+            event_id=ev.id,
+            event_type=ev.event_type,
+            order_id=ev.order_id,
+            payment_id=ev.payment_id,
+            attempts=ev.attempts,
+            error=ev.last_error,
+            created_at=now,
+            replayed_at=None,
+        )
+    )
+    await session.commit()
+    logger.error(
+        "payment outbox event dead-lettered: event_id=%s order_id=%s attempts=%s error=%s",
+        ev.id,
+        ev.order_id,
+        ev.attempts,
+        ev.last_error,
+    )
+    return "dead_lettered"
+
+
+async def _add_entitlement_generation_event(*, session, ev: PaymentOutboxEvent, now: datetime) -> str | None:
+    """为大单写入权益生成事件（与支付事件同事务）；已存在则不重复写入，返回新事件 ID。"""
+
+    existing = (
+        await session.scalars(
+            select(PaymentOutboxEvent.id)
+            .where(
+                PaymentOutboxEvent.order_id == ev.order_id,
+                PaymentOutboxEvent.event_type == ENTITLEMENTS_GENERATION_EVENT,
+            )
+            .limit(1)
+        )
+    ).first()
+    if existing is not None:
+        return None
+
+    event_id = str(uuid4())
+    session.add(
+        PaymentOutboxEvent(
+            id=event_id,
+            event_type=ENTITLEMENTS_GENERATION_EVENT,
+            order_id=ev.order_id,
+            payment_id=ev.payment_id,
+            status=PaymentOutboxStatus.PENDING.value,
+            attempts=0,
+            next_attempt_at=now,
+            paid_at=ev.paid_at,
+        )
+    )
+    return event_id
+
+
+async def process_payment_outbox_event(*, session, event_id: str) -> str:
+    """处理一条事件；返回 done / retry / dead_lettered / skipped（已完成或正被其它消费者处理）。"""
+
+    ev = (
+        await session.scalars(
+            select(PaymentOutboxEvent)
+            .where(PaymentOutboxEvent.id == event_id, PaymentOutboxEvent.status == PaymentOutboxStatus.PENDING.value)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+    ).first()
+    if ev is None:
+        await session.rollback()
+        PAYMENT_OUTBOX_EVENTS.labels(outcome="skipped").inc()
+        return "skipped"
+
+    follow_up_id: str | None = None
+    try:
+        now = utcnow()
+        if ev.event_type == ENTITLEMENTS_GENERATION_EVENT:
+            await generate_deferred_entitlements(session=session, order_id=ev.order_id)
+        elif await fulfill_paid_order(session=session, order_id=ev.order_id):
+            follow_up_id = await _add_entitlement_generation_event(session=session, ev=ev, now=now)
+        ev.status = PaymentOutboxStatus.DONE.value
+        ev.attempts = int(ev.attempts or 0) + 1
+        ev.processed_at = now
+        ev.last_error = None
+        paid_at = ev.paid_at
+        await session.commit()
+    except Exception as exc:  # noqa: BLE001
+        await session.rollback()
+        retryable = not isinstance(exc, HTTPException)
+        error = repr(exc.detail) if isinstance(exc, HTTPException) else repr(exc)
+        outcome = await _record_failure(session=session, event_id=event_id, error=error, retryable=retryable)
+        if outcome == "retry":
+            logger.warning("payment outbox event failed, will retry: event_id=%s err=%s", event_id, error)
+        PAYMENT_OUTBOX_EVENTS.labels(outcome=outcome).inc()
+        return outcome
+
+    PAYMENT_OUTBOX_EVENTS.labels(outcome="done").inc()
+    if follow_up_id is None:
+        PAYMENT_FULFILLMENT_LAG.observe(max(0.0, (now - paid_at).total_seconds()))
+    else:
+        enqueue_payment_outbox_event(follow_up_id)
+    return "done"
+
+
+async def due_payment_outbox_event_ids(*, session, now: datetime, limit: int) -> list[str]:
+    """到期待处理事件 ID；正被即时任务处理（行已加锁）的事件不返回。"""
+
+    rows = await session.scalars(
+        select(PaymentOutboxEvent.id)
+        .where(
+            PaymentOutboxEvent.status == PaymentOutboxStatus.PENDING.value,
+            PaymentOutboxEvent.next_attempt_at <= now,
+        )
+        .order_by(PaymentOutboxEvent.next_attempt_at)
+        .limit(int(limit))
+        .with_for_update(skip_locked=True)
+    )
+    return [str(x) for x in rows.all()]
+
+
+async def oldest_pending_paid_at(*, session) -> datetime | None:
+    return (
+        await session.execute(
+            select(func.min(PaymentOutboxEvent.paid_at)).where(
+                PaymentOutboxEvent.status == PaymentOutboxStatus.PENDING.value
+            )
+        )
+    ).scalar()
+
+
+async def drain_payment_outbox_batch(*, session, now: datetime, limit: int) -> OutboxDrainResult:
+    """处理一批到期事件（逐条事务；调用方无需 commit）。"""
+
+    event_ids = await due_payment_outbox_event_ids(session=session, now=now, limit=limit)
+    await session.rollback()
+    done = failed = 0
+    for event_id in event_ids:
+        outcome = await process_payment_outbox_event(session=session, event_id=event_id)
+        if outcome == "done":
+            done += 1
+        elif outcome != "skipped":
+            failed += 1
+    return OutboxDrainResult(processed=len(event_ids), done=done, failed=failed)
+
+
+async def replay_dead_letters(
+    *,
+    session,
+    event_ids: list[str] | None = None,
+    order_ids: list[str] | None = None,
+    limit: int = 100,
+) -> list[str]:
+    """把未回放的死信对应事件重置为 PENDING（立即可执行）；返回事件 ID（调用方负责 commit 与投递）。"""
+
+    stmt = select(PaymentOutboxDeadLetter).where(PaymentOutboxDeadLetter.replayed_at.is_(None))
+    if event_ids:
+        stmt = stmt.where(PaymentOutboxDeadLetter.event_id.in_(event_ids))
+    if order_ids:
+        stmt = stmt.where(PaymentOutboxDeadLetter.order_id.in_(order_ids))
+    letters = list(
+        (
+            await session.scalars(stmt.order_by(PaymentOutboxDeadLetter.created_at).limit(int(limit)).with_for_update())
+        ).all()
+    )
+    if not letters:
+        return []
+
+    now = utcnow()
+    wanted = {x.event_id for x in letters}
+    events = (
+        await session.scalars(select(PaymentOutboxEvent).where(PaymentOutboxEvent.id.in_(wanted)).with_for_update())
+    ).all()
+    replayed: list[str] = []
+    for ev in events:
+        if ev.status != PaymentOutboxStatus.DEAD.value:
+            continue
+        ev.status = PaymentOutboxStatus.PENDING.value
+        ev.attempts = 0
+        ev.next_attempt_at = now
+        replayed.append(ev.id)
+    for letter in letters:
+        letter.replayed_at = now
+    return replayed
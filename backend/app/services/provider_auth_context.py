@@ -6,6 +6,7 @@
 
 说明（v1）：
 - token payload 仅用于定位 actorId/actorType；providerId 通过 DB 查询得到（与 design.md 一致）。
+- token 解析复用 rbac.parse_actor_from_bearer_token（单次验签 + jti 缓存），不再单独解码/查黑名单。
 """
 
 from __future__ import annotations
@@ -17,9 +18,10 @@ from sqlalchemy import select
 
 from app.models.provider_staff import ProviderStaff
 from app.models.provider_user import ProviderUser
+from app.services.actor_cache import cached_provider_context, remember_provider_context
+from app.services.rbac import ActorContext, ActorType, parse_actor_from_bearer_token
 from app.utils.auth_header import extract_bearer_token as _extract_bearer_token
 from app.utils.db import get_session_factory
-from app.utils.jwt_provider_token import decode_and_validate_provider_token, token_blacklist_key
 from app.utils.redis_client import get_redis
 
 
@@ -30,33 +32,49 @@ class ProviderContext:
     providerId: str
 
 
-async def require_provider_context(*, authorization: str | None) -> ProviderContext:
-    token = _extract_bearer_token(authorization)
-    payload = decode_and_validate_provider_token(token=token)
-    redis = get_redis()
-    if await redis.exists(token_blacklist_key(jti=str(payload["jti"]))):
-        raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-    actor_type = str(payload["actorType"])
-    actor_id = str(payload["sub"])
+_PROVIDER_ACTOR_TYPES = {ActorType.PROVIDER, ActorType.PROVIDER_STAFF}
+
+
+async def require_provider_context(*, authorization: str | None, actor: ActorContext | None = None) -> ProviderContext:
+    """解析 Provider 上下文。
+
+    - actor：RbacContextMiddleware 已解析（验签 + 黑名单）的上下文，传入时不再重复解码。
+    - providerId/账号状态按 jti 缓存（app.services.actor_cache），账号冻结时由 ORM 钩子失效。
+    """
+
+    if actor is None or actor.actor_type not in _PROVIDER_ACTOR_TYPES or not actor.jti:
+        token = _extract_bearer_token(authorization)
+        actor = await parse_actor_from_bearer_token(token=token, redis=get_redis())
+        if actor.actor_type not in _PROVIDER_ACTOR_TYPES or not actor.jti:
+            raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "Token 无效"})
+
+    hit = cached_provider_context(jti=actor.jti, sub=actor.sub)
+    if hit is not None:
+        return hit
 
     session_factory = get_session_factory()
     async with session_factory() as session:
-        if actor_type == "PROVIDER":
-            user = (await session.scalars(select(ProviderUser).where(ProviderUser.id == actor_id).limit(1))).first()
+        if actor.actor_type == ActorType.PROVIDER:
+            user = (await session.scalars(select(ProviderUser).where(ProviderUser.id == actor.sub).limit(1))).first()
             if user is None or user.status != "ACTIVE":
                 raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-            return ProviderContext(actorType="PROVIDER", actorId=user.id, providerId=user.provider_id)
+            ctx = ProviderContext(actorType="PROVIDER", actorId=user.id, providerId=user.provider_id)
+        else:
+            staff = (await session.scalars(select(ProviderStaff).where(ProviderStaff.id == actor.sub).limit(1))).first()
+            if staff is None or staff.status != "ACTIVE":
+                raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
+            ctx = ProviderContext(actorType="PROVIDER_STAFF", actorId=staff.id, providerId=staff.provider_id)
 
-        staff = (await session.scalars(select(ProviderStaff).where(ProviderStaff.id == actor_id).limit(1))).first()
-        if staff is None or staff.status != "ACTIVE":
-            raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-        return ProviderContext(actorType="PROVIDER_STAFF", actorId=staff.id, providerId=staff.provider_id)
+    remember_provider_context(jti=actor.jti, sub=actor.sub, actor=actor, provider=ctx, token_exp=None)
+    return ctx
 
 
-async def try_get_provider_context(*, authorization: str | None) -> ProviderContext | None:
+async def try_get_provider_context(
+    *, authorization: str | None, actor: ActorContext | None = None
+) -> ProviderContext | None:
     if not authorization:
         return None
     try:
-        return await require_provider_context(authorization=authorization)
+        return await require_provider_context(authorization=authorization, actor=actor)
     except HTTPException:
         return None
@@ -0,0 +1,119 @@
+"""限流与失败锁定（Redis Lua，单次往返）。
+
+说明：
+- `hit_sliding_window`：滑动窗口计数器。当前窗口计数 + 上一窗口计数按“剩余重叠比例”加权，
+  近似真实滑动窗口（无固定窗口在边界处可放行 2 倍请求的问题），每个 key 仅一个 hash（最多 3 个字段）。
+  时间取 Redis 服务端 TIME：多实例之间没有时钟偏差；被拒绝的请求不计数。
+- `enforce_rate_limit`：超限抛 429 RATE_LIMITED，details 带 retryAfterSeconds。
+- `record_failure`：失败计数 + 达阈值锁定（登录失败等）；原先 INCR/EXPIRE/SET/DEL 分多次往返且非原子
+  （INCR 成功而 EXPIRE 未执行时计数永不过期），现合并为一个脚本。
+- Redis 异常原样抛出（与改造前一致，不做 fail-open）。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+from app.utils.redis_client import get_redis
+from app.utils.redis_scripts import LuaScript
+
+# KEYS[1]=计数 hash；ARGV=limit, window_ms, cost
+# 返回 {allowed(0/1), remaining, retry_after_ms}
+_SLIDING_WINDOW = LuaScript("""
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local idx = math.floor(now / window)
+local cur = tonumber(redis.call('HGET', KEYS[1], tostring(idx)) or '0')
+local prev = tonumber(redis.call('HGET', KEYS[1], tostring(idx - 1)) or '0')
+local elapsed = now - idx * window
+local used = prev * (window - elapsed) / window + cur
+if used + cost > limit then
+  local retry = window - elapsed
+  if cur + cost <= limit and prev > 0 then
+    -- 本窗口内随上一窗口权重衰减即可放行：prev * (window - e) / window <= limit - cost - cur
+    retry = math.ceil(window * (1 - (limit - cost - cur) / prev) - elapsed)
+  end
+  return {0, math.max(0, math.floor(limit - used)), math.max(1, retry)}
+end
+redis.call('HINCRBY', KEYS[1], tostring(idx), cost)
+redis.call('HDEL', KEYS[1], tostring(idx - 2))
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {1, math.max(0, math.floor(limit - used - cost)), 0}
+""")
+
+# KEYS[1]=失败计数，KEYS[2]=锁定标记；ARGV=max_failures, window_seconds, lock_seconds, reset_on_lock(0/1)
+_RECORD_FAILURE = LuaScript("""
+local n = redis.call('INCR', KEYS[1])
+if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+if n >= tonumber(ARGV[1]) then
+  redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+  if ARGV[4] == '1' then redis.call('DEL', KEYS[1]) end
+end
+return n
+""")
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    retry_after_ms: int
+
+    @property
+    def retry_after_seconds(self) -> int:
+        return max(1, math.ceil(self.retry_after_ms / 1000)) if not self.allowed else 0
+
+
+async def hit_sliding_window(
+    *, key: str, limit: int, window_seconds: float, cost: int = 1, redis=None
+) -> RateLimitDecision:
+    r = redis if redis is not None else get_redis()
+    allowed, remaining, retry_ms = await _SLIDING_WINDOW.run(
+        r,
+        keys=[key],
+        args=[max(1, int(limit)), max(1, int(window_seconds * 1000)), max(1, int(cost))],
+    )
+    return RateLimitDecision(allowed=bool(int(allowed)), remaining=int(remaining), retry_after_ms=int(retry_ms))
+
+
+async def enforce_rate_limit(
+    *, key: str, limit: int, window_seconds: float, message: str = "请求过于频繁", redis=None
+) -> RateLimitDecision:
+    decision = await hit_sliding_window(key=key, limit=limit, window_seconds=window_seconds, redis=redis)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "code": "RATE_LIMITED",
+                "message": message,
+                "details": {"retryAfterSeconds": decision.retry_after_seconds},
+            },
+        )
+    return decision
+
+
+async def record_failure(
+    *,
+    fail_key: str,
+    lock_key: str,
+    max_failures: int,
+    window_seconds: int,
+    lock_seconds: int,
+    reset_on_lock: bool = False,
+    redis=None,
+) -> int:
+    """失败计数 +1（窗口内首次失败设置过期），达到阈值写入锁定标记；返回当前失败次数。"""
+
+    r = redis if redis is not None else get_redis()
+    n = await _RECORD_FAILURE.run(
+        r,
+        keys=[fail_key, lock_key],
+        args=[int(max_failures), int(window_seconds), int(lock_seconds), 1 if reset_on_lock else 0],
+    )
+    return int(n)
@@ -12,10 +12,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import StrEnum
+from typing import Callable
 
-from fastapi import HTTPException
+import jwt
+from fastapi import HTTPException, Request
 from redis.asyncio import Redis
 
+from app.services.actor_cache import cached_actor, remember_actor
 from app.utils.jwt_admin_token import decode_and_validate_admin_token, token_blacklist_key
 from app.utils.jwt_dealer_token import decode_and_validate_dealer_token
 from app.utils.jwt_provider_token import decode_and_validate_provider_token, token_blacklist_key as provider_token_blacklist_key
@@ -35,57 +38,68 @@ class ActorContext:
     actor_type: ActorType
     sub: str
     channel: str | None = None
+    jti: str | None = None
+
+
+def peek_actor_type(token: str) -> str | None:
+    """读取未验签的 actorType claim，仅用于选择密钥（随后必须用对应密钥完整校验）。"""
+
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    v = claims.get("actorType") if isinstance(claims, dict) else None
+    return str(v) if v else None
+
+
+# actorType -> (验签解码, 黑名单 key；dealer v1 无黑名单)
+_TOKEN_RESOLVERS: dict[str, tuple[Callable[..., dict], Callable[..., str] | None]] = {
+    ActorType.ADMIN.value: (decode_and_validate_admin_token, token_blacklist_key),
+    ActorType.PROVIDER.value: (decode_and_validate_provider_token, provider_token_blacklist_key),
+    ActorType.PROVIDER_STAFF.value: (decode_and_validate_provider_token, provider_token_blacklist_key),
+    ActorType.DEALER.value: (decode_and_validate_dealer_token, None),
+    ActorType.USER.value: (decode_and_validate_user_token, user_token_blacklist_key),
+}
 
 
 async def parse_actor_from_bearer_token(*, token: str, redis: Redis) -> ActorContext:
     """根据 token 解析操作者上下文。
 
     约束：
-    - admin token 与 user token secret 分离，因此可先尝试 admin 解码。
-    - v1 仅落地 USER/ADMIN。
+    - 各端 token secret 隔离：先读未验签的 actorType 选定密钥，只做一次验签解码（不再逐个 secret 试错）。
+    - 黑名单校验结果按 jti 短 TTL 缓存（app.services.actor_cache），logout/refresh/账号状态变化时主动失效。
     """
 
-    # 1) 尝试 admin
-    try:
-        payload = decode_and_validate_admin_token(token=token)
-        jti = str(payload["jti"])
-        if await redis.exists(token_blacklist_key(jti=jti)):
-            raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-        return ActorContext(actor_type=ActorType.ADMIN, sub=str(payload["sub"]), channel=None)
-    except HTTPException:
-        # 继续尝试 user
-        pass
-
-    # 2) 尝试 provider
-    try:
-        payload = decode_and_validate_provider_token(token=token)
-        jti = str(payload["jti"])
-        if await redis.exists(provider_token_blacklist_key(jti=jti)):
-            raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-        actor_type = str(payload["actorType"])
-        if actor_type == ActorType.PROVIDER.value:
-            return ActorContext(actor_type=ActorType.PROVIDER, sub=str(payload["sub"]), channel=None)
-        return ActorContext(actor_type=ActorType.PROVIDER_STAFF, sub=str(payload["sub"]), channel=None)
-    except HTTPException:
-        pass
-
-    # 3) 尝试 dealer
-    try:
-        payload = decode_and_validate_dealer_token(token=token)
-        return ActorContext(actor_type=ActorType.DEALER, sub=str(payload["sub"]), channel=None)
-    except HTTPException:
-        pass
-
-    # 4) 尝试 user
-    payload = decode_and_validate_user_token(token=token)
+    resolver = _TOKEN_RESOLVERS.get(peek_actor_type(token) or "")
+    if resolver is None:
+        raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "Token 无效"})
+    decode, blacklist_key = resolver
+    payload = decode(token=token)
     jti = str(payload["jti"])
-    if await redis.exists(user_token_blacklist_key(jti=jti)):
+    sub = str(payload["sub"])
+
+    hit = cached_actor(jti=jti, sub=sub)
+    if hit is not None:
+        return hit
+
+    if blacklist_key is not None and await redis.exists(blacklist_key(jti=jti)):
         raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "未登录"})
-    return ActorContext(
-        actor_type=ActorType.USER,
-        sub=str(payload["sub"]),
+
+    actor = ActorContext(
+        actor_type=ActorType(str(payload["actorType"])),
+        sub=sub,
         channel=str(payload.get("channel")) if payload.get("channel") else None,
+        jti=jti,
     )
+    remember_actor(jti=jti, sub=sub, actor=actor, token_exp=payload.get("exp"))
+    return actor
+
+
+def request_actor(request: Request) -> ActorContext | None:
+    """RbacContextMiddleware 已注入的上下文（未注入/无效 token 时为 None）。"""
+
+    actor = getattr(request.state, "actor", None)
+    return actor if isinstance(actor, ActorContext) else None
 
 
 def require_actor_types(*, actor: ActorContext, allowed: set[ActorType]) -> None:
@@ -11,6 +11,8 @@
   - 创建 Refund 记录
   - 更新 Order.payment_status=REFUNDED
   - 更新该订单下 Entitlement.status=REFUNDED
+  - 冲销经销商分账流水（dealer_commission_ledger -> REVERSED）
+  - 物流商品在履约扣减前退款：释放仍为 RESERVED 的库存预占（已扣减的不回补库存）
 """
 
 from __future__ import annotations
@@ -21,13 +23,22 @@ from uuid import uuid4
 from sqlalchemy import func, select, update
 
 from app.models.entitlement import Entitlement
-from app.models.enums import EntitlementStatus, OrderType, PaymentStatus, RedemptionStatus, RefundStatus
+from app.models.enums import (
+    EntitlementStatus,
+    OrderType,
+    PaymentStatus,
+    ProductFulfillmentType,
+    RedemptionStatus,
+    RefundStatus,
+)
 from app.models.order import Order
 from app.models.redemption_record import RedemptionRecord
 from app.models.refund import Refund
+from app.services.dealer_settlement import reverse_dealer_commission
 from app.services.entitlement_state_machine import assert_entitlement_status_transition
 from app.services.order_state_machine import assert_order_status_transition
 from app.services.refund_rules import RefundRuleResult, can_refund_unredeemed_entitlements
+from app.services.stock_reservation import release_order_stock
 
 
 @dataclass(frozen=True)
@@ -96,6 +107,15 @@ async def execute_full_refund_for_order(*, session, order: Order, reason: str |
     # 订单状态更新：PAID -> REFUNDED
     assert_order_status_transition(current=order.payment_status, target=PaymentStatus.REFUNDED.value)
     await session.execute(update(Order).where(Order.id == order.id).values(payment_status=PaymentStatus.REFUNDED.value))
+    await reverse_dealer_commission(session=session, order_id=order.id)
+
+    if (
+        order.order_type == OrderType.PRODUCT.value
+        and order.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value
+    ):
+        # 上面的 UPDATE 已锁定订单行，与支付履约（订单行 FOR UPDATE 后确认扣减）串行；
+        # 履约已确认扣减则无 RESERVED 流水，这里为空操作
+        await release_order_stock(session=session, order_ids=[order.id])
 
     # 权益状态更新：ACTIVE -> REFUNDED（v1：不细分 USED/EXPIRED 等；由退款规则确保未核销）
     entitlements = (await session.scalars(select(Entitlement).where(Entitlement.order_id == order.id))).all()
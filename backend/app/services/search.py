@@ -0,0 +1,159 @@
+"""关键词检索：MySQL FULLTEXT（ngram 分词）+ 相关度排序 + 高亮片段。
+
+规格来源：
+- specs/health-services-platform/design.md -> `GET /api/v1/products`、`GET /api/v1/venues`、CMS 内容列表（keyword）
+- specs-prod/admin/api-contracts.md -> 审计日志列表（keyword）
+
+说明：
+- 各列表端点带 `keyword` 时统一调用 `keyword_search`，不再各自拼 `LIKE '%kw%'`（无法走索引，恒为全表扫描）。
+- 检索列在 `SearchSpec` 中声明，列集合须与 FULLTEXT 索引完全一致（InnoDB 布尔模式要求；索引见各模型 `ft_*`）。
+- 关键词按空白切词，每个词作为短语必须命中（`+"词"`，BOOLEAN MODE）；ngram 下中文无需分词词典。
+  剥离布尔运算符，避免用户输入改变查询语义。
+- 短于 `search_ngram_token_size` 的词无法命中 ngram 索引，对该词降级为 LIKE（转义通配符）；
+  全部为短词时没有相关度，`score` 为 None，调用方按原排序返回。
+- 索引由 InnoDB 在写入/发布/下线时同步维护，无需额外的重建任务。
+- `highlight`：返回 HTML 转义后的片段，命中处包 `<em>`；长文本按首个命中截取窗口。
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.audit_log import AuditLog
+from app.models.cms_content import CmsContent
+from app.models.product import Product
+from app.models.venue import Venue
+from app.utils.settings import settings
+
+MAX_TERMS = 8
+MAX_TERM_LENGTH = 64
+
+# BOOLEAN MODE 运算符与短语引号：一律视为分隔符
+_OPERATOR_CHARS = re.compile(r'[+\-<>()~*"@]+')
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """检索列（顺序与 FULLTEXT 索引一致）+ 可高亮字段（DTO 字段名 -> 模型属性名）。"""
+
+    columns: tuple[Any, ...]
+    snippet_fields: tuple[tuple[str, str], ...]
+
+
+CMS_CONTENT_SEARCH = SearchSpec(
+    columns=(CmsContent.title, CmsContent.summary),
+    snippet_fields=(("title", "title"), ("summary", "summary")),
+)
+PRODUCT_SEARCH = SearchSpec(columns=(Product.title,), snippet_fields=(("title", "title"),))
+VENUE_SEARCH = SearchSpec(
+    columns=(Venue.name, Venue.address),
+    snippet_fields=(("name", "name"), ("address", "address")),
+)
+AUDIT_LOG_SEARCH = SearchSpec(columns=(AuditLog.summary,), snippet_fields=(("summary", "summary"),))
+
+
+@dataclass(frozen=True)
+class KeywordSearch:
+    spec: SearchSpec
+    terms: tuple[str, ...]
+    where: ColumnElement[bool]
+    # 相关度（MATCH ... AGAINST）；全部为短词降级 LIKE 时为 None
+    score: ColumnElement[Any] | None
+
+
+def parse_terms(keyword: str | None) -> tuple[str, ...]:
+    """切词：去运算符、去重（大小写不敏感）、限制词数与词长。"""
+
+    s = _OPERATOR_CHARS.sub(" ", str(keyword or ""))
+    terms: list[str] = []
+    seen: set[str] = set()
+    for raw in s.split():
+        t = raw[:MAX_TERM_LENGTH]
+        if t.casefold() in seen:
+            continue
+        seen.add(t.casefold())
+        terms.append(t)
+        if len(terms) >= MAX_TERMS:
+            break
+    return tuple(terms)
+
+
+def boolean_query(terms: tuple[str, ...]) -> str:
+    """每个词作为必须命中的短语：`+"a" +"b"`（terms 已由 parse_terms 去掉引号）。"""
+
+    return " ".join(f'+"{t}"' for t in terms)
+
+
+def keyword_search(spec: SearchSpec, keyword: str | None) -> KeywordSearch | None:
+    """返回检索谓词与相关度表达式；关键词为空（或仅含运算符）时返回 None（表示不过滤）。"""
+
+    terms = parse_terms(keyword)
+    if not terms:
+        return None
+
+    min_len = max(1, int(settings.search_ngram_token_size))
+    ft_terms = tuple(t for t in terms if len(t) >= min_len)
+    short_terms = tuple(t for t in terms if len(t) < min_len)
+
+    conds: list[ColumnElement[bool]] = []
+    score = None
+    if ft_terms:
+        score = match(*spec.columns, against=boolean_query(ft_terms)).in_boolean_mode()
+        # 直接以 MATCH 作谓词（而非 score > 0），优化器才会走 FULLTEXT 索引
+        conds.append(score)
+    for t in short_terms:
+        conds.append(_like_any(spec, t))
+    return KeywordSearch(spec=spec, terms=terms, where=and_(*conds), score=score)
+
+
+def _like_any(spec: SearchSpec, term: str) -> ColumnElement[bool]:
+    return or_(*[c.contains(term, autoescape=True) for c in spec.columns])
+
+
+def highlight(text: str | None, terms: tuple[str, ...], *, width: int = 80) -> str | None:
+    """命中片段：HTML 转义，命中处包 `<em>`；无命中返回 None。
+
+    文本超过 width 时以首个命中为中心截取窗口，首尾被截断处补 `…`。
+    """
+
+    if not text or not terms:
+        return None
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(text)
+    if first is None:
+        return None
+
+    start, end = 0, len(text)
+    if len(text) > width:
+        start = max(0, min(first.start() - width // 4, len(text) - width))
+        end = start + width
+
+    window = text[start:end]
+    parts: list[str] = []
+    pos = 0
+    for m in pattern.finditer(window):
+        parts.append(html.escape(window[pos : m.start()]))
+        parts.append(f"<em>{html.escape(m.group(0))}</em>")
+        pos = m.end()
+    parts.append(html.escape(window[pos:]))
+    return ("…" if start > 0 else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+def highlights(obj: Any, search: KeywordSearch | None) -> dict[str, str] | None:
+    """按 SearchSpec.snippet_fields 生成 `{"title": "...<em>kw</em>..."}`；未检索时返回 None。"""
+
+    if search is None:
+        return None
+    out: dict[str, str] = {}
+    for field, attr in search.spec.snippet_fields:
+        snippet = highlight(getattr(obj, attr, None), search.terms)
+        if snippet is not None:
+            out[field] = snippet
+    return out
@@ -0,0 +1,278 @@
+"""预约时段容量占用引擎（VenueSchedule.remaining_capacity）。
+
+规格来源：
+- specs/health-services-platform/design.md -> `CAPACITY_FULL`（容量不足）
+- specs/health-services-platform/design.md -> 属性 19：预约取消状态恢复（释放容量）
+
+说明：
+- 占用：单条条件更新 `UPDATE ... SET remaining_capacity = remaining_capacity - 1 WHERE id = ? AND remaining_capacity > 0`，
+  以 rowcount 判定成功；不做“先读后写”，并发下不会超卖，行锁只持有到调用方事务提交。
+- venue_schedules 未对 (venue, service, date, slot) 建唯一约束：同一时段存在重复行时，占用/释放/对账都只作用于
+  同一行——优先启用行、其次 id 最小（见 `_slot_targets`），避免 rowcount 不为 1 误判已满、容量被写到不同行。
+- 取消：预约状态以条件 UPDATE 从读取时的状态改为 CANCELLED，命中（rowcount=1）才释放容量；
+  并发取消同一预约只有一个请求回补容量（释放是加法，重复执行会让容量虚增导致超卖）。
+- 释放：按时段聚合后批量执行 `remaining_capacity = min(capacity, remaining_capacity + n)`（与 release_capacity 口径一致）。
+- 对账：以 bookings 中“仍占用容量”的记录数为准，修正漂移的 remaining_capacity（见 app/tasks/booking_capacity.py）。
+- 本模块只执行 SQL，不 commit；事务边界由调用方控制（与 booking 写入同事务提交）。
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import cast
+
+from sqlalchemy import Table, and_, bindparam, case, func, or_, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.booking import Booking
+from app.models.enums import BookingStatus, CommonEnabledStatus
+from app.models.venue_schedule import VenueSchedule
+
+# 占用容量的预约状态：仅 CANCELLED 会释放容量（COMPLETED 视为已消耗）
+CAPACITY_HOLDING_BOOKING_STATUSES = (
+    BookingStatus.PENDING.value,
+    BookingStatus.CONFIRMED.value,
+    BookingStatus.COMPLETED.value,
+)
+
+
+@dataclass(frozen=True)
+class SlotKey:
+    venue_id: str
+    service_type: str
+    booking_date: date
+    time_slot: str
+
+
+@dataclass(frozen=True)
+class SlotDrift:
+    schedule_id: str
+    observed_remaining: int
+    expected_remaining: int
+
+
+def _slot_where(slot: SlotKey):
+    return and_(
+        VenueSchedule.venue_id == slot.venue_id,
+        VenueSchedule.service_type == slot.service_type,
+        VenueSchedule.booking_date == slot.booking_date,
+        VenueSchedule.time_slot == slot.time_slot,
+    )
+
+
+def _slot_targets(where):
+    """每个时段承载容量的排期行（子查询）：优先启用行，其次 id 最小；占用、释放、对账共用这一口径。"""
+
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=(
+                VenueSchedule.venue_id,
+                VenueSchedule.service_type,
+                VenueSchedule.booking_date,
+                VenueSchedule.time_slot,
+            ),
+            order_by=(
+                case((VenueSchedule.status == CommonEnabledStatus.ENABLED.value, 0), else_=1),
+                VenueSchedule.id.asc(),
+            ),
+        )
+        .label("rn")
+    )
+    ranked = select(
+        VenueSchedule.venue_id,
+        VenueSchedule.service_type,
+        VenueSchedule.booking_date,
+        VenueSchedule.time_slot,
+        VenueSchedule.id,
+        rank,
+    ).where(where)
+    ranked_sq = ranked.subquery("ranked_schedules")
+    return select(ranked_sq).where(ranked_sq.c.rn == 1).subquery("slot_targets")
+
+
+async def _target_ids(*, session, slots: list[SlotKey]) -> dict[SlotKey, str]:
+    targets = _slot_targets(or_(*[_slot_where(k) for k in slots]))
+    rows = (
+        await session.execute(
+            select(
+                targets.c.venue_id, targets.c.service_type, targets.c.booking_date, targets.c.time_slot, targets.c.id
+            )
+        )
+    ).all()
+    return {
+        SlotKey(venue_id=str(r[0]), service_type=str(r[1]), booking_date=r[2], time_slot=str(r[3])): str(r[4])
+        for r in rows
+    }
+
+
+async def try_reserve_slot(*, session, slot: SlotKey) -> bool:
+    """原子占用 1 个容量；时段不存在/已停用/已满均返回 False。"""
+
+    schedule_id = (await _target_ids(session=session, slots=[slot])).get(slot)
+    if schedule_id is None:
+        return False
+    res = await session.execute(
+        update(VenueSchedule)
+        .where(
+            VenueSchedule.id == schedule_id,
+            VenueSchedule.status == CommonEnabledStatus.ENABLED.value,
+            VenueSchedule.remaining_capacity > 0,
+        )
+        .values(remaining_capacity=VenueSchedule.remaining_capacity - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return int(res.rowcount or 0) == 1
+
+
+async def release_slots(*, session, slots: list[SlotKey]) -> int:
+    """批量释放容量（取消预约）；同一时段出现多次则一次性回补 n。返回命中的排期行数。
+
+    说明：不校验排期状态（停用的排期也应回补，避免重新启用后容量偏少）。
+    """
+
+    if not slots:
+        return 0
+
+    counts = Counter(slots)
+    targets = await _target_ids(session=session, slots=list(counts))
+    if not targets:
+        return 0
+    t = cast(Table, VenueSchedule.__table__)
+    released = t.c.remaining_capacity + bindparam("b_n")
+    stmt = (
+        update(t)
+        .where(t.c.id == bindparam("b_id"))
+        .values(
+            remaining_capacity=case(
+                (released > t.c.capacity, case((t.c.capacity < 0, 0), else_=t.c.capacity)),
+                else_=released,
+            )
+        )
+    )
+    # 固定顺序加锁，避免批量取消之间互相死锁
+    params = [{"b_id": sid, "b_n": int(counts[k])} for k, sid in sorted(targets.items(), key=lambda kv: kv[1])]
+    res = await session.execute(stmt, params)
+    return int(res.rowcount or 0)
+
+
+async def release_slot(*, session, slot: SlotKey) -> int:
+    return await release_slots(session=session, slots=[slot])
+
+
+async def cancel_booking_releasing_slot(
+    *, session, booking: Booking, cancelled_at: datetime, cancel_reason: str
+) -> bool:
+    """条件取消预约并释放容量：仅当状态仍为读取时的 booking.status 才生效；返回是否由本次取消。"""
+
+    res = await session.execute(
+        update(Booking)
+        .where(Booking.id == booking.id, Booking.status == booking.status)
+        .values(status=BookingStatus.CANCELLED.value, cancelled_at=cancelled_at, cancel_reason=cancel_reason)
+        .execution_options(synchronize_session=False)
+    )
+    if int(res.rowcount or 0) != 1:
+        return False
+    await release_slot(
+        session=session,
+        slot=SlotKey(
+            venue_id=booking.venue_id,
+            service_type=booking.service_type,
+            booking_date=booking.booking_date,
+            time_slot=booking.time_slot,
+        ),
+    )
+    # 已由上面的 UPDATE 写入：同步内存对象，不再产生第二次 UPDATE
+    set_committed_value(booking, "status", BookingStatus.CANCELLED.value)
+    set_committed_value(booking, "cancelled_at", cancelled_at)
+    set_committed_value(booking, "cancel_reason", cancel_reason)
+    return True
+
+
+async def resize_slot_capacity(*, session, schedule_id: str, capacity: int) -> None:
+    """调整总容量并保持“已占用量”不变：remaining = max(0, new_capacity - (capacity - remaining))。
+
+    以单条 UPDATE 计算，避免与并发占用/释放交错时基于旧快照回写。
+    """
+
+    new_cap = int(capacity)
+    booked = VenueSchedule.capacity - VenueSchedule.remaining_capacity
+    booked_nonneg = case((booked < 0, 0), else_=booked)
+    new_remaining = new_cap - booked_nonneg
+    await session.execute(
+        update(VenueSchedule)
+        .where(VenueSchedule.id == schedule_id)
+        .values(
+            remaining_capacity=case((new_remaining < 0, 0), else_=new_remaining),
+            capacity=new_cap,
+            status=CommonEnabledStatus.ENABLED.value,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def find_capacity_drift(*, session, date_from: date, limit: int = 500) -> list[SlotDrift]:
+    """找出 remaining_capacity 与 bookings 实际占用不一致的排期（booking_date >= date_from）。"""
+
+    held = (
+        select(
+            Booking.venue_id.label("venue_id"),
+            Booking.service_type.label("service_type"),
+            Booking.booking_date.label("booking_date"),
+            Booking.time_slot.label("time_slot"),
+            func.count().label("held"),
+        )
+        .where(
+            Booking.booking_date >= date_from,
+            Booking.status.in_(CAPACITY_HOLDING_BOOKING_STATUSES),
+        )
+        .group_by(Booking.venue_id, Booking.service_type, Booking.booking_date, Booking.time_slot)
+        .subquery()
+    )
+    # 重复排期行只对账承载容量的那一行（与占用/释放同口径），其余行不写入
+    targets = _slot_targets(VenueSchedule.booking_date >= date_from)
+    held_count = func.coalesce(held.c.held, 0)
+    expected = VenueSchedule.capacity - held_count
+    expected_nonneg = case((expected < 0, 0), else_=expected)
+    rows = (
+        await session.execute(
+            select(VenueSchedule.id, VenueSchedule.remaining_capacity, expected_nonneg)
+            .join(targets, targets.c.id == VenueSchedule.id)
+            .outerjoin(
+                held,
+                and_(
+                    held.c.venue_id == VenueSchedule.venue_id,
+                    held.c.service_type == VenueSchedule.service_type,
+                    held.c.booking_date == VenueSchedule.booking_date,
+                    held.c.time_slot == VenueSchedule.time_slot,
+                ),
+            )
+            .where(VenueSchedule.booking_date >= date_from, VenueSchedule.remaining_capacity != expected_nonneg)
+            .order_by(VenueSchedule.booking_date.asc(), VenueSchedule.id.asc())
+            .limit(int(limit))
+        )
+    ).all()
+    return [SlotDrift(schedule_id=str(r[0]), observed_remaining=int(r[1]), expected_remaining=int(r[2])) for r in rows]
+
+
+async def apply_capacity_drift(*, session, drifts: list[SlotDrift]) -> int:
+    """按观测值做条件修正（remaining 未被并发改动才写入），返回修正行数。"""
+
+    if not drifts:
+        return 0
+    t = cast(Table, VenueSchedule.__table__)
+    stmt = (
+        update(t)
+        .where(t.c.id == bindparam("b_id"), t.c.remaining_capacity == bindparam("b_observed"))
+        .values(remaining_capacity=bindparam("b_expected"))
+    )
+    res = await session.execute(
+        stmt,
+        [
+            {"b_id": d.schedule_id, "b_observed": d.observed_remaining, "b_expected": d.expected_remaining}
+            for d in drifts
+        ],
+    )
+    return int(res.rowcount or 0)
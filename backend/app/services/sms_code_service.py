@@ -9,6 +9,7 @@
 说明：
 - v1 不接入真实短信供应商；仅生成并存储验证码，同时输出日志便于联调/验收。
 - Redis 是裁决来源：验证码、发送频控、每日次数、失败锁定均由 Redis key 决定。
+- 发送与校验各为一个 Lua 脚本（单次往返、原子执行），见 app/utils/redis_scripts.py。
 """
 
 from __future__ import annotations
@@ -22,8 +23,50 @@ from datetime import UTC, datetime, timedelta
 from fastapi import HTTPException
 from redis.asyncio import Redis
 
+from app.utils.redis_scripts import LuaScript
+
 logger = logging.getLogger(__name__)
 
+# 脚本返回码
+_OK = 0
+_LOCKED = 1
+_EXPIRED = 2
+_INVALID = 3
+_COOLDOWN = 4
+_DAILY_LIMITED = 5
+
+# KEYS=lock, cooldown, daily, code；ARGV=code, code_ttl, cooldown_seconds, daily_limit, daily_ttl
+# 每日计数在冷却检查之后递增（超限请求同样计数，与逐条命令实现一致）
+_REQUEST_CODE = LuaScript(
+    """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 1 end
+if redis.call('EXISTS', KEYS[2]) == 1 then return 4 end
+local n = redis.call('INCR', KEYS[3])
+if n == 1 then redis.call('EXPIRE', KEYS[3], ARGV[5]) end
+if n > tonumber(ARGV[4]) then return 5 end
+redis.call('SET', KEYS[4], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+return 0
+"""
+)
+
+# KEYS=lock, code, fail；ARGV=submitted_code, max_fails, fail_window_and_lock_seconds
+_VERIFY_CODE = LuaScript(
+    """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 1 end
+local stored = redis.call('GET', KEYS[2])
+if not stored then return 2 end
+if stored ~= ARGV[1] then
+  local n = redis.call('INCR', KEYS[3])
+  if n == 1 then redis.call('EXPIRE', KEYS[3], ARGV[3]) end
+  if n >= tonumber(ARGV[2]) then redis.call('SET', KEYS[1], '1', 'EX', ARGV[3]) end
+  return 3
+end
+redis.call('DEL', KEYS[2], KEYS[3])
+return 0
+"""
+)
+
 
 _CN_PHONE_RE = re.compile(r"^1\d{10}$")
 
@@ -103,31 +146,28 @@ class SmsCodeService:
 
         _validate_phone(phone)
 
-        # 锁定期间直接当作限流处理（v1 最小可执行口径）
-        if await self._redis.exists(self._lock_key(scene, phone)):
-            raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "请求过于频繁"})
-
-        # 同手机号 60s 间隔
-        cooldown_key = self._cooldown_key(scene, phone)
-        if await self._redis.exists(cooldown_key):
-            raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "请求过于频繁"})
-
-        # 每日 20 次上限（UTC 自然日）
-        daily_key = self._daily_key(scene, phone)
-        daily_count = await self._redis.incr(daily_key)
-        if daily_count == 1:
-            await self._redis.expire(daily_key, self._seconds_until_next_utc_day())
-        if daily_count > self._DAILY_LIMIT:
-            raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "请求过于频繁"})
-
-        # 生成 6 位数字码
+        # 生成 6 位数字码（被限流时脚本不会写入，直接丢弃）
         sms_code = f"{random.randint(0, 999999):06d}"
 
-        # 存储验证码（5 分钟）
-        await self._redis.set(self._code_key(scene, phone), sms_code, ex=self._CODE_TTL_SECONDS)
-
-        # 设置冷却（60 秒）
-        await self._redis.set(cooldown_key, "1", ex=self._RESEND_COOLDOWN_SECONDS)
+        # 锁定 -> 60s 间隔 -> 每日 20 次上限（UTC 自然日）-> 写验证码与冷却，一次往返原子完成
+        rc = await _REQUEST_CODE.run(
+            self._redis,
+            keys=[
+                self._lock_key(scene, phone),
+                self._cooldown_key(scene, phone),
+                self._daily_key(scene, phone),
+                self._code_key(scene, phone),
+            ],
+            args=[
+                sms_code,
+                self._CODE_TTL_SECONDS,
+                self._RESEND_COOLDOWN_SECONDS,
+                self._DAILY_LIMIT,
+                self._seconds_until_next_utc_day(),
+            ],
+        )
+        if int(rc) != _OK:
+            raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "请求过于频繁"})
 
         # v1：不对接供应商，仅日志输出，便于联调
         logger.info("已生成短信验证码（v1 mock，不实际发送）：scene=%s phone=%s code=%s", scene, phone, sms_code)
@@ -149,25 +189,18 @@ class SmsCodeService:
 
         _validate_phone(phone)
 
-        if await self._redis.exists(self._lock_key(scene, phone)):
+        # 锁定检查 -> 比对 -> 成功删码清失败计数 / 失败计数（30 分钟窗口，达阈值锁定），一次往返原子完成；
+        # 原子性同时保证同一验证码并发校验时只有一个请求成功。
+        rc = int(
+            await _VERIFY_CODE.run(
+                self._redis,
+                keys=[self._lock_key(scene, phone), self._code_key(scene, phone), self._fail_key(scene, phone)],
+                args=[str(sms_code), self._MAX_VERIFY_FAILS, self._FAIL_LOCK_SECONDS],
+            )
+        )
+        if rc == _LOCKED:
             raise HTTPException(status_code=429, detail={"code": "RATE_LIMITED", "message": "请求过于频繁"})
-
-        code_key = self._code_key(scene, phone)
-        stored = await self._redis.get(code_key)
-        if stored is None:
+        if rc == _EXPIRED:
             raise HTTPException(status_code=400, detail={"code": "SMS_CODE_EXPIRED", "message": "验证码已过期"})
-
-        stored_code = stored.decode("utf-8") if isinstance(stored, (bytes, bytearray)) else str(stored)
-        if stored_code != sms_code:
-            fail_key = self._fail_key(scene, phone)
-            fail_count = await self._redis.incr(fail_key)
-            # 失败次数窗口：30 分钟（达到阈值后锁定；最小可执行口径）
-            if fail_count == 1:
-                await self._redis.expire(fail_key, self._FAIL_LOCK_SECONDS)
-            if fail_count >= self._MAX_VERIFY_FAILS:
-                await self._redis.set(self._lock_key(scene, phone), "1", ex=self._FAIL_LOCK_SECONDS)
+        if rc == _INVALID:
             raise HTTPException(status_code=400, detail={"code": "SMS_CODE_INVALID", "message": "验证码错误"})
-
-        # 校验成功：删除验证码并清理失败计数
-        await self._redis.delete(code_key)
-        await self._redis.delete(self._fail_key(scene, phone))
@@ -0,0 +1,141 @@
+"""物流商品库存预占：下单预占 / 支付确认 / 超时释放。
+
+规格来源：
+- specs/health-services-platform/tasks.md -> REQ-ECOMMERCE-P0-001（下单占用库存 -> 支付扣减 / 超时释放）
+
+说明：
+- 预占：每个商品一条条件 UPDATE（`stock - reserved_stock >= qty` 才加占用），由数据库原子判定，
+  不做“先读后写”；任一商品不足即抛 409 OUT_OF_STOCK，调用方不提交 => 整单回滚（all-or-nothing）。
+- 所有路径都按商品 id 升序更新 products，锁顺序固定，避免多商品购物车互相死锁；
+  预占放在下单事务末尾执行，热点商品行锁只持有到提交为止。
+- 每单每商品一行流水（order_stock_reservations）：确认/释放只处理 RESERVED 行并推进状态，
+  重复回调、重复释放不会二次扣减。调用方须已锁定订单行（支付回调 FOR UPDATE / sweeper SKIP LOCKED /
+  退款 UPDATE）。
+- 已支付未履约即全额退款：预占仍为 RESERVED，退款同事务释放（见 app/services/refund_service.py）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import cast
+
+from fastapi import HTTPException
+from sqlalchemy import Table, bindparam, case, insert, select, update
+
+from app.models.enums import StockReservationStatus
+from app.models.order_stock_reservation import OrderStockReservation
+from app.models.product import Product
+from app.utils.datetime_utc import utcnow
+
+
+@dataclass(frozen=True)
+class StockReleaseResult:
+    products: int
+    quantity: int
+
+
+def _merge_quantities(quantities: dict[str, int]) -> list[tuple[str, int]]:
+    return sorted((str(pid), int(q)) for pid, q in quantities.items() if int(q) > 0)
+
+
+async def reserve_order_stock(*, session, order_id: str, quantities: dict[str, int]) -> None:
+    """为订单预占库存（product_id -> 数量，已按商品合并）；调用方负责 commit/回滚。"""
+
+    lines = _merge_quantities(quantities)
+    if not lines:
+        return
+
+    t = cast(Table, Product.__table__)
+    for pid, qty in lines:
+        res = await session.execute(
+            update(t)
+            .where(t.c.id == pid, t.c.stock - t.c.reserved_stock >= qty)
+            .values(reserved_stock=t.c.reserved_stock + qty)
+        )
+        if int(res.rowcount or 0) != 1:
+            raise HTTPException(status_code=409, detail={"code": "OUT_OF_STOCK", "message": "库存不足"})
+
+    await session.execute(
+        insert(OrderStockReservation),
+        [
+            {
+                "order_id": order_id,
+                "product_id": pid,
+                "quantity": qty,
+                "status": StockReservationStatus.RESERVED.value,
+            }
+            for pid, qty in lines
+        ],
+    )
+
+
+async def _reserved_by_product(*, session, order_ids: list[str]) -> list[tuple[str, int]]:
+    # 加锁读：读到最新已提交状态（并发的确认/释放已推进的流水不会被重复计入）
+    rows = (
+        await session.execute(
+            select(OrderStockReservation.product_id, OrderStockReservation.quantity)
+            .where(
+                OrderStockReservation.order_id.in_(order_ids),
+                OrderStockReservation.status == StockReservationStatus.RESERVED.value,
+            )
+            .with_for_update()
+        )
+    ).all()
+    merged: dict[str, int] = {}
+    for pid, q in rows:
+        merged[str(pid)] = merged.get(str(pid), 0) + int(q or 0)
+    return _merge_quantities(merged)
+
+
+async def _advance_status(*, session, order_ids: list[str], target: StockReservationStatus) -> None:
+    await session.execute(
+        update(OrderStockReservation)
+        .where(
+            OrderStockReservation.order_id.in_(order_ids),
+            OrderStockReservation.status == StockReservationStatus.RESERVED.value,
+        )
+        .values(status=target.value, updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def confirm_order_stock(*, session, order_id: str) -> int:
+    """支付成功：预占转扣减（stock 与 reserved_stock 同减）；返回扣减件数（重复调用为 0）。"""
+
+    lines = await _reserved_by_product(session=session, order_ids=[order_id])
+    if not lines:
+        return 0
+
+    t = cast(Table, Product.__table__)
+    stock_after = t.c.stock - bindparam("b_qty")
+    reserved_after = t.c.reserved_stock - bindparam("b_qty")
+    await session.execute(
+        update(t)
+        .where(t.c.id == bindparam("b_id"))
+        .values(
+            stock=case((stock_after < 0, 0), else_=stock_after),
+            reserved_stock=case((reserved_after < 0, 0), else_=reserved_after),
+        ),
+        [{"b_id": pid, "b_qty": qty} for pid, qty in lines],
+    )
+    await _advance_status(session=session, order_ids=[order_id], target=StockReservationStatus.CONFIRMED)
+    return sum(q for _pid, q in lines)
+
+
+async def release_order_stock(*, session, order_ids: list[str]) -> StockReleaseResult:
+    """释放一批订单的预占（按商品聚合后一次 executemany）；重复调用不会重复释放。"""
+
+    if not order_ids:
+        return StockReleaseResult(products=0, quantity=0)
+    lines = await _reserved_by_product(session=session, order_ids=order_ids)
+    if lines:
+        t = cast(Table, Product.__table__)
+        released = t.c.reserved_stock - bindparam("b_qty")
+        await session.execute(
+            update(t).where(t.c.id == bindparam("b_id"))
+            # 防御：不让 reserved_stock 变负
+            .values(reserved_stock=case((released < 0, 0), else_=released)),
+            [{"b_id": pid, "b_qty": qty} for pid, qty in lines],
+        )
+        await _advance_status(session=session, order_ids=order_ids, target=StockReservationStatus.RELEASED)
+    return StockReleaseResult(products=len(lines), quantity=sum(q for _pid, q in lines))
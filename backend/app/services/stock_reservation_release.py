@@ -0,0 +1,79 @@
+"""物流商品库存预占超时释放（集合式批量）。
+
+规格来源：
+- specs/health-services-platform/tasks.md -> REQ-ECOMMERCE-P0-001（下单占用库存 -> 超时释放）
+
+说明：
+- 每批在一个事务内完成：
+  1) `SELECT ... FOR UPDATE SKIP LOCKED` 认领一批到期的待支付订单（多个 worker 并行时各自拿到不相交的分片）；
+  2) 按商品聚合这批订单仍为 RESERVED 的预占流水（GROUP BY product_id）；
+  3) 对每个商品一次条件 UPDATE `reserved_stock = reserved_stock - agg.qty`（不小于 0，按 id 固定顺序加锁），
+     流水置为 RELEASED（见 services/stock_reservation.py）；
+  4) 订单置为 FAILED 并清空到期时间（仍带 PENDING 条件，避免覆盖并发的支付成功）。
+- 与逐单逐商品 ORM 读改写相比，单批 SQL 往返次数为常数级（不随订单数增长）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from app.models.enums import PaymentStatus, ProductFulfillmentType
+from app.models.order import Order
+from app.services.stock_reservation import release_order_stock
+
+
+@dataclass(frozen=True)
+class ReleaseBatchResult:
+    orders: int
+    products: int
+    quantity: int
+
+
+def _expired_pending_conditions(*, now: datetime) -> list:
+    return [
+        Order.payment_status == PaymentStatus.PENDING.value,
+        Order.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value,
+        Order.reservation_expires_at.is_not(None),
+        Order.reservation_expires_at < now,
+    ]
+
+
+async def release_expired_reservations_batch(*, session, now: datetime, limit: int) -> ReleaseBatchResult:
+    """认领并释放一批到期订单；调用方负责 commit（认领行锁持续到提交）。"""
+
+    order_ids = list(
+        (
+            await session.scalars(
+                select(Order.id)
+                .where(*_expired_pending_conditions(now=now))
+                .order_by(Order.reservation_expires_at.asc(), Order.id.asc())
+                .limit(int(limit))
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+    )
+    if not order_ids:
+        return ReleaseBatchResult(orders=0, products=0, quantity=0)
+
+    released = await release_order_stock(session=session, order_ids=order_ids)
+
+    await session.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.payment_status == PaymentStatus.PENDING.value)
+        .values(payment_status=PaymentStatus.FAILED.value, reservation_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return ReleaseBatchResult(orders=len(order_ids), products=released.products, quantity=released.quantity)
+
+
+async def oldest_expired_reservation_at(*, session, now: datetime) -> datetime | None:
+    """仍未释放的最早到期时间（用于计算积压 lag）。"""
+
+    return (
+        await session.scalars(
+            select(func.min(Order.reservation_expires_at)).where(*_expired_pending_conditions(now=now))
+        )
+    ).first()
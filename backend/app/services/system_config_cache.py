@@ -0,0 +1,302 @@
+"""SystemConfig 读缓存（进程内 LRU + Redis）。
+
+规格来源：
+- specs/health-services-platform/design.md -> SystemConfig key 约定（MINI_PROGRAM_* / H5_* / WEBSITE_* / REGION_CITIES 等）
+
+说明：
+- 读侧（小程序/H5/官网每次页面加载）只读少量 key 的 valueJson，适合读穿缓存：
+  L1 进程内 LRU（短 TTL 兜底）-> L2 Redis（key 级条目，含 version/etag）-> MySQL。
+- 失效：任何 ORM 会话提交了 SystemConfig 的新增/修改/删除，都会在 after_commit 后：
+  1) 立即清理本进程 L1；2) 删除 Redis 条目并通过 pub/sub 广播，其它进程的监听任务据此清理各自 L1。
+  因此 admin 写接口无需逐个显式调用失效；Core 层 bulk 写入（绕过 ORM）需自行调用 `invalidate_system_config`。
+- ETag：由 key + valueJson.version + 内容摘要组成（PUT 草稿不改 version 但会改内容，摘要保证 304 不会返回旧内容）。
+- 回填防旧值：每个 key 维护一个失效代数（generation），失效时在同一脚本内自增代数并删除条目；
+  未命中时先读代数再查 DB，回填用 Lua 比较代数后再写（代数已变则放弃回填，本次结果也不进 L1），
+  避免“查 DB 得到旧值 -> 并发写入并失效 -> 旧值回填”把旧配置缓存到 TTL 结束。
+- Redis 不可用时降级为直连 DB（与 IdempotencyService 等一致：缓存失败不影响主流程）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.enums import CommonEnabledStatus
+from app.models.system_config import SystemConfig
+from app.utils.db import get_session_factory
+from app.utils.invalidation import in_pytest, listen_for_invalidations, register_commit_invalidation
+from app.utils.redis_client import get_redis
+from app.utils.redis_scripts import LuaScript
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "system_config:invalidate"
+
+_REDIS_KEY_PREFIX = "system_config:cache:"
+_REDIS_TTL_SECONDS = 300
+_GENERATION_KEY_PREFIX = "system_config:gen:"
+_GENERATION_TTL_SECONDS = 86400
+_L1_TTL_SECONDS = 30.0
+_L1_MAX_ENTRIES = 256
+
+_SESSION_INFO_KEY = "system_config_cache_dirty_keys"
+
+# KEYS[1]=条目 KEYS[2]=代数；ARGV[1]=读 DB 前的代数 ARGV[2]=条目 JSON ARGV[3]=TTL
+_SET_IF_GENERATION = LuaScript("""
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then return 0 end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+""")
+
+# KEYS 按 (条目, 代数) 成对传入；ARGV[1]=代数 TTL
+_INVALIDATE = LuaScript("""
+for i = 1, #KEYS, 2 do
+  redis.call('INCR', KEYS[i + 1])
+  redis.call('EXPIRE', KEYS[i + 1], ARGV[1])
+  redis.call('DEL', KEYS[i])
+end
+return #KEYS / 2
+""")
+
+
+@dataclass(frozen=True)
+class CachedSystemConfig:
+    key: str
+    exists: bool
+    status: str | None
+    value: dict
+    version: str
+    etag: str
+
+    @property
+    def enabled(self) -> bool:
+        return self.exists and self.status == CommonEnabledStatus.ENABLED.value
+
+
+def _build_entry(*, key: str, status: str | None, value: dict | None, exists: bool) -> CachedSystemConfig:
+    v = value if isinstance(value, dict) else {}
+    version = str(v.get("version") or "0")
+    digest = hashlib.sha1(
+        json.dumps([status, v], sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()[:12]
+    return CachedSystemConfig(
+        key=key,
+        exists=exists,
+        status=status,
+        value=v,
+        version=version,
+        etag=f'W/"{key}:{version}:{digest}"',
+    )
+
+
+class _LruCache:
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, CachedSystemConfig]] = OrderedDict()
+
+    def get(self, key: str) -> CachedSystemConfig | None:
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        expires_at, entry = hit
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def put(self, entry: CachedSystemConfig) -> None:
+        self._data[entry.key] = (time.monotonic() + self._ttl, entry)
+        self._data.move_to_end(entry.key)
+        while len(self._data) > self._max:
+            self._data.popitem(last=False)
+
+    def evict(self, keys: list[str] | None = None) -> None:
+        if keys is None:
+            self._data.clear()
+            return
+        for k in keys:
+            self._data.pop(k, None)
+
+
+_l1 = _LruCache(max_entries=_L1_MAX_ENTRIES, ttl_seconds=_L1_TTL_SECONDS)
+
+
+async def _load_from_db(key: str) -> CachedSystemConfig:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        cfg = (await session.scalars(select(SystemConfig).where(SystemConfig.key == key).limit(1))).first()
+    if cfg is None:
+        return _build_entry(key=key, status=None, value=None, exists=False)
+    return _build_entry(key=key, status=str(cfg.status), value=cfg.value_json or {}, exists=True)
+
+
+async def _redis_get(key: str) -> CachedSystemConfig | None:
+    try:
+        raw = await get_redis().get(_REDIS_KEY_PREFIX + key)
+    except Exception:  # noqa: BLE001
+        return None
+    if not raw:
+        return None
+    try:
+        obj = json.loads(raw)
+        return CachedSystemConfig(
+            key=key,
+            exists=bool(obj["exists"]),
+            status=obj.get("status"),
+            value=obj.get("value") or {},
+            version=str(obj.get("version") or "0"),
+            etag=str(obj["etag"]),
+        )
+    except Exception:  # noqa: BLE001
+        return None
+
+
+async def _redis_generation(key: str) -> str | None:
+    try:
+        raw = await get_redis().get(_GENERATION_KEY_PREFIX + key)
+    except Exception:  # noqa: BLE001
+        return None
+    if raw is None:
+        return "0"
+    return raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+
+
+async def _redis_set(entry: CachedSystemConfig, *, generation: str | None) -> bool:
+    """代数未变才回填；返回 False 表示读 DB 期间该 key 已被失效（entry 可能是旧值）。"""
+
+    if generation is None:
+        return True
+    payload = json.dumps(
+        {
+            "exists": entry.exists,
+            "status": entry.status,
+            "value": entry.value,
+            "version": entry.version,
+            "etag": entry.etag,
+        },
+        ensure_ascii=False,
+        default=str,
+    )
+    try:
+        stored = await _SET_IF_GENERATION.run(
+            get_redis(),
+            keys=[_REDIS_KEY_PREFIX + entry.key, _GENERATION_KEY_PREFIX + entry.key],
+            args=[generation, payload, _REDIS_TTL_SECONDS],
+        )
+    except Exception:  # noqa: BLE001
+        return True
+    return int(stored or 0) == 1
+
+
+async def get_system_config(key: str) -> CachedSystemConfig:
+    """读穿获取配置（不存在也会缓存为 exists=False，避免穿透）。"""
+
+    use_l1 = not in_pytest()
+    if use_l1:
+        hit = _l1.get(key)
+        if hit is not None:
+            return hit
+
+    entry = await _redis_get(key)
+    if entry is None:
+        generation = await _redis_generation(key)
+        entry = await _load_from_db(key)
+        if not await _redis_set(entry, generation=generation):
+            return entry
+
+    if use_l1:
+        _l1.put(entry)
+    return entry
+
+
+async def get_enabled_config_value(key: str) -> dict | None:
+    """等价于 `SELECT ... WHERE key=? AND status=ENABLED`：未启用/不存在返回 None。"""
+
+    entry = await get_system_config(key)
+    if not entry.enabled:
+        return None
+    return entry.value
+
+
+async def invalidate_system_config(keys: list[str]) -> None:
+    """清理本进程 L1 + Redis 条目，并广播给其它进程。"""
+
+    ks = sorted({str(k) for k in keys if k})
+    if not ks:
+        return
+    _l1.evict(ks)
+    try:
+        r = get_redis()
+        await _INVALIDATE.run(
+            r,
+            keys=[rk for k in ks for rk in (_REDIS_KEY_PREFIX + k, _GENERATION_KEY_PREFIX + k)],
+            args=[_GENERATION_TTL_SECONDS],
+        )
+        await r.publish(INVALIDATION_CHANNEL, json.dumps({"keys": ks}))
+    except Exception:  # noqa: BLE001
+        logger.warning("system config invalidation publish failed (L1 TTL will converge): keys=%s", ks)
+
+
+def not_modified_or_tag(*, request: Request, response: Response, entry: CachedSystemConfig) -> Response | None:
+    """条件请求：If-None-Match 命中返回 304；否则在响应上写 ETag，返回 None 交由调用方继续。"""
+
+    inm = request.headers.get("If-None-Match")
+    if inm and any(x.strip() in {entry.etag, "*"} for x in inm.split(",")):
+        return Response(status_code=304, headers={"ETag": entry.etag})
+    response.headers["ETag"] = entry.etag
+    return None
+
+
+async def conditional_enabled_config_value(
+    *, request: Request, response: Response, key: str
+) -> tuple[Response | None, dict | None]:
+    """读侧接口常用组合：返回 (304 响应或 None, 已启用的 valueJson 或 None)。"""
+
+    entry = await get_system_config(key)
+    not_modified = not_modified_or_tag(request=request, response=response, entry=entry)
+    if not_modified is not None:
+        return not_modified, None
+    return None, (entry.value if entry.enabled else None)
+
+
+# -----------------------------
+# ORM 提交钩子：自动失效；跨进程失效监听（FastAPI lifespan 内启动）
+# -----------------------------
+
+
+def _dirty_keys(session: Session) -> set[str]:
+    return {
+        str(obj.key)
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, SystemConfig) and obj.key
+    }
+
+
+def _on_invalidation(payload: dict | None) -> None:
+    keys = (payload or {}).get("keys")
+    _l1.evict([str(k) for k in keys] if isinstance(keys, list) else None)
+
+
+register_commit_invalidation(
+    info_key=_SESSION_INFO_KEY,
+    collect=_dirty_keys,
+    evict_local=_l1.evict,
+    propagate=invalidate_system_config,
+)
+
+
+async def run_invalidation_listener(stop: asyncio.Event) -> None:
+    """订阅失效广播并清理本进程 L1；Redis 断开时退避重连，直到 stop 被置位。"""
+
+    await listen_for_invalidations(channel=INVALIDATION_CHANNEL, handler=_on_invalidation, stop=stop)
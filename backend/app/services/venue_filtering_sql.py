@@ -0,0 +1,107 @@
+"""场所筛选规则的 SQL 编译（与 `venue_filtering_rules` 等价）。
+
+规格来源：
+- specs/health-services-platform/design.md -> `GET /api/v1/venues`（regionLevel/regionCode、entitlementId 过滤）
+- specs/health-services-platform/design.md -> 属性 14：权益使用场所过滤正确性
+
+说明：
+- `venue_filtering_rules` / `entitlement_scope_rules` 中的纯函数仍是口径来源（属性测试 oracle）；
+  本模块把同一口径翻译为 SQL 谓词，使列表端点可在数据库侧完成过滤/分页，而不必全量拉取后在 Python 中过滤。
+- 任一规则调整，必须同步修改本模块，并由 tests/test_property_14_venue_filtering_sql_equivalence.py 兜底。
+- 附近检索（lat/lng/radius）：geohash 前缀（覆盖圆的格子集合，走 (publish_status, geohash) 索引）+ 经纬度框预筛，
+  再用球面距离（haversine，与 `app.utils.geohash.haversine_meters` 同式）精确过滤与排序。
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import and_, false, func, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.enums import EntitlementType
+from app.models.venue import Venue
+from app.services.entitlement_scope_rules import parse_region_scope
+from app.services.venue_filtering_rules import _normalize_region_code
+from app.utils.geohash import EARTH_RADIUS_METERS, bounding_box, covering_cells
+
+
+def region_filter_clause(*, region_level: str | None, region_code: str | None) -> ColumnElement[bool] | None:
+    """等价于 `matches_region_filter`；参数不完整/不合法时返回 None（表示不过滤）。"""
+
+    level, normalized = _normalize_region_code(region_level=region_level, region_code=region_code)
+    if not level or not normalized:
+        return None
+    if level == "COUNTRY":
+        return Venue.country_code == normalized
+    if level == "PROVINCE":
+        return Venue.province_code == normalized
+    if level == "CITY":
+        return Venue.city_code == normalized
+    return None
+
+
+def entitlement_scope_clause(
+    *,
+    entitlement_type: str,
+    applicable_regions: list[str] | None,
+    applicable_venues: list[str] | None,
+) -> ColumnElement[bool]:
+    """等价于 `filter_venues_by_entitlement`（逐场所调用 `is_entitlement_eligible_for_venue`）。"""
+
+    # 健行天下：区域限制；未知类型保守拒绝
+    if entitlement_type != EntitlementType.SERVICE_PACKAGE.value or not applicable_regions:
+        return false()
+
+    scopes: dict[str, set[str]] = {"COUNTRY": set(), "PROVINCE": set(), "CITY": set()}
+    for x in applicable_regions:
+        parsed = parse_region_scope(x) if isinstance(x, str) else None
+        if parsed is None:
+            continue
+        # 与纯函数一致：比较的是完整 scope 文本（如 'CITY:110100'），而非拆分后的 code
+        scopes[parsed.level].add(x)
+
+    region_conds: list[ColumnElement[bool]] = []
+    if scopes["COUNTRY"]:
+        region_conds.append(Venue.country_code.in_(sorted(scopes["COUNTRY"])))
+    if scopes["PROVINCE"]:
+        region_conds.append(Venue.province_code.in_(sorted(scopes["PROVINCE"])))
+    if scopes["CITY"]:
+        region_conds.append(Venue.city_code.in_(sorted(scopes["CITY"])))
+    if not region_conds:
+        return false()
+
+    cond: ColumnElement[bool] = or_(*region_conds)
+
+    # 场所白名单：若配置则必须命中
+    if applicable_venues is not None and len(applicable_venues) > 0:
+        venue_ids = sorted({v for v in applicable_venues if isinstance(v, str)})
+        if not venue_ids:
+            return false()
+        cond = and_(cond, Venue.id.in_(venue_ids))
+    return cond
+
+
+def distance_meters_expr(*, lat: float, lng: float) -> ColumnElement[float]:
+    """场所到 (lat,lng) 的球面距离（米）。"""
+
+    half_dlat = func.radians(Venue.lat - lat) / 2
+    half_dlng = func.radians(Venue.lng - lng) / 2
+    a = func.power(func.sin(half_dlat), 2) + func.cos(func.radians(lat)) * func.cos(
+        func.radians(Venue.lat)
+    ) * func.power(func.sin(half_dlng), 2)
+    return 2 * EARTH_RADIUS_METERS * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+def nearby_clause(*, lat: float, lng: float, radius_meters: float) -> ColumnElement[bool]:
+    """距离 <= radius 的场所（先用 geohash 前缀与经纬度框缩小候选，再做精确距离判断）。"""
+
+    cells = covering_cells(lat=lat, lng=lng, radius_meters=radius_meters)
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat=lat, lng=lng, radius_meters=radius_meters)
+    conds: list[ColumnElement[bool]] = [
+        or_(*[Venue.geohash.like(f"{c}%") for c in cells]),
+        Venue.lat.between(lat_min, lat_max),
+    ]
+    # 跨 ±180 经线时经度框会被拆成两段：直接省略，交给 geohash 前缀与精确距离
+    if lng_min >= -180.0 and lng_max <= 180.0:
+        conds.append(Venue.lng.between(lng_min, lng_max))
+    conds.append(distance_meters_expr(lat=lat, lng=lng) <= radius_meters)
+    return and_(*conds)
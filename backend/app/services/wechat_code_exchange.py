@@ -22,9 +22,9 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
-import httpx
 from fastapi import HTTPException
 
+from app.utils import http_clients
 from app.utils.settings import settings
 
 
@@ -54,12 +54,14 @@ async def exchange_wechat_code(*, code: str) -> WechatCodeExchangeResult:
     # 可选：第三方代换服务（若配置）
     if settings.wechat_code_exchange_service_url.strip():
         try:
-            async with httpx.AsyncClient(timeout=8.0) as client:
-                resp = await client.post(
-                    settings.wechat_code_exchange_service_url.strip(),
-                    json={"code": code},
-                )
-                data = resp.json()
+            resp = await http_clients.request(
+                "POST",
+                settings.wechat_code_exchange_service_url.strip(),
+                upstream="wechat_code_exchange_service",
+                timeout=8.0,
+                json={"code": code},
+            )
+            data = resp.json()
         except Exception as exc:  # noqa: BLE001 - 统一按未认证处理
             raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信登录失败"}) from exc
 
@@ -83,9 +85,8 @@ async def exchange_wechat_code(*, code: str) -> WechatCodeExchangeResult:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(url, params=params)
-            data = resp.json()
+        resp = await http_clients.request("GET", url, upstream="wechat_api", timeout=8.0, params=params)
+        data = resp.json()
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信登录失败"}) from exc
 
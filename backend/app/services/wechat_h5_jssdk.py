@@ -15,9 +15,9 @@ from dataclasses import dataclass
 from datetime import UTC, datetime
 from uuid import uuid4
 
-import httpx
 
 from app.utils.redis_client import get_redis
+from app.utils import http_clients
 from app.utils.settings import settings
 
 
@@ -57,9 +57,8 @@ async def _fetch_access_token() -> tuple[str, int]:
 
     url = f"{_WX_API_BASE}/cgi-bin/token"
     params = {"grant_type": "client_credential", "appid": appid, "secret": secret}
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url, params=params)
-        data = r.json() if r.content else {}
+    r = await http_clients.request("GET", url, upstream="wechat_api", timeout=10.0, params=params)
+    data = r.json() if r.content else {}
 
     token = str(data.get("access_token") or "").strip()
     expires_in = int(data.get("expires_in") or 0)
@@ -86,9 +85,8 @@ async def _fetch_jsapi_ticket() -> tuple[str, int]:
     access_token, _exp = await _fetch_access_token()
     url = f"{_WX_API_BASE}/cgi-bin/ticket/getticket"
     params = {"access_token": access_token, "type": "jsapi"}
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url, params=params)
-        data = r.json() if r.content else {}
+    r = await http_clients.request("GET", url, upstream="wechat_api", timeout=10.0, params=params)
+    data = r.json() if r.content else {}
 
     if int(data.get("errcode") or 0) != 0:
         err = str(data.get("errmsg") or "获取 jsapi_ticket 失败")
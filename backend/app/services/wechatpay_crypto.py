@@ -0,0 +1,276 @@
+"""微信支付密钥材料（平台证书 / 商户私钥）缓存与轮换。
+
+规格来源：
+- specs/health-services-platform/后端升级需求与变更清单（v1）.md -> REQ-P0-001（回调验签）
+- app/api/v1/orders.py 预支付签名（JSAPI/H5）
+
+说明：
+- 证书/私钥只在首次使用与来源变化时解析（RSA 私钥反序列化是毫秒级 CPU 操作），之后复用解析结果。
+- 平台证书按序列号（wechatpay-serial）并存：`wechat_pay_platform_cert_pem_or_path`（可为多证书 PEM 串）
+  与 `wechat_pay_platform_certs_dir`（目录下全部 *.pem）合并加载；微信切换新证书期间新旧证书同时可用。
+- 文件来源按 mtime/size 检测变化（最多每 `wechat_pay_crypto_reload_check_seconds` 检查一次），变化后重新加载；
+  配置未变而文件加载失败（如替换过程中读到半截文件）时继续使用上一份材料。
+- 解析、签名、验签都在线程中执行（asyncio.to_thread），不阻塞事件循环。
+- 错误口径沿用改造前：平台证书问题 -> 500 INTERNAL_ERROR / 验签失败 -> 401 UNAUTHENTICATED；
+  商户私钥问题 -> 400 PAYMENT_NOT_CONFIGURED。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from cryptography.x509 import load_pem_x509_certificates
+from fastapi import HTTPException
+from prometheus_client import Counter
+
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WECHATPAY_CRYPTO_RELOADS = Counter(
+    "lhmy_wechatpay_crypto_reloads_total",
+    "WeChat Pay key material (re)loads",
+    ["material", "outcome"],
+)
+
+
+def _norm_serial(serial: str) -> str:
+    # 微信侧序列号为大写十六进制；证书对象的 serial_number 转十六进制后可能少前导 0
+    return str(serial or "").strip().upper().lstrip("0")
+
+
+def _is_pem_text(raw: str) -> bool:
+    return raw.startswith("-----BEGIN")
+
+
+def _file_stamp(path: str) -> tuple[Any, ...]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _dir_pem_files(path: str) -> list[str]:
+    try:
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(".pem"))
+    except OSError:
+        return []
+    return [os.path.join(path, n) for n in names]
+
+
+@dataclass(frozen=True)
+class PlatformCertificates:
+    public_keys: dict[str, Any]  # 规范化序列号 -> 公钥
+
+
+class _Material(Generic[T]):
+    """按“来源指纹”缓存的解析结果（线程安全；在工作线程中调用）。"""
+
+    def __init__(
+        self, *, name: str, config: Callable[[], tuple], stamp: Callable[[tuple], tuple], load: Callable[[tuple], T]
+    ):
+        self._name = name
+        self._config = config
+        self._stamp = stamp
+        self._load = load
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._value_config: tuple | None = None
+        self._value_stamp: tuple | None = None
+        self._checked_at = 0.0
+
+    def current(self) -> T:
+        config = self._config()
+        now = time.monotonic()
+        interval = max(0.0, float(settings.wechat_pay_crypto_reload_check_seconds))
+        with self._lock:
+            if self._value is not None and config == self._value_config and now - self._checked_at < interval:
+                return self._value
+            stamp = self._stamp(config)
+            self._checked_at = now
+            if self._value is not None and config == self._value_config and stamp == self._value_stamp:
+                return self._value
+            try:
+                value = self._load(config)
+            except HTTPException:
+                if self._value is not None and config == self._value_config:
+                    WECHATPAY_CRYPTO_RELOADS.labels(material=self._name, outcome="failed_kept_previous").inc()
+                    logger.warning("wechatpay %s reload failed; keep previous material", self._name, exc_info=True)
+                    return self._value
+                WECHATPAY_CRYPTO_RELOADS.labels(material=self._name, outcome="failed").inc()
+                raise
+            WECHATPAY_CRYPTO_RELOADS.labels(material=self._name, outcome="loaded").inc()
+            self._value, self._value_config, self._value_stamp = value, config, stamp
+            return value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = self._value_config = self._value_stamp = None
+            self._checked_at = 0.0
+
+
+# ---- 平台证书 ----
+
+
+def _platform_config() -> tuple:
+    return (
+        (settings.wechat_pay_platform_cert_pem_or_path or "").strip(),
+        (settings.wechat_pay_platform_certs_dir or "").strip(),
+        _norm_serial(settings.wechat_pay_platform_cert_serial or ""),
+    )
+
+
+def _platform_stamp(config: tuple) -> tuple:
+    pem_or_path, certs_dir, _serial = config
+    parts: list[tuple] = []
+    if pem_or_path and not _is_pem_text(pem_or_path):
+        parts.append(_file_stamp(pem_or_path))
+    if certs_dir:
+        parts.extend(_file_stamp(p) for p in _dir_pem_files(certs_dir))
+    return tuple(parts)
+
+
+def _platform_error(message: str) -> HTTPException:
+    return HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": message})
+
+
+def _load_platform_certificates(config: tuple) -> PlatformCertificates:
+    pem_or_path, certs_dir, configured_serial = config
+    if not pem_or_path and not certs_dir:
+        raise _platform_error("缺少微信支付平台证书配置")
+
+    blobs: list[bytes] = []
+    if pem_or_path:
+        if _is_pem_text(pem_or_path):
+            blobs.append(pem_or_path.encode("utf-8"))
+        else:
+            try:
+                with open(pem_or_path, "rb") as f:  # noqa: PTH123
+                    blobs.append(f.read())
+            except Exception as exc:  # noqa: BLE001
+                raise _platform_error("无法读取微信支付平台证书文件") from exc
+    for path in _dir_pem_files(certs_dir) if certs_dir else []:
+        try:
+            with open(path, "rb") as f:  # noqa: PTH123
+                blobs.append(f.read())
+        except Exception as exc:  # noqa: BLE001
+            raise _platform_error("无法读取微信支付平台证书文件") from exc
+
+    public_keys: dict[str, Any] = {}
+    for blob in blobs:
+        try:
+            certs = load_pem_x509_certificates(blob)
+        except Exception as exc:  # noqa: BLE001
+            raise _platform_error("微信支付平台证书无法解析") from exc
+        for cert in certs:
+            public_keys[_norm_serial(format(cert.serial_number, "X"))] = cert.public_key()
+    if not public_keys:
+        raise _platform_error("缺少微信支付平台证书配置")
+
+    # 兼容：单证书且显式配置了序列号时，按配置的序列号也可查到（历史配置可能与证书内序列号写法不一致）
+    if configured_serial and len(public_keys) == 1 and configured_serial not in public_keys:
+        public_keys[configured_serial] = next(iter(public_keys.values()))
+    return PlatformCertificates(public_keys=public_keys)
+
+
+# ---- 商户私钥 ----
+
+
+def _mch_key_config() -> tuple:
+    return ((settings.wechat_pay_mch_private_key_pem_or_path or "").strip(),)
+
+
+def _mch_key_stamp(config: tuple) -> tuple:
+    (raw,) = config
+    return (_file_stamp(raw),) if raw and not _is_pem_text(raw) else ()
+
+
+def _payment_not_configured(message: str) -> HTTPException:
+    return HTTPException(status_code=400, detail={"code": "PAYMENT_NOT_CONFIGURED", "message": message})
+
+
+def _load_mch_private_key(config: tuple):
+    (raw,) = config
+    if not raw:
+        raise _payment_not_configured("微信支付未配置：缺少商户私钥（WECHAT_PAY_MCH_PRIVATE_KEY_PEM_OR_PATH）")
+    if _is_pem_text(raw):
+        pem = raw.encode("utf-8")
+    else:
+        try:
+            with open(raw, "rb") as f:  # noqa: PTH123
+                pem = f.read()
+        except Exception as exc:  # noqa: BLE001
+            raise _payment_not_configured("微信支付配置无效：无法读取商户私钥文件") from exc
+    try:
+        return load_pem_private_key(pem, password=None)
+    except Exception as exc:  # noqa: BLE001
+        raise _payment_not_configured("微信支付配置无效：商户私钥无法解析") from exc
+
+
+_platform_certs: _Material[PlatformCertificates] = _Material(
+    name="platform_certificates", config=_platform_config, stamp=_platform_stamp, load=_load_platform_certificates
+)
+_mch_private_key: _Material[Any] = _Material(
+    name="mch_private_key", config=_mch_key_config, stamp=_mch_key_stamp, load=_load_mch_private_key
+)
+
+
+def reset_wechatpay_crypto() -> None:
+    """丢弃已解析的材料（测试/运维强制重载用）。"""
+
+    _platform_certs.reset()
+    _mch_private_key.reset()
+
+
+def _verify_sync(*, serial: str, message: bytes, signature: bytes) -> None:
+    pub = _platform_certs.current().public_keys.get(_norm_serial(serial))
+    if pub is None:
+        raise HTTPException(status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信支付证书序列号不匹配"})
+
+    try:
+        # 微信支付平台证书（v3）为 RSA；类型收窄以满足静态检查，并防御配置错误。
+        if isinstance(pub, rsa.RSAPublicKey):
+            pub.verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+        elif isinstance(pub, ec.EllipticCurvePublicKey):
+            # 兜底：若未来证书切换为 ECC，这里也可验签
+            pub.verify(signature, message, ec.ECDSA(hashes.SHA256()))
+        else:
+            raise _platform_error("微信支付平台证书公钥类型不支持")
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(
+            status_code=401, detail={"code": "UNAUTHENTICATED", "message": "微信支付签名校验失败"}
+        ) from exc
+
+
+def _sign_sync(message: bytes) -> str:
+    key = _mch_private_key.current()
+    sig = key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+    return base64.b64encode(sig).decode("utf-8")
+
+
+async def verify_platform_signature(*, serial: str, message: bytes, signature: bytes) -> None:
+    """用 wechatpay-serial 对应的平台证书验签（SHA256withRSA）。"""
+
+    await asyncio.to_thread(_verify_sync, serial=serial, message=message, signature=signature)
+
+
+async def sign_with_mch_key(message: str) -> str:
+    """商户私钥 SHA256withRSA 签名，返回 base64。"""
+
+    return await asyncio.to_thread(_sign_sync, message.encode("utf-8"))
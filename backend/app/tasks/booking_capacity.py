@@ -0,0 +1,64 @@
+"""预约容量对账任务。
+
+说明：
+- 占用/释放已改为条件 UPDATE（见 app/services/slot_capacity.py），正常路径不会漂移；
+  但历史数据、人工改库或异常中断仍可能让 remaining_capacity 与 bookings 实际占用不一致。
+- 本任务周期性扫描“今天及以后”的排期，以 bookings 为准做条件修正（仅当 remaining 未被并发改动时写入）。
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import UTC, datetime
+from typing import Any, cast
+
+from celery.schedules import crontab
+
+from app.celery_app import celery_app
+from app.services.slot_capacity import apply_capacity_drift, find_capacity_drift
+from app.tasks.runtime import run_async
+from app.utils.db import get_session_factory
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = 500
+_MAX_BATCHES = 20
+
+
+@cast(Any, celery_app.on_after_configure).connect
+def _setup_periodic_tasks(sender, **_kwargs) -> None:
+    sender.add_periodic_task(
+        crontab(minute="*/10"),
+        cast(Any, reconcile_slot_capacity).s(),
+        name="reconcile_slot_capacity",
+    )
+
+
+async def reconcile_slot_capacity_once() -> dict:
+    today = datetime.now(tz=UTC).date()
+    found = 0
+    fixed = 0
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for _ in range(_MAX_BATCHES):
+            drifts = await find_capacity_drift(session=session, date_from=today, limit=_BATCH_SIZE)
+            if not drifts:
+                break
+            found += len(drifts)
+            n = await apply_capacity_drift(session=session, drifts=drifts)
+            await session.commit()
+            fixed += n
+            # 本批无一命中（全部被并发改动）：留待下一轮，避免空转
+            if n == 0 or len(drifts) < _BATCH_SIZE:
+                break
+
+    if found:
+        logger.warning("slot capacity drift reconciled: found=%s fixed=%s", found, fixed)
+    return {"found": int(found), "fixed": int(fixed)}
+
+
+@celery_app.task(name="booking_capacity.reconcile_slot_capacity")
+def reconcile_slot_capacity() -> dict:
+    out = run_async(reconcile_slot_capacity_once())
+    return {"ok": True, **out}
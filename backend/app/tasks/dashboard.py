@@ -0,0 +1,47 @@
+"""Admin 仪表盘日汇总任务。
+
+说明：
+- 每 10 分钟滚动重算最近 DASHBOARD_ROLLUP_RECENT_DAYS 天（不含今天）的日汇总（幂等 upsert）；
+  跨天后昨天的汇总在一个调度周期内落表，此前由接口实时统计兜底。
+- 更早的历史区间用 scripts/backfill_dashboard_rollups.py 回填。
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from celery.schedules import crontab
+
+from app.celery_app import celery_app
+from app.services.dashboard_rollup import rollup_days
+from app.tasks.runtime import run_async
+from app.utils.db import get_session_factory
+from app.utils.settings import settings
+
+
+@cast(Any, celery_app.on_after_configure).connect
+def _setup_periodic_tasks(sender, **_kwargs) -> None:
+    sender.add_periodic_task(
+        crontab(minute="*/10"),
+        cast(Any, rollup_recent_dashboard_days).s(),
+        name="rollup_recent_dashboard_days",
+    )
+
+
+async def rollup_recent_dashboard_days_once() -> dict:
+    today = datetime.now(tz=UTC).date()
+    date_to = today - timedelta(days=1)
+    date_from = today - timedelta(days=max(1, int(settings.dashboard_rollup_recent_days)))
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        n = await rollup_days(session=session, date_from=date_from, date_to=date_to)
+        await session.commit()
+    return {"days": int(n), "from": date_from.isoformat(), "to": date_to.isoformat()}
+
+
+@celery_app.task(name="dashboard.rollup_recent_dashboard_days")
+def rollup_recent_dashboard_days() -> dict:
+    out = run_async(rollup_recent_dashboard_days_once())
+    return {"ok": True, **out}
@@ -0,0 +1,44 @@
+"""经销商订单异步导出任务。
+
+说明：
+- POST /dealer/orders/export-jobs 写入任务状态（Redis）后投递本任务；本任务流式写文件并通知发起人
+  （见 app/services/dealer_order_export.py）。
+- 每小时清理超过 TTL 的导出文件（任务状态随 Redis TTL 自然过期）。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, cast
+
+from celery.schedules import crontab
+
+from app.celery_app import celery_app
+from app.services.dealer_order_export import cleanup_expired_export_files, run_export_job
+from app.tasks.runtime import run_async
+
+logger = logging.getLogger(__name__)
+
+
+@cast(Any, celery_app.on_after_configure).connect
+def _setup_periodic_tasks(sender, **_kwargs) -> None:
+    sender.add_periodic_task(
+        crontab(minute=17),
+        cast(Any, cleanup_dealer_export_files).s(),
+        name="cleanup_dealer_export_files",
+    )
+
+
+@celery_app.task(name="dealer_exports.export_dealer_orders", acks_late=True)
+def export_dealer_orders(job_id: str) -> dict:
+    job = run_async(run_export_job(job_id=job_id))
+    if job is None:
+        logger.warning("dealer export job expired before execution: job_id=%s", job_id)
+        return {"ok": False, "jobId": job_id}
+    return {"ok": True, "jobId": job_id, "rowCount": job.get("rowCount")}
+
+
+@celery_app.task(name="dealer_exports.cleanup_dealer_export_files")
+def cleanup_dealer_export_files() -> dict:
+    return {"ok": True, "removed": cleanup_expired_export_files(now_ts=time.time())}
@@ -0,0 +1,26 @@
+"""经销商结算单异步生成任务。
+
+说明：
+- POST /admin/dealer-settlements/generate-jobs 写入任务状态（Redis）后投递本任务；
+  生成逻辑与进度上报见 app/services/dealer_settlement.py。
+- 生成本身幂等（已存在的结算单保持不变），重复投递/重试不会重复出账。
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.celery_app import celery_app
+from app.services.dealer_settlement import run_settlement_job
+from app.tasks.runtime import run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="dealer_settlements.generate_dealer_settlements", acks_late=True)
+def generate_dealer_settlements_job(job_id: str) -> dict:
+    job = run_async(run_settlement_job(job_id=job_id))
+    if job is None:
+        logger.warning("dealer settlement job expired before execution: job_id=%s", job_id)
+        return {"ok": False, "jobId": job_id}
+    return {"ok": True, "jobId": job_id, "created": job.get("created"), "existing": job.get("existing")}
@@ -1,33 +1,50 @@
-"""库存相关后台任务（占位）。
+"""库存相关后台任务。
 
-v2 目标：
-- 支持“下单占用库存 -> 超时释放”
+- 下单占用库存（reserved_stock）-> 支付超时释放
 
-当前阶段：
-- 仅提供一个周期任务占位，确保 Celery worker/beat 可启动与可运行。
+说明：
+- 集合式批量释放（见 app/services/stock_reservation_release.py）：每批 SKIP LOCKED 认领 + 按商品聚合 UPDATE；
+  多个 worker 同时运行时各自认领不相交的订单分片，积压时可横向扩容加速排空。
+- 单次运行按时间预算循环多批（不超过调度间隔），剩余积压留给下一次调度或其它 worker。
+- 指标：lhmy_inventory_release_drained_total（已释放订单/数量）、lhmy_inventory_release_lag_seconds（最早未释放到期订单的滞后）。
 """
 
 from __future__ import annotations
 
-import asyncio
+import logging
+import time
 from datetime import UTC, datetime
 from typing import Any, cast
 
 from celery.schedules import crontab
+from prometheus_client import Counter, Gauge, Histogram
 
 from app.celery_app import celery_app
-from app.models.enums import PaymentStatus, ProductFulfillmentType
-from app.models.order import Order
-from app.models.order_item import OrderItem
-from app.models.product import Product
+from app.services.stock_reservation_release import oldest_expired_reservation_at, release_expired_reservations_batch
+from app.tasks.runtime import run_async
 from app.utils.db import get_session_factory
 from app.utils.settings import settings
-from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_RELEASE_DRAINED = Counter(
+    "lhmy_inventory_release_drained_total", "Expired stock reservations released", ["unit"]
+)
+INVENTORY_RELEASE_LAG = Gauge(
+    "lhmy_inventory_release_lag_seconds",
+    "Age of the oldest expired-but-unreleased stock reservation",
+    multiprocess_mode="livemax",
+)
+INVENTORY_RELEASE_BATCH_SECONDS = Histogram(
+    "lhmy_inventory_release_batch_seconds",
+    "Latency of one claim+release batch transaction",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
 
 
 @cast(Any, celery_app.on_after_configure).connect
 def _setup_periodic_tasks(sender, **_kwargs) -> None:
-    # v2 占位：每分钟扫描一次超时订单并释放库存（实现将在电商能力落地时补齐）
+    # 每分钟扫描一次到期订单并释放库存
     sender.add_periodic_task(
         crontab(minute="*/1"),
         cast(Any, release_expired_stock_reservations).s(),
@@ -35,62 +52,53 @@ def _setup_periodic_tasks(sender, **_kwargs) -> None:
     )
 
 
-@celery_app.task(name="inventory.release_expired_stock_reservations")
-def release_expired_stock_reservations() -> dict:
-    async def _run() -> int:
-        now = datetime.now(tz=UTC).replace(tzinfo=None)
+async def release_expired_stock_once(*, batch_size: int, max_seconds: float) -> dict:
+    session_factory = get_session_factory()
+    deadline = time.monotonic() + max(0.0, float(max_seconds))
+    orders = 0
+    quantity = 0
+    batches = 0
 
-        session_factory = get_session_factory()
+    while True:
+        now = datetime.now(tz=UTC).replace(tzinfo=None)
+        t0 = time.perf_counter()
         async with session_factory() as session:
-            # 仅释放：待支付 + 已到期 + 物流商品订单
-            orders: list[Order] = list(
-                (
-                    await session.scalars(
-                    select(Order)
-                    .where(
-                        Order.payment_status == PaymentStatus.PENDING.value,
-                        Order.fulfillment_type == ProductFulfillmentType.PHYSICAL_GOODS.value,
-                        Order.reservation_expires_at.is_not(None),
-                        Order.reservation_expires_at < now,
-                    )
-                    .order_by(Order.created_at.asc())
-                    .limit(200)
-                    )
-                ).all()
-            )
-
-            if not orders:
-                return 0
-
-            released = 0
-            for o in orders:
-                items: list[OrderItem] = list((await session.scalars(select(OrderItem).where(OrderItem.order_id == o.id))).all())
-                # 仅对 PRODUCT 明细扣预占（SERVICE_PACKAGE 不走库存）
-                product_ids = [it.item_id for it in items if it.item_type == "PRODUCT"]
-                if product_ids:
-                    products: list[Product] = list((await session.scalars(select(Product).where(Product.id.in_(product_ids)))).all())
-                    prod_map = {p.id: p for p in products}
-                    for it in items:
-                        if it.item_type != "PRODUCT":
-                            continue
-                        p = prod_map.get(it.item_id)
-                        if p is None:
-                            continue
-                        qty = int(it.quantity or 0)
-                        if qty <= 0:
-                            continue
-                        # 防御：不让 reserved_stock 变负
-                        p.reserved_stock = max(0, int(p.reserved_stock or 0) - qty)
-
-                # 标记订单已关闭（最小：置为 FAILED 并清空到期时间，避免重复释放）
-                o.payment_status = PaymentStatus.FAILED.value
-                o.reservation_expires_at = None
-                released += 1
-
+            res = await release_expired_reservations_batch(session=session, now=now, limit=batch_size)
             await session.commit()
-            return released
-
-    released = asyncio.run(_run())
-    return {"ok": True, "released": int(released)}
+        INVENTORY_RELEASE_BATCH_SECONDS.observe(time.perf_counter() - t0)
+        if res.orders == 0:
+            break
+        batches += 1
+        orders += res.orders
+        quantity += res.quantity
+        INVENTORY_RELEASE_DRAINED.labels(unit="orders").inc(res.orders)
+        INVENTORY_RELEASE_DRAINED.labels(unit="quantity").inc(res.quantity)
+        if res.orders < batch_size or time.monotonic() >= deadline:
+            break
+
+    now = datetime.now(tz=UTC).replace(tzinfo=None)
+    async with session_factory() as session:
+        oldest = await oldest_expired_reservation_at(session=session, now=now)
+    lag_seconds = max(0.0, (now - oldest).total_seconds()) if oldest is not None else 0.0
+    INVENTORY_RELEASE_LAG.set(lag_seconds)
+
+    if orders:
+        logger.info(
+            "inventory release drained: orders=%s quantity=%s batches=%s lag_seconds=%.1f",
+            orders,
+            quantity,
+            batches,
+            lag_seconds,
+        )
+    return {"released": int(orders), "quantity": int(quantity), "batches": int(batches), "lagSeconds": lag_seconds}
 
 
+@celery_app.task(name="inventory.release_expired_stock_reservations")
+def release_expired_stock_reservations() -> dict:
+    out = run_async(
+        release_expired_stock_once(
+            batch_size=max(1, int(settings.inventory_release_batch_size)),
+            max_seconds=float(settings.inventory_release_max_seconds),
+        )
+    )
+    return {"ok": True, **out}
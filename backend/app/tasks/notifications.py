@@ -0,0 +1,26 @@
+"""Admin 定向通知异步发送任务。
+
+说明：
+- POST /admin/notifications/send 在定向接收者数超过同步上限时写入任务状态（Redis）后投递本任务；
+  写入逻辑与进度上报见 app/services/notification_sending.py。
+- 分片提交 + 通知 id 确定性派生（INSERT IGNORE），重复投递/重试不会重复写入。
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.celery_app import celery_app
+from app.services.notification_sending import run_send_job
+from app.tasks.runtime import run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="notifications.send_targeted_notifications", acks_late=True)
+def send_targeted_notifications_job(job_id: str) -> dict:
+    job = run_async(run_send_job(job_id=job_id))
+    if job is None:
+        logger.warning("notification send job expired before execution: job_id=%s", job_id)
+        return {"ok": False, "jobId": job_id}
+    return {"ok": True, "jobId": job_id, "createdCount": job.get("createdCount")}
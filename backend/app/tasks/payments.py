@@ -0,0 +1,92 @@
+"""支付成功 outbox 消费任务（异步履约）。
+
+说明：
+- 支付回调提交 PAYMENT_SUCCEEDED 事件后投递 process_payment_event 立即处理（见 app/api/v1/payments.py）；
+- 每分钟排空一次到期事件（投递失败 / 失败重试），单次运行按时间预算循环多批；
+- 处理逻辑、重试退避、死信与指标见 app/services/payment_outbox.py。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, cast
+
+from celery.schedules import crontab
+
+from app.celery_app import celery_app
+from app.services.payment_outbox import (
+    PAYMENT_OUTBOX_OLDEST_PENDING,
+    drain_payment_outbox_batch,
+    oldest_pending_paid_at,
+    process_payment_outbox_event,
+)
+from app.tasks.runtime import run_async
+from app.utils.datetime_utc import utcnow
+from app.utils.db import get_session_factory
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@cast(Any, celery_app.on_after_configure).connect
+def _setup_periodic_tasks(sender, **_kwargs) -> None:
+    sender.add_periodic_task(
+        crontab(minute="*/1"),
+        cast(Any, drain_payment_outbox).s(),
+        name="drain_payment_outbox",
+    )
+
+
+async def process_payment_event_once(event_id: str) -> str:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        return await process_payment_outbox_event(session=session, event_id=event_id)
+
+
+async def drain_payment_outbox_once(*, batch_size: int, max_seconds: float) -> dict:
+    session_factory = get_session_factory()
+    deadline = time.monotonic() + max(0.0, float(max_seconds))
+    processed = done = failed = 0
+
+    while True:
+        async with session_factory() as session:
+            res = await drain_payment_outbox_batch(session=session, now=utcnow(), limit=batch_size)
+        processed += res.processed
+        done += res.done
+        failed += res.failed
+        # 整批都被跳过（均正被其它消费者处理）时不再空转
+        if res.processed < batch_size or res.done + res.failed == 0 or time.monotonic() >= deadline:
+            break
+
+    async with session_factory() as session:
+        oldest = await oldest_pending_paid_at(session=session)
+    lag_seconds = max(0.0, (utcnow() - oldest).total_seconds()) if oldest is not None else 0.0
+    PAYMENT_OUTBOX_OLDEST_PENDING.set(lag_seconds)
+
+    if processed:
+        logger.info(
+            "payment outbox drained: processed=%s done=%s failed=%s lag_seconds=%.1f",
+            processed,
+            done,
+            failed,
+            lag_seconds,
+        )
+    return {"processed": int(processed), "done": int(done), "failed": int(failed), "lagSeconds": lag_seconds}
+
+
+@celery_app.task(name="payments.process_payment_event", acks_late=True)
+def process_payment_event(event_id: str) -> dict:
+    outcome = run_async(process_payment_event_once(event_id))
+    return {"ok": outcome in ("done", "skipped"), "eventId": event_id, "outcome": outcome}
+
+
+@celery_app.task(name="payments.drain_payment_outbox")
+def drain_payment_outbox() -> dict:
+    out = run_async(
+        drain_payment_outbox_once(
+            batch_size=max(1, int(settings.payment_outbox_drain_batch_size)),
+            max_seconds=float(settings.payment_outbox_drain_max_seconds),
+        )
+    )
+    return {"ok": True, **out}
@@ -0,0 +1,90 @@
+"""Celery worker 进程内的异步运行时。
+
+说明：
+- 任务内不再每次 `asyncio.run`（每次新建/关闭 event loop，全局 engine 连接池绑定在旧 loop 上无法复用）；
+  改为每个 worker 进程持有一个常驻 event loop，engine/Redis 客户端随之在进程内复用。
+- prefork 子进程启动时丢弃从父进程继承的 loop/engine/Redis/出站 HTTP 客户端（连接不可跨进程共享）。
+- 指标：设置 CELERY_METRICS_PORT 后由 worker 主进程暴露 /metrics；
+  prefork 多子进程需同时设置 PROMETHEUS_MULTIPROC_DIR（prometheus_client 多进程模式聚合各子进程指标）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
+
+from app.utils.db import reset_engine
+from app.utils.http_clients import reset_http_clients
+from app.utils.redis_client import reset_redis
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _prepare_multiproc_dir() -> None:
+    # 需在任何指标对象创建之前执行（celery -A app.celery_app 会先导入本模块，再导入任务模块）：
+    # 清理上次运行残留的 mmap 文件，避免计数被重复累加
+    mp_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not mp_dir:
+        return
+    shutil.rmtree(mp_dir, ignore_errors=True)
+    os.makedirs(mp_dir, exist_ok=True)
+
+
+_prepare_multiproc_dir()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _reset_after_fork(**_kwargs) -> None:
+    global _loop
+    _loop = None
+    reset_engine()
+    reset_redis()
+    reset_http_clients()
+
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(pid=None, **_kwargs) -> None:
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    from prometheus_client import multiprocess  # noqa: WPS433
+
+    multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@worker_init.connect
+def _start_metrics_server(**_kwargs) -> None:
+    port = int(settings.celery_metrics_port or 0)
+    if port <= 0:
+        return
+    from prometheus_client import CollectorRegistry, start_http_server  # noqa: WPS433
+
+    try:
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess  # noqa: WPS433
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            start_http_server(port, registry=registry)
+        else:
+            start_http_server(port)
+    except OSError:
+        logger.warning("celery metrics server not started: port=%s", port)
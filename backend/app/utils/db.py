@@ -47,3 +47,11 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
     if _session_factory is None:
         _session_factory = async_sessionmaker(bind=get_engine(), expire_on_commit=False)
     return _session_factory
+
+
+def reset_engine() -> None:
+    """丢弃当前进程持有的全局 engine（Celery prefork 子进程启动时调用：连接池不可跨进程/跨 event loop 复用）。"""
+
+    global _engine, _session_factory
+    _engine = None
+    _session_factory = None
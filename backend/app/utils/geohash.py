@@ -0,0 +1,111 @@
+"""Geohash 编码与覆盖格计算（附近场所检索）。
+
+说明：
+- 标准 base32 geohash：经度/纬度交替二分，前缀相同 => 落在同一矩形格内，可直接走 B-Tree 前缀范围扫描；
+- `covering_cells` 枚举与圆的经纬度外接框相交的格子（精度按格子数上限自适应），保证圆被完全覆盖；
+- 这里只做候选预筛，精确距离仍由调用方用球面距离过滤/排序。
+"""
+
+from __future__ import annotations
+
+import math
+
+EARTH_RADIUS_METERS = 6371008.8
+MAX_PRECISION = 12
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_METERS_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_METERS / 180.0
+
+
+def encode(lat: float, lng: float, *, precision: int = MAX_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: list[str] = []
+    bits = 0
+    bit_count = 0
+    even = True  # 偶数位编码经度
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision: int) -> tuple[float, float]:
+    """返回 (lat_deg, lng_deg)：给定精度下单格的纬度高度/经度宽度。"""
+
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _wrap_lng(lng: float) -> float:
+    return (lng + 180.0) % 360.0 - 180.0
+
+
+def bounding_box(*, lat: float, lng: float, radius_meters: float) -> tuple[float, float, float, float]:
+    """包含整个圆的经纬度框 (lat_min, lat_max, lng_min, lng_max)。
+
+    经度范围不做回绕：跨 ±180 时可能超出 [-180, 180]；圆覆盖极点时经度取全范围。
+    """
+
+    dlat = radius_meters / _METERS_PER_DEGREE_LAT
+    if abs(lat) + dlat >= 89.9:
+        return max(-90.0, lat - dlat), min(90.0, lat + dlat), -180.0, 180.0
+    cos_lat = math.cos(math.radians(abs(lat) + dlat))
+    dlng = radius_meters / (_METERS_PER_DEGREE_LAT * cos_lat)
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def covering_cells(*, lat: float, lng: float, radius_meters: float, max_cells: int = 16) -> list[str]:
+    """覆盖以 (lat,lng) 为圆心、radius 为半径的圆的 geohash 前缀集合。
+
+    取格子数不超过 max_cells 的最高精度，枚举与经纬度框相交的全部格子（前缀越长，索引扫描的候选越少）。
+    """
+
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat=lat, lng=lng, radius_meters=radius_meters)
+    for precision in range(MAX_PRECISION, 0, -1):
+        dlat, dlng = cell_size_degrees(precision)
+        row0 = math.floor((lat_min + 90.0) / dlat)
+        rows = min(math.floor((lat_max + 90.0) / dlat), round(180.0 / dlat) - 1) - row0 + 1
+        col0 = math.floor((lng_min + 180.0) / dlng)
+        cols = min(math.floor((lng_max + 180.0) / dlng) - col0 + 1, round(360.0 / dlng))
+        if rows * cols > max_cells and precision > 1:
+            continue
+        cells: list[str] = []
+        for i in range(rows):
+            clat = (row0 + i + 0.5) * dlat - 90.0
+            for j in range(cols):
+                cell = encode(clat, _wrap_lng((col0 + j + 0.5) * dlng - 180.0), precision=precision)
+                if cell not in cells:
+                    cells.append(cell)
+        return cells
+    return []
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,189 @@
+"""出站 HTTP 客户端（按上游 origin 复用的长连接池）。
+
+说明：
+- 每个上游 origin（scheme://host:port）一个长期存活的 `httpx.AsyncClient`，复用 TCP/TLS 连接（keep-alive）；
+  不再在每次调用（甚至每次重试）里新建客户端、重新握手。
+- 连接池上限/keep-alive 过期/默认超时由 settings（HTTP_CLIENT_*）配置；调用方可按请求覆盖超时
+  （例如 AI Provider 的 timeoutMs）。
+- 生命周期：FastAPI lifespan 关闭时 `close_http_clients()`；Celery prefork 子进程启动时 `reset_http_clients()`
+  （连接池不可跨进程复用）。连接绑定 event loop：在新的 loop 上取用时重建客户端，旧客户端交回其所属 loop 关闭
+  （该 loop 已关闭时连接已随之失效，只丢弃引用）。
+- 指标：`lhmy_upstream_request_seconds{upstream,method,outcome}` / `lhmy_upstream_errors_total{upstream,kind}`，
+  upstream 为调用方给出的逻辑名（如 wechat_api / wechat_pay / ai:openai_compatible），避免按 URL 产生高基数标签。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+from prometheus_client import Counter, Histogram
+
+from app.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "lhmy_upstream_request_seconds",
+    "Latency of outbound HTTP requests by upstream",
+    ["upstream", "method", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+UPSTREAM_ERRORS = Counter(
+    "lhmy_upstream_errors_total",
+    "Outbound HTTP failures by upstream (transport errors and 5xx responses)",
+    ["upstream", "kind"],
+)
+
+_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(float(settings.http_client_default_timeout_seconds)),
+        limits=httpx.Limits(
+            max_connections=int(settings.http_client_max_connections),
+            max_keepalive_connections=int(settings.http_client_max_keepalive_connections),
+            keepalive_expiry=float(settings.http_client_keepalive_expiry_seconds),
+        ),
+    )
+
+
+def _origin(url: str) -> str:
+    u = httpx.URL(url)
+    return f"{u.scheme}://{u.host}:{u.port or (443 if u.scheme == 'https' else 80)}"
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """返回 url 所在 origin 的共享客户端（不要 close/async with 它）。"""
+
+    key = _origin(url)
+    loop = asyncio.get_running_loop()
+    hit = _clients.get(key)
+    if hit is not None:
+        if hit[0] is loop and not hit[1].is_closed:
+            return hit[1]
+        _close_on_owner_loop(*hit)
+    client = _new_client()
+    _clients[key] = (loop, client)
+    return client
+
+
+def _close_on_owner_loop(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    if client.is_closed or loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+def _outcome(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+async def request(
+    method: str,
+    url: str,
+    *,
+    upstream: str,
+    timeout: float | httpx.Timeout | None = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """经共享连接池发起请求并记录指标；传输层异常原样抛出（由调用方决定重试/降级口径）。
+
+    kwargs 透传给 `httpx.AsyncClient.request`（params/json/content/headers 等）。
+    """
+
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    started = time.perf_counter()
+    try:
+        resp = await get_http_client(url).request(method, url, **kwargs)
+    except httpx.TimeoutException:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="timeout").inc()
+        UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome="timeout").observe(
+            time.perf_counter() - started
+        )
+        raise
+    except httpx.HTTPError:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="transport").inc()
+        UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome="error").observe(
+            time.perf_counter() - started
+        )
+        raise
+
+    UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome=_outcome(resp.status_code)).observe(
+        time.perf_counter() - started
+    )
+    if resp.status_code >= 500:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="5xx").inc()
+    return resp
+
+
+@asynccontextmanager
+async def stream(
+    method: str,
+    url: str,
+    *,
+    upstream: str,
+    timeout: float | httpx.Timeout | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[httpx.Response]:
+    """流式请求（SSE 等）：响应头到达即返回，正文由调用方在 `async with` 内逐行读取。
+
+    指标口径同 `request`；耗时记录到响应头到达为止（流式正文时长取决于上游生成速度，不计入）。
+    """
+
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    started = time.perf_counter()
+    client = get_http_client(url)
+    try:
+        resp = await client.send(client.build_request(method, url, **kwargs), stream=True)
+    except httpx.TimeoutException:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="timeout").inc()
+        UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome="timeout").observe(
+            time.perf_counter() - started
+        )
+        raise
+    except httpx.HTTPError:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="transport").inc()
+        UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome="error").observe(
+            time.perf_counter() - started
+        )
+        raise
+
+    UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, method=method, outcome=_outcome(resp.status_code)).observe(
+        time.perf_counter() - started
+    )
+    if resp.status_code >= 500:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind="5xx").inc()
+    try:
+        yield resp
+    finally:
+        await resp.aclose()
+
+
+async def close_http_clients() -> None:
+    """关闭全部共享客户端（FastAPI lifespan 关闭阶段调用）。"""
+
+    loop = asyncio.get_running_loop()
+    clients = list(_clients.values())
+    _clients.clear()
+    for owner, c in clients:
+        if owner is not loop:
+            _close_on_owner_loop(owner, c)
+            continue
+        try:
+            await c.aclose()
+        except Exception:  # noqa: BLE001
+            logger.warning("http client close failed", exc_info=True)
+
+
+def reset_http_clients() -> None:
+    """丢弃当前进程持有的客户端（同 db.reset_engine：fork 后不可复用父进程的连接）。"""
+
+    _clients.clear()
@@ -0,0 +1,108 @@
+"""进程内缓存的失效基础设施（ORM 提交钩子 + 跨进程 pub/sub 监听）。
+
+说明：
+- 使用方：system_config_cache / actor_cache / ai.repository / enterprise_suggestion_index。
+- 提交钩子：after_flush 收集本次会话涉及的失效键（写入 session.info），after_soft_rollback 丢弃，
+  after_commit 后先同步清理本进程，再在当前事件循环上异步执行跨进程传播（删除 Redis 条目/广播等）。
+- 监听：订阅频道，逐条消息交给 handler；(重新)订阅时可能漏消息，以 None 调用 handler 表示整体清空；
+  Redis 断开时退避重连，直到 stop 被置位（FastAPI lifespan 内启动）。
+- 测试环境不启用进程内缓存：测试会绕过 ORM 直接清表，跨用例复用会读到脏数据（同 db.py/redis_client.py）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Callable, Coroutine, Iterable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_pending_tasks: set[asyncio.Task] = set()
+
+
+def in_pytest() -> bool:
+    return os.getenv("PYTEST_CURRENT_TEST") is not None or os.getenv("RUN_INTEGRATION_TESTS") == "1"
+
+
+def register_commit_invalidation(
+    *,
+    info_key: str,
+    collect: Callable[[Session], Iterable[str]],
+    evict_local: Callable[[list[str]], None],
+    propagate: Callable[[list[str]], Coroutine[Any, Any, None]],
+) -> None:
+    """注册 after_flush/after_soft_rollback/after_commit 钩子；collect 返回本次 flush 需失效的键。"""
+
+    def _collect(session: Session, _flush_context) -> None:
+        keys = set(collect(session))
+        if keys:
+            session.info.setdefault(info_key, set()).update(keys)
+
+    def _discard(session: Session, _previous_transaction) -> None:
+        session.info.pop(info_key, None)
+
+    def _invalidate_after_commit(session: Session) -> None:
+        keys: set[str] | None = session.info.pop(info_key, None)
+        if not keys:
+            return
+        ks = sorted(keys)
+        evict_local(ks)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(propagate(ks))
+        _pending_tasks.add(task)
+        task.add_done_callback(_pending_tasks.discard)
+
+    event.listen(Session, "after_flush", _collect)
+    event.listen(Session, "after_soft_rollback", _discard)
+    event.listen(Session, "after_commit", _invalidate_after_commit)
+
+
+async def listen_for_invalidations(
+    *, channel: str, handler: Callable[[dict | None], None], stop: asyncio.Event
+) -> None:
+    """订阅 channel 并把消息体（JSON 对象）交给 handler；无法解析的消息同样以 None 调用（整体清空）。"""
+
+    backoff = 1.0
+    while not stop.is_set():
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(channel)
+            backoff = 1.0
+            # 重连期间可能漏消息：整体清空一次
+            handler(None)
+            while not stop.is_set():
+                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not msg:
+                    continue
+                try:
+                    payload = json.loads(msg.get("data") or b"{}")
+                except Exception:  # noqa: BLE001
+                    payload = None
+                handler(payload if isinstance(payload, dict) else None)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.warning("invalidation listener disconnected: channel=%s; retry in %.0fs", channel, backoff)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:  # noqa: BLE001
+                    pass
@@ -0,0 +1,130 @@
+"""列表分页工具（keyset cursor + 封顶总数）。
+
+说明：
+- 游标为不透明字符串（urlsafe base64(JSON)），对外不承诺内部结构
+- 默认排序口径为 `(created_at DESC, id DESC)`，与各列表端点“最新在前”的既有口径一致；
+  `DescKeyset` 支持任意非空排序键（如 `(booking_date, created_at, id)`），id 作为最终决胜键
+- 非法游标统一返回 400 INVALID_ARGUMENT（与其它 query 参数校验口径一致）
+- 传 cursor 时忽略 page（从游标之后继续），否则仍走 page/pageSize 的 OFFSET 分页（兼容旧客户端）
+- `count_capped`：默认精确计数；配置 LIST_TOTAL_CAP>0 后 COUNT 最多扫描 cap+1 行，超出时返回 cap 并标记
+  `totalCapped=true`（前端展示 “10000+”）
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils.settings import settings
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=400, detail={"code": "INVALID_ARGUMENT", "message": "cursor 不合法"})
+
+
+def _dump_key(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _load_key(raw: Any, python_type: type) -> Any:
+    if python_type is datetime:
+        return datetime.fromisoformat(str(raw))
+    if python_type is date:
+        return date.fromisoformat(str(raw))
+    return python_type(raw)
+
+
+@dataclass(frozen=True)
+class DescKeyset:
+    """`ORDER BY k1 DESC, ..., id DESC` 的 keyset 分页（排序键须为非空列）。
+
+    用法：
+        keyset = DescKeyset(keys=(Order.created_at,), id_col=Order.id)
+        after = keyset.decode(cursor)
+        stmt = keyset.paginate(stmt, after=after, page=page, page_size=page_size)
+        next_cursor = keyset.next_cursor(rows, page_size=page_size)
+    """
+
+    keys: tuple[Any, ...]
+    id_col: Any
+
+    def order_by(self) -> list[Any]:
+        return [c.desc() for c in self.keys] + [self.id_col.desc()]
+
+    def encode(self, obj: Any) -> str:
+        raw = json.dumps(
+            {"k": [_dump_key(getattr(obj, c.key)) for c in self.keys], "id": str(getattr(obj, self.id_col.key))},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str | None) -> tuple[tuple[Any, ...], str] | None:
+        """解析游标；空值返回 None，非法值抛 400。"""
+
+        s = (cursor or "").strip()
+        if not s:
+            return None
+        try:
+            padded = s + "=" * (-len(s) % 4)
+            obj = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            raw_keys = obj["k"]
+            if not isinstance(raw_keys, list) or len(raw_keys) != len(self.keys):
+                raise ValueError("key count mismatch")
+            values = tuple(_load_key(v, c.type.python_type) for v, c in zip(raw_keys, self.keys))
+            cid = str(obj["id"])
+        except Exception as exc:  # noqa: BLE001
+            raise _invalid_cursor() from exc
+        if not cid:
+            raise _invalid_cursor()
+        return values, cid
+
+    def after(self, cursor: tuple[tuple[Any, ...], str]) -> ColumnElement[bool]:
+        """`(k1, ..., id) < cursor`，展开为 OR/AND（便于 MySQL 对复合索引做 range scan）。"""
+
+        values, cid = cursor
+        cols = [*self.keys, self.id_col]
+        vals = [*values, cid]
+        branches = []
+        for i, col in enumerate(cols):
+            eqs = [cols[j] == vals[j] for j in range(i)]
+            branches.append(and_(*eqs, col < vals[i]) if eqs else col < vals[i])
+        return or_(*branches)
+
+    def paginate(self, stmt: Select, *, after: tuple[tuple[Any, ...], str] | None, page: int, page_size: int) -> Select:
+        stmt = stmt.order_by(*self.order_by())
+        if after is not None:
+            stmt = stmt.where(self.after(after))
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        return stmt.limit(page_size)
+
+    def next_cursor(self, rows: Sequence[Any], *, page_size: int) -> str | None:
+        """满页时返回最后一行的游标（最后一页可能多一次空查询，换取不必多取一行）。"""
+
+        if len(rows) < page_size or not rows:
+            return None
+        return self.encode(rows[-1])
+
+
+async def count_capped(*, session, stmt: Select, cap: int | None = None) -> tuple[int, bool]:
+    """列表总数：最多扫描 cap+1 行；返回 (total, capped)。cap<=0 表示精确计数。"""
+
+    limit = int(settings.list_total_cap if cap is None else cap)
+    inner: Select = stmt.order_by(None).with_only_columns(literal_column("1"), maintain_column_froms=True)
+    if limit > 0:
+        inner = inner.limit(limit + 1)
+    n = int((await session.execute(select(func.count()).select_from(inner.subquery()))).scalar() or 0)
+    if limit > 0 and n > limit:
+        return limit, True
+    return n, False
@@ -28,3 +28,10 @@ def get_redis() -> Redis:
     if _redis is None:
         _redis = Redis(host=settings.redis_host, port=settings.redis_port, db=settings.redis_db)
     return _redis
+
+
+def reset_redis() -> None:
+    """丢弃当前进程持有的全局 Redis 客户端（同 db.reset_engine）。"""
+
+    global _redis
+    _redis = None
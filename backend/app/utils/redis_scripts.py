@@ -0,0 +1,29 @@
+"""Redis 服务端 Lua 脚本。
+
+说明：
+- 多步读改写（检查 -> 计数 -> 设置过期）合成一个脚本，单次往返且原子执行（脚本执行期间不会穿插其它命令）。
+- 调用走 EVALSHA；服务端尚未缓存该脚本（重启/切主/首次调用）时收到 NOSCRIPT，自动 SCRIPT LOAD 后重试。
+- 脚本对象与 Redis 客户端解耦（测试模式下 get_redis() 每次返回新客户端），执行时传入客户端。
+- 脚本内访问的 key 一律通过 KEYS 传入，不在脚本内拼接。
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Sequence
+from typing import Any
+
+from redis.exceptions import NoScriptError
+
+
+class LuaScript:
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    async def run(self, redis, *, keys: Sequence[str], args: Sequence[Any] = ()) -> Any:
+        try:
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            await redis.script_load(self.source)
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
@@ -62,6 +62,15 @@ class Settings(BaseSettings):
     # - 默认 result backend: Redis（由上面 redis_* 组合）
     celery_broker_url: str = ""
     celery_result_backend: str = ""
+    # worker 指标端口（0=不暴露）；prefork 多子进程需同时设置 PROMETHEUS_MULTIPROC_DIR
+    celery_metrics_port: int = 0
+
+    # 库存预占超时释放（集合式批量 sweeper）
+    inventory_release_batch_size: int = 500
+    inventory_release_max_seconds: float = 50.0
+
+    # Admin 仪表盘日汇总：定时任务每次滚动重算最近 N 天（不含今天）
+    dashboard_rollup_recent_days: int = 3
 
     # JWT（阶段3：统一身份认证服务）
     jwt_secret: str = "change_me_jwt_secret"
@@ -84,7 +93,10 @@ class Settings(BaseSettings):
     # - 平台证书建议以文件方式挂载；也支持直接填 PEM 文本。
     wechat_pay_api_v3_key: str = ""  # 32字节（ASCII）APIv3Key
     wechat_pay_platform_cert_serial: str = ""  # 平台证书序列号（用于校验 wechatpay-serial）
-    wechat_pay_platform_cert_pem_or_path: str = ""  # PEM 文本或证书文件路径
+    wechat_pay_platform_cert_pem_or_path: str = ""  # PEM 文本或证书文件路径（可含多张证书）
+    wechat_pay_platform_certs_dir: str = ""  # 平台证书目录（*.pem；证书轮换期间新旧证书按序列号并存）
+    # 证书/商户私钥文件变化检测间隔（秒；见 services/wechatpay_crypto.py）
+    wechat_pay_crypto_reload_check_seconds: float = 5.0
 
     # 微信支付 JSAPI 预支付（小程序端，v1）
     # 说明：
@@ -127,6 +139,9 @@ class Settings(BaseSettings):
     jwt_algorithm_dealer: str = "HS256"
     jwt_dealer_access_expire_seconds: int = 7200  # 2小时
 
+    # 操作者上下文缓存（按 token jti；黑名单/账号状态变化时主动失效，TTL 为跨进程兜底）
+    actor_cache_ttl_seconds: float = 30.0
+
     # Dealer 初始账号（用于开发/测试环境最小可执行）
     # 说明：避免因无注册入口导致无法登录验证 Dealer 端（仅当以下变量有值时才会自动创建）。
     dealer_init_username: str = ""
@@ -136,6 +151,17 @@ class Settings(BaseSettings):
     # 权益二维码签名（阶段5-29）
     # 约束：与 DEALER_SIGN_SECRET 密钥隔离；仅存后端环境变量，不可下发前端。
     entitlement_qr_sign_secret: str = "change_me_entitlement_qr_sign_secret"
+    # 履约事务内联生成的权益条数上限；超过则写 ENTITLEMENTS_GENERATION outbox 事件另行批量生成（0=始终内联）
+    entitlement_async_threshold: int = 2000
+
+    # 支付成功 outbox 异步履约（services/payment_outbox.py）
+    # - 失败重试按指数退避（base * 2^(n-1)，封顶 max），执行 max_attempts 次仍失败进入死信表
+    # - 排空任务每分钟运行：单批条数 / 单次运行时间预算
+    payment_outbox_max_attempts: int = 8
+    payment_outbox_retry_base_seconds: float = 10.0
+    payment_outbox_retry_max_seconds: float = 600.0
+    payment_outbox_drain_batch_size: int = 200
+    payment_outbox_drain_max_seconds: float = 50.0
 
     # 经销商参数签名（阶段7-44）
     # 约束：仅存后端环境变量，不可下发前端。
@@ -151,6 +177,65 @@ class Settings(BaseSettings):
     # - 用户确认默认：24 小时
     bind_token_expire_seconds: int = 86400
 
+    # 经销商订单导出（流式/异步任务）
+    # - DEALER_EXPORT_DIR：异步任务文件目录（backend 与 celery_worker 需共享同一卷）
+    dealer_export_batch_size: int = 1000
+    dealer_export_dir: str = "/tmp/lhmy_dealer_exports"
+    dealer_export_job_ttl_seconds: int = 86400
+
+    # 经销商结算单批量生成（services/dealer_settlement.py）
+    # - 预取/多行 upsert 的分片大小；异步生成任务状态（Redis）保留时长
+    dealer_settlement_batch_size: int = 1000
+    dealer_settlement_job_ttl_seconds: int = 86400
+
+    # 站内通知（services/notification_inbox.py / notification_sending.py）
+    # - 未读计数缓存 TTL（漏记最多持续一个 TTL）
+    # - 定向发送：接收者数超过 sync_max 走异步任务；Core 多行 INSERT 分片大小；任务状态（Redis）保留时长
+    notification_unread_cache_ttl_seconds: int = 600
+    notification_send_sync_max_targets: int = 500
+    notification_send_batch_size: int = 1000
+    notification_send_job_ttl_seconds: int = 86400
+
+    # 列表总数封顶（COUNT 最多扫描 N+1 行，超出返回 N 且 totalCapped=true）；默认 0=精确计数，
+    # 大表慢查询时按环境开启（如 LIST_TOTAL_CAP=10000，前端展示 “10000+”）
+    list_total_cap: int = 0
+
+    # 附近场所检索（GET /api/v1/venues?lat=&lng=&radius=，单位：米）
+    venue_nearby_default_radius_meters: int = 5000
+    venue_nearby_max_radius_meters: int = 50000
+
+    # 关键词全文检索（FULLTEXT WITH PARSER ngram；须与 MySQL 服务端 ngram_token_size 一致，服务端需关闭停用词，见 stage46）
+    # 短于该长度的词无法命中 ngram 索引，降级为 LIKE
+    search_ngram_token_size: int = 2
+
+    # 出站 HTTP 连接池（AI Provider / 微信 API / 微信支付；每个上游 origin 一个长连接客户端，见 utils/http_clients.py）
+    http_client_max_connections: int = 100
+    http_client_max_keepalive_connections: int = 20
+    http_client_keepalive_expiry_seconds: float = 30.0
+    http_client_default_timeout_seconds: float = 10.0
+
+    # AI 响应缓存（按 Strategy 开启：constraints.response_cache_ttl_seconds > 0；constraints.personalized=true 时恒不缓存）
+    # - 每个 scene 的条目数上限（超出按最近访问淘汰）；TTL 上限（Strategy 配置超出时截断）
+    ai_response_cache_max_entries_per_scene: int = 2000
+    ai_response_cache_max_ttl_seconds: int = 7 * 86400
+
+    # 幂等（services/idempotency.py）
+    # - 认领租约：首个请求执行期间每 1/3 租约自动续期；进程崩溃未写回结果时，租约到期后重试可重新执行
+    # - 并发重试等待首个结果的上限，超时返回 409 STATE_CONFLICT（AI 对话单独放宽：需等上游生成完毕）
+    # - 结果序列化后达到该字节数时 zlib 压缩存储
+    idempotency_claim_lease_seconds: int = 30
+    idempotency_wait_timeout_seconds: float = 10.0
+    idempotency_ai_chat_wait_timeout_seconds: float = 60.0
+    idempotency_compress_min_bytes: int = 512
+
+    # 审计日志异步批量写入（AuditLogMiddleware）
+    # - 进程内有界队列 + 后台批量 INSERT；MySQL 写入失败/超时时落盘（JSONL），恢复后自动回放
+    audit_queue_max_size: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval_ms: int = 500
+    audit_flush_timeout_seconds: float = 3.0
+    audit_spill_dir: str = "/tmp/lhmy_audit_spill"
+
     def mysql_dsn(self) -> str:
         # SQLAlchemy async + aiomysql
         return (
@@ -0,0 +1,69 @@
+"""
+回填 Admin 仪表盘日汇总（dashboard_daily_rollups）。
+
+用途：
+- 首次上线/历史数据修正后，按日期区间重算日汇总（幂等 upsert，可重复执行）。
+- 日常最近几天由 Celery 定时任务滚动重算（app/tasks/dashboard.py），无需手工执行。
+
+运行方式（在 docker compose 环境）：
+- 最近 400 天：docker compose exec backend python scripts/backfill_dashboard_rollups.py --days 400
+- 指定区间：docker compose exec backend python scripts/backfill_dashboard_rollups.py --from 2025-01-01 --to 2025-12-31
+
+说明：按 --chunk-days 分段提交，避免单个大事务；区间上限为昨天（今天由接口实时统计）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+# 允许脚本以 “python scripts/xxx.py” 方式运行（sys.path[0] 会指向 scripts/ 目录）
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from app.services.dashboard_rollup import rollup_days
+from app.utils.db import get_engine, get_session_factory
+
+
+async def _main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--days", type=int, default=None, help="回填最近 N 天（不含今天）")
+    p.add_argument("--from", dest="date_from", default=None, help="起始日期 YYYY-MM-DD（UTC）")
+    p.add_argument("--to", dest="date_to", default=None, help="结束日期 YYYY-MM-DD（UTC，默认昨天）")
+    p.add_argument("--chunk-days", dest="chunk_days", type=int, default=31, help="每个事务处理的天数")
+    args = p.parse_args()
+
+    yesterday = datetime.now(tz=UTC).date() - timedelta(days=1)
+    date_to = min(date.fromisoformat(args.date_to), yesterday) if args.date_to else yesterday
+    if args.date_from:
+        date_from = date.fromisoformat(args.date_from)
+    elif args.days:
+        date_from = yesterday - timedelta(days=int(args.days) - 1)
+    else:
+        raise SystemExit("缺少 --days 或 --from")
+    if date_from > date_to:
+        raise SystemExit(f"日期区间为空：{date_from} > {date_to}")
+
+    chunk = max(1, int(args.chunk_days))
+    total = 0
+    session_factory = get_session_factory()
+    cur = date_from
+    while cur <= date_to:
+        end = min(cur + timedelta(days=chunk - 1), date_to)
+        async with session_factory() as session:
+            total += await rollup_days(session=session, date_from=cur, date_to=end)
+            await session.commit()
+        print(f"rolled up {cur} .. {end}")
+        cur = end + timedelta(days=1)
+
+    print(f"OK: backfilled {total} day(s) {date_from} .. {date_to}")
+    # 主动释放连接池，避免脚本退出时触发 “Event loop is closed” 的清理警告
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,169 @@
+"""微基准：中间件栈（纯 ASGI vs 旧 BaseHTTPMiddleware）单请求延迟。
+
+用法（进程内 ASGI 调用，不经网络；鉴权 GET 需可连接的 MySQL/Redis，已执行 alembic upgrade head）：
+    cd backend && python scripts/bench_middleware_stack.py
+
+环境变量：
+- BENCH_REQUESTS：每个场景请求次数（默认 2000）
+- BENCH_WARMUP：预热次数（默认 200）
+- BENCH_AUTH_PATH：鉴权 GET 路径（默认 /api/v1/cart，使用随机 USER token）
+
+说明：
+- after：create_app() 当前的纯 ASGI 中间件栈。
+- before：同一应用，将 4 个中间件替换为与基线提交一致的 BaseHTTPMiddleware 版本
+  （审计写入逻辑复用 `_record_audit`，两侧只差中间件包装方式）。
+
+输出：每个场景 before/after 的 p50/p99（ms）与 ops/s。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from uuid import uuid4
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.main import create_app  # noqa: E402
+from app.middleware.audit_log import AuditLogMiddleware, _record_audit  # noqa: E402
+from app.middleware.rbac_context import RbacContextMiddleware  # noqa: E402
+from app.middleware.request_id import RequestIdMiddleware  # noqa: E402
+from app.middleware.request_logger import RequestLoggerMiddleware, logger as request_logger  # noqa: E402
+from app.services.rbac import parse_actor_from_bearer_token  # noqa: E402
+from app.utils.jwt_token import create_user_token  # noqa: E402
+from app.utils.redis_client import get_redis  # noqa: E402
+from app.utils.settings import settings  # noqa: E402
+
+
+class _LegacyRequestId(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        rid = request.headers.get(settings.request_id_header) or str(uuid.uuid4())
+        request.state.request_id = rid
+        response = await call_next(request)
+        response.headers[settings.request_id_header] = rid
+        return response
+
+
+class _LegacyRequestLogger(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        actor = getattr(request.state, "actor", None)
+        request_logger.info(
+            "request_id=%s method=%s path=%s status=%s cost_ms=%.2f actor_type=%s actor_id=%s ip=%s ua=%s",
+            getattr(request.state, "request_id", ""),
+            request.method,
+            request.url.path,
+            response.status_code,
+            (time.perf_counter() - start) * 1000,
+            getattr(actor, "actor_type", None),
+            getattr(actor, "sub", None),
+            getattr(getattr(request, "client", None), "host", None),
+            request.headers.get("User-Agent"),
+        )
+        return response
+
+
+class _LegacyRbacContext(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request.state.actor = None
+        auth = request.headers.get("Authorization")
+        if auth and auth.lower().startswith("bearer "):
+            try:
+                request.state.actor = await parse_actor_from_bearer_token(
+                    token=auth.split(" ", 1)[1].strip(), redis=get_redis()
+                )
+            except Exception:  # noqa: BLE001
+                request.state.actor = None
+        return await call_next(request)
+
+
+class _LegacyAuditLog(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        await _record_audit(request=request, status_code=int(response.status_code))
+        return response
+
+
+_LEGACY = {
+    RequestIdMiddleware: _LegacyRequestId,
+    RequestLoggerMiddleware: _LegacyRequestLogger,
+    RbacContextMiddleware: _LegacyRbacContext,
+    AuditLogMiddleware: _LegacyAuditLog,
+}
+
+
+def _build_app(*, legacy: bool):
+    app = create_app()
+    if legacy:
+        # middleware_stack 在首个请求时才构建，此处替换 user_middleware 即可
+        app.user_middleware = [
+            Middleware(_LEGACY.get(m.cls, m.cls), *m.args, **m.kwargs) for m in app.user_middleware
+        ]
+    return app
+
+
+def _pct(sorted_ms: list[float], p: float) -> float | None:
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[int(p * (len(sorted_ms) - 1))], 3)
+
+
+async def _measure(*, app, path: str, headers: dict[str, str], n: int, warmup: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(warmup):
+            await client.get(path, headers=headers)
+        lat: list[float] = []
+        statuses: set[int] = set()
+        t_start = time.perf_counter()
+        for _ in range(n):
+            t0 = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            lat.append((time.perf_counter() - t0) * 1000)
+            statuses.add(resp.status_code)
+        elapsed = time.perf_counter() - t_start
+    lat.sort()
+    return {
+        "statuses": sorted(statuses),
+        "p50Ms": _pct(lat, 0.50),
+        "p99Ms": _pct(lat, 0.99),
+        "opsPerSec": round(n / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def main() -> int:
+    n = int(os.getenv("BENCH_REQUESTS", "2000"))
+    warmup = int(os.getenv("BENCH_WARMUP", "200"))
+    auth_path = os.getenv("BENCH_AUTH_PATH", "/api/v1/cart")
+
+    # 请求日志会显著放大两侧耗时且与中间件形态无关：基准期间静默
+    request_logger.disabled = True
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    scenarios = [
+        ("health", "/api/v1/health", {}),
+        ("authenticatedGet", auth_path, {"Authorization": f"Bearer {create_user_token(user_id=str(uuid4()))}"}),
+    ]
+    report: dict = {"requests": n, "warmup": warmup, "scenarios": {}}
+    for name, path, headers in scenarios:
+        report["scenarios"][name] = {
+            "path": path,
+            "before": await _measure(app=_build_app(legacy=True), path=path, headers=headers, n=n, warmup=warmup),
+            "after": await _measure(app=_build_app(legacy=False), path=path, headers=headers, n=n, warmup=warmup),
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,172 @@
+"""压测：Redis 限流/短信验证码——逐条命令（legacy）vs Lua 脚本（单次往返）。
+
+用法（需可连接的 Redis，读取 REDIS_HOST/REDIS_PORT/REDIS_DB 配置）：
+    cd backend && python scripts/bench_redis_rate_limit.py
+
+环境变量：
+- BENCH_TARGET：rate_limit（默认）| sms_request | sms_verify
+- BENCH_MODE：lua（默认）| legacy（改造前的多次往返实现，仅用于对比）
+- BENCH_OPS：总操作数（默认 20000）
+- BENCH_CONCURRENCY：并发协程数（默认 50）
+- BENCH_KEYS：参与的不同 key 数（默认 1000；越小越接近热点 key）
+
+输出：吞吐（ops/s）、p50/p99 延迟与放行/拒绝计数。脚本使用随机前缀的临时 key，结束时清理。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import HTTPException  # noqa: E402
+from redis.asyncio import ConnectionPool, Redis  # noqa: E402
+
+from app.services.rate_limit import hit_sliding_window  # noqa: E402
+from app.services.sms_code_service import SmsCodeService  # noqa: E402
+from app.utils.settings import settings  # noqa: E402
+
+
+def _pct(sorted_ms: list[float], p: float) -> float | None:
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[int(p * (len(sorted_ms) - 1))], 2)
+
+
+async def _legacy_rate_limit(redis: Redis, *, key: str, limit: int) -> bool:
+    # 改造前：固定窗口 INCR + EXPIRE（两次往返，非原子）
+    k = f"{key}:{int(time.time()) // 60}"
+    n = int(await redis.incr(k))
+    if n == 1:
+        await redis.expire(k, 120)
+    return n <= limit
+
+
+async def _legacy_sms_request(redis: Redis, *, scene: str, phone: str) -> bool:
+    svc = SmsCodeService
+    if await redis.exists(svc._lock_key(scene, phone)):
+        return False
+    if await redis.exists(svc._cooldown_key(scene, phone)):
+        return False
+    daily_key = svc._daily_key(scene, phone)
+    n = await redis.incr(daily_key)
+    if n == 1:
+        await redis.expire(daily_key, svc._seconds_until_next_utc_day())
+    if n > svc._DAILY_LIMIT:
+        return False
+    await redis.set(svc._code_key(scene, phone), "123456", ex=svc._CODE_TTL_SECONDS)
+    await redis.set(svc._cooldown_key(scene, phone), "1", ex=svc._RESEND_COOLDOWN_SECONDS)
+    return True
+
+
+async def _legacy_sms_verify(redis: Redis, *, scene: str, phone: str, code: str) -> bool:
+    svc = SmsCodeService
+    if await redis.exists(svc._lock_key(scene, phone)):
+        return False
+    stored = await redis.get(svc._code_key(scene, phone))
+    if stored is None:
+        return False
+    if stored.decode("utf-8") != code:
+        fail_key = svc._fail_key(scene, phone)
+        n = await redis.incr(fail_key)
+        if n == 1:
+            await redis.expire(fail_key, svc._FAIL_LOCK_SECONDS)
+        if n >= svc._MAX_VERIFY_FAILS:
+            await redis.set(svc._lock_key(scene, phone), "1", ex=svc._FAIL_LOCK_SECONDS)
+        return False
+    await redis.delete(svc._code_key(scene, phone))
+    await redis.delete(svc._fail_key(scene, phone))
+    return True
+
+
+async def main() -> int:
+    target = os.getenv("BENCH_TARGET", "rate_limit").strip().lower()
+    mode = os.getenv("BENCH_MODE", "lua").strip().lower()
+    ops = int(os.getenv("BENCH_OPS", "20000"))
+    concurrency = int(os.getenv("BENCH_CONCURRENCY", "50"))
+    n_keys = max(1, int(os.getenv("BENCH_KEYS", "1000")))
+
+    pool = ConnectionPool(
+        host=settings.redis_host, port=settings.redis_port, db=settings.redis_db, max_connections=concurrency
+    )
+    redis = Redis(connection_pool=pool)
+    prefix = f"bench:{uuid4().hex[:8]}"
+    scene = f"{prefix}:SCENE"
+    svc = SmsCodeService(redis)
+
+    # sms_verify：先为每个手机号写入验证码（奇数次提交错误码以覆盖失败计数分支）
+    if target == "sms_verify":
+        for i in range(n_keys):
+            await redis.set(SmsCodeService._code_key(scene, f"1{i:010d}"), "123456", ex=600)
+
+    async def _op(i: int) -> bool:
+        key_i = i % n_keys
+        phone = f"1{key_i:010d}"
+        if target == "rate_limit":
+            key = f"{prefix}:rl:{key_i}"
+            if mode == "legacy":
+                return await _legacy_rate_limit(redis, key=key, limit=30)
+            return (await hit_sliding_window(key=key, limit=30, window_seconds=60, redis=redis)).allowed
+        code = "123456" if i % 2 == 0 else "000000"
+        try:
+            if target == "sms_request":
+                if mode == "legacy":
+                    return await _legacy_sms_request(redis, scene=scene, phone=phone)
+                await svc.request_code(phone=phone, scene=scene)
+                return True
+            if mode == "legacy":
+                return await _legacy_sms_verify(redis, scene=scene, phone=phone, code=code)
+            await svc.verify_code(phone=phone, scene=scene, sms_code=code)
+            return True
+        except HTTPException:
+            return False
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies_ms: list[float] = []
+    outcomes: list[bool] = []
+
+    async def _one(i: int) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            outcomes.append(await _op(i))
+            latencies_ms.append((time.perf_counter() - t0) * 1000)
+
+    try:
+        t_start = time.perf_counter()
+        await asyncio.gather(*[_one(i) for i in range(ops)])
+        elapsed = time.perf_counter() - t_start
+    finally:
+        async for key in redis.scan_iter(match=f"{prefix}:*"):
+            await redis.delete(key)
+        async for key in redis.scan_iter(match=f"sms:*{scene}*"):
+            await redis.delete(key)
+        await redis.aclose()
+        await pool.aclose()
+
+    allowed = sum(1 for x in outcomes if x)
+    lat = sorted(latencies_ms)
+    report = {
+        "target": target,
+        "mode": mode,
+        "ops": ops,
+        "concurrency": concurrency,
+        "keys": n_keys,
+        "allowed": allowed,
+        "rejected": ops - allowed,
+        "opsPerSec": round(ops / elapsed, 1) if elapsed > 0 else None,
+        "avgMs": round(statistics.fmean(lat), 2) if lat else None,
+        "p50Ms": _pct(lat, 0.50),
+        "p99Ms": _pct(lat, 0.99),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
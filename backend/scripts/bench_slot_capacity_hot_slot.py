@@ -0,0 +1,145 @@
+"""并发压测：单个热点预约时段的容量占用。
+
+用法（需可连接的 MySQL，已执行 alembic upgrade head）：
+    cd backend && python scripts/bench_slot_capacity_hot_slot.py
+
+环境变量：
+- BENCH_CAPACITY：时段总容量（默认 50）
+- BENCH_ATTEMPTS：占用尝试次数（默认 500）
+- BENCH_CONCURRENCY：并发协程数（默认 50）
+- BENCH_MODE：conditional（条件 UPDATE，默认）| legacy（先读后写，仅用于对比超卖）
+
+输出：成功数/失败数/是否超卖、吞吐（ops/s）与 p50/p99 延迟。脚本结束时删除临时排期行。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from uuid import uuid4
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.models.enums import CommonEnabledStatus  # noqa: E402
+from app.models.venue_schedule import VenueSchedule  # noqa: E402
+from app.services.booking_capacity_rules import can_reserve_capacity, reserve_capacity  # noqa: E402
+from app.services.slot_capacity import SlotKey, try_reserve_slot  # noqa: E402
+from app.utils.settings import settings  # noqa: E402
+
+
+def _pct(sorted_ms: list[float], p: float) -> float | None:
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[int(p * (len(sorted_ms) - 1))], 2)
+
+
+async def _legacy_reserve(*, session, slot: SlotKey) -> bool:
+    sched = (
+        await session.scalars(
+            select(VenueSchedule)
+            .where(
+                VenueSchedule.venue_id == slot.venue_id,
+                VenueSchedule.service_type == slot.service_type,
+                VenueSchedule.booking_date == slot.booking_date,
+                VenueSchedule.time_slot == slot.time_slot,
+            )
+            .limit(1)
+        )
+    ).first()
+    if sched is None or not can_reserve_capacity(remaining_capacity=int(sched.remaining_capacity)):
+        return False
+    sched.remaining_capacity = reserve_capacity(remaining_capacity=int(sched.remaining_capacity))
+    return True
+
+
+async def main() -> int:
+    capacity = int(os.getenv("BENCH_CAPACITY", "50"))
+    attempts = int(os.getenv("BENCH_ATTEMPTS", "500"))
+    concurrency = int(os.getenv("BENCH_CONCURRENCY", "50"))
+    mode = os.getenv("BENCH_MODE", "conditional").strip().lower()
+
+    engine = create_async_engine(settings.mysql_dsn(), pool_size=concurrency, max_overflow=0)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    slot = SlotKey(
+        venue_id=str(uuid4()),
+        service_type="BENCH",
+        booking_date=date.today() + timedelta(days=1),
+        time_slot="09:00-10:00",
+    )
+    sched_id = str(uuid4())
+    async with session_factory() as session:
+        session.add(
+            VenueSchedule(
+                id=sched_id,
+                venue_id=slot.venue_id,
+                service_type=slot.service_type,
+                booking_date=slot.booking_date,
+                time_slot=slot.time_slot,
+                capacity=capacity,
+                remaining_capacity=capacity,
+                status=CommonEnabledStatus.ENABLED.value,
+            )
+        )
+        await session.commit()
+
+    reserve = try_reserve_slot if mode == "conditional" else _legacy_reserve
+    sem = asyncio.Semaphore(concurrency)
+    latencies_ms: list[float] = []
+    outcomes: list[bool] = []
+
+    async def _one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            async with session_factory() as session:
+                ok = await reserve(session=session, slot=slot)
+                await session.commit()
+            latencies_ms.append((time.perf_counter() - t0) * 1000)
+            outcomes.append(ok)
+
+    try:
+        t_start = time.perf_counter()
+        await asyncio.gather(*[_one() for _ in range(attempts)])
+        elapsed = time.perf_counter() - t_start
+
+        async with session_factory() as session:
+            remaining = int(
+                (await session.scalars(select(VenueSchedule.remaining_capacity).where(VenueSchedule.id == sched_id))).one()
+            )
+    finally:
+        async with session_factory() as session:
+            await session.execute(delete(VenueSchedule).where(VenueSchedule.id == sched_id))
+            await session.commit()
+        await engine.dispose()
+
+    succeeded = sum(1 for x in outcomes if x)
+    lat = sorted(latencies_ms)
+    report = {
+        "mode": mode,
+        "capacity": capacity,
+        "attempts": attempts,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "rejected": attempts - succeeded,
+        "remainingAfter": remaining,
+        # 超卖：成功数超过容量，或 成功数 + 剩余 != 容量（丢失更新）
+        "oversold": succeeded > capacity or succeeded + remaining != capacity,
+        "opsPerSec": round(attempts / elapsed, 1) if elapsed > 0 else None,
+        "avgMs": round(statistics.fmean(lat), 2) if lat else None,
+        "p50Ms": _pct(lat, 0.50),
+        "p99Ms": _pct(lat, 0.99),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
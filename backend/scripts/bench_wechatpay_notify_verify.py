@@ -0,0 +1,152 @@
+"""压测：微信支付回调验签 / 预支付签名——每次读文件+解析（legacy）vs 缓存的密钥材料。
+
+用法（无需外部服务；脚本自行生成 RSA-2048 证书与私钥到临时目录）：
+    cd backend && python scripts/bench_wechatpay_notify_verify.py
+
+环境变量：
+- BENCH_OPS：验签每种模式的操作数（默认 2000）
+- BENCH_SIGN_OPS：签名每种模式的操作数（默认 200；legacy 每次解析私钥，较慢）
+- BENCH_CONCURRENCY：并发协程数（默认 50）
+
+输出：验签（callbacks/s）与签名（signs/s）在 legacy / cached 两种模式下的吞吐与 p50/p99 延迟。
+legacy 模式在事件循环内同步执行（与改造前一致），cached 模式走 services/wechatpay_crypto.py（线程中执行）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import padding, rsa  # noqa: E402
+from cryptography.hazmat.primitives.serialization import load_pem_private_key  # noqa: E402
+from cryptography.x509 import load_pem_x509_certificate  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from app.services.wechatpay_crypto import sign_with_mch_key, verify_platform_signature  # noqa: E402
+from app.utils.settings import settings  # noqa: E402
+
+
+def _pct(sorted_ms: list[float], p: float) -> float | None:
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[int(p * (len(sorted_ms) - 1))], 3)
+
+
+def _write_material(tmpdir: str) -> tuple[rsa.RSAPrivateKey, str, str, str]:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "bench")])
+    now = datetime.now(tz=UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(tmpdir, "platform.pem")
+    key_path = os.path.join(tmpdir, "apiclient_key.pem")
+    with open(cert_path, "wb") as f:  # noqa: PTH123
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:  # noqa: PTH123
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+    return key, cert_path, key_path, format(cert.serial_number, "X")
+
+
+async def _legacy_verify(*, cert_path: str, message: bytes, signature: bytes) -> None:
+    with open(cert_path, "rb") as f:  # noqa: PTH123
+        cert = load_pem_x509_certificate(f.read())
+    cert.public_key().verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+
+
+async def _legacy_sign(*, key_path: str, message: str) -> str:
+    with open(key_path, "rb") as f:  # noqa: PTH123
+        key = load_pem_private_key(f.read(), password=None)
+    return base64.b64encode(key.sign(message.encode("utf-8"), padding.PKCS1v15(), hashes.SHA256())).decode()
+
+
+async def _measure(op, *, ops: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies_ms: list[float] = []
+
+    async def _one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await op()
+            latencies_ms.append((time.perf_counter() - t0) * 1000)
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*[_one() for _ in range(ops)])
+    elapsed = time.perf_counter() - t_start
+    lat = sorted(latencies_ms)
+    return {
+        "opsPerSec": round(ops / elapsed, 1) if elapsed > 0 else None,
+        "avgMs": round(statistics.fmean(lat), 3) if lat else None,
+        "p50Ms": _pct(lat, 0.50),
+        "p99Ms": _pct(lat, 0.99),
+    }
+
+
+async def main() -> int:
+    ops = int(os.getenv("BENCH_OPS", "2000"))
+    sign_ops = int(os.getenv("BENCH_SIGN_OPS", "200"))
+    concurrency = int(os.getenv("BENCH_CONCURRENCY", "50"))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        key, cert_path, key_path, serial = _write_material(tmpdir)
+        settings.wechat_pay_platform_cert_pem_or_path = cert_path
+        settings.wechat_pay_mch_private_key_pem_or_path = key_path
+
+        body = json.dumps({"id": "evt", "resource": {"ciphertext": "x" * 512}})
+        message = f"1700000000\nnonce\n{body}\n".encode("utf-8")
+        signature = key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+        sign_message = "POST\n/v3/pay/transactions/jsapi\n1700000000\nnonce\n{}\n"
+
+        report = {
+            "ops": ops,
+            "signOps": sign_ops,
+            "concurrency": concurrency,
+            "verify": {
+                "legacy": await _measure(
+                    lambda: _legacy_verify(cert_path=cert_path, message=message, signature=signature),
+                    ops=ops,
+                    concurrency=concurrency,
+                ),
+                "cached": await _measure(
+                    lambda: verify_platform_signature(serial=serial, message=message, signature=signature),
+                    ops=ops,
+                    concurrency=concurrency,
+                ),
+            },
+            "sign": {
+                "legacy": await _measure(
+                    lambda: _legacy_sign(key_path=key_path, message=sign_message), ops=sign_ops, concurrency=concurrency
+                ),
+                "cached": await _measure(
+                    lambda: sign_with_mch_key(sign_message), ops=sign_ops, concurrency=concurrency
+                ),
+            },
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,86 @@
+"""
+支付成功 outbox 死信查看与回放（payment_outbox_dead_letters）。
+
+用途：
+- 履约重试耗尽或业务校验失败（如服务包模板缺失）的事件会进入死信表；修复数据/配置后回放，
+  事件回到 PENDING，由排空任务（app/tasks/payments.py）或 --process 立即重新履约（履约幂等，可重复回放）。
+
+运行方式（在 docker compose 环境）：
+- 查看未回放死信：docker compose exec backend python scripts/replay_payment_outbox.py --list
+- 回放指定订单：docker compose exec backend python scripts/replay_payment_outbox.py --order-id <orderId> [--order-id ...]
+- 回放指定事件：docker compose exec backend python scripts/replay_payment_outbox.py --event-id <eventId>
+- 回放全部未回放死信并在当前进程立即处理：... replay_payment_outbox.py --all --process
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 允许脚本以 “python scripts/xxx.py” 方式运行（sys.path[0] 会指向 scripts/ 目录）
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from sqlalchemy import select
+
+from app.models.payment_outbox import PaymentOutboxDeadLetter
+from app.services.payment_outbox import process_payment_outbox_event, replay_dead_letters
+from app.utils.db import get_engine, get_session_factory
+
+
+async def _list(*, limit: int) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        rows = (
+            await session.scalars(
+                select(PaymentOutboxDeadLetter)
+                .where(PaymentOutboxDeadLetter.replayed_at.is_(None))
+                .order_by(PaymentOutboxDeadLetter.created_at)
+                .limit(limit)
+            )
+        ).all()
+    for x in rows:
+        print(f"{x.created_at:%Y-%m-%d %H:%M:%S}  event={x.event_id}  order={x.order_id}  attempts={x.attempts}  error={x.error}")
+    print(f"total={len(rows)}")
+
+
+async def _main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--list", action="store_true", help="只列出未回放的死信")
+    p.add_argument("--event-id", dest="event_ids", action="append", default=[], help="回放指定事件（可重复）")
+    p.add_argument("--order-id", dest="order_ids", action="append", default=[], help="回放指定订单（可重复）")
+    p.add_argument("--all", action="store_true", help="回放全部未回放死信（受 --limit 限制）")
+    p.add_argument("--limit", type=int, default=100, help="单次最多处理的死信条数")
+    p.add_argument("--process", action="store_true", help="回放后在当前进程立即履约（默认交给排空任务）")
+    args = p.parse_args()
+
+    limit = max(1, int(args.limit))
+    try:
+        if args.list:
+            await _list(limit=limit)
+            return
+        if not (args.event_ids or args.order_ids or args.all):
+            raise SystemExit("缺少 --event-id / --order-id / --all")
+
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            event_ids = await replay_dead_letters(
+                session=session, event_ids=args.event_ids or None, order_ids=args.order_ids or None, limit=limit
+            )
+            await session.commit()
+        print(f"replayed {len(event_ids)} event(s)")
+
+        if args.process:
+            async with session_factory() as session:
+                for event_id in event_ids:
+                    outcome = await process_payment_outbox_event(session=session, event_id=event_id)
+                    print(f"{event_id}: {outcome}")
+    finally:
+        await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
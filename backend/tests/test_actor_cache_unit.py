@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.provider_user import ProviderUser
+from app.services.actor_cache import _ActorCache, _dirty_subs
+from app.services.rbac import ActorType, parse_actor_from_bearer_token, peek_actor_type
+from app.utils.jwt_admin_token import create_admin_token
+from app.utils.jwt_dealer_token import create_dealer_token
+from app.utils.jwt_provider_token import create_provider_token
+from app.utils.jwt_token import create_user_token
+
+
+class _FakeRedis:
+    def __init__(self, blacklisted: set[str] | None = None) -> None:
+        self.blacklisted = blacklisted or set()
+        self.exists_calls: list[str] = []
+
+    async def exists(self, key: str) -> int:
+        self.exists_calls.append(key)
+        return 1 if key in self.blacklisted else 0
+
+
+def test_single_pass_resolves_each_actor_type() -> None:
+    admin_token, _ = create_admin_token(admin_id="a1")
+    provider_token, _ = create_provider_token(actor_type="PROVIDER_STAFF", actor_id="s1")
+    dealer_token, _ = create_dealer_token(actor_id="d1")
+    user_token = create_user_token(user_id="u1", channel="MINI_PROGRAM")
+
+    cases = [
+        (admin_token, ActorType.ADMIN, "a1", 1),
+        (provider_token, ActorType.PROVIDER_STAFF, "s1", 1),
+        (dealer_token, ActorType.DEALER, "d1", 0),
+        (user_token, ActorType.USER, "u1", 1),
+    ]
+    for token, actor_type, sub, exists_calls in cases:
+        redis = _FakeRedis()
+        actor = asyncio.run(parse_actor_from_bearer_token(token=token, redis=redis))
+        assert (actor.actor_type, actor.sub) == (actor_type, sub)
+        assert actor.jti
+        assert len(redis.exists_calls) == exists_calls
+    assert peek_actor_type(user_token) == "USER"
+    assert peek_actor_type("not-a-jwt") is None
+
+
+def test_blacklisted_or_garbage_token_is_rejected() -> None:
+    token, jti = create_admin_token(admin_id="a1")
+    with pytest.raises(HTTPException):
+        asyncio.run(parse_actor_from_bearer_token(token=token, redis=_FakeRedis({f"admin:token:blacklist:{jti}"})))
+    with pytest.raises(HTTPException):
+        asyncio.run(parse_actor_from_bearer_token(token="garbage", redis=_FakeRedis()))
+
+
+def test_cache_evicts_by_jti_and_sub_and_respects_token_exp() -> None:
+    cache = _ActorCache(max_entries=10, ttl_seconds=60)
+    cache.put("j1", sub="s1", actor="A1", provider=None, token_exp=None)
+    cache.put("j2", sub="s1", actor="A2", provider=None, token_exp=None)
+    cache.put("j3", sub="s2", actor="A3", provider=None, token_exp=None)
+    assert cache.get("j1", sub="s1") is not None
+    assert cache.get("j1", sub="other") is None
+
+    cache.evict(subs=["s1"])
+    assert cache.get("j2", sub="s1") is None
+    cache.evict(jtis=["j3"])
+    assert cache.get("j3", sub="s2") is None
+
+    cache.put("j4", sub="s4", actor="A4", provider=None, token_exp=int(time.time()) - 1)
+    assert cache.get("j4", sub="s4") is None
+
+
+def _persistent(session: Session, obj):
+    make_transient_to_detached(obj)
+    session.add(obj)
+    return obj
+
+
+def test_only_status_changes_mark_sub_for_invalidation() -> None:
+    session = Session()
+    suspended = _persistent(
+        session, ProviderUser(id="p1", provider_id="prov", username="a", password_hash="h", status="ACTIVE")
+    )
+    renamed = _persistent(
+        session, ProviderUser(id="p2", provider_id="prov", username="b", password_hash="h", status="ACTIVE")
+    )
+
+    suspended.status = "SUSPENDED"
+    renamed.username = "b2"
+    assert _dirty_subs(session) == {"p1"}
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+
+from app.services.ai import gateway, response_cache
+from app.services.ai.response_cache import (
+    AiResponseCache,
+    CachedAiResponse,
+    cache_ttl_seconds,
+    config_fingerprint,
+    normalize_user_input,
+    purge_response_cache,
+)
+from app.services.ai.types import AiCallContext, AiProviderSnapshot, AiStrategySnapshot
+
+
+class _FakeRedis:
+    """只实现响应缓存用到的命令（值 + ZSET；TTL 以绝对时间记录）。"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, tuple[str, float]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+    async def get(self, key: str):
+        v = self.values.get(key)
+        if v is None or v[1] <= time.time():
+            return None
+        return v[0].encode("utf-8")
+
+    async def set(self, key: str, value: str, ex: int) -> bool:
+        self.values[key] = (value, time.time() + ex)
+        return True
+
+    async def zadd(self, key: str, mapping: dict[str, float], xx: bool = False) -> int:
+        z = self.zsets.setdefault(key, {})
+        for m, score in mapping.items():
+            if not xx or m in z:
+                z[m] = score
+        return 0
+
+    async def zremrangebyscore(self, key: str, lo, hi: float) -> int:
+        z = self.zsets.get(key, {})
+        drop = [m for m, s in z.items() if s <= hi]
+        for m in drop:
+            del z[m]
+        return len(drop)
+
+    async def zcard(self, key: str) -> int:
+        return len(self.zsets.get(key, {}))
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        return True
+
+    async def zpopmin(self, key: str, count: int):
+        z = self.zsets.get(key, {})
+        popped = sorted(z.items(), key=lambda kv: kv[1])[:count]
+        for m, _ in popped:
+            del z[m]
+        return [(m.encode("utf-8"), s) for m, s in popped]
+
+    async def zrange(self, key: str, start: int, end: int):
+        return [m.encode("utf-8") for m, _ in sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])]
+
+    async def delete(self, *keys: str) -> int:
+        n = 0
+        for k in keys:
+            n += int(self.values.pop(k, None) is not None) + int(self.zsets.pop(k, None) is not None)
+        return n
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis) -> None:
+        self._redis = redis
+        self._ops: list = []
+
+    def __getattr__(self, name: str):
+        def _queue(*args, **kwargs):
+            self._ops.append(getattr(self._redis, name)(*args, **kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self) -> list:
+        return [await op for op in self._ops]
+
+
+_STRATEGY = AiStrategySnapshot(
+    scene="faq",
+    display_name="常见问题",
+    provider_id="p1",
+    prompt_template="你是助手",
+    generation_config={},
+    constraints={"response_cache_ttl_seconds": 600, "forbid_medical_diagnosis": True},
+)
+_PROVIDER = AiProviderSnapshot(
+    id="p1", name="p", provider_type="OPENAPI_COMPATIBLE", credentials={"api_key": "k1"}, endpoint="https://x", extra={}
+)
+
+
+def test_normalization_and_policy() -> None:
+    assert normalize_user_input("  体检 套餐\n怎么 预约？ ") == normalize_user_input("体检 套餐 怎么 预约?")
+    assert normalize_user_input("ＡＢＣ。") == "abc"
+
+    assert cache_ttl_seconds(_STRATEGY) == 600
+    assert cache_ttl_seconds(replace(_STRATEGY, constraints={})) == 0
+    assert cache_ttl_seconds(replace(_STRATEGY, constraints={"response_cache_ttl_seconds": True})) == 0
+    personalized = replace(_STRATEGY, constraints={"response_cache_ttl_seconds": 600, "personalized": True})
+    assert cache_ttl_seconds(personalized) == 0
+    assert AiResponseCache.for_strategy(personalized, config_version="v", redis=_FakeRedis()) is None
+
+    # 换密钥不影响指纹；改提示词/换 Provider 参数即换版本
+    v = config_fingerprint(_STRATEGY, _PROVIDER)
+    assert config_fingerprint(_STRATEGY, replace(_PROVIDER, credentials={"api_key": "k2"})) == v
+    assert config_fingerprint(replace(_STRATEGY, prompt_template="x"), _PROVIDER) != v
+    assert config_fingerprint(_STRATEGY, replace(_PROVIDER, extra={"default_model": "m2"})) != v
+
+
+def test_lru_evicts_least_recently_used_and_purge_clears_scene(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(response_cache.settings, "ai_response_cache_max_entries_per_scene", 2)
+    redis = _FakeRedis()
+    cache = AiResponseCache.for_strategy(_STRATEGY, config_version="v1", redis=redis)
+    assert cache is not None
+
+    async def _run() -> None:
+        assert await cache.get(user_input="a") is None
+        await cache.put(user_input="a", response=CachedAiResponse(content="A", provider_type="X"))
+        await cache.put(user_input="b", response=CachedAiResponse(content="B", provider_type="X"))
+        assert (await cache.get(user_input="a？")).content == "A"  # 近似输入命中，并刷新 LRU
+        await cache.put(user_input="c", response=CachedAiResponse(content="C", provider_type="X"))
+
+        assert await cache.get(user_input="b") is None
+        assert (await cache.get(user_input="a")).content == "A"
+        assert (await cache.get(user_input="c")).content == "C"
+
+        assert await purge_response_cache(scene="faq", redis=redis) == 2
+        assert await cache.get(user_input="a") is None
+
+    asyncio.run(_run())
+
+
+def test_gateway_serves_risk_refusal_from_cache_and_skips_personalized(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _FakeRedis()
+    monkeypatch.setattr(response_cache, "get_redis", lambda: redis)
+    strategy = {"s": _STRATEGY}
+
+    async def _resolve_snapshots(*, scene: str):
+        return strategy["s"], _PROVIDER
+
+    monkeypatch.setattr(gateway, "resolve_snapshots", _resolve_snapshots)
+    ctx = AiCallContext(user_id="u1", request_id="r1")
+
+    async def _run() -> None:
+        first = await gateway.call_ai(scene="faq", user_input="我是不是得了糖尿病", context=ctx)
+        assert first.provider.provider_type == "RISK_BLOCKED" and not first.cache_hit
+        again = await gateway.call_ai(scene="faq", user_input="我是不是得了糖尿病？", context=ctx)
+        assert again.cache_hit and again.content == first.content
+        assert again.provider.provider_type == "RISK_BLOCKED"
+        assert again.config_version == config_fingerprint(_STRATEGY, _PROVIDER)
+
+        strategy["s"] = replace(_STRATEGY, constraints={**_STRATEGY.constraints, "personalized": True})
+        redis.values.clear()
+        await gateway.call_ai(scene="faq", user_input="我是不是得了糖尿病", context=ctx)
+        assert redis.values == {}
+
+    asyncio.run(_run())
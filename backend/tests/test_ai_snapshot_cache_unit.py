@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.ai_provider import AiProvider
+from app.models.ai_strategy import AiStrategy
+from app.services.ai import repository
+from app.services.ai.repository import _MISS, _dirty_keys, _SnapshotCache
+from app.services.ai.types import AiProviderSnapshot, AiStrategySnapshot
+
+_STRATEGY = AiStrategySnapshot(
+    scene="faq", display_name="", provider_id="p1", prompt_template="", generation_config={}, constraints={}
+)
+_PROVIDER = AiProviderSnapshot(
+    id="p1",
+    name="p",
+    provider_type="OPENAPI_COMPATIBLE",
+    credentials={},
+    endpoint=None,
+    extra={"rateLimitPerMinute": 5},
+)
+
+
+def test_put_is_dropped_when_invalidated_during_load() -> None:
+    cache = _SnapshotCache(max_entries=2, ttl_seconds=60)
+    gen = cache.generation
+    cache.evict(["s:faq"])  # 回源期间发生失效
+    cache.put("s:faq", _STRATEGY, generation=gen)
+    assert cache.get("s:faq", AiStrategySnapshot) is _MISS
+
+    cache.put("s:faq", None, generation=cache.generation)  # 负缓存
+    assert cache.get("s:faq", AiStrategySnapshot) is None
+    for k in ("s:a", "s:b"):
+        cache.put(k, _STRATEGY, generation=cache.generation)
+    assert cache.get("s:faq", AiStrategySnapshot) is _MISS
+
+
+def test_flush_collects_strategy_scene_and_provider_id() -> None:
+    session = Session()
+    session.add(AiStrategy(id="s1", scene="faq", display_name="", prompt_template=""))
+    session.add(AiProvider(id="p1", name="p", provider_type="OPENAPI_COMPATIBLE"))
+    assert _dirty_keys(session) == {"s:faq", "p:p1"}
+
+
+def test_resolve_hits_cache_without_db_until_invalidated(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(repository, "in_pytest", lambda: False)
+    monkeypatch.setattr(repository, "_cache", _SnapshotCache(max_entries=16, ttl_seconds=60))
+    loads: list[str] = []
+
+    class _Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def _load_strategy(session, *, scene: str):
+        loads.append(f"s:{scene}")
+        return _STRATEGY if scene == "faq" else None
+
+    async def _load_provider(session, *, provider_id: str):
+        loads.append(f"p:{provider_id}")
+        return _PROVIDER
+
+    monkeypatch.setattr(repository, "get_session_factory", lambda: _Session)
+    monkeypatch.setattr(repository, "load_strategy_by_scene", _load_strategy)
+    monkeypatch.setattr(repository, "load_provider_by_id", _load_provider)
+
+    async def _run() -> None:
+        assert await repository.resolve_snapshots(scene="faq") == (_STRATEGY, _PROVIDER)
+        assert await repository.resolve_snapshots(scene="faq") == (_STRATEGY, _PROVIDER)
+        assert await repository.resolve_snapshots(scene="nope") == (None, None)
+        assert await repository.resolve_snapshots(scene="nope") == (None, None)
+        assert loads == ["s:faq", "p:p1", "s:nope"]
+
+        # 只失效 Provider（例如停用）：Strategy 仍命中，Provider 回源
+        repository._cache.evict(["p:p1"])
+        assert await repository.resolve_snapshots(scene="faq") == (_STRATEGY, _PROVIDER)
+        assert loads[-1] == "p:p1" and len(loads) == 4
+
+    asyncio.run(_run())
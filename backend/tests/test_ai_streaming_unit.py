@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.services.ai.adapters.base import ProviderAdapter
+from app.services.ai.adapters.dashscope_application import DashScopeApplicationAdapter
+from app.services.ai.adapters.dashscope_model import DashScopeModelAdapter
+from app.services.ai.adapters.openai_compatible import OpenAiCompatibleAdapter
+from app.services.ai.sse import format_sse, iter_sse_data
+from app.services.ai.types import AiAdapterResult, AiCallContext, AiProviderSnapshot, AiStrategySnapshot
+from app.utils import http_clients
+
+_STRATEGY = AiStrategySnapshot(
+    scene="health_qa",
+    display_name="健康问答",
+    provider_id="p1",
+    prompt_template="你是助手",
+    generation_config={},
+    constraints={},
+)
+_CTX = AiCallContext(user_id="u1", request_id="r1")
+
+
+def _provider(provider_type: str, **credentials: str) -> AiProviderSnapshot:
+    return AiProviderSnapshot(
+        id="p1",
+        name="p",
+        provider_type=provider_type,
+        credentials={"api_key": "k", **credentials},
+        endpoint="https://ai.example.com",
+        extra={"default_model": "m", "retries": 1},
+    )
+
+
+def _sse_body(*events: object) -> bytes:
+    return b"".join(f"data: {json.dumps(e) if not isinstance(e, str) else e}\n\n".encode() for e in events)
+
+
+def _mock_upstream(monkeypatch: pytest.MonkeyPatch, responses: list[httpx.Response]) -> list[httpx.Request]:
+    seen: list[httpx.Request] = []
+
+    def _handler(req: httpx.Request) -> httpx.Response:
+        seen.append(req)
+        return responses[min(len(seen), len(responses)) - 1]
+
+    real_new_client = http_clients._new_client
+
+    def _mock_client() -> httpx.AsyncClient:
+        c = real_new_client()
+        c._transport = httpx.MockTransport(_handler)
+        return c
+
+    monkeypatch.setattr(http_clients, "_new_client", _mock_client)
+    return seen
+
+
+async def _collect(adapter: ProviderAdapter, provider: AiProviderSnapshot) -> list[str]:
+    return [d async for d in adapter.stream(provider=provider, strategy=_STRATEGY, user_input="你好", context=_CTX)]
+
+
+def test_iter_sse_data_handles_comments_multiline_and_missing_trailing_blank() -> None:
+    body = b': keep-alive\n\nevent: result\ndata: {"a":1}\nid: 3\n\ndata:line1\ndata: line2\n\ndata: tail'
+
+    async def _run() -> list[str]:
+        resp = httpx.Response(200, content=body)
+        return [d async for d in iter_sse_data(resp)]
+
+    assert asyncio.run(_run()) == ['{"a":1}', "line1\nline2", "tail"]
+    assert format_sse("delta", {"content": "你好"}) == 'event: delta\ndata: {"content":"你好"}\n\n'.encode()
+
+
+def test_openai_compatible_stream_relays_deltas(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = _sse_body(
+        {"choices": [{"delta": {"role": "assistant"}}]},
+        {"choices": [{"delta": {"content": "你"}}]},
+        {"choices": [{"delta": {"content": "好"}}]},
+        "[DONE]",
+    )
+    seen = _mock_upstream(monkeypatch, [httpx.Response(200, content=body)])
+
+    assert asyncio.run(_collect(OpenAiCompatibleAdapter(), _provider("OPENAPI_COMPATIBLE"))) == ["你", "好"]
+    assert json.loads(seen[0].content)["stream"] is True
+
+
+def test_dashscope_stream_requests_incremental_sse_and_retries_before_first_delta(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    body = _sse_body(
+        {"output": {"choices": [{"message": {"role": "assistant", "content": "多喝"}}]}},
+        {"output": {"choices": [{"message": {"role": "assistant", "content": "水"}}]}},
+    )
+    seen = _mock_upstream(monkeypatch, [httpx.Response(503), httpx.Response(200, content=body)])
+
+    assert asyncio.run(_collect(DashScopeModelAdapter(), _provider("DASHSCOPE_MODEL"))) == ["多喝", "水"]
+    assert len(seen) == 2
+    assert seen[-1].headers["X-DashScope-SSE"] == "enable"
+    assert json.loads(seen[-1].content)["parameters"]["incremental_output"] is True
+
+    seen = _mock_upstream(monkeypatch, [httpx.Response(200, content=_sse_body({"output": {"text": "好的"}}))])
+    assert asyncio.run(_collect(DashScopeApplicationAdapter(), _provider("DASHSCOPE_APPLICATION", app_id="a1"))) == [
+        "好的"
+    ]
+
+
+def test_stream_without_any_delta_fails_like_execute(monkeypatch: pytest.MonkeyPatch) -> None:
+    _mock_upstream(monkeypatch, [httpx.Response(200, content=_sse_body("[DONE]"))])
+    with pytest.raises(HTTPException) as ei:
+        asyncio.run(_collect(OpenAiCompatibleAdapter(), _provider("OPENAPI_COMPATIBLE")))
+    assert ei.value.status_code == 500
+
+
+def test_default_stream_falls_back_to_execute() -> None:
+    class _Whole(ProviderAdapter):
+        def supports(self, *, strategy: AiStrategySnapshot) -> bool:
+            return True
+
+        async def execute(self, **_kwargs) -> AiAdapterResult:
+            return AiAdapterResult(content="整段回复")
+
+    assert asyncio.run(_collect(_Whole(), _provider("CUSTOM"))) == ["整段回复"]
@@ -0,0 +1,59 @@
+"""纯 ASGI 中间件栈：request.state 语义与响应头保持不变。"""
+
+from __future__ import annotations
+
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.audit_log import AuditLogMiddleware
+from app.middleware.rbac_context import RbacContextMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.request_logger import RequestLoggerMiddleware
+from app.utils.settings import settings
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(RequestLoggerMiddleware)
+    app.add_middleware(RbacContextMiddleware)
+    app.add_middleware(AuditLogMiddleware)
+
+    @app.get("/state")
+    async def _state(request: Request):
+        return {"requestId": request.state.request_id, "actor": request.state.actor}
+
+    @app.get("/stream")
+    async def _stream():
+        async def _gen():
+            for i in range(3):
+                yield f"{i}\n".encode()
+
+        return StreamingResponse(_gen(), media_type="text/plain")
+
+    return app
+
+
+def test_request_id_is_propagated_to_state_and_response_header() -> None:
+    client = TestClient(_app())
+    header = settings.request_id_header
+
+    resp = client.get("/state", headers={header: "rid-123", "Authorization": "Bearer not-a-token"})
+    assert resp.status_code == 200
+    assert resp.json() == {"requestId": "rid-123", "actor": None}
+    assert resp.headers[header] == "rid-123"
+
+    generated = client.get("/state")
+    assert generated.headers[header] == generated.json()["requestId"]
+
+
+def test_streaming_response_passes_through_and_is_logged(caplog) -> None:
+    client = TestClient(_app())
+    with caplog.at_level(logging.INFO, logger="lhmy.request"):
+        resp = client.get("/stream")
+    assert resp.text == "0\n1\n2\n"
+    assert settings.request_id_header in resp.headers
+    assert any("path=/stream status=200" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from app.services import audit_writer
+from app.services.audit_writer import AuditBatchWriter, _encode_row
+
+
+class _FakeDbWriter(AuditBatchWriter):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.fail = False
+        self.batches: list[tuple[bool, list[dict]]] = []
+
+    async def _insert(self, rows: list[dict], *, ignore_duplicates: bool) -> None:
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append((ignore_duplicates, list(rows)))
+
+
+def _row(i: int) -> dict:
+    return {"id": f"id-{i}", "actor_id": "a", "created_at": datetime(2025, 1, 1, 0, 0, i)}
+
+
+def _writer(tmp_path, **kwargs) -> _FakeDbWriter:
+    opts = {
+        "max_queue_size": 100,
+        "batch_size": 3,
+        "flush_interval_seconds": 0.05,
+        "flush_timeout_seconds": 1.0,
+        "spill_dir": str(tmp_path),
+    }
+    opts.update(kwargs)
+    return _FakeDbWriter(**opts)
+
+
+def test_batches_by_size_and_drains_on_stop(tmp_path) -> None:
+    async def _run() -> _FakeDbWriter:
+        w = _writer(tmp_path)
+        w.start()
+        for i in range(7):
+            w.submit(_row(i))
+        await w.stop()
+        return w
+
+    w = asyncio.run(_run())
+    sizes = [len(rows) for _, rows in w.batches]
+    assert sum(sizes) == 7 and max(sizes) <= 3
+    assert not list(tmp_path.iterdir())
+
+
+def test_failed_flush_spills_then_replays_with_insert_ignore(tmp_path) -> None:
+    async def _run() -> _FakeDbWriter:
+        w = _writer(tmp_path)
+        w.fail = True
+        w.start()
+        w.submit(_row(1))
+        w.submit(_row(2))
+        await asyncio.sleep(0.3)
+        assert list(tmp_path.glob("audit-*.jsonl"))
+
+        w.fail = False
+        await w._replay_spill()
+        await w.stop()
+        return w
+
+    w = asyncio.run(_run())
+    replayed = [rows for ignore, rows in w.batches if ignore]
+    assert [r["id"] for rows in replayed for r in rows] == ["id-1", "id-2"]
+    assert replayed[0][0]["created_at"] == datetime(2025, 1, 1, 0, 0, 1)
+    assert not list(tmp_path.iterdir())
+
+
+def test_queue_full_spills_off_the_event_loop(tmp_path) -> None:
+    async def _run() -> None:
+        w = _writer(tmp_path, max_queue_size=1)
+        w._queue = asyncio.Queue(maxsize=1)
+        w.submit(_row(1))
+        w.submit(_row(2))
+        w.submit(_row(3))
+        # submit 不做文件 IO：溢出记录由后台任务合并后在线程中落盘
+        assert not list(tmp_path.iterdir())
+        assert w._overflow_task is not None
+        await w._overflow_task
+        lines = (tmp_path / next(p.name for p in tmp_path.iterdir())).read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2 and '"id-2"' in lines[0] and '"id-3"' in lines[1]
+
+    asyncio.run(_run())
+
+
+def test_replay_reclaims_stale_claims_left_by_a_crash(tmp_path) -> None:
+    stale = tmp_path / "audit-1.jsonl.replaying-dead"
+    stale.write_text(_encode_row(_row(1)) + "\n", encoding="utf-8")
+    old = time.time() - audit_writer._STALE_CLAIM_SECONDS - 1
+    os.utime(stale, (old, old))
+    # 正在被其它进程回放（mtime 新）的认领文件不抢
+    fresh = tmp_path / "audit-2.jsonl.replaying-live"
+    fresh.write_text(_encode_row(_row(2)) + "\n", encoding="utf-8")
+
+    w = _writer(tmp_path)
+    asyncio.run(w._replay_spill())
+
+    assert [r["id"] for _, rows in w.batches for r in rows] == ["id-1"]
+    assert [p.name for p in tmp_path.iterdir()] == ["audit-2.jsonl.replaying-live"]
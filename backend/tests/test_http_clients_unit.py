@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.utils import http_clients
+
+
+def _sample(name: str, **labels: str) -> float:
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_origin_normalizes_default_ports() -> None:
+    assert http_clients._origin("https://api.weixin.qq.com/sns/jscode2session?x=1") == "https://api.weixin.qq.com:443"
+    assert http_clients._origin("https://api.weixin.qq.com:443/cgi-bin/token") == "https://api.weixin.qq.com:443"
+    assert http_clients._origin("http://127.0.0.1:8080/v1") == "http://127.0.0.1:8080"
+
+
+def test_client_is_shared_per_origin_within_a_loop_and_recreated_after_close() -> None:
+    async def _run() -> None:
+        a = http_clients.get_http_client("https://api.example.com/a")
+        b = http_clients.get_http_client("https://api.example.com/b?x=1")
+        c = http_clients.get_http_client("https://other.example.com/a")
+        assert a is b and a is not c
+
+        await http_clients.close_http_clients()
+        assert a.is_closed
+        assert http_clients.get_http_client("https://api.example.com/a") is not a
+        await http_clients.close_http_clients()
+
+    asyncio.run(_run())
+
+
+def test_client_from_another_running_loop_is_closed_on_that_loop_when_replaced() -> None:
+    owner = asyncio.new_event_loop()
+    thread = threading.Thread(target=owner.run_forever, daemon=True)
+    thread.start()
+    try:
+        old = asyncio.run_coroutine_threadsafe(_get("https://api.example.com/a"), owner).result(timeout=5)
+
+        async def _run() -> None:
+            new = http_clients.get_http_client("https://api.example.com/a")
+            assert new is not old
+            await http_clients.close_http_clients()
+
+        asyncio.run(_run())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), owner).result(timeout=5)
+        assert old.is_closed
+    finally:
+        owner.call_soon_threadsafe(owner.stop)
+        thread.join(timeout=5)
+        owner.close()
+
+
+async def _get(url: str) -> httpx.AsyncClient:
+    return http_clients.get_http_client(url)
+
+
+def test_request_records_latency_and_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    def _handler(req: httpx.Request) -> httpx.Response:
+        if req.url.path == "/boom":
+            raise httpx.ConnectError("refused", request=req)
+        return httpx.Response(503 if req.url.path == "/down" else 200, json={"ok": True})
+
+    real_new_client = http_clients._new_client
+    created: list[httpx.AsyncClient] = []
+
+    def _mock_client() -> httpx.AsyncClient:
+        c = real_new_client()
+        c._transport = httpx.MockTransport(_handler)
+        created.append(c)
+        return c
+
+    monkeypatch.setattr(http_clients, "_new_client", _mock_client)
+    up = "unit_test_upstream"
+    before_5xx = _sample("lhmy_upstream_errors_total", upstream=up, kind="5xx")
+    before_transport = _sample("lhmy_upstream_errors_total", upstream=up, kind="transport")
+    before_ok = _sample("lhmy_upstream_request_seconds_count", upstream=up, method="GET", outcome="2xx")
+
+    async def _run() -> None:
+        r = await http_clients.request("GET", "https://u.example.com/ok", upstream=up, timeout=1.0)
+        assert r.json() == {"ok": True}
+        r = await http_clients.request("GET", "https://u.example.com/down", upstream=up)
+        assert r.status_code == 503
+        with pytest.raises(httpx.ConnectError):
+            await http_clients.request("GET", "https://u.example.com/boom", upstream=up)
+        # 同一 origin 的请求复用同一个池化客户端
+        assert len(created) == 1
+        await http_clients.close_http_clients()
+
+    asyncio.run(_run())
+
+    assert _sample("lhmy_upstream_request_seconds_count", upstream=up, method="GET", outcome="2xx") == before_ok + 1
+    assert _sample("lhmy_upstream_errors_total", upstream=up, kind="5xx") == before_5xx + 1
+    assert _sample("lhmy_upstream_errors_total", upstream=up, kind="transport") == before_transport + 1
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.deps import IdempotencyGuard
+from app.services import idempotency
+from app.services.idempotency import IdempotencyCachedResult, IdempotencyClaim, IdempotencyService
+
+
+class _FakeRedis:
+    """只实现幂等用到的命令；EVALSHA 支持释放（比较后删除）与续租（比较后 PEXPIRE，记录续期次数）。"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.renewals = 0
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def set(self, key: str, value, *, nx: bool = False, px=None, ex=None, get: bool = False):
+        value = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        old = self.values.get(key)
+        if nx and old is not None:
+            return old if get else None
+        self.values[key] = value
+        return old if get else True
+
+    async def evalsha(self, sha: str, numkeys: int, key: str, marker: bytes, *args):
+        if sha == idempotency._RENEW.sha:
+            if self.values.get(key) != marker:
+                return 0
+            self.renewals += 1
+            return 1
+        assert sha == idempotency._RELEASE.sha
+        if self.values.get(key) == marker:
+            del self.values[key]
+            return 1
+        return 0
+
+
+_OK = IdempotencyCachedResult(status_code=200, success=True, data={"orderId": "o1"}, error=None)
+_ARGS = {"operation": "create_order", "actor_type": "USER", "actor_id": "u1", "idempotency_key": "k1"}
+
+
+@pytest.fixture(autouse=True)
+def _fast_wait(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(idempotency.settings, "idempotency_wait_timeout_seconds", 1.0)
+
+
+def test_concurrent_retry_waits_for_first_result_instead_of_executing() -> None:
+    svc = IdempotencyService(_FakeRedis())
+    executions: list[str] = []
+
+    async def _handler(name: str):
+        outcome = await svc.claim(**_ARGS)
+        if isinstance(outcome, IdempotencyCachedResult):
+            return outcome
+        executions.append(name)
+        await asyncio.sleep(0.05)
+        await svc.set(**_ARGS, result=_OK)
+        await svc.release(outcome)
+        return _OK
+
+    async def _run():
+        return await asyncio.gather(_handler("a"), _handler("b"))
+
+    first, second = asyncio.run(_run())
+    assert executions == ["a"]
+    assert first == second == _OK
+
+
+def test_release_lets_retry_execute_and_timeout_is_409(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _FakeRedis()
+    svc = IdempotencyService(redis)
+
+    async def _run() -> None:
+        claim = await svc.claim(**_ARGS)
+        assert isinstance(claim, IdempotencyClaim)
+        assert await svc.get(**_ARGS) is None  # 处理中标记对 get 不可见
+
+        # 标记仍在：等待超时
+        monkeypatch.setattr(idempotency.settings, "idempotency_wait_timeout_seconds", 0.05)
+        with pytest.raises(HTTPException) as ei:
+            await svc.claim(**_ARGS)
+        assert ei.value.status_code == 409 and ei.value.detail["code"] == "STATE_CONFLICT"
+
+        # 首个请求未写回结果即结束：释放后重试可重新执行
+        await svc.release(claim)
+        assert isinstance(await svc.claim(**_ARGS), IdempotencyClaim)
+
+    asyncio.run(_run())
+
+
+def test_claim_lease_is_renewed_until_released(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _FakeRedis()
+    svc = IdempotencyService(redis)
+    monkeypatch.setattr(idempotency.settings, "idempotency_claim_lease_seconds", 1)
+
+    async def _run() -> None:
+        claim = await svc.claim(**_ARGS)
+        assert isinstance(claim, IdempotencyClaim) and claim.renewal is not None
+        await asyncio.sleep(0.75)  # 每 1/3 租约续期一次
+        renewed = redis.renewals
+        assert renewed >= 1
+
+        await svc.release(claim)
+        await asyncio.sleep(0)
+        assert claim.renewal.cancelled() and redis.values == {}
+
+        # 结果写回后续租发现标记已被覆盖即自行结束
+        other = await svc.claim(**_ARGS)
+        assert isinstance(other, IdempotencyClaim) and other.renewal is not None
+        await svc.set(**_ARGS, result=_OK)
+        await asyncio.wait_for(other.renewal, timeout=1.0)
+        assert redis.renewals == renewed
+
+    asyncio.run(_run())
+
+
+def test_large_payload_is_compressed_and_legacy_format_still_reads() -> None:
+    redis = _FakeRedis()
+    svc = IdempotencyService(redis)
+    big = IdempotencyCachedResult(status_code=200, success=True, data={"items": ["体检套餐"] * 200}, error=None)
+    key = IdempotencyService._key(**_ARGS)
+
+    async def _run() -> None:
+        await svc.set(**_ARGS, result=big)
+        stored = redis.values[key]
+        assert stored.startswith(b"~z:") and len(stored) < len(json.dumps(big.data, ensure_ascii=False).encode())
+        assert await svc.get(**_ARGS) == big
+
+        redis.values[key] = json.dumps(
+            {"status_code": 409, "success": False, "data": None, "error": {"code": "X"}}
+        ).encode()
+        legacy = await svc.claim(**_ARGS)
+        assert isinstance(legacy, IdempotencyCachedResult) and legacy.error == {"code": "X"}
+
+    asyncio.run(_run())
+
+
+def test_guard_replays_with_current_request_id_and_releases_unfinished_claims(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _FakeRedis()
+    monkeypatch.setattr("app.api.v1.deps.get_redis", lambda: redis)
+    request = SimpleNamespace(state=SimpleNamespace(request_id="req-2"))
+
+    async def _run() -> None:
+        guard = IdempotencyGuard(request)  # type: ignore[arg-type]
+        assert await guard.replay_or_claim(**_ARGS) is None
+        await guard.release()
+        assert redis.values == {}
+
+        await IdempotencyService(redis).set(**_ARGS, result=_OK)
+        replay = await IdempotencyGuard(request).replay_or_claim(**_ARGS)  # type: ignore[arg-type]
+        body = json.loads(replay.body)
+        assert replay.status_code == 200 and body["data"] == {"orderId": "o1"} and body["requestId"] == "req-2"
+
+    asyncio.run(_run())
@@ -0,0 +1,93 @@
+"""集成测试：Admin 仪表盘日汇总（rollup 表 + 当天实时 + 缺失日期兜底）。
+
+规格来源：
+- specs/health-services-platform/design.md -> E-11. Admin 仪表盘统计（v1 最小契约）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.models  # noqa: F401
+from app.main import app
+from app.models.base import Base
+from app.models.dashboard_daily_rollup import DashboardDailyRollup
+from app.models.enums import OrderType, PaymentStatus
+from app.models.order import Order
+from app.services.dashboard_rollup import rollup_days
+from app.utils.db import get_session_factory
+from app.utils.jwt_admin_token import create_admin_token
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db() -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+def _paid_order(*, order_type: str, paid_at: datetime) -> Order:
+    return Order(
+        id=str(uuid4()),
+        user_id=str(uuid4()),
+        order_type=order_type,
+        total_amount=10.0,
+        payment_method="WECHAT",
+        payment_status=PaymentStatus.PAID.value,
+        created_at=paid_at,
+        paid_at=paid_at,
+    )
+
+
+def test_dashboard_reads_rollups_for_closed_days_and_live_today():
+    asyncio.run(_reset_db())
+
+    now = datetime.now(tz=UTC).replace(tzinfo=None)
+    today = now.date()
+    yesterday = today - timedelta(days=1)
+    two_days_ago = today - timedelta(days=2)
+
+    async def _seed_and_rollup() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(_paid_order(order_type=OrderType.SERVICE_PACKAGE.value, paid_at=now))
+            session.add(_paid_order(order_type=OrderType.SERVICE_PACKAGE.value, paid_at=now - timedelta(days=1)))
+            session.add(_paid_order(order_type=OrderType.PRODUCT.value, paid_at=now - timedelta(days=1)))
+            session.add(_paid_order(order_type=OrderType.SERVICE_PACKAGE.value, paid_at=now - timedelta(days=2)))
+            await session.commit()
+
+            # 只汇总昨天；前天留空验证实时兜底
+            assert await rollup_days(session=session, date_from=yesterday, date_to=yesterday) == 1
+            await session.commit()
+            # 幂等：重复汇总不报错
+            assert await rollup_days(session=session, date_from=yesterday, date_to=yesterday) == 1
+            await session.commit()
+
+            row = await session.get(DashboardDailyRollup, yesterday)
+            assert row is not None
+            assert row.service_package_paid_count == 1
+            assert row.ecommerce_paid_count == 1
+
+    asyncio.run(_seed_and_rollup())
+
+    token, _ = create_admin_token(admin_id=str(uuid4()))
+    r = TestClient(app).get("/api/v1/admin/dashboard/summary?range=7d", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    data = r.json()["data"]
+
+    assert data["today"]["servicePackagePaidCount"] == 1
+    sp = {x["date"]: x["count"] for x in data["trends"]["servicePackageOrders"]}
+    ec = {x["date"]: x["count"] for x in data["trends"]["ecommerceOrders"]}
+    assert sp[today.isoformat()] == 1
+    assert sp[yesterday.isoformat()] == 1
+    assert ec[yesterday.isoformat()] == 1
+    assert sp[two_days_ago.isoformat()] == 1
@@ -0,0 +1,133 @@
+"""集成测试：服务包大单权益批量生成（Core 批量插入 + 幂等）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 高端服务卡实例与权益生成规则
+- specs/health-services-platform/tasks.md -> 阶段5-28
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+import app.models  # noqa: F401
+from app.models.base import Base
+from app.models.entitlement import Entitlement
+from app.models.enums import OrderItemType, OrderType, PaymentStatus
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.package_service import PackageService
+from app.models.service_package import ServicePackage
+from app.models.service_package_instance import ServicePackageInstance
+from app.services.entitlement_generation import (
+    count_entitlements_to_generate,
+    generate_entitlements_after_payment_succeeded,
+)
+from app.services.entitlement_qr_signing import parse_payload_text, sign_payload
+from app.utils.db import get_session_factory
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+_SECRET = "test_bulk_entitlement_secret"
+
+
+async def _reset_db() -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+def test_bulk_generation_inserts_all_rows_once():
+    asyncio.run(_reset_db())
+
+    order_id = str(uuid4())
+    template_id = str(uuid4())
+    quantity = 1200
+    service_types = ["MASSAGE", "PHYSIO"]
+
+    async def _seed() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(ServicePackage(id=template_id, name="企业卡", region_level="CITY", tier="T1", description=None))
+            for st in service_types:
+                session.add(
+                    PackageService(id=str(uuid4()), service_package_id=template_id, service_type=st, total_count=3)
+                )
+            session.add(
+                Order(
+                    id=order_id,
+                    user_id=str(uuid4()),
+                    order_type=OrderType.SERVICE_PACKAGE.value,
+                    total_amount=0.0,
+                    payment_status=PaymentStatus.PAID.value,
+                    paid_at=datetime.now(tz=UTC).replace(tzinfo=None),
+                )
+            )
+            session.add(
+                OrderItem(
+                    id=str(uuid4()),
+                    order_id=order_id,
+                    item_type=OrderItemType.SERVICE_PACKAGE.value,
+                    item_id=template_id,
+                    title="企业卡",
+                    quantity=quantity,
+                    unit_price=0.0,
+                    total_price=0.0,
+                    service_package_template_id=template_id,
+                    region_scope="CITY:110100",
+                    tier="T1",
+                )
+            )
+            await session.commit()
+
+    async def _generate() -> int:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            n = await generate_entitlements_after_payment_succeeded(
+                session=session, order_id=order_id, qr_sign_secret=_SECRET, owner_id_override=order_id
+            )
+            await session.commit()
+            return n
+
+    async def _check() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            assert await count_entitlements_to_generate(session=session, order_id=order_id) == quantity * len(
+                service_types
+            )
+            n_ent = await session.scalar(
+                select(func.count()).select_from(Entitlement).where(Entitlement.order_id == order_id)
+            )
+            n_sp = await session.scalar(
+                select(func.count())
+                .select_from(ServicePackageInstance)
+                .where(ServicePackageInstance.order_id == order_id)
+            )
+            assert int(n_ent or 0) == quantity * len(service_types)
+            assert int(n_sp or 0) == quantity
+
+            e = (await session.scalars(select(Entitlement).where(Entitlement.order_id == order_id).limit(1))).first()
+            assert e is not None
+            assert e.owner_id == order_id and e.current_user_id == order_id
+            assert e.applicable_regions == ["CITY:110100"]
+            parsed = parse_payload_text(e.qr_code)
+            assert parsed.sign == sign_payload(
+                secret=_SECRET,
+                entitlement_id=parsed.entitlement_id,
+                voucher_code=parsed.voucher_code,
+                ts=parsed.ts,
+                nonce=parsed.nonce,
+            )
+
+    asyncio.run(_seed())
+    assert asyncio.run(_generate()) == quantity * len(service_types)
+    # 幂等：重复触发不再写入
+    assert asyncio.run(_generate()) == 0
+    asyncio.run(_check())
@@ -0,0 +1,142 @@
+"""集成测试：经销商分账流水（支付成功写入）+ 集合式异步出账（进度/幂等）。
+
+规格来源：
+- specs/health-services-platform/dealer-settlement-v1.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import app.models  # noqa: F401
+from app.main import app
+from app.models.base import Base
+from app.models.dealer import Dealer
+from app.models.dealer_commission_entry import DealerCommissionEntry
+from app.models.enums import DealerCommissionEntryStatus, DealerStatus, OrderType, PaymentStatus
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.settlement_record import SettlementRecord
+from app.services.dealer_settlement import reverse_dealer_commission, run_settlement_job, save_job
+from app.services.payment_callbacks import record_payment_succeeded
+from app.services.settlement_cycle import compute_settlement_cycle_monthly
+from app.utils.db import get_session_factory
+from app.utils.jwt_admin_token import create_admin_token
+from app.utils.redis_client import get_redis
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db_and_redis() -> None:
+    r = get_redis()
+    await r.flushdb()
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+async def _seed_pending_orders(*, dealer_id: str, n: int) -> list[tuple[str, str]]:
+    out: list[tuple[str, str]] = []
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        session.add(Dealer(id=dealer_id, name="IT Dealer", status=DealerStatus.ACTIVE.value))
+        for _ in range(n):
+            order_id, payment_id = str(uuid4()), str(uuid4())
+            session.add(
+                Order(
+                    id=order_id,
+                    user_id=str(uuid4()),
+                    order_type=OrderType.SERVICE_PACKAGE.value,
+                    total_amount=100.0,
+                    payment_method="WECHAT",
+                    payment_status=PaymentStatus.PENDING.value,
+                    dealer_id=dealer_id,
+                )
+            )
+            session.add(
+                Payment(id=payment_id, order_id=order_id, amount=100.0, payment_status=PaymentStatus.PENDING.value)
+            )
+            out.append((order_id, payment_id))
+        await session.commit()
+    return out
+
+
+def test_paid_orders_write_ledger_and_settlement_job_reports_progress():
+    asyncio.run(_reset_db_and_redis())
+    dealer_id = str(uuid4())
+    orders = asyncio.run(_seed_pending_orders(dealer_id=dealer_id, n=3))
+
+    async def _pay_and_refund_one() -> str:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            for order_id, payment_id in orders:
+                await record_payment_succeeded(session=session, order_id=order_id, payment_id=payment_id)
+            await reverse_dealer_commission(session=session, order_id=orders[0][0])
+            await session.commit()
+            entries = (
+                await session.scalars(select(DealerCommissionEntry).where(DealerCommissionEntry.dealer_id == dealer_id))
+            ).all()
+        assert len(entries) == 3
+        assert sorted(e.status for e in entries) == [
+            DealerCommissionEntryStatus.ACTIVE.value,
+            DealerCommissionEntryStatus.ACTIVE.value,
+            DealerCommissionEntryStatus.REVERSED.value,
+        ]
+        return entries[0].cycle
+
+    cycle = asyncio.run(_pay_and_refund_one())
+    assert cycle == compute_settlement_cycle_monthly(dt=datetime.now(tz=UTC))
+
+    admin_token, _jti = create_admin_token(admin_id="00000000-0000-0000-0000-00000000a001")
+    client = TestClient(app)
+
+    async def _run_job() -> dict | None:
+        y, m = int(cycle[:4]), int(cycle[5:7])
+        start = datetime(y, m, 1)
+        end = datetime(y + 1, 1, 1) if m == 12 else datetime(y, m + 1, 1)
+        job = {
+            "jobId": str(uuid4()),
+            "status": "PENDING",
+            "cycle": cycle,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+        }
+        await save_job(redis=get_redis(), job=job)
+        return await run_settlement_job(job_id=job["jobId"])
+
+    job = asyncio.run(_run_job())
+    assert job is not None and job["status"] == "DONE"
+    assert (job["created"], job["existing"]) == (1, 0)
+    assert job["progress"]["stage"] == "upsert" and job["progress"]["done"] == job["progress"]["total"] == 1
+
+    r = client.get(
+        f"/api/v1/admin/dealer-settlements/generate-jobs/{job['jobId']}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["data"]["status"] == "DONE"
+
+    async def _settlement() -> SettlementRecord:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            return (
+                await session.scalars(select(SettlementRecord).where(SettlementRecord.dealer_id == dealer_id))
+            ).one()
+
+    row = asyncio.run(_settlement())
+    # 退款冲销的订单不计入：2 单 * 100 * 默认 10%
+    assert (row.order_count, float(row.amount)) == (2, 20.0)
+
+    # 重跑：幂等，不重复出账
+    job2 = asyncio.run(_run_job())
+    assert job2 is not None and (job2["created"], job2["existing"]) == (0, 1)
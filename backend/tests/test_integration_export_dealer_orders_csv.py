@@ -2,7 +2,7 @@
 
 规格来源（单一真相来源）：
 - specs-prod/admin/security.md#5 导出安全（v1：同步直下，不落盘 TTL=0）
-- specs-prod/admin/api-contracts.md#10(9)（你已拍板：dateFrom/dateTo 必填；maxRows=5000）
+- specs-prod/admin/api-contracts.md#9D（dateFrom/dateTo 必填；流式导出不限行数 + 异步导出任务）
 - specs-prod/admin/tasks.md#TASK-P0-003
 """
 
@@ -22,7 +22,9 @@ from app.main import app
 from app.models.admin import Admin
 from app.models.audit_log import AuditLog
 from app.models.base import Base
+from app.models.notification import Notification
 from app.models.order import Order
+from app.services.dealer_order_export import DealerOrderExportFilters, run_export_job, save_job
 from app.services.password_hashing import hash_password
 from app.utils.db import get_session_factory
 from app.utils.jwt_admin_token import create_admin_token
@@ -147,7 +149,7 @@ def test_export_requires_date_from_to_and_audited_and_csv_attachment():
     assert r_audit.json()["data"]["total"] >= 1
 
 
-def test_export_over_max_rows_rejected_400():
+def test_export_streams_beyond_former_max_rows():
     asyncio.run(_reset_db_and_redis())
 
     admin_id = "00000000-0000-0000-0000-00000000a001"
@@ -221,9 +223,107 @@ def test_export_over_max_rows_rejected_400():
         headers={"Authorization": f"Bearer {admin_token}"},
         params={"dealerId": dealer_id, "dateFrom": "2025-12-01", "dateTo": "2025-12-01"},
     )
-    assert r1.status_code == 400
-    assert r1.json()["success"] is False
-    assert r1.json()["error"]["code"] == "INVALID_ARGUMENT"
+    assert r1.status_code == 200
+    lines = [x for x in r1.content.decode("utf-8").splitlines() if x.strip()]
+    assert len(lines) == 1 + 5001
+
+    async def _audit_row_count() -> int:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            a = (
+                await session.scalars(
+                    select(AuditLog)
+                    .where(AuditLog.resource_type == "EXPORT_DEALER_ORDERS", AuditLog.resource_id == dealer_id)
+                    .limit(1)
+                )
+            ).first()
+            assert a is not None
+            return int((a.metadata_json or {}).get("rowCount") or 0)
+
+    assert asyncio.run(_audit_row_count()) == 5001
+
+
+def test_export_job_writes_file_and_notifies_requester():
+    asyncio.run(_reset_db_and_redis())
+
+    admin_id = "00000000-0000-0000-0000-00000000a001"
+    admin_token, _jti = create_admin_token(admin_id=admin_id)
+    client = TestClient(app)
+    dealer_id = str(uuid4())
+    order_id = str(uuid4())
+    day = datetime(2026, 1, 6, 23, 0, 0, tzinfo=UTC).replace(tzinfo=None)
+
+    async def _seed() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(
+                Order(
+                    id=order_id,
+                    user_id=str(uuid4()),
+                    order_type="SERVICE_PACKAGE",
+                    total_amount=1.0,
+                    payment_method="WECHAT",
+                    payment_status="PAID",
+                    dealer_id=dealer_id,
+                    created_at=day,
+                    paid_at=day,
+                )
+            )
+            await session.commit()
+
+    asyncio.run(_seed())
+
+    # 不依赖 worker：直接写入任务状态并在进程内执行任务体
+    filters = DealerOrderExportFilters(
+        dealer_id=dealer_id,
+        start_utc=datetime(2026, 1, 6, 16, 0, 0),
+        end_exclusive=datetime(2026, 1, 7, 16, 0, 0),
+        date_from="2026-01-07",
+        date_to="2026-01-07",
+    )
+    job_id = str(uuid4())
+
+    async def _run() -> dict | None:
+        await save_job(
+            redis=get_redis(),
+            job={
+                "jobId": job_id,
+                "status": "PENDING",
+                "dealerId": dealer_id,
+                "ctx": {"actorType": "ADMIN", "adminId": admin_id},
+                "filters": filters.to_json(),
+                "fileName": filters.filename(),
+            },
+        )
+        return await run_export_job(job_id=job_id)
+
+    job = asyncio.run(_run())
+    assert job is not None and job["status"] == "DONE" and job["rowCount"] == 1
+
+    r_status = client.get(f"/api/v1/dealer/orders/export-jobs/{job_id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert r_status.status_code == 200
+    assert r_status.json()["data"]["status"] == "DONE"
+
+    r_file = client.get(
+        f"/api/v1/dealer/orders/export-jobs/{job_id}/download", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert r_file.status_code == 200
+    assert "attachment" in (r_file.headers.get("Content-Disposition") or "")
+    assert order_id in r_file.content.decode("utf-8")
+
+    async def _notified() -> int:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            return int(
+                (
+                    await session.execute(
+                        select(func.count()).select_from(Notification).where(Notification.receiver_id == admin_id)
+                    )
+                ).scalar()
+                or 0
+            )
+
+    assert asyncio.run(_notified()) == 1
 
 
 def test_export_date_filter_is_beijing_day_boundary():
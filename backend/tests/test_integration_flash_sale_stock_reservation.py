@@ -0,0 +1,169 @@
+"""集成测试：物流商品抢购库存预占（原子条件更新 + 预占流水）。
+
+规格来源：
+- specs/health-services-platform/tasks.md -> REQ-ECOMMERCE-P0-001（下单占用库存 -> 支付扣减 / 超时释放）
+
+覆盖：
+- 并发抢购同一热点商品：成功单数 == 库存，其余 409 OUT_OF_STOCK，无 5xx（无死锁/超卖）
+- 多商品购物车 all-or-nothing；正反顺序的购物车并发下单不死锁
+- 支付确认/超时释放按流水幂等：重复调用不二次扣减
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+import app.models  # noqa: F401
+from app.main import app
+from app.models.base import Base
+from app.models.enums import ProductFulfillmentType, ProductStatus, StockReservationStatus
+from app.models.order_stock_reservation import OrderStockReservation
+from app.models.product import Product
+from app.services.stock_reservation import confirm_order_stock, release_order_stock
+from app.utils.db import get_session_factory
+from app.utils.jwt_token import create_user_token
+from app.utils.redis_client import get_redis
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+_ADDRESS = {"receiverName": "张三", "receiverPhone": "13800000000", "addressLine": "测试路 1 号"}
+
+
+async def _reset_db_and_redis() -> None:
+    await get_redis().flushdb()
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+async def _seed_products(stocks: dict[str, int]) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for pid, stock in stocks.items():
+            session.add(
+                Product(
+                    id=pid,
+                    provider_id=str(uuid4()),
+                    title=f"P-{pid[:4]}",
+                    fulfillment_type=ProductFulfillmentType.PHYSICAL_GOODS.value,
+                    status=ProductStatus.ON_SALE.value,
+                    price={"original": 10},
+                    stock=stock,
+                    reserved_stock=0,
+                )
+            )
+        await session.commit()
+
+
+async def _place_orders(carts: list[list[tuple[str, int]]]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def _one(cart: list[tuple[str, int]]) -> httpx.Response:
+            token = create_user_token(user_id=str(uuid4()), channel="MINI_PROGRAM")
+            return await client.post(
+                "/api/v1/orders",
+                headers={"Authorization": f"Bearer {token}", "Idempotency-Key": uuid4().hex},
+                json={
+                    "orderType": "PRODUCT",
+                    "items": [{"itemType": "PRODUCT", "itemId": pid, "quantity": q} for pid, q in cart],
+                    "shippingAddress": _ADDRESS,
+                },
+            )
+
+        return list(await asyncio.gather(*[_one(c) for c in carts]))
+
+
+async def _stock_of(pid: str) -> tuple[int, int]:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        p = await session.get(Product, pid)
+        assert p is not None
+        return int(p.stock), int(p.reserved_stock)
+
+
+def test_flash_sale_hot_product_never_oversells():
+    asyncio.run(_reset_db_and_redis())
+    pid = str(uuid4())
+    asyncio.run(_seed_products({pid: 10}))
+
+    responses = asyncio.run(_place_orders([[(pid, 1)] for _ in range(60)]))
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == 10
+    assert statuses.count(409) == 50
+    assert all(r.json()["error"]["code"] == "OUT_OF_STOCK" for r in responses if r.status_code == 409)
+    assert asyncio.run(_stock_of(pid)) == (10, 10)
+
+
+def test_multi_product_cart_is_all_or_nothing_and_deadlock_free():
+    asyncio.run(_reset_db_and_redis())
+    a, b, c = str(uuid4()), str(uuid4()), str(uuid4())
+    asyncio.run(_seed_products({a: 50, b: 1, c: 50}))
+
+    # b 只剩 1 件：只有一单能拿到 b，其它单的 a 预占必须随之回滚
+    responses = asyncio.run(_place_orders([[(a, 2), (b, 1)] for _ in range(5)]))
+    assert sorted(r.status_code for r in responses) == [200, 409, 409, 409, 409]
+    assert asyncio.run(_stock_of(a)) == (50, 2)
+    assert asyncio.run(_stock_of(b)) == (1, 1)
+
+    # 正反顺序的购物车并发：固定锁顺序，不应出现死锁（5xx）
+    carts = [[(a, 1), (c, 1)] if i % 2 == 0 else [(c, 1), (a, 1)] for i in range(20)]
+    responses = asyncio.run(_place_orders(carts))
+    assert [r.status_code for r in responses] == [200] * 20
+    assert asyncio.run(_stock_of(a)) == (50, 22)
+    assert asyncio.run(_stock_of(c)) == (50, 20)
+
+
+def test_confirm_and_release_are_idempotent_via_ledger():
+    asyncio.run(_reset_db_and_redis())
+    pid = str(uuid4())
+    asyncio.run(_seed_products({pid: 5}))
+    responses = asyncio.run(_place_orders([[(pid, 2), (pid, 1)], [(pid, 1)]]))
+    assert [r.status_code for r in responses] == [200, 200]
+    paid_order_id = responses[0].json()["data"]["id"]
+    expired_order_id = responses[1].json()["data"]["id"]
+
+    async def _run() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            # 同一商品的多行明细合并为一行流水
+            rows = (
+                await session.scalars(
+                    select(OrderStockReservation).where(OrderStockReservation.order_id == paid_order_id)
+                )
+            ).all()
+            assert [(r.product_id, r.quantity) for r in rows] == [(pid, 3)]
+
+            assert await confirm_order_stock(session=session, order_id=paid_order_id) == 3
+            assert await confirm_order_stock(session=session, order_id=paid_order_id) == 0
+            first = await release_order_stock(session=session, order_ids=[expired_order_id, paid_order_id])
+            second = await release_order_stock(session=session, order_ids=[expired_order_id])
+            assert (first.products, first.quantity) == (1, 1)
+            assert (second.products, second.quantity) == (0, 0)
+            await session.commit()
+
+        async with session_factory() as session:
+            statuses = dict(
+                (
+                    await session.execute(
+                        select(OrderStockReservation.order_id, OrderStockReservation.status).where(
+                            OrderStockReservation.product_id == pid
+                        )
+                    )
+                ).all()
+            )
+            assert statuses == {
+                paid_order_id: StockReservationStatus.CONFIRMED.value,
+                expired_order_id: StockReservationStatus.RELEASED.value,
+            }
+
+    asyncio.run(_run())
+    assert asyncio.run(_stock_of(pid)) == (2, 0)
@@ -0,0 +1,131 @@
+"""集成测试：库存预占超时释放（集合式批量 + SKIP LOCKED 认领）。
+
+规格来源：
+- specs/health-services-platform/tasks.md -> REQ-ECOMMERCE-P0-001（下单占用库存 -> 超时释放）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+import app.models  # noqa: F401
+from app.models.base import Base
+from app.models.enums import OrderItemType, OrderType, PaymentStatus, ProductFulfillmentType, StockReservationStatus
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_stock_reservation import OrderStockReservation
+from app.models.product import Product
+from app.tasks.inventory import release_expired_stock_once
+from app.utils.db import get_session_factory
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db() -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+def test_sweeper_releases_expired_orders_in_aggregated_batches():
+    asyncio.run(_reset_db())
+
+    now = datetime.now(tz=UTC).replace(tzinfo=None)
+    product_ids = [str(uuid4()), str(uuid4())]
+    expired_ids = [str(uuid4()) for _ in range(7)]
+    live_id = str(uuid4())
+
+    async def _seed() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            for pid in product_ids:
+                session.add(
+                    Product(
+                        id=pid,
+                        provider_id=str(uuid4()),
+                        title="P",
+                        fulfillment_type=ProductFulfillmentType.PHYSICAL_GOODS.value,
+                        price={"original": 10},
+                        stock=100,
+                        reserved_stock=20,
+                    )
+                )
+            for i, oid in enumerate(expired_ids + [live_id]):
+                session.add(
+                    Order(
+                        id=oid,
+                        user_id=str(uuid4()),
+                        order_type=OrderType.PRODUCT.value,
+                        total_amount=10.0,
+                        payment_status=PaymentStatus.PENDING.value,
+                        fulfillment_type=ProductFulfillmentType.PHYSICAL_GOODS.value,
+                        reservation_expires_at=(
+                            (now + timedelta(minutes=30)) if oid == live_id else (now - timedelta(minutes=i + 1))
+                        ),
+                    )
+                )
+                for pid in product_ids:
+                    session.add(
+                        OrderItem(
+                            id=str(uuid4()),
+                            order_id=oid,
+                            item_type=OrderItemType.PRODUCT.value,
+                            item_id=pid,
+                            title="P",
+                            quantity=2,
+                            unit_price=10.0,
+                            unit_price_type="original",
+                            total_price=20.0,
+                        )
+                    )
+                    session.add(
+                        OrderStockReservation(
+                            order_id=oid,
+                            product_id=pid,
+                            quantity=2,
+                            status=StockReservationStatus.RESERVED.value,
+                        )
+                    )
+            await session.commit()
+
+    async def _run() -> dict:
+        # 两个 sweeper 并发：SKIP LOCKED 保证不会重复释放
+        a, b = await asyncio.gather(
+            release_expired_stock_once(batch_size=3, max_seconds=10),
+            release_expired_stock_once(batch_size=3, max_seconds=10),
+        )
+        return {"released": a["released"] + b["released"], "lag": max(a["lagSeconds"], b["lagSeconds"])}
+
+    asyncio.run(_seed())
+    out = asyncio.run(_run())
+    assert out["released"] == 7
+    assert out["lag"] == 0.0
+
+    async def _check() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            for pid in product_ids:
+                p = await session.get(Product, pid)
+                assert p is not None
+                # 20 - 7 单 * 2 件
+                assert int(p.reserved_stock) == 6
+            for oid in expired_ids:
+                o = await session.get(Order, oid)
+                assert o is not None and o.payment_status == PaymentStatus.FAILED.value
+                assert o.reservation_expires_at is None
+            live = await session.get(Order, live_id)
+            assert live is not None and live.payment_status == PaymentStatus.PENDING.value
+            for pid in product_ids:
+                r = await session.get(OrderStockReservation, (live_id, pid))
+                assert r is not None and r.status == StockReservationStatus.RESERVED.value
+                r2 = await session.get(OrderStockReservation, (expired_ids[0], pid))
+                assert r2 is not None and r2.status == StockReservationStatus.RELEASED.value
+
+    asyncio.run(_check())
@@ -0,0 +1,67 @@
+"""集成测试：关键词检索不受 InnoDB 默认停用词影响（FULLTEXT ngram）。
+
+规格来源：
+- specs/health-services-platform/design.md -> `GET /api/v1/products`（keyword）
+
+覆盖：
+- "AI"（ngram token 含默认停用词 a）与 "the"（本身为默认停用词）仍能命中并返回高亮
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.models  # noqa: F401
+from app.main import app
+from app.models.base import Base
+from app.models.enums import ProductFulfillmentType, ProductStatus
+from app.models.product import Product
+from app.utils.db import get_session_factory
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db() -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+async def _seed(titles: list[str]) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for title in titles:
+            session.add(
+                Product(
+                    id=str(uuid4()),
+                    provider_id=str(uuid4()),
+                    title=title,
+                    fulfillment_type=ProductFulfillmentType.SERVICE.value,
+                    status=ProductStatus.ON_SALE.value,
+                    price={"original": 10},
+                )
+            )
+        await session.commit()
+
+
+def test_keyword_containing_default_stopwords_still_matches():
+    asyncio.run(_reset_db())
+    asyncio.run(_seed(["AI 健康顾问", "The Best 体检套餐", "中医理疗"]))
+    client = TestClient(app)
+
+    r = client.get("/api/v1/products", params={"keyword": "AI"})
+    assert r.status_code == 200
+    items = r.json()["data"]["items"]
+    assert [x["title"] for x in items] == ["AI 健康顾问"]
+    assert items[0]["highlight"] == {"title": "<em>AI</em> 健康顾问"}
+
+    r = client.get("/api/v1/products", params={"keyword": "the"})
+    assert r.status_code == 200
+    assert [x["title"] for x in r.json()["data"]["items"]] == ["The Best 体检套餐"]
@@ -0,0 +1,133 @@
+"""集成测试：群发写一条广播 + 接收端读取时合并 + 未读数（Redis 计数）。
+
+规格依据：
+- specs-prod/admin/api-contracts.md#9J
+- specs/health-services-platform/admin-notifications-sending-v1.md -> 3.2 接收端：通知列表（dealer）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import app.models  # noqa: F401
+from app.main import app
+from app.models.admin import Admin
+from app.models.base import Base
+from app.models.dealer import Dealer
+from app.models.dealer_user import DealerUser
+from app.models.enums import DealerStatus
+from app.models.notification import Notification
+from app.models.notification_broadcast import NotificationBroadcast
+from app.services.password_hashing import hash_password
+from app.utils.db import get_session_factory
+from app.utils.jwt_admin_token import create_admin_token
+from app.utils.jwt_dealer_token import create_dealer_token
+from app.utils.redis_client import get_redis
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db_and_redis() -> None:
+    r = get_redis()
+    await r.flushdb()
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+async def _seed(*, admin_id: str, dealer_user_ids: list[str]) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        session.add(
+            Admin(
+                id=admin_id,
+                username=f"it_admin_bc_{admin_id[-4:]}",
+                password_hash=hash_password(password="Abcdef!2345"),
+                status="ACTIVE",
+                phone="13800138000",
+            )
+        )
+        dealer_id = str(uuid4())
+        session.add(Dealer(id=dealer_id, name="IT Dealer", status=DealerStatus.ACTIVE.value))
+        for uid in dealer_user_ids:
+            session.add(
+                DealerUser(
+                    id=uid,
+                    dealer_id=dealer_id,
+                    username=f"it_dealer_bc_{uid[-6:]}",
+                    password_hash=hash_password(password="Abcdef!2345"),
+                    status="ACTIVE",
+                )
+            )
+        await session.commit()
+
+
+async def _counts() -> tuple[int, int]:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        broadcasts = int((await session.execute(select(func.count()).select_from(NotificationBroadcast))).scalar() or 0)
+        direct = int((await session.execute(select(func.count()).select_from(Notification))).scalar() or 0)
+        return broadcasts, direct
+
+
+def test_broadcast_send_is_one_row_and_merged_into_dealer_inbox():
+    asyncio.run(_reset_db_and_redis())
+
+    admin_id = str(uuid4())
+    dealer_user_ids = [str(uuid4()) for _ in range(3)]
+    asyncio.run(_seed(admin_id=admin_id, dealer_user_ids=dealer_user_ids))
+
+    admin_token, _ = create_admin_token(admin_id=admin_id)
+    dealer_token, _ = create_dealer_token(actor_id=dealer_user_ids[0])
+    client = TestClient(app)
+
+    def _unread_total() -> int:
+        r = client.get(
+            "/api/v1/dealer/notifications",
+            headers={"Authorization": f"Bearer {dealer_token}"},
+            params={"status": "UNREAD", "page": 1, "pageSize": 1},
+        )
+        assert r.status_code == 200
+        return int(r.json()["data"]["total"])
+
+    assert _unread_total() == 0
+
+    r = client.post(
+        "/api/v1/admin/notifications/send",
+        headers={"Authorization": f"Bearer {admin_token}", "Idempotency-Key": "k-bc-1"},
+        json={"title": "t", "content": "c", "category": "OPS", "audience": {"mode": "ALL_DEALERS"}},
+    )
+    assert r.status_code == 200
+    data = r.json()["data"]
+    assert data["createdCount"] == 3 and data["broadcastId"]
+    assert asyncio.run(_counts()) == (1, 0)
+
+    # 已回填的计数在发送提交后增量更新
+    assert _unread_total() == 1
+
+    r_list = client.get("/api/v1/dealer/notifications", headers={"Authorization": f"Bearer {dealer_token}"})
+    assert r_list.status_code == 200
+    items = r_list.json()["data"]["items"]
+    assert [(x["id"], x["status"], x["category"]) for x in items] == [(data["broadcastId"], "UNREAD", "OPS")]
+
+    r_read = client.post(
+        f"/api/v1/dealer/notifications/{data['broadcastId']}/read", headers={"Authorization": f"Bearer {dealer_token}"}
+    )
+    assert r_read.status_code == 200
+    assert r_read.json()["data"]["status"] == "READ"
+    assert _unread_total() == 0
+
+    # ADMIN 看不到 ALL_DEALERS 广播
+    r_admin = client.post(
+        f"/api/v1/admin/notifications/{data['broadcastId']}/read", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert r_admin.status_code == 404
@@ -0,0 +1,167 @@
+"""集成测试：预约时段容量引擎（并发占用不超卖 / 批量释放 / 对账）。
+
+规格来源：
+- specs/health-services-platform/design.md -> `CAPACITY_FULL`（容量不足）
+- specs/health-services-platform/design.md -> 属性 19：预约取消状态恢复（释放容量）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+import app.models  # noqa: F401
+from app.models.base import Base
+from app.models.booking import Booking
+from app.models.enums import BookingConfirmationMethod, BookingStatus, CommonEnabledStatus
+from app.models.venue_schedule import VenueSchedule
+from app.services.slot_capacity import (
+    SlotKey,
+    apply_capacity_drift,
+    find_capacity_drift,
+    release_slots,
+    try_reserve_slot,
+)
+from app.utils.db import get_session_factory
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_INTEGRATION_TESTS") != "1", reason="integration tests disabled")
+
+
+async def _reset_db() -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
+
+
+async def _remaining(sched_id: str) -> int:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        s = await session.get(VenueSchedule, sched_id)
+        assert s is not None
+        return int(s.remaining_capacity)
+
+
+def test_slot_capacity_concurrent_reserve_never_oversells_and_reconciles():
+    asyncio.run(_reset_db())
+
+    slot = SlotKey(
+        venue_id=str(uuid4()),
+        service_type="MASSAGE",
+        booking_date=(datetime.now(tz=UTC) + timedelta(days=1)).date(),
+        time_slot="09:00-10:00",
+    )
+    sched_id = str(uuid4())
+
+    async def _run() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            session.add(
+                VenueSchedule(
+                    id=sched_id,
+                    venue_id=slot.venue_id,
+                    service_type=slot.service_type,
+                    booking_date=slot.booking_date,
+                    time_slot=slot.time_slot,
+                    capacity=5,
+                    remaining_capacity=5,
+                    status=CommonEnabledStatus.ENABLED.value,
+                )
+            )
+            await session.commit()
+
+        async def _one() -> bool:
+            async with session_factory() as s:
+                ok = await try_reserve_slot(session=s, slot=slot)
+                await s.commit()
+                return ok
+
+        outcomes = await asyncio.gather(*[_one() for _ in range(30)])
+        assert sum(1 for x in outcomes if x) == 5
+        assert await _remaining(sched_id) == 0
+
+        # 批量释放：同一时段出现 3 次 -> 回补 3
+        async with session_factory() as session:
+            await release_slots(session=session, slots=[slot, slot, slot])
+            await session.commit()
+        assert await _remaining(sched_id) == 3
+
+        # 释放不超过总容量
+        async with session_factory() as session:
+            await release_slots(session=session, slots=[slot] * 10)
+            await session.commit()
+        assert await _remaining(sched_id) == 5
+
+        # 对账：2 条占用中的预约 -> remaining 应为 3
+        async with session_factory() as session:
+            for st in (BookingStatus.CONFIRMED.value, BookingStatus.COMPLETED.value, BookingStatus.CANCELLED.value):
+                session.add(
+                    Booking(
+                        id=str(uuid4()),
+                        entitlement_id=str(uuid4()),
+                        user_id=str(uuid4()),
+                        venue_id=slot.venue_id,
+                        service_type=slot.service_type,
+                        booking_date=slot.booking_date,
+                        time_slot=slot.time_slot,
+                        status=st,
+                        confirmation_method=BookingConfirmationMethod.AUTO.value,
+                    )
+                )
+            await session.commit()
+
+        async with session_factory() as session:
+            drifts = await find_capacity_drift(session=session, date_from=slot.booking_date)
+            assert [(d.schedule_id, d.observed_remaining, d.expected_remaining) for d in drifts] == [(sched_id, 5, 3)]
+            assert await apply_capacity_drift(session=session, drifts=drifts) == 1
+            await session.commit()
+        assert await _remaining(sched_id) == 3
+
+    asyncio.run(_run())
+
+
+def test_slot_capacity_duplicate_schedule_rows_use_first_row_by_id():
+    asyncio.run(_reset_db())
+
+    slot = SlotKey(
+        venue_id=str(uuid4()),
+        service_type="MASSAGE",
+        booking_date=(datetime.now(tz=UTC) + timedelta(days=1)).date(),
+        time_slot="10:00-11:00",
+    )
+    first_id, second_id = sorted(str(uuid4()) for _ in range(2))
+
+    async def _run() -> None:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            for sid in (first_id, second_id):
+                session.add(
+                    VenueSchedule(
+                        id=sid,
+                        venue_id=slot.venue_id,
+                        service_type=slot.service_type,
+                        booking_date=slot.booking_date,
+                        time_slot=slot.time_slot,
+                        capacity=2,
+                        remaining_capacity=2,
+                        status=CommonEnabledStatus.ENABLED.value,
+                    )
+                )
+            await session.commit()
+
+        async with session_factory() as session:
+            assert await try_reserve_slot(session=session, slot=slot) is True
+            await session.commit()
+        assert (await _remaining(first_id), await _remaining(second_id)) == (1, 2)
+
+        async with session_factory() as session:
+            assert await release_slots(session=session, slots=[slot]) == 1
+            await session.commit()
+        assert (await _remaining(first_id), await _remaining(second_id)) == (2, 2)
+
+    asyncio.run(_run())
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.utils import invalidation
+from app.utils.invalidation import listen_for_invalidations
+
+
+class _FakePubSub:
+    def __init__(self, messages: list[bytes], stop: asyncio.Event) -> None:
+        self._messages = list(messages)
+        self._stop = stop
+        self.channels: list[str] = []
+        self.closed = False
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.append(channel)
+
+    async def get_message(self, *, ignore_subscribe_messages: bool, timeout: float):
+        if not self._messages:
+            self._stop.set()
+            return None
+        return {"type": "message", "data": self._messages.pop(0)}
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_listener_clears_on_subscribe_and_on_unparseable_messages(monkeypatch: pytest.MonkeyPatch) -> None:
+    stop = asyncio.Event()
+    pubsub = _FakePubSub([b'{"keys": ["a"]}', b"not-json", b"[1, 2]"], stop)
+
+    class _Redis:
+        def pubsub(self) -> _FakePubSub:
+            return pubsub
+
+    monkeypatch.setattr(invalidation, "get_redis", lambda: _Redis())
+    seen: list[dict | None] = []
+
+    asyncio.run(listen_for_invalidations(channel="c:invalidate", handler=seen.append, stop=stop))
+
+    assert pubsub.channels == ["c:invalidate"] and pubsub.closed
+    assert seen == [None, {"keys": ["a"]}, None, None]
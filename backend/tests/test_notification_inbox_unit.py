@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.dealer_user import DealerUser
+from app.models.enums import NotificationBroadcastAudience, NotificationReceiverType, NotificationStatus
+from app.models.notification import Notification
+from app.models.notification_broadcast import NotificationBroadcast, NotificationBroadcastReceipt
+from app.services import notification_inbox
+from app.services.notification_inbox import bump_broadcast_total, list_inbox, mark_inbox_read, unread_count
+from app.services.notification_sending import (
+    insert_targeted_notifications,
+    new_broadcast,
+    notification_id_for,
+    sync_unread_counters,
+)
+
+_TABLES = [
+    DealerUser.__table__,
+    Notification.__table__,
+    NotificationBroadcast.__table__,
+    NotificationBroadcastReceipt.__table__,
+]
+_DEALER = NotificationReceiverType.DEALER.value
+_T0 = datetime(2026, 10, 1, 8, 0, 0)
+
+
+class _FakeRedis:
+    """只实现收件箱用到的命令；EVALSHA 仅支持“已存在才增减”脚本。"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+
+    async def mget(self, keys):
+        return [None if k not in self.values else str(self.values[k]).encode() for k in keys]
+
+    async def set(self, key: str, value, *, nx: bool = False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = int(value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for k in keys if self.values.pop(k, None) is not None)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        assert sha == notification_inbox._INCR_EXISTING.sha
+        keys, delta = keys_and_args[:numkeys], int(keys_and_args[numkeys])
+        n = 0
+        for k in keys:
+            if k in self.values:
+                self.values[k] = max(0, self.values[k] + delta)
+                n += 1
+        return n
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    async def _setup() -> None:
+        async with engine.begin() as conn:
+            for t in _TABLES:
+                await conn.run_sync(t.create)
+            # 接收者账号早于所有测试数据创建：广播只对建号之后发送的可见
+            for rid in ("d1", "d2"):
+                await conn.execute(
+                    insert(DealerUser.__table__).values(
+                        id=rid, dealer_id="dl1", username=f"u_{rid}", password_hash="x", created_at=_T0, updated_at=_T0
+                    )
+                )
+
+    asyncio.run(_setup())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def _direct(*, receiver_id: str, minutes: int, status: str = NotificationStatus.UNREAD.value) -> Notification:
+    return Notification(
+        id=str(uuid4()),
+        receiver_type=_DEALER,
+        receiver_id=receiver_id,
+        title=f"d{minutes}",
+        content="c",
+        status=status,
+        created_at=_T0 + timedelta(minutes=minutes),
+    )
+
+
+def _broadcast(*, audience: str, minutes: int) -> NotificationBroadcast:
+    return new_broadcast(
+        sender_id="a1",
+        audience=audience,
+        title=f"b{minutes}",
+        content="c",
+        category="SYSTEM",
+        meta=None,
+        now=_T0 + timedelta(minutes=minutes),
+    )
+
+
+def test_inbox_merges_direct_and_broadcast_rows_with_receipts(session_factory) -> None:
+    redis = _FakeRedis()
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            session.add_all(
+                [
+                    _direct(receiver_id="d1", minutes=1),
+                    _direct(receiver_id="d1", minutes=4, status=NotificationStatus.READ.value),
+                    _direct(receiver_id="d2", minutes=5),
+                    _broadcast(audience=NotificationBroadcastAudience.ALL_DEALERS.value, minutes=2),
+                    _broadcast(audience=NotificationBroadcastAudience.ALL_DEALERS.value, minutes=3),
+                    _broadcast(audience=NotificationBroadcastAudience.ALL_PROVIDERS.value, minutes=6),
+                ]
+            )
+            await session.commit()
+
+            args = {"session": session, "redis": redis, "receiver_type": _DEALER, "receiver_id": "d1"}
+            items, total = await list_inbox(**args, status=None, page=1, page_size=3)
+            assert ([x.title for x in items], total) == (["d4", "b3", "b2"], 4)
+            items, _ = await list_inbox(**args, status=None, page=2, page_size=3)
+            assert [x.title for x in items] == ["d1"]
+
+            b3 = (await session.scalars(select(NotificationBroadcast).where(NotificationBroadcast.title == "b3"))).one()
+            read = await mark_inbox_read(**args, notification_id=b3.id)
+            assert read is not None and read.status == NotificationStatus.READ.value
+            # 幂等：重复标记不新增回执
+            assert (await mark_inbox_read(**args, notification_id=b3.id)).read_at == read.read_at
+            receipts = (await session.execute(select(func.count()).select_from(NotificationBroadcastReceipt))).scalar()
+            assert int(receipts or 0) == 1
+            # 其它受众的广播对该接收者不可见
+            b6 = (await session.scalars(select(NotificationBroadcast).where(NotificationBroadcast.title == "b6"))).one()
+            assert await mark_inbox_read(**args, notification_id=b6.id) is None
+
+            items, total = await list_inbox(**args, status=NotificationStatus.UNREAD.value, page=1, page_size=20)
+            assert ([x.title for x in items], total) == (["b2", "d1"], 2)
+            items, total = await list_inbox(**args, status=NotificationStatus.READ.value, page=1, page_size=20)
+            assert ([x.title for x in items], total) == (["d4", "b3"], 2)
+
+    asyncio.run(_run())
+
+
+def test_unread_count_is_served_from_counters_after_first_backfill(session_factory) -> None:
+    redis = _FakeRedis()
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            session.add_all([_direct(receiver_id="d1", minutes=1), _broadcast(audience="ALL_DEALERS", minutes=2)])
+            await session.commit()
+            args = {"session": session, "redis": redis, "receiver_type": _DEALER, "receiver_id": "d1"}
+            assert await unread_count(**args) == 2
+
+            # 绕过计数直接写库：计数已回填，轮询不再 COUNT（TTL 到期前看不到）
+            session.add(_direct(receiver_id="d1", minutes=3))
+            await session.commit()
+            assert await unread_count(**args) == 2
+
+            # 走发送路径：提交后增量
+            n = await insert_targeted_notifications(
+                session=session,
+                batch_id=str(uuid4()),
+                receivers=[(_DEALER, "d1"), (_DEALER, "d2")],
+                sender_id="a1",
+                title="t",
+                content="c",
+                category="SYSTEM",
+                meta={"targetsCount": 2},
+                now=_T0,
+            )
+            await session.commit()
+            await sync_unread_counters(redis=redis, receivers=[(_DEALER, "d1"), (_DEALER, "d2")], created=n)
+            b = _broadcast(audience="ALL_DEALERS", minutes=5)
+            session.add(b)
+            await session.commit()
+            await bump_broadcast_total(redis=redis, audience="ALL_DEALERS")
+            assert await unread_count(**args) == 4
+
+            # 已读：定向 -1，广播记回执
+            first = (await session.scalars(select(Notification).where(Notification.title == "d1"))).one()
+            await mark_inbox_read(**args, notification_id=first.id)
+            await mark_inbox_read(**args, notification_id=b.id)
+            assert await unread_count(**args) == 2
+            # 未回填过的接收者不会被增量“创建”出错误计数
+            assert notification_inbox.unread_key(_DEALER, "d2") not in redis.values
+
+    asyncio.run(_run())
+
+
+def test_replayed_targeted_chunk_keeps_ids_and_invalidates_counters(session_factory) -> None:
+    redis = _FakeRedis()
+    batch_id = str(uuid4())
+    receivers = [(_DEALER, "d1"), (_DEALER, "d2")]
+
+    # 重放分片：id 由 (batchId, 接收者) 派生，MySQL 下 INSERT IGNORE 跳过已写入的行
+    assert notification_id_for(batch_id=batch_id, receiver_type=_DEALER, receiver_id="d1") == notification_id_for(
+        batch_id=batch_id, receiver_type=_DEALER, receiver_id="d1"
+    )
+    stmt = insert(Notification.__table__).prefix_with("IGNORE", dialect="mysql")
+    assert str(stmt.compile(dialect=mysql.dialect())).startswith("INSERT IGNORE INTO notifications")
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            redis.values[notification_inbox.unread_key(_DEALER, "d1")] = 0
+            n = await insert_targeted_notifications(
+                session=session,
+                batch_id=batch_id,
+                receivers=receivers,
+                sender_id="a1",
+                title="t",
+                content="c",
+                category="SYSTEM",
+                meta=None,
+                now=_T0,
+            )
+            await session.commit()
+            await sync_unread_counters(redis=redis, receivers=receivers, created=n)
+            assert redis.values[notification_inbox.unread_key(_DEALER, "d1")] == 1
+
+            # 部分行已存在（写入数 < 分片大小）：无法区分是谁，计数失效后由 COUNT 回填
+            await sync_unread_counters(redis=redis, receivers=receivers, created=1)
+            assert notification_inbox.unread_key(_DEALER, "d1") not in redis.values
+            assert await unread_count(session=session, redis=redis, receiver_type=_DEALER, receiver_id="d1") == 1
+
+    asyncio.run(_run())
+
+
+def test_broadcasts_sent_before_account_creation_are_hidden(session_factory) -> None:
+    redis = _FakeRedis()
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            old = _broadcast(audience="ALL_DEALERS", minutes=1)
+            session.add_all(
+                [
+                    old,
+                    _broadcast(audience="ALL_DEALERS", minutes=3),
+                    DealerUser(
+                        id="d3",
+                        dealer_id="dl1",
+                        username="u_d3",
+                        password_hash="x",
+                        created_at=_T0 + timedelta(minutes=2),
+                    ),
+                ]
+            )
+            await session.commit()
+
+            args = {"session": session, "redis": redis, "receiver_type": _DEALER, "receiver_id": "d3"}
+            items, total = await list_inbox(**args, status=None, page=1, page_size=20)
+            assert ([x.title for x in items], total) == (["b3"], 1)
+            items, total = await list_inbox(**args, status=NotificationStatus.UNREAD.value, page=1, page_size=20)
+            assert ([x.title for x in items], total) == (["b3"], 1)
+            assert await mark_inbox_read(**args, notification_id=old.id) is None
+
+            # 建号之后的新广播照常计入（计数已回填，走增量）
+            session.add(_broadcast(audience="ALL_DEALERS", minutes=5))
+            await session.commit()
+            await bump_broadcast_total(redis=redis, audience="ALL_DEALERS")
+            assert await unread_count(**args) == 2
+            # 早已存在的账号看到全部广播
+            assert await unread_count(**{**args, "receiver_id": "d1"}) == 3
+
+    asyncio.run(_run())
+
+
+def test_direct_mark_read_decrements_counter_once(session_factory) -> None:
+    redis = _FakeRedis()
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            n = _direct(receiver_id="d1", minutes=1)
+            session.add_all([n, _direct(receiver_id="d1", minutes=2)])
+            await session.commit()
+            args = {"session": session, "redis": redis, "receiver_type": _DEALER, "receiver_id": "d1"}
+            assert await unread_count(**args) == 2
+
+            first = await mark_inbox_read(**args, notification_id=n.id)
+            again = await mark_inbox_read(**args, notification_id=n.id)
+            assert first is not None and again is not None
+            assert first.status == again.status == NotificationStatus.READ.value
+            assert first.read_at == again.read_at
+            assert redis.values[notification_inbox.unread_key(_DEALER, "d1")] == 1
+            assert await mark_inbox_read(**args, notification_id=str(uuid4())) is None
+
+    asyncio.run(_run())
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.enums import OrderType, PaymentOutboxStatus, PaymentStatus
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.payment_outbox import (
+    ENTITLEMENTS_GENERATION_EVENT,
+    PaymentOutboxDeadLetter,
+    PaymentOutboxEvent,
+)
+from app.services import payment_outbox
+from app.services.payment_callbacks import record_payment_succeeded
+from app.services.payment_outbox import drain_payment_outbox_batch, process_payment_outbox_event, replay_dead_letters
+from app.utils.datetime_utc import utcnow
+
+_TABLES = [Order.__table__, Payment.__table__, PaymentOutboxEvent.__table__, PaymentOutboxDeadLetter.__table__]
+
+
+@pytest.fixture
+def session_factory(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(payment_outbox.settings, "payment_outbox_max_attempts", 3)
+    monkeypatch.setattr(payment_outbox.settings, "payment_outbox_retry_base_seconds", 10.0)
+    monkeypatch.setattr(payment_outbox.settings, "payment_outbox_retry_max_seconds", 15.0)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    async def _setup() -> None:
+        async with engine.begin() as conn:
+            for t in _TABLES:
+                await conn.run_sync(t.create)
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            session.add(
+                Order(
+                    id="o1",
+                    user_id="u1",
+                    order_type=OrderType.SERVICE_PACKAGE.value,
+                    total_amount=99.0,
+                    payment_status=PaymentStatus.PENDING.value,
+                )
+            )
+            session.add(Payment(id="p1", order_id="o1", amount=99.0, payment_status=PaymentStatus.PENDING.value))
+            await session.commit()
+
+    asyncio.run(_setup())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_callback_records_paid_state_and_single_event_without_fulfilling(session_factory, monkeypatch) -> None:
+    fulfilled: list[str] = []
+
+    async def _fulfill(*, session, order_id: str) -> bool:
+        fulfilled.append(order_id)
+        return False
+
+    monkeypatch.setattr(payment_outbox, "fulfill_paid_order", _fulfill)
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            event_id = await record_payment_succeeded(session=session, order_id="o1", payment_id="p1")
+            assert event_id and fulfilled == []
+            # 重复回调：事件仍待处理 -> 返回同一事件（补投递），不新增
+            assert await record_payment_succeeded(session=session, order_id="o1", payment_id="p1") == event_id
+
+            o = (await session.scalars(select(Order).where(Order.id == "o1"))).one()
+            assert o.payment_status == PaymentStatus.PAID.value and o.paid_at is not None
+            assert len((await session.scalars(select(PaymentOutboxEvent))).all()) == 1
+
+            assert await process_payment_outbox_event(session=session, event_id=event_id) == "done"
+            assert await process_payment_outbox_event(session=session, event_id=event_id) == "skipped"
+            assert fulfilled == ["o1"]
+            assert await record_payment_succeeded(session=session, order_id="o1", payment_id="p1") is None
+
+    asyncio.run(_run())
+
+
+def test_failures_back_off_then_dead_letter_and_replay(session_factory, monkeypatch) -> None:
+    outcomes = iter([RuntimeError("db gone"), HTTPException(status_code=400, detail={"code": "X"}), None])
+
+    async def _fulfill(*, session, order_id: str) -> bool:
+        exc = next(outcomes)
+        if exc is not None:
+            raise exc
+        return False
+
+    monkeypatch.setattr(payment_outbox, "fulfill_paid_order", _fulfill)
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            event_id = await record_payment_succeeded(session=session, order_id="o1", payment_id="p1")
+            assert event_id is not None
+
+            # 临时故障：退避后重试，排空任务在到期前不会取到
+            assert await process_payment_outbox_event(session=session, event_id=event_id) == "retry"
+            ev = await session.get(PaymentOutboxEvent, event_id, populate_existing=True)
+            assert ev.attempts == 1 and "db gone" in (ev.last_error or "")
+            assert (await drain_payment_outbox_batch(session=session, now=utcnow(), limit=10)).processed == 0
+
+            # 业务校验失败：重试无意义，直接进入死信
+            res = await drain_payment_outbox_batch(session=session, now=utcnow() + timedelta(seconds=11), limit=10)
+            assert (res.processed, res.failed) == (1, 1)
+            ev = await session.get(PaymentOutboxEvent, event_id, populate_existing=True)
+            assert ev.status == PaymentOutboxStatus.DEAD.value
+            letters = (await session.scalars(select(PaymentOutboxDeadLetter))).all()
+            assert [(x.event_id, x.attempts) for x in letters] == [(event_id, 2)]
+
+            # 回放：回到 PENDING 并立即可执行；已回放的死信不会被再次回放
+            assert await replay_dead_letters(session=session, order_ids=["o1"]) == [event_id]
+            await session.commit()
+            assert await replay_dead_letters(session=session, order_ids=["o1"]) == []
+            res = await drain_payment_outbox_batch(session=session, now=utcnow(), limit=10)
+            assert (res.processed, res.done) == (1, 1)
+            ev = await session.get(PaymentOutboxEvent, event_id, populate_existing=True)
+            assert ev.status == PaymentOutboxStatus.DONE.value and ev.processed_at is not None
+
+    asyncio.run(_run())
+
+
+def test_large_order_entitlements_become_their_own_retried_event(session_factory, monkeypatch) -> None:
+    generated: list[str] = []
+    enqueued: list[str] = []
+    outcomes = iter([RuntimeError("lock wait timeout"), None])
+
+    async def _fulfill(*, session, order_id: str) -> bool:
+        return True
+
+    async def _generate(*, session, order_id: str) -> int:
+        exc = next(outcomes)
+        if exc is not None:
+            raise exc
+        generated.append(order_id)
+        return 1200
+
+    monkeypatch.setattr(payment_outbox, "fulfill_paid_order", _fulfill)
+    monkeypatch.setattr(payment_outbox, "generate_deferred_entitlements", _generate)
+    monkeypatch.setattr(payment_outbox, "enqueue_payment_outbox_event", enqueued.append)
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            event_id = await record_payment_succeeded(session=session, order_id="o1", payment_id="p1")
+            assert event_id is not None
+            assert await process_payment_outbox_event(session=session, event_id=event_id) == "done"
+
+            # 支付事件与权益事件同事务提交，提交后投递即时处理
+            gen = (
+                await session.scalars(
+                    select(PaymentOutboxEvent).where(PaymentOutboxEvent.event_type == ENTITLEMENTS_GENERATION_EVENT)
+                )
+            ).one()
+            assert enqueued == [gen.id] and gen.status == PaymentOutboxStatus.PENDING.value
+
+            # 生成失败：权益事件退避重试，支付事件保持 DONE
+            assert await process_payment_outbox_event(session=session, event_id=gen.id) == "retry"
+            res = await drain_payment_outbox_batch(session=session, now=utcnow() + timedelta(seconds=11), limit=10)
+            assert (res.processed, res.done) == (1, 1)
+            assert generated == ["o1"]
+            gen = await session.get(PaymentOutboxEvent, gen.id, populate_existing=True)
+            assert gen.status == PaymentOutboxStatus.DONE.value and gen.attempts == 2
+
+            # 支付事件回放：权益事件已存在，不重复写入/投递
+            ev = await session.get(PaymentOutboxEvent, event_id)
+            ev.status = PaymentOutboxStatus.PENDING.value
+            await session.commit()
+            assert await process_payment_outbox_event(session=session, event_id=event_id) == "done"
+            assert enqueued == [gen.id]
+            assert len((await session.scalars(select(PaymentOutboxEvent))).all()) == 2
+
+    asyncio.run(_run())
+
+
+def test_retry_delay_is_exponential_and_capped(monkeypatch) -> None:
+    monkeypatch.setattr(payment_outbox.settings, "payment_outbox_retry_base_seconds", 10.0)
+    monkeypatch.setattr(payment_outbox.settings, "payment_outbox_retry_max_seconds", 60.0)
+    assert [payment_outbox._retry_delay_seconds(n) for n in (1, 2, 3, 4, 5)] == [10.0, 20.0, 40.0, 60.0, 60.0]
+
+
+def test_drain_stops_when_a_full_batch_is_all_skipped(monkeypatch) -> None:
+    from app.tasks import payments as payment_tasks
+
+    calls: list[int] = []
+
+    async def _batch(*, session, now, limit: int) -> payment_outbox.OutboxDrainResult:
+        calls.append(limit)
+        # 满批但全部被跳过（正被即时任务处理）：不应在时间预算内反复重取
+        return payment_outbox.OutboxDrainResult(processed=limit, done=0, failed=0)
+
+    async def _oldest(*, session):
+        return None
+
+    class _Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            return None
+
+    monkeypatch.setattr(payment_tasks, "get_session_factory", lambda: _Session)
+    monkeypatch.setattr(payment_tasks, "drain_payment_outbox_batch", _batch)
+    monkeypatch.setattr(payment_tasks, "oldest_pending_paid_at", _oldest)
+
+    res = asyncio.run(payment_tasks.drain_payment_outbox_once(batch_size=5, max_seconds=60.0))
+    assert calls == [5] and res["processed"] == 5
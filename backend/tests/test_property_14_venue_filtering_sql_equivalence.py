@@ -0,0 +1,146 @@
+"""属性测试：场所筛选 SQL 谓词与纯函数口径一致（属性14）。
+
+规格来源：
+- specs/health-services-platform/design.md -> 属性 14：权益使用场所过滤正确性
+
+断言：
+- `region_filter_clause` 与 `matches_region_filter` 对任意场所/参数组合筛选结果一致
+- `entitlement_scope_clause` 与 `filter_venues_by_entitlement` 对任意场所/权益组合筛选结果一致
+- keyset 游标逐页遍历的结果与一次性按 (created_at DESC, id DESC) 排序的结果一致
+
+说明：以 SQLite 内存库执行编译后的谓词（仅建 venues 表），纯函数作为 oracle。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models.enums import EntitlementType, VenuePublishStatus
+from app.models.venue import Venue
+from app.services.venue_filtering_rules import (
+    VenueLite,
+    VenueRegion,
+    filter_venues_by_entitlement,
+    matches_region_filter,
+)
+from app.services.venue_filtering_sql import entitlement_scope_clause, region_filter_clause
+from app.utils.pagination import DescKeyset
+
+_COUNTRIES = [None, "COUNTRY:CN", "COUNTRY:US"]
+_PROVINCES = [None, "PROVINCE:110000", "PROVINCE:310000"]
+_CITIES = [None, "CITY:110100", "CITY:310100", "CITY:999999"]
+_SCOPES = _COUNTRIES[1:] + _PROVINCES[1:] + _CITIES[1:] + ["CITY:", "BAD:1", "no_colon", ""]
+
+_venue_st = st.tuples(st.sampled_from(_COUNTRIES), st.sampled_from(_PROVINCES), st.sampled_from(_CITIES))
+
+
+def _seed(session: Session, rows: list[tuple[str | None, str | None, str | None]]) -> list[Venue]:
+    base = datetime(2026, 1, 1)
+    venues = [
+        Venue(
+            id=f"v{i:03d}",
+            provider_id="p1",
+            name=f"venue-{i}",
+            country_code=c,
+            province_code=p,
+            city_code=ci,
+            publish_status=VenuePublishStatus.PUBLISHED.value,
+            # 刻意制造相同 created_at，覆盖 keyset 的 id 次序分支
+            created_at=base + timedelta(minutes=i // 2),
+        )
+        for i, (c, p, ci) in enumerate(rows)
+    ]
+    session.add_all(venues)
+    session.flush()
+    return venues
+
+
+def _lite(v: Venue) -> VenueLite:
+    return VenueLite(
+        id=v.id,
+        region=VenueRegion(country_code=v.country_code, province_code=v.province_code, city_code=v.city_code),
+    )
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Venue.__table__.create(engine)
+    return Session(engine)
+
+
+@settings(max_examples=60, deadline=None)
+@given(
+    rows=st.lists(_venue_st, max_size=12),
+    region_level=st.sampled_from([None, "", "CITY", "province", "COUNTRY", "DISTRICT"]),
+    region_code=st.sampled_from([None, "", "110100", "CITY:110100", "110000", "PROVINCE:110000", "CN"]),
+)
+def test_property_14_region_filter_sql_matches_pure_function(rows, region_level, region_code):
+    with _session() as session:
+        venues = _seed(session, rows)
+        expected = {
+            v.id
+            for v in venues
+            if matches_region_filter(venue=_lite(v), region_level=region_level, region_code=region_code)
+        }
+
+        stmt = select(Venue.id)
+        cond = region_filter_clause(region_level=region_level, region_code=region_code)
+        if cond is not None:
+            stmt = stmt.where(cond)
+        assert set(session.scalars(stmt).all()) == expected
+
+
+@settings(max_examples=80, deadline=None)
+@given(
+    rows=st.lists(_venue_st, max_size=12),
+    entitlement_type=st.sampled_from([EntitlementType.SERVICE_PACKAGE.value, "UNKNOWN"]),
+    applicable_regions=st.one_of(st.none(), st.lists(st.sampled_from(_SCOPES), max_size=4)),
+    applicable_venues=st.one_of(st.none(), st.lists(st.sampled_from([f"v{i:03d}" for i in range(14)]), max_size=5)),
+)
+def test_property_14_entitlement_scope_sql_matches_pure_function(
+    rows, entitlement_type, applicable_regions, applicable_venues
+):
+    with _session() as session:
+        venues = _seed(session, rows)
+        expected = {
+            v.id
+            for v in filter_venues_by_entitlement(
+                venues=[_lite(v) for v in venues],
+                entitlement_type=entitlement_type,
+                applicable_regions=applicable_regions,
+                applicable_venues=applicable_venues,
+            )
+        }
+
+        cond = entitlement_scope_clause(
+            entitlement_type=entitlement_type,
+            applicable_regions=applicable_regions,
+            applicable_venues=applicable_venues,
+        )
+        assert set(session.scalars(select(Venue.id).where(cond)).all()) == expected
+
+
+@settings(max_examples=30, deadline=None)
+@given(rows=st.lists(_venue_st, max_size=15), page_size=st.integers(min_value=1, max_value=4))
+def test_keyset_cursor_walk_matches_full_ordering(rows, page_size):
+    with _session() as session:
+        _seed(session, rows)
+        keyset = DescKeyset(keys=(Venue.created_at,), id_col=Venue.id)
+        expected = list(session.scalars(select(Venue.id).order_by(*keyset.order_by())).all())
+
+        walked: list[str] = []
+        cursor: str | None = None
+        while True:
+            stmt = keyset.paginate(select(Venue), after=keyset.decode(cursor), page=1, page_size=page_size)
+            items = list(session.scalars(stmt).all())
+            walked.extend(v.id for v in items)
+            cursor = keyset.next_cursor(items, page_size=page_size)
+            if cursor is None:
+                break
+
+        assert walked == expected
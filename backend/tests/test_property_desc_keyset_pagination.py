@@ -0,0 +1,116 @@
+"""属性测试：多键 keyset 游标分页与 OFFSET 分页结果一致。
+
+断言：
+- 以 `DescKeyset((booking_date, created_at), id)` 逐页跟随 nextCursor，拼接结果 == 全量按
+  (booking_date DESC, created_at DESC, id DESC) 排序的结果（不重不漏，含大量排序键相等的行）
+- 游标经 encode/decode 往返后类型保持（date/datetime），非法游标 400
+- count_capped：默认精确计数；指定 cap 时超出返回 (cap, True)
+
+说明：以 SQLite 内存库执行编译后的谓词（仅建 bookings 表）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+from app.utils.pagination import DescKeyset, count_capped
+
+_KEYSET = DescKeyset(keys=(Booking.booking_date, Booking.created_at), id_col=Booking.id)
+_BASE_DAY = date(2026, 1, 1)
+_BASE_TS = datetime(2026, 1, 1, 8, 0, 0)
+
+
+@settings(max_examples=60, deadline=None)
+@given(
+    rows=st.lists(
+        st.tuples(st.integers(min_value=0, max_value=3), st.integers(min_value=0, max_value=3)),
+        min_size=0,
+        max_size=40,
+    ),
+    page_size=st.integers(min_value=1, max_value=7),
+)
+def test_property_keyset_pages_cover_sorted_rows_exactly_once(rows: list[tuple[int, int]], page_size: int):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Booking.__table__.create(engine)
+    with Session(engine) as session:
+        for i, (day, minute) in enumerate(rows):
+            session.add(
+                Booking(
+                    id=f"b{i:03d}",
+                    source_type="ENTITLEMENT",
+                    user_id="u1",
+                    venue_id="v1",
+                    service_type="svc",
+                    booking_date=_BASE_DAY + timedelta(days=day),
+                    time_slot="09:00-10:00",
+                    created_at=_BASE_TS + timedelta(minutes=minute),
+                )
+            )
+        session.flush()
+
+        expected = list(session.scalars(select(Booking.id).order_by(*_KEYSET.order_by())).all())
+
+        got: list[str] = []
+        cursor: str | None = None
+        for _ in range(len(rows) + 2):
+            after = _KEYSET.decode(cursor)
+            page = list(session.scalars(_KEYSET.paginate(select(Booking), after=after, page=1, page_size=page_size)))
+            got.extend(b.id for b in page)
+            cursor = _KEYSET.next_cursor(page, page_size=page_size)
+            if cursor is None:
+                break
+    engine.dispose()
+
+    assert got == expected
+
+
+def test_cursor_roundtrip_and_invalid_cursor():
+    b = Booking(id="b1", booking_date=date(2026, 3, 1), created_at=datetime(2026, 3, 1, 9, 30, 15))
+    values, cid = _KEYSET.decode(_KEYSET.encode(b))
+    assert values == (date(2026, 3, 1), datetime(2026, 3, 1, 9, 30, 15))
+    assert cid == "b1"
+    assert _KEYSET.decode("") is None
+
+    for bad in ["not-base64!", "eyJ4IjoxfQ", _KEYSET.encode(b)[:-4]]:
+        with pytest.raises(HTTPException) as ei:
+            _KEYSET.decode(bad)
+        assert ei.value.status_code == 400
+
+
+def test_count_capped_is_exact_by_default_and_caps_when_requested():
+    async def _run() -> None:
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Booking.__table__.create)
+        async with AsyncSession(engine) as session:
+            for i in range(5):
+                session.add(
+                    Booking(
+                        id=f"b{i}",
+                        source_type="ENTITLEMENT",
+                        user_id="u1",
+                        venue_id="v1",
+                        service_type="svc",
+                        booking_date=_BASE_DAY,
+                        time_slot="09:00-10:00",
+                        created_at=_BASE_TS,
+                    )
+                )
+            await session.flush()
+            stmt = select(Booking).order_by(*_KEYSET.order_by())
+            assert await count_capped(session=session, stmt=stmt) == (5, False)
+            assert await count_capped(session=session, stmt=stmt, cap=3) == (3, True)
+            assert await count_capped(session=session, stmt=stmt, cap=5) == (5, False)
+        await engine.dispose()
+
+    asyncio.run(_run())
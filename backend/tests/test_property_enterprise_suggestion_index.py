@@ -0,0 +1,52 @@
+"""属性测试：企业名称联想索引与 Property 9 口径一致。
+
+规格来源：
+- specs/health-services-platform/design.md -> 企业名称智能匹配（精确 > 前缀 > 包含 > 编辑距离<=2，最多 10 条）
+
+断言：
+- `EnterpriseSuggestionIndex.suggest` 与 `suggest_enterprises`（oracle，逐条计算编辑距离）结果逐条一致
+- `bounded_levenshtein` 在上限内与完整编辑距离一致，超限返回 None
+"""
+
+from __future__ import annotations
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from app.services.enterprise_matching import (
+    EnterpriseCandidate,
+    bounded_levenshtein,
+    levenshtein_distance,
+    suggest_enterprises,
+)
+from app.services.enterprise_suggestion_index import EnterpriseSuggestionIndex
+
+# 小字母表：让前缀/包含/编辑距离各档都高频出现
+_name_st = st.text(alphabet="ab北京科技 A", min_size=0, max_size=12)
+
+
+@settings(max_examples=300, deadline=None)
+@given(
+    names=st.lists(_name_st, min_size=0, max_size=40),
+    keyword=st.text(alphabet="ab北京科技 A", min_size=0, max_size=10),
+    limit=st.integers(min_value=0, max_value=12),
+)
+def test_property_index_matches_oracle(names: list[str], keyword: str, limit: int):
+    # id 与输入顺序同序：oracle 稳定排序下同名并列按输入顺序，索引按 (name, id)
+    enterprises = [EnterpriseCandidate(id=f"e{i:03d}", name=n, city_code=None) for i, n in enumerate(names)]
+    index = EnterpriseSuggestionIndex(enterprises)
+
+    got = index.suggest(keyword, limit=limit)
+    expected = suggest_enterprises(keyword=keyword, enterprises=enterprises, limit=limit)
+    assert [s.id for s in got] == [s.id for s in expected]
+
+
+@settings(max_examples=300, deadline=None)
+@given(
+    a=st.text(alphabet="abc北", max_size=12),
+    b=st.text(alphabet="abc北", max_size=12),
+    k=st.integers(min_value=0, max_value=3),
+)
+def test_property_bounded_levenshtein_agrees_within_bound(a: str, b: str, k: int):
+    d = levenshtein_distance(a, b)
+    assert bounded_levenshtein(a, b, k) == (d if d <= k else None)
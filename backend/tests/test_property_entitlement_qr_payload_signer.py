@@ -0,0 +1,21 @@
+"""属性测试：批量签名器（PayloadSigner）与单条签名 sign_payload 结果一致。"""
+
+from __future__ import annotations
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from app.services.entitlement_qr_signing import PayloadSigner, sign_payload
+
+
+@given(
+    st.text(min_size=1),
+    st.lists(st.tuples(st.text(min_size=1), st.text(min_size=1), st.integers(min_value=0), st.text()), max_size=5),
+)
+def test_property_payload_signer_matches_sign_payload(secret: str, items: list[tuple[str, str, int, str]]):
+    signer = PayloadSigner(secret=secret)
+    for entitlement_id, voucher_code, ts, nonce in items:
+        expected = sign_payload(
+            secret=secret, entitlement_id=entitlement_id, voucher_code=voucher_code, ts=ts, nonce=nonce
+        )
+        assert signer.sign(entitlement_id=entitlement_id, voucher_code=voucher_code, ts=ts, nonce=nonce) == expected
@@ -0,0 +1,139 @@
+"""属性测试：附近场所检索（geohash 预筛 + 球面距离）不漏不多。
+
+断言：
+- 半径内任意一点的 geohash 必以 `covering_cells` 中某个前缀开头（预筛不漏）
+- `nearby_clause` + 距离排序的 SQL 结果与“全量 haversine 过滤后按 (距离, id) 排序”的纯 Python 结果一致
+- Venue 写入/坐标变更时 geohash 由 ORM 钩子同步
+
+说明：以 SQLite 内存库执行编译后的谓词（仅建 venues 表；LEAST 以 Python 函数注册，对应 MySQL 内置函数）。
+"""
+
+from __future__ import annotations
+
+import math
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.models.enums import VenuePublishStatus
+from app.models.venue import Venue
+from app.services.venue_filtering_sql import distance_meters_expr, nearby_clause
+from app.utils.geohash import EARTH_RADIUS_METERS, covering_cells, encode, haversine_meters
+
+_lat_st = st.floats(min_value=-89.0, max_value=89.0, allow_nan=False)
+_lng_st = st.floats(min_value=-179.0, max_value=179.0, allow_nan=False)
+_radius_st = st.integers(min_value=50, max_value=50000)
+
+
+def _destination(lat: float, lng: float, *, bearing_deg: float, distance_m: float) -> tuple[float, float]:
+    p1, l1 = math.radians(lat), math.radians(lng)
+    b = math.radians(bearing_deg)
+    d = distance_m / EARTH_RADIUS_METERS
+    p2 = math.asin(math.sin(p1) * math.cos(d) + math.cos(p1) * math.sin(d) * math.cos(b))
+    l2 = l1 + math.atan2(math.sin(b) * math.sin(d) * math.cos(p1), math.cos(d) - math.sin(p1) * math.sin(p2))
+    return math.degrees(p2), (math.degrees(l2) + 540.0) % 360.0 - 180.0
+
+
+def _engine():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def _register_least(dbapi_conn, _record):
+        dbapi_conn.create_function("least", 2, min)
+
+    Venue.__table__.create(engine)
+    return engine
+
+
+@settings(max_examples=300, deadline=None)
+@given(
+    lat=_lat_st,
+    lng=_lng_st,
+    radius=_radius_st,
+    bearing=st.floats(min_value=0.0, max_value=360.0, allow_nan=False),
+    frac=st.floats(min_value=0.0, max_value=1.0, allow_nan=False),
+)
+def test_property_covering_cells_contain_every_point_within_radius(
+    lat: float, lng: float, radius: int, bearing: float, frac: float
+):
+    cells = covering_cells(lat=lat, lng=lng, radius_meters=radius)
+    dlat, dlng = _destination(lat, lng, bearing_deg=bearing, distance_m=radius * frac)
+    gh = encode(dlat, dlng)
+    assert any(gh.startswith(c) for c in cells)
+
+
+@settings(max_examples=40, deadline=None)
+@given(
+    lat=_lat_st,
+    lng=_lng_st,
+    radius=_radius_st,
+    points=st.lists(
+        st.tuples(
+            st.floats(min_value=0.0, max_value=360.0, allow_nan=False),
+            st.floats(min_value=0.0, max_value=2.0, allow_nan=False),
+        ),
+        min_size=0,
+        max_size=40,
+    ),
+)
+def test_property_nearby_sql_matches_haversine_oracle(
+    lat: float, lng: float, radius: int, points: list[tuple[float, float]]
+):
+    engine = _engine()
+    with Session(engine) as session:
+        for i, (bearing, frac) in enumerate(points):
+            vlat, vlng = _destination(lat, lng, bearing_deg=bearing, distance_m=radius * frac)
+            session.add(
+                Venue(
+                    id=f"v{i:03d}",
+                    provider_id="p1",
+                    name=f"venue-{i}",
+                    lat=vlat,
+                    lng=vlng,
+                    publish_status=VenuePublishStatus.PUBLISHED.value,
+                )
+            )
+        session.flush()
+
+        distance = distance_meters_expr(lat=lat, lng=lng)
+        got = list(
+            session.scalars(
+                select(Venue.id)
+                .where(nearby_clause(lat=lat, lng=lng, radius_meters=radius))
+                .order_by(distance.asc(), Venue.id.asc())
+            ).all()
+        )
+
+        all_venues = list(session.scalars(select(Venue)).all())
+    engine.dispose()
+
+    scored = [(haversine_meters(lat, lng, v.lat, v.lng), v.id) for v in all_venues]
+    # 恰落在边界上的点，两侧浮点误差可能各判一边：不纳入比较
+    borderline = {vid for d, vid in scored if abs(d - radius) < 1e-3}
+    expected = {vid for d, vid in scored if d <= radius and vid not in borderline}
+    got = [vid for vid in got if vid not in borderline]
+    assert set(got) == expected and len(got) == len(expected)
+    # 按距离升序：等距点（SQL 与 Python 浮点误差可能使其先后互换）只要求误差范围内不减
+    by_id = {vid: d for d, vid in scored}
+    assert all(by_id[a] <= by_id[b] + 1e-6 for a, b in zip(got, got[1:]))
+
+
+def test_geohash_synced_on_insert_and_coordinate_update():
+    engine = _engine()
+    with Session(engine) as session:
+        v = Venue(id="v1", provider_id="p1", name="v", lat=31.2304, lng=121.4737)
+        session.add(v)
+        session.flush()
+        assert v.geohash == encode(31.2304, 121.4737)
+        assert v.geohash.startswith("wtw3s")
+
+        v.lat, v.lng = 39.9042, 116.4074
+        session.flush()
+        assert v.geohash == encode(39.9042, 116.4074)
+
+        v.lat = None
+        session.flush()
+        assert v.geohash is None
+    engine.dispose()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import NoScriptError
+
+from app.services import rate_limit, sms_code_service
+from app.services.sms_code_service import SmsCodeService
+
+
+class _FakeRedis:
+    """只记录 EVALSHA/SCRIPT LOAD 调用；脚本返回值由用例预置（本地无 Redis，脚本语义由集成环境覆盖）。"""
+
+    def __init__(self, replies: list) -> None:
+        self.replies = list(replies)
+        self.loaded: set[str] = set()
+        self.calls: list[tuple] = []
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        self.calls.append(("evalsha", sha, numkeys, keys_and_args))
+        if sha not in self.loaded:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        return self.replies.pop(0)
+
+    async def script_load(self, source: str) -> str:
+        sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        self.calls.append(("script_load", sha))
+        self.loaded.add(sha)
+        return sha
+
+    def __getattr__(self, name: str):
+        raise AssertionError(f"unexpected redis command: {name}")
+
+
+def test_noscript_loads_once_then_single_round_trip() -> None:
+    redis = _FakeRedis([[1, 29, 0], [1, 28, 0]])
+
+    async def _run() -> None:
+        first = await rate_limit.hit_sliding_window(key="k", limit=30, window_seconds=60, redis=redis)
+        second = await rate_limit.hit_sliding_window(key="k", limit=30, window_seconds=60, redis=redis)
+        assert first.allowed and first.remaining == 29 and second.remaining == 28
+
+    asyncio.run(_run())
+    assert [c[0] for c in redis.calls] == ["evalsha", "script_load", "evalsha", "evalsha"]
+    assert redis.calls[-1][2:] == (1, ("k", 30, 60000, 1))
+
+
+def test_enforce_rate_limit_raises_429_with_retry_after() -> None:
+    redis = _FakeRedis([[0, 0, 1500]])
+    redis.loaded.add(rate_limit._SLIDING_WINDOW.sha)
+
+    with pytest.raises(HTTPException) as ei:
+        asyncio.run(rate_limit.enforce_rate_limit(key="k", limit=1, window_seconds=1, message="慢点", redis=redis))
+    assert ei.value.status_code == 429
+    assert ei.value.detail == {"code": "RATE_LIMITED", "message": "慢点", "details": {"retryAfterSeconds": 2}}
+
+
+@pytest.mark.parametrize(
+    ("reply", "status", "code"),
+    [(0, None, None), (1, 429, "RATE_LIMITED"), (2, 400, "SMS_CODE_EXPIRED"), (3, 400, "SMS_CODE_INVALID")],
+)
+def test_sms_verify_is_one_script_call(reply: int, status: int | None, code: str | None) -> None:
+    redis = _FakeRedis([reply])
+    redis.loaded.add(sms_code_service._VERIFY_CODE.sha)
+    svc = SmsCodeService(redis)
+
+    async def _run() -> None:
+        await svc.verify_code(phone="13800000000", scene="H5_BUY", sms_code="123456")
+
+    if status is None:
+        asyncio.run(_run())
+    else:
+        with pytest.raises(HTTPException) as ei:
+            asyncio.run(_run())
+        assert ei.value.status_code == status and ei.value.detail["code"] == code
+    assert len(redis.calls) == 1
+    _, _, numkeys, keys_and_args = redis.calls[0]
+    assert numkeys == 3 and keys_and_args[:3] == (
+        "sms:lock:H5_BUY:13800000000",
+        "sms:code:H5_BUY:13800000000",
+        "sms:fail:H5_BUY:13800000000",
+    )
+
+
+@pytest.mark.parametrize("reply", [1, 4, 5])
+def test_sms_request_rejections_map_to_rate_limited(reply: int) -> None:
+    redis = _FakeRedis([reply])
+    redis.loaded.add(sms_code_service._REQUEST_CODE.sha)
+    with pytest.raises(HTTPException) as ei:
+        asyncio.run(SmsCodeService(redis).request_code(phone="13800000000", scene="H5_BUY"))
+    assert ei.value.status_code == 429 and ei.value.detail["code"] == "RATE_LIMITED"
+    assert len(redis.calls) == 1
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.dealer_commission_entry import DealerCommissionEntry
+from app.models.entitlement import Entitlement
+from app.models.enums import (
+    OrderType,
+    PaymentStatus,
+    ProductFulfillmentType,
+    ProductStatus,
+    StockReservationStatus,
+)
+from app.models.order import Order
+from app.models.order_stock_reservation import OrderStockReservation
+from app.models.product import Product
+from app.models.redemption_record import RedemptionRecord
+from app.models.refund import Refund
+from app.services.refund_service import execute_full_refund_for_order
+from app.services.stock_reservation import confirm_order_stock
+
+_TABLES = [
+    Order.__table__,
+    Product.__table__,
+    OrderStockReservation.__table__,
+    Refund.__table__,
+    Entitlement.__table__,
+    RedemptionRecord.__table__,
+    DealerCommissionEntry.__table__,
+]
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    async def _setup() -> None:
+        async with engine.begin() as conn:
+            for t in _TABLES:
+                await conn.run_sync(t.create)
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            session.add(
+                Product(
+                    id="p1",
+                    provider_id="pv1",
+                    title="P",
+                    fulfillment_type=ProductFulfillmentType.PHYSICAL_GOODS.value,
+                    status=ProductStatus.ON_SALE.value,
+                    price={"original": 10},
+                    stock=10,
+                    reserved_stock=3,
+                )
+            )
+            session.add(
+                Order(
+                    id="o1",
+                    user_id="u1",
+                    order_type=OrderType.PRODUCT.value,
+                    fulfillment_type=ProductFulfillmentType.PHYSICAL_GOODS.value,
+                    total_amount=30.0,
+                    payment_status=PaymentStatus.PAID.value,
+                )
+            )
+            session.add(
+                OrderStockReservation(
+                    order_id="o1", product_id="p1", quantity=3, status=StockReservationStatus.RESERVED.value
+                )
+            )
+            await session.commit()
+
+    asyncio.run(_setup())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_refund_before_fulfillment_releases_the_reservation(session_factory) -> None:
+    async def _run() -> None:
+        async with session_factory() as session:
+            order = await session.get(Order, "o1")
+            assert order is not None
+            res = await execute_full_refund_for_order(session=session, order=order, reason="不想要了")
+            assert res.ok
+            await session.commit()
+
+            p = await session.get(Product, "p1", populate_existing=True)
+            assert p is not None and (p.stock, p.reserved_stock) == (10, 0)
+            statuses = (await session.scalars(select(OrderStockReservation.status))).all()
+            assert statuses == [StockReservationStatus.RELEASED.value]
+
+            # 退款后迟到的履约不再扣减库存
+            assert await confirm_order_stock(session=session, order_id="o1") == 0
+
+    asyncio.run(_run())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import html
+import re
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+
+from app.models.cms_content import CmsContent
+from app.models.product import Product
+from app.services.search import (
+    CMS_CONTENT_SEARCH,
+    PRODUCT_SEARCH,
+    boolean_query,
+    highlight,
+    highlights,
+    keyword_search,
+    parse_terms,
+)
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_parse_terms_strips_boolean_operators_and_dedupes() -> None:
+    assert parse_terms(None) == ()
+    assert parse_terms('  +-"()~*<>@ ') == ()
+    assert parse_terms('瑜伽 -馆 "上海" Yoga yoga') == ("瑜伽", "馆", "上海", "Yoga")
+    assert boolean_query(("瑜伽", "上海")) == '+"瑜伽" +"上海"'
+    assert len(parse_terms(" ".join(f"t{i}" for i in range(20)))) == 8
+
+
+def test_keyword_search_uses_fulltext_and_falls_back_to_like_for_short_terms() -> None:
+    search = keyword_search(CMS_CONTENT_SEARCH, "瑜伽 馆")
+    assert search is not None and search.score is not None
+    sql = _sql(select(CmsContent.id).where(search.where).order_by(search.score.desc()))
+    assert "MATCH (cms_contents.title, cms_contents.summary) AGAINST ('+\"瑜伽\"' IN BOOLEAN MODE)" in sql
+    # 单字无法命中 ngram(2) 索引：降级 LIKE，且通配符被转义
+    assert "LIKE" in sql and "馆" in sql
+
+    short_only = keyword_search(PRODUCT_SEARCH, "a %")
+    assert short_only is not None and short_only.score is None
+    sql = _sql(select(Product.id).where(short_only.where))
+    assert "MATCH" not in sql
+    assert "ESCAPE '/'" in sql
+
+    assert keyword_search(PRODUCT_SEARCH, "   ") is None
+
+
+def test_highlight_escapes_html_and_windows_long_text() -> None:
+    assert highlight("<b>上海瑜伽馆</b>", ("瑜伽",)) == "&lt;b&gt;上海<em>瑜伽</em>馆&lt;/b&gt;"
+    assert highlight("Yoga Studio", ("yoga",)) == "<em>Yoga</em> Studio"
+    assert highlight("无命中", ("瑜伽",)) is None
+
+    text = "甲" * 200 + "瑜伽" + "乙" * 200
+    snippet = highlight(text, ("瑜伽",), width=40)
+    assert snippet is not None
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<em>瑜伽</em>" in snippet
+
+    search = keyword_search(CMS_CONTENT_SEARCH, "瑜伽")
+    x = CmsContent(id="c1", channel_id="ch", title="瑜伽入门", summary=None)
+    assert highlights(x, search) == {"title": "<em>瑜伽</em>入门"}
+    assert highlights(x, None) is None
+
+
+@settings(max_examples=200, deadline=None)
+@given(
+    text=st.text(alphabet="ab<&>瑜伽 ", min_size=1, max_size=200),
+    terms=st.lists(st.text(alphabet="ab瑜伽", min_size=1, max_size=3), min_size=1, max_size=3),
+    width=st.integers(min_value=10, max_value=120),
+)
+def test_property_highlight_is_an_escaped_substring_with_all_hits_marked(
+    text: str, terms: list[str], width: int
+) -> None:
+    snippet = highlight(text, tuple(terms), width=width)
+    if not any(t.lower() in text.lower() for t in terms):
+        assert snippet is None
+        return
+    assert snippet is not None
+
+    body = snippet.removeprefix("…").removesuffix("…")
+    plain = html.unescape(body.replace("<em>", "").replace("</em>", ""))
+    assert plain in text
+    assert plain == text if len(text) <= width else len(plain) == width
+    # 标记外的片段不应残留任何命中
+    outside = re.sub(r"<em>.*?</em>", "\x00", body)
+    assert not any(t.lower() in html.unescape(seg).lower() for seg in outside.split("\x00") for t in terms)
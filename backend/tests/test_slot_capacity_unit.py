@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.booking import Booking
+from app.models.enums import BookingConfirmationMethod, BookingStatus, CommonEnabledStatus
+from app.models.venue_schedule import VenueSchedule
+from app.services.slot_capacity import (
+    SlotKey,
+    apply_capacity_drift,
+    cancel_booking_releasing_slot,
+    find_capacity_drift,
+    release_slots,
+    try_reserve_slot,
+)
+
+_SLOT = SlotKey(venue_id="v1", service_type="MASSAGE", booking_date=date(2026, 11, 1), time_slot="09:00-10:00")
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    async def _setup() -> None:
+        async with engine.begin() as conn:
+            for t in (VenueSchedule.__table__, Booking.__table__):
+                await conn.run_sync(t.create)
+
+    asyncio.run(_setup())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def _schedule(sid: str, status: str) -> VenueSchedule:
+    return VenueSchedule(
+        id=sid,
+        venue_id=_SLOT.venue_id,
+        service_type=_SLOT.service_type,
+        booking_date=_SLOT.booking_date,
+        time_slot=_SLOT.time_slot,
+        capacity=2,
+        remaining_capacity=2,
+        status=status,
+    )
+
+
+def _booking(bid: str, status: str) -> Booking:
+    return Booking(
+        id=bid,
+        entitlement_id="e1",
+        user_id="u1",
+        venue_id=_SLOT.venue_id,
+        service_type=_SLOT.service_type,
+        booking_date=_SLOT.booking_date,
+        time_slot=_SLOT.time_slot,
+        status=status,
+        confirmation_method=BookingConfirmationMethod.AUTO.value,
+    )
+
+
+def test_duplicate_schedule_rows_reserve_release_and_reconcile_the_same_row(session_factory) -> None:
+    async def _remaining(session) -> dict[str, int]:
+        rows = (await session.execute(VenueSchedule.__table__.select())).all()
+        return {r.id: int(r.remaining_capacity) for r in rows}
+
+    async def _run() -> None:
+        async with session_factory() as session:
+            # a 最小但已停用：承载容量的是启用行中 id 最小的 b
+            session.add_all(
+                [
+                    _schedule("a", CommonEnabledStatus.DISABLED.value),
+                    _schedule("b", CommonEnabledStatus.ENABLED.value),
+                    _schedule("c", CommonEnabledStatus.ENABLED.value),
+                ]
+            )
+            await session.commit()
+
+            assert await try_reserve_slot(session=session, slot=_SLOT) is True
+            assert await try_reserve_slot(session=session, slot=_SLOT) is True
+            await session.commit()
+            assert await _remaining(session) == {"a": 2, "b": 0, "c": 2}
+
+            assert await release_slots(session=session, slots=[_SLOT]) == 1
+            await session.commit()
+            assert await _remaining(session) == {"a": 2, "b": 1, "c": 2}
+
+            session.add(_booking("bk1", BookingStatus.CONFIRMED.value))
+            await session.execute(VenueSchedule.__table__.update().values(remaining_capacity=0))
+            await session.commit()
+
+            # 对账只修正承载行 b（1 条占用 -> 1），重复行不被写入
+            drifts = await find_capacity_drift(session=session, date_from=_SLOT.booking_date)
+            assert [(d.schedule_id, d.expected_remaining) for d in drifts] == [("b", 1)]
+            assert await apply_capacity_drift(session=session, drifts=drifts) == 1
+            await session.commit()
+            assert await _remaining(session) == {"a": 0, "b": 1, "c": 0}
+
+    asyncio.run(_run())
+
+
+def test_concurrent_cancels_of_one_booking_release_capacity_once(session_factory) -> None:
+    now = datetime(2026, 10, 31, 8, 0, 0)
+
+    async def _run() -> None:
+        async with session_factory() as setup:
+            setup.add_all(
+                [_schedule("s1", CommonEnabledStatus.ENABLED.value), _booking("bk1", BookingStatus.PENDING.value)]
+            )
+            await setup.execute(VenueSchedule.__table__.update().values(remaining_capacity=1))
+            await setup.commit()
+
+        # 两个请求都在对方提交前读到 PENDING
+        async with session_factory() as first, session_factory() as second:
+            b1 = await first.get(Booking, "bk1")
+            b2 = await second.get(Booking, "bk1")
+            assert b1 is not None and b2 is not None
+
+            assert await cancel_booking_releasing_slot(
+                session=first, booking=b1, cancelled_at=now, cancel_reason="USER_CANCEL"
+            )
+            await first.commit()
+            assert b1.status == BookingStatus.CANCELLED.value and b1 not in first.dirty
+
+            assert not await cancel_booking_releasing_slot(
+                session=second, booking=b2, cancelled_at=now, cancel_reason="PROVIDER_CANCEL"
+            )
+            await second.rollback()
+
+        async with session_factory() as check:
+            s1 = await check.get(VenueSchedule, "s1")
+            b = await check.get(Booking, "bk1")
+            assert s1 is not None and s1.remaining_capacity == 2
+            assert b is not None and (b.status, b.cancel_reason) == (BookingStatus.CANCELLED.value, "USER_CANCEL")
+
+    asyncio.run(_run())
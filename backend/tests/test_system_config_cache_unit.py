@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import Response
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.models.system_config import SystemConfig
+from app.services import system_config_cache
+from app.services.system_config_cache import (
+    _build_entry,
+    _dirty_keys,
+    _LruCache,
+    get_system_config,
+    invalidate_system_config,
+    not_modified_or_tag,
+)
+
+
+class _FakeRedis:
+    """只实现缓存用到的命令；EVALSHA 按脚本 sha 分派到等价的 Python 实现。"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def publish(self, channel: str, message: str) -> int:
+        return 0
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        keys, args = list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])
+        if sha == system_config_cache._SET_IF_GENERATION.sha:
+            if self.values.get(keys[1], b"0").decode() != args[0]:
+                return 0
+            self.values[keys[0]] = args[1].encode()
+            return 1
+        assert sha == system_config_cache._INVALIDATE.sha
+        for entry_key, gen_key in zip(keys[::2], keys[1::2]):
+            self.values[gen_key] = str(int(self.values.get(gen_key, b"0")) + 1).encode()
+            self.values.pop(entry_key, None)
+        return len(keys) // 2
+
+
+def _request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_etag_changes_with_content_even_if_version_unchanged() -> None:
+    # PUT 草稿不改 version，但内容变化必须产生新的 ETag
+    a = _build_entry(key="K", status="ENABLED", value={"version": "1", "items": [1]}, exists=True)
+    b = _build_entry(key="K", status="ENABLED", value={"version": "1", "items": [1, 2]}, exists=True)
+    c = _build_entry(key="K", status="DISABLED", value={"version": "1", "items": [1]}, exists=True)
+    assert a.version == b.version == "1"
+    assert len({a.etag, b.etag, c.etag}) == 3
+    assert a.enabled and not c.enabled
+    assert not _build_entry(key="K", status=None, value=None, exists=False).enabled
+
+
+def test_not_modified_returns_304_only_on_matching_etag() -> None:
+    entry = _build_entry(key="REGION_CITIES", status="ENABLED", value={"version": "7"}, exists=True)
+
+    resp = Response()
+    assert not_modified_or_tag(request=_request(), response=resp, entry=entry) is None
+    assert resp.headers["ETag"] == entry.etag
+
+    hit = not_modified_or_tag(request=_request({"If-None-Match": entry.etag}), response=Response(), entry=entry)
+    assert hit is not None and hit.status_code == 304
+
+    miss = not_modified_or_tag(request=_request({"If-None-Match": 'W/"stale"'}), response=Response(), entry=entry)
+    assert miss is None
+
+
+def test_lru_evicts_oldest_and_expires() -> None:
+    lru = _LruCache(max_entries=2, ttl_seconds=60)
+    for k in ("a", "b", "c"):
+        lru.put(_build_entry(key=k, status="ENABLED", value={}, exists=True))
+    assert lru.get("a") is None
+    assert lru.get("b") is not None and lru.get("c") is not None
+
+    expired = _LruCache(max_entries=2, ttl_seconds=-1)
+    expired.put(_build_entry(key="a", status="ENABLED", value={}, exists=True))
+    assert expired.get("a") is None
+
+
+def test_flush_collects_system_config_keys_for_invalidation() -> None:
+    session = Session()
+    session.add(SystemConfig(id="1", key="WEBSITE_SITE_SEO", value_json={}))
+    assert _dirty_keys(session) == {"WEBSITE_SITE_SEO"}
+
+
+def test_fill_is_dropped_when_invalidated_during_db_load(monkeypatch) -> None:
+    redis = _FakeRedis()
+    db_value = {"version": "1"}
+    invalidate_during_load = True
+
+    async def _load(key: str):
+        nonlocal invalidate_during_load
+        entry = _build_entry(key=key, status="ENABLED", value=dict(db_value), exists=True)
+        if invalidate_during_load:
+            # 读到旧值之后、回填之前：并发写入提交并失效
+            invalidate_during_load = False
+            db_value["version"] = "2"
+            await invalidate_system_config([key])
+        return entry
+
+    monkeypatch.setattr(system_config_cache, "get_redis", lambda: redis)
+    monkeypatch.setattr(system_config_cache, "_load_from_db", _load)
+
+    stale = asyncio.run(get_system_config("K"))
+    assert stale.version == "1"
+    assert "system_config:cache:K" not in redis.values
+
+    fresh = asyncio.run(get_system_config("K"))
+    assert fresh.version == "2"
+    assert asyncio.run(get_system_config("K")).etag == fresh.etag
+    assert "system_config:cache:K" in redis.values
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import os
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+from fastapi import HTTPException
+
+from app.services import wechatpay_crypto
+from app.services.wechatpay_crypto import reset_wechatpay_crypto, sign_with_mch_key, verify_platform_signature
+
+
+def _key() -> rsa.RSAPrivateKey:
+    return rsa.generate_private_key(public_exponent=65537, key_size=1024)
+
+
+def _cert_pem(key: rsa.RSAPrivateKey, serial: int) -> bytes:
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "wechatpay-platform")])
+    now = datetime.now(tz=UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(serial)
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+def _sign(key: rsa.RSAPrivateKey, message: bytes) -> bytes:
+    return key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_platform_cert_pem_or_path", "")
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_platform_certs_dir", "")
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_platform_cert_serial", "")
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_crypto_reload_check_seconds", 0.0)
+    reset_wechatpay_crypto()
+    yield
+    reset_wechatpay_crypto()
+
+
+def test_rotation_dir_holds_old_and_new_certificates_and_reloads_on_change(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    old_key, new_key = _key(), _key()
+    (tmp_path / "old.pem").write_bytes(_cert_pem(old_key, 0x0A1B))
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_platform_certs_dir", str(tmp_path))
+    msg = b"1700000000\nnonce\n{}\n"
+    parses: list[int] = []
+    real_load = wechatpay_crypto.load_pem_x509_certificates
+    monkeypatch.setattr(
+        wechatpay_crypto, "load_pem_x509_certificates", lambda blob: parses.append(1) or real_load(blob)
+    )
+
+    async def _run() -> None:
+        await verify_platform_signature(serial="0a1b", message=msg, signature=_sign(old_key, msg))
+        await verify_platform_signature(serial="A1B", message=msg, signature=_sign(old_key, msg))
+        assert len(parses) == 1  # 未变化：不重复解析
+
+        with pytest.raises(HTTPException) as ei:
+            await verify_platform_signature(serial="C0DE", message=msg, signature=_sign(new_key, msg))
+        assert ei.value.status_code == 401
+
+        # 微信下发新证书：放入目录后无需重启，新旧序列号同时可用
+        (tmp_path / "new.pem").write_bytes(_cert_pem(new_key, 0xC0DE))
+        await verify_platform_signature(serial="C0DE", message=msg, signature=_sign(new_key, msg))
+        await verify_platform_signature(serial="A1B", message=msg, signature=_sign(old_key, msg))
+
+        with pytest.raises(HTTPException) as ei:
+            await verify_platform_signature(serial="C0DE", message=msg, signature=_sign(old_key, msg))
+        assert ei.value.status_code == 401 and ei.value.detail["message"] == "微信支付签名校验失败"
+
+        # 替换过程中读到损坏文件：配置未变，继续使用上一份证书
+        (tmp_path / "new.pem").write_bytes(b"-----BEGIN CERTIFICATE-----\ngarbage")
+        os.utime(tmp_path / "new.pem", ns=(1, 1))
+        await verify_platform_signature(serial="C0DE", message=msg, signature=_sign(new_key, msg))
+
+    asyncio.run(_run())
+
+
+def test_missing_platform_config_is_500() -> None:
+    with pytest.raises(HTTPException) as ei:
+        asyncio.run(verify_platform_signature(serial="1", message=b"m", signature=b"s"))
+    assert ei.value.status_code == 500 and ei.value.detail["message"] == "缺少微信支付平台证书配置"
+
+
+def test_mch_key_is_parsed_once_and_signs(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    key = _key()
+    path = tmp_path / "apiclient_key.pem"
+    path.write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_mch_private_key_pem_or_path", str(path))
+    loads: list[int] = []
+    real_load = wechatpay_crypto.load_pem_private_key
+    monkeypatch.setattr(
+        wechatpay_crypto, "load_pem_private_key", lambda pem, password: loads.append(1) or real_load(pem, password)
+    )
+
+    async def _run() -> list[str]:
+        return [await sign_with_mch_key("GET\n/v3/x\n1\nn\n\n") for _ in range(3)]
+
+    sigs = asyncio.run(_run())
+    assert loads == [1]
+    key.public_key().verify(base64.b64decode(sigs[0]), b"GET\n/v3/x\n1\nn\n\n", padding.PKCS1v15(), hashes.SHA256())
+
+    monkeypatch.setattr(wechatpay_crypto.settings, "wechat_pay_mch_private_key_pem_or_path", "")
+    with pytest.raises(HTTPException) as ei:
+        asyncio.run(sign_with_mch_key("x"))
+    assert ei.value.status_code == 400 and ei.value.detail["code"] == "PAYMENT_NOT_CONFIGURED"